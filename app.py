@@ -1,1689 +1,1894 @@
-import os
-import io
-import sqlite3
-from flask import Flask, render_template, request, redirect, url_for, send_file, flash, session, jsonify
-from flask_socketio import SocketIO, join_room, leave_room, emit
-from functools import wraps
-import json
-from datetime import datetime, timedelta
-import calendar
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.platypus import Paragraph, Table, TableStyle
-from reportlab.lib import colors
-import models as dbHandler
-from functions.pdf_exporters import exportar_pdf_bytes, exportar_sacramental_bytes
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-import traceback
-
-app = Flask(__name__)
-
-# Configuração do SocketIO para produção 
-try:
-    import eventlet
-    socketio = SocketIO(app, 
-                       cors_allowed_origins="*",
-                       async_mode='eventlet')
-except ImportError:
-    socketio = SocketIO(app, 
-                       cors_allowed_origins="*",
-                       async_mode='threading')
-
-#Secret key para RENDER
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-123')
-
-# #Database do RENDER para produção
-# if 'RENDER' in os.environ:
-#     DB_PATH = "/opt/render/project/src/database/atas.db"
-# else:
-#     DB_PATH = "database/atas.db"
-
-
-
-# Configuração do Secret Key e Database para desenvolvimento local :)
-def get_db():
-    conn = sqlite3.connect("database/atas.db")
-    conn.row_factory = sqlite3.Row
-    return conn
-
-# Inicialização do banco de dados
-def init_db():
-    with app.app_context():
-        conn = get_db()
-        try:
-            with open('database/schema_inicial.sql', 'r', encoding='utf-8') as f:
-                sql_script = f.read()
-            conn.executescript(sql_script)
-            conn.commit()
-            conn.close()
-            print("Banco de dados inicializado com sucesso.")
-        except Exception as e:
-            print(f"Erro ao inicializar banco: {e}")
-
-# Mensagem Autenticação no Login
-def login_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not session.get('logged_in'):
-            flash('Por favor, faça login para acessar esta página.', 'error')
-            return redirect(url_for('login'))
-        return f(*args, **kwargs)
-    return decorated_function
-
-# app.py
-
-# Autenticação Login
-def authenticate_user(username, password):
-    conn = get_db()
-    # 1. Busca o usuário APENAS pelo username (NUNCA pela senha)
-    user = conn.execute(
-        "SELECT * FROM users WHERE username = ?", 
-        (username,)
-    ).fetchone()
-    conn.close()
-    
-    # 2. Se o usuário existir, verifica a senha contra o hash armazenado
-    if user and check_password_hash(user['password'], password):
-        return user
-    return None # Retorna None se o usuário não for encontrado ou a senha não bater
-
-# ==================================================================
-# Rotas principais do sistema de atas
-# ==================================================================
-
-# Aba de discursantes recentes na criação de atas sacramentais
-def get_discursantes_recentes():
-    """Busca discursantes dos últimos 3 meses"""
-    conn = get_db()
-    
-    # Data de 3 meses atrás
-# -    tres_meses_atras = (datetime.now().replace(day=1) - timedelta(days=90)).strftime("%Y-%m-%d")
-# +    # usar os últimos 90 dias (mais confiável que manipular day=1)
-    tres_meses_atras = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
-    
-    discursantes_recentes = conn.execute("""
-        SELECT s.discursantes, a.data, s.tema
-        FROM sacramental s 
-        JOIN atas a ON s.ata_id = a.id 
-        WHERE a.data >= ? AND a.tipo = 'sacramental' AND a.ala_id = ?
-        ORDER BY a.data DESC
-    """, (tres_meses_atras, session['user_id'])).fetchall()
-    
-    # Processar discursantes
-    todos_discursantes = []
-    nomes_ja_adicionados = set()
-    
-    for row in discursantes_recentes:
-        if row['discursantes']:
-            try:
-                discursantes_lista = json.loads(row['discursantes'])
-                for discursante in discursantes_lista:
-                    if discursante and discursante.strip():
-                        nome_limpo = discursante.strip()
-                        # Evitar duplicatas
-                        if nome_limpo not in nomes_ja_adicionados:
-                            # Formatar data para exibição
-                            data_obj = datetime.strptime(row['data'], "%Y-%m-%d")
-                            data_formatada = data_obj.strftime("%d/%m/%Y")
-                            
-                            todos_discursantes.append({
-                                'nome': nome_limpo,
-                                'data': data_formatada
-                            })
-                            nomes_ja_adicionados.add(nome_limpo)
-            except json.JSONDecodeError:
-                continue
-    
-    # Limitar a 20 discursantes mais recentes
-    return todos_discursantes[:20]
-
-
-# Próxima reunião sacramental automática na página inicial
-def get_proxima_reuniao_sacramental():
-    """Encontra a data da próxima reunião sacramental"""
-    hoje = datetime.now().date()
-    
-    # Encontrar próximo domingo
-    dias_para_domingo = (6 - hoje.weekday()) % 7
-    if dias_para_domingo == 0:  # Se hoje é domingo
-        proximo_domingo = hoje
-    else:
-        proximo_domingo = hoje + timedelta(days=dias_para_domingo)
-    
-    # Verificar se já existe ata para esta data
-    conn = get_db()
-    ata_existente = conn.execute(
-        "SELECT * FROM atas WHERE data = ? AND tipo = 'sacramental'", 
-        (proximo_domingo.strftime("%Y-%m-%d"),)
-    ).fetchone()
-    
-    # Formatar data em português
-    data_formatada = proximo_domingo.strftime("%d/%m/%Y")
-    
-    if ata_existente:
-        return {
-            'data': proximo_domingo.strftime("%Y-%m-%d"),
-            'data_formatada': data_formatada,
-            'ata_existente': True,
-            'id': ata_existente['id']
-        }
-    else:
-        return None
-
-# NOVA FUNÇÃO
-def get_temas_recentes():
-    """Busca temas dos últimos 3 meses"""
-    conn = get_db()
-    
-    # Data de 90 dias atrás
-    tres_meses_atras = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
-    
-    temas_recentes = conn.execute("""
-        SELECT DISTINCT s.tema, a.data 
-        FROM sacramental s 
-        JOIN atas a ON s.ata_id = a.id 
-        WHERE date(a.data) >= date(?) 
-          AND a.tipo = 'sacramental' 
-          AND a.ala_id = ? 
-          AND s.tema IS NOT NULL 
-          AND TRIM(s.tema) <> ''
-        ORDER BY a.data DESC
-        LIMIT 10
-    """, (tres_meses_atras, session['user_id'])).fetchall()
-    
-    temas_formatados = []
-    for tema in temas_recentes:
-        if tema['tema']:
-            data_obj = datetime.strptime(tema['data'], "%Y-%m-%d")
-            data_formatada = data_obj.strftime("%d/%m/%Y")
-            temas_formatados.append({
-                'tema': tema['tema'],
-                'data': data_formatada
-            })
-    
-    conn.close()
-    return temas_formatados[:10]
-
-def get_hinos_recentes():
-    """Busca hinos tocados nos últimos 2 meses, agrupados por data."""
-    conn = get_db()
-    
-    # Data de 60 dias atrás (aproximadamente 2 meses)
-    dois_meses_atras = (datetime.now() - timedelta(days=60)).strftime("%Y-%m-%d")
-    
-    # Selecionar data e todos os campos de hino
-    hinos_recentes_raw = conn.execute("""
-        SELECT a.data, s.hinos, s.hino_sacramental, s.hino_intermediario
-        FROM sacramental s
-        JOIN atas a ON s.ata_id = a.id
-        WHERE date(a.data) >= date(?)
-          AND a.tipo = 'sacramental'
-          AND a.ala_id = ?
-        ORDER BY a.data DESC
-        LIMIT 10
-    """, (dois_meses_atras, session['user_id'])).fetchall()
-
-    hinos_por_data = {}
-
-    for row in hinos_recentes_raw:
-        data_obj = datetime.strptime(row['data'], "%Y-%m-%d")
-        data_formatada = data_obj.strftime("%d/%m/%Y")
-
-        hinos_lista = []
-
-        # Adiciona Hinos de Abertura e Encerramento (coluna 'hinos' é um JSON array [abertura, encerramento])
-        try:
-            hinos_json = json.loads(row['hinos'] or '[]')
-            if len(hinos_json) > 0 and hinos_json[0] and hinos_json[0].strip(): hinos_lista.append({'tipo': 'Abertura', 'nome': hinos_json[0].strip()})
-            if len(hinos_json) > 1 and hinos_json[1] and hinos_json[1].strip(): hinos_lista.append({'tipo': 'Encerramento', 'nome': hinos_json[1].strip()})
-        except json.JSONDecodeError: pass
-
-        # Adiciona Hino Sacramental e Intermediário
-        if row['hino_sacramental'] and row['hino_sacramental'].strip(): hinos_lista.append({'tipo': 'Sacramental', 'nome': row['hino_sacramental'].strip()})
-        if row['hino_intermediario'] and row['hino_intermediario'].strip(): hinos_lista.append({'tipo': 'Intermediário', 'nome': row['hino_intermediario'].strip()})
-
-        if hinos_lista and data_formatada not in hinos_por_data:
-            hinos_por_data[data_formatada] = {'data': data_formatada, 'hinos': hinos_lista}
-            
-    conn.close()
-    return list(hinos_por_data.values())[:10]
-
-# Configuração do Rate Limiting
-limiter = Limiter(
-    app=app,
-    key_func=get_remote_address,
-    storage_uri="memory://",  # Use memória para desenvolvimento. Em produção, use Redis ou Memcached.
-    default_limits=["200 per day", "50 per hour"]
-)
-
-# Rota de Login de Usuário
-@app.route('/', methods=['GET', 'POST'])
-@limiter.limit("5 per minute", methods=["POST"]) # error="Muitas tentativas de login. Tente novamente em um minuto.")
-def login():
-    # If user is already logged in, redirect to index
-    if session.get('logged_in'):
-        return redirect(url_for('index'))
-    
-    if request.method == 'POST':
-        username = request.form.get('username', '').strip()
-        password = request.form.get('password', '').strip()
-        
-        if not username or not password:
-            flash('Por favor, preencha todos os campos.', 'error')
-            return render_template('login.html')
-        
-        user = authenticate_user(username, password)
-        
-        if user:
-            session['logged_in'] = True
-            session['username'] = user['username']
-            session['user_id'] = user['id']
-            flash(f'Login realizado com sucesso! Bem-vindo, {user["username"]}.', 'success')
-            return redirect(url_for('index'))
-        else:
-            flash('Credenciais inválidas. Por favor, tente novamente.', 'error')
-    
-    return render_template('login.html')
-
-# Rota de Logout de Usuário
-@app.route('/logout')
-def logout():
-    session.clear()
-    flash('Você saiu do sistema.', 'success')
-    return redirect(url_for('login'))
-
-# ==================================================================
-# Rotas de Configurações
-# ==================================================================
-
-# Rota para configurações com clonagem automática de templates padrão
-@app.route("/configuracoes")
-@login_required
-def configuracoes():
-    conn = get_db()
-    ala_id = session['user_id']
-
-    # 1. Buscar templates da ala logada
-    templates_row = conn.execute("SELECT * FROM templates WHERE ala_id = ?", (ala_id,)).fetchall()
-    
-    # 2. LÓGICA DE CLONAGEM: Se não houver templates para esta ala, copia os padrões (ala_id = 0)
-    if not templates_row:
-        modelos_mestres = conn.execute("SELECT * FROM templates WHERE ala_id = 0").fetchall()
-        for modelo in modelos_mestres:
-            conn.execute("""
-                INSERT INTO templates (
-                    ala_id, tipo_template, nome, boas_vindas, desobrigacoes, apoios, 
-                    confirmacoes_batismo, apoio_membro_novo, bencao_crianca, 
-                    sacramento, mensagens, live, encerramento
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                ala_id, modelo['tipo_template'], modelo['nome'], modelo['boas_vindas'], 
-                modelo['desobrigacoes'], modelo['apoios'], modelo['confirmacoes_batismo'], 
-                modelo['apoio_membro_novo'], modelo['bencao_crianca'], modelo['sacramento'], 
-                modelo['mensagens'], modelo['live'], modelo['encerramento']
-            ))
-        conn.commit()
-        # Refaz a busca agora com os templates clonados
-        templates_row = conn.execute("SELECT * FROM templates WHERE ala_id = ?", (ala_id,)).fetchall()
-
-    templates = [dict(t) for t in templates_row]
-
-    # 3. Buscar informações da unidade (Sua lógica original preservada)
-    unidade_row = conn.execute(
-        "SELECT * FROM unidades WHERE ala_id = ?",
-        (ala_id,)
-    ).fetchone()
-
-    if unidade_row:
-        unidade = dict(unidade_row)
-        primeiro = unidade.get('primeiro_conselheiro') or ''
-        segundo = unidade.get('segundo_conselheiro') or ''
-
-        if not primeiro and not segundo:
-            cons_raw = unidade.get('conselheiros') or ''
-            if cons_raw:
-                try:
-                    parsed = json.loads(cons_raw)
-                    if isinstance(parsed, list):
-                        primeiro = parsed[0] if len(parsed) > 0 else ''
-                        segundo = parsed[1] if len(parsed) > 1 else ''
-                except Exception:
-                    if '|' in cons_raw:
-                        parts = [p.strip() for p in cons_raw.split('|', 1)]
-                        primeiro = parts[0]
-                        segundo = parts[1] if len(parts) > 1 else ''
-                    elif '\n' in cons_raw:
-                        parts = [p.strip() for p in cons_raw.split('\n', 1)]
-                        primeiro = parts[0]
-                        segundo = parts[1] if len(parts) > 1 else ''
-                    else:
-                        primeiro = cons_raw.strip()
-
-        unidade['primeiro_conselheiro'] = primeiro
-        unidade['segundo_conselheiro'] = segundo
-    else:
-        unidade = {}
-
-    # 4. Buscar estatísticas (Sua lógica original preservada)
-    total_atas = conn.execute(
-        "SELECT COUNT(*) FROM atas WHERE ala_id = ?",
-        (ala_id,)
-    ).fetchone()[0]
-
-    atas_sacramentais = conn.execute(
-        "SELECT COUNT(*) FROM atas WHERE ala_id = ? AND tipo = 'sacramental'",
-        (ala_id,)
-    ).fetchone()[0]
-
-    atas_batismo = conn.execute(
-        "SELECT COUNT(*) FROM atas WHERE ala_id = ? AND tipo = 'batismo'",
-        (ala_id,)
-    ).fetchone()[0]
-
-    mes_atual = datetime.now().strftime("%Y-%m")
-    atas_mes = conn.execute(
-        "SELECT COUNT(*) FROM atas WHERE ala_id = ? AND strftime('%Y-%m', data) = ?",
-        (ala_id, mes_atual)
-    ).fetchone()[0]
-
-    conn.close()
-
-    return render_template(
-        "configuracoes.html",
-        templates=templates,
-        unidade=unidade,
-        total_atas=total_atas,
-        atas_sacramentais=atas_sacramentais,
-        atas_batismo=atas_batismo,
-        atas_mes=atas_mes
-    )
-
-# Rota para salvar configurações da ala
-@app.route("/configuracoes/ala/salvar", methods=["POST"])
-@login_required
-def salvar_configuracoes_ala():
-    conn = get_db()
-
-    nome_ala = request.form.get("nome_ala")
-    bispo = request.form.get("bispo")
-    primeiro_conselheiro = request.form.get("primeiro_conselheiro")
-    segundo_conselheiro = request.form.get("segundo_conselheiro")
-    recepcionista = request.form.get("recepcionista")
-    pianista = request.form.get("pianista")
-    regente_musica = request.form.get("regente_musica")
-    horario = request.form.get("horario")
-    
-    # Verificar se já existe registro para esta ala
-    unidade_existente = conn.execute(
-        "SELECT * FROM unidades WHERE ala_id = ?",
-        (session['user_id'],)
-    ).fetchone()
-
-    if unidade_existente:
-        # Atualizar - não tocar em estaca_id para evitar inconsistências
-        conn.execute("""
-            UPDATE unidades
-            SET nome = ?, bispo = ?, primeiro_conselheiro = ?, segundo_conselheiro = ?, horario = ?, recepcionista = ?, pianista = ?, regente_musica = ?
-            WHERE ala_id = ?
-        """, (nome_ala, bispo, primeiro_conselheiro, segundo_conselheiro, horario, recepcionista, pianista, regente_musica, session['user_id']))
-    else:
-        # Inserir - estaca_id usará valor default definido no schema (DEFAULT 1)
-        conn.execute("""
-            INSERT INTO unidades (ala_id, nome, bispo, primeiro_conselheiro, segundo_conselheiro, horario, recepcionista, pianista, regente_musica)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (session['user_id'], nome_ala, bispo, primeiro_conselheiro, segundo_conselheiro, horario, recepcionista, pianista, regente_musica))
-
-    conn.commit()
-    conn.close()
-
-    flash("Configurações da ala salvas com sucesso!", "success")
-    return redirect(url_for("configuracoes"))
-
-# Rota para editar template
-@app.route("/configuracoes/template/<int:template_id>")
-@login_required
-def editar_template(template_id):
-    conn = get_db()
-    template = conn.execute(
-        "SELECT * FROM templates WHERE id = ?", 
-        (template_id,)
-    ).fetchone()
-    
-    if template:
-        template = dict(template)
-        conn.close()
-        return render_template("_editar_template.html", template=template)
-    else:
-        conn.close()
-        return "Template não encontrado", 404
-
-# Rota para salvar template
-@app.route("/configuracoes/template/<int:template_id>/salvar", methods=["POST"])
-@login_required
-def salvar_template(template_id):
-    conn = get_db()
-    try:
-        # Mapeamento exato com o seu novo SCHEMA do SQL
-        conn.execute("""
-            UPDATE templates SET
-                nome = ?, boas_vindas = ?, desobrigacoes = ?, apoios = ?, 
-                confirmacoes_batismo = ?, apoio_membro_novo = ?, bencao_crianca = ?,
-                sacramento = ?, mensagens = ?, live = ?, encerramento = ?
-            WHERE id = ? AND ala_id = ?
-        """, (
-            request.form.get('nome'), request.form.get('boas_vindas'),
-            request.form.get('desobrigacoes'), request.form.get('apoios'),
-            request.form.get('confirmacoes_batismo'), request.form.get('apoio_membro_novo'),
-            request.form.get('bencao_crianca'), request.form.get('sacramento'),
-            request.form.get('mensagens'), request.form.get('live'),
-            request.form.get('encerramento'), template_id, session['user_id']
-        ))
-        
-        conn.commit()
-        flash("Template atualizado com sucesso!", "success")
-    except Exception as e:
-        flash(f"Erro ao salvar: {e}", "error")
-    finally:
-        conn.close()
-    return redirect(url_for("configuracoes"))
-
-# Rota para criar novo template
-@app.route("/configuracoes/template/criar", methods=["POST"])
-@login_required
-def criar_template():
-    conn = get_db()
-    ala_id = session.get('user_id')
-    
-    try:
-        nome = request.form.get('nome')
-        tipo_template = request.form.get('tipo_template') # 1=Sacramental, 2=Batismo
-        
-        # 1. VERIFICAÇÃO DE DUPLICIDADE: 
-        # Busca se já existe um template desse TIPO para essa ALA
-        existente = conn.execute(
-            "SELECT id FROM templates WHERE tipo_template = ? AND ala_id = ?", 
-            (tipo_template, ala_id)
-        ).fetchone()
-
-        if existente:
-            # Se já existe, apenas redirecionamos ou avisamos. 
-            # O ideal é que o usuário use a rota de SALVAR para editar.
-            flash("Já existe um template para este tipo. Por favor, edite o existente.", "warning")
-            return redirect(url_for("configuracoes"))
-
-        # 2. INSERÇÃO (Caso seja realmente novo)
-        conn.execute("""
-            INSERT INTO templates (
-                tipo_template, ala_id, nome, boas_vindas, desobrigacoes, apoios, 
-                confirmacoes_batismo, apoio_membro_novo, bencao_crianca, 
-                sacramento, mensagens, live, encerramento
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            tipo_template, ala_id, nome,
-            "Bom dia irmãos...", "É proposto...", "O(a) irmão(o)...",
-            "O(a) irmão(o)...", "O(a) irmão(o)...", "Gostaríamos...",
-            "Passaremos...", "Agradecemos...", "Gostaria...", "Agradecemos..."
-        ))
-        
-        conn.commit()
-        flash("Novo template criado com sucesso!", "success")
-    except Exception as e:
-        print(f"Erro: {e}")
-        flash("Erro ao criar template", "error")
-    finally:
-        conn.close()
-    return redirect(url_for("configuracoes"))
-   
-# Rota para apagar template
-@app.route("/configuracoes/template/<int:template_id>/apagar", methods=["POST"])
-@login_required
-def apagar_template(template_id):
-    conn = get_db()
-    
-    try:
-        # Verificar se o template existe
-        template = conn.execute(
-            "SELECT * FROM templates WHERE id = ?", 
-            (template_id,)
-        ).fetchone()
-        
-        if not template:
-            return jsonify({
-                'success': False,
-                'message': 'Template não encontrado'
-            }), 404
-        
-        # Não permitir apagar todos os templates - manter pelo menos um de cada tipo
-        templates_restantes = conn.execute(
-            "SELECT COUNT(*) FROM templates WHERE tipo_template = ?", 
-            (template['tipo_template'],)
-        ).fetchone()[0]
-        
-        if templates_restantes <= 1:
-            return jsonify({
-                'success': False,
-                'message': 'Não é possível apagar o último template deste tipo'
-            }, 400)
-        
-        # Apagar o template
-        conn.execute("DELETE FROM templates WHERE id = ?", (template_id,))
-        conn.commit()
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'message': 'Template apagado com sucesso!'
-        })
-        
-    except Exception as e:
-        conn.close()
-        print(f"Erro ao apagar template: {e}")
-        return jsonify({
-            'success': False,
-            'message': 'Erro interno ao apagar template'
-        }), 500
-
-# ==================================================================
-# Rotas de Atas
-# ==================================================================
-
-# Página Inicial com lista de atas
-@app.route('/index')
-@login_required
-def index():
-    conn = get_db()
-    
-    # Gerar lista de meses para o seletor EM PORTUGUÊS
-    meses = []
-    current_year = datetime.now().year
-    current_month = datetime.now().month
-    
-    # Nomes dos meses em português
-    meses_ptbr = [
-        '', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-        'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
-    ]
-    
-    for month in range(1, 13):
-        month_name = meses_ptbr[month]
-        month_value = f"{current_year}-{month:02d}"
-        meses.append({
-            'value': month_value,
-            'nome': f"{month_name} {current_year}"
-        })
-    
-    # Formato do mês atual para seleção automática
-    mes_atual = datetime.now().strftime("%Y-%m")
-    mes_nome = meses_ptbr[datetime.now().month] + " " + str(datetime.now().year)  # CORREÇÃO: Definir mes_nome
-    
-    # Carregar atas do mês atual da ala do usuário
-    atas = conn.execute(
-        "SELECT * FROM atas WHERE strftime('%Y-%m', data) = ? AND ala_id = ? ORDER BY data DESC", 
-        (mes_atual, session['user_id'])
-    ).fetchall()
-    
-    # Buscar próxima reunião sacramental
-    proxima_reuniao = get_proxima_reuniao_sacramental()
-    
-    return render_template(
-        "index.html",
-        meses=meses,
-        mes_atual=mes_atual,
-        mes_nome=mes_nome,  # AGORA ESTÁ DEFINIDA
-        atas=atas,
-        proxima_reuniao=proxima_reuniao
-    )
-
-# Rota para visualizar todas as atas
-@app.route("/atas")
-@login_required
-def listar_todas_atas():
-    conn = get_db()
-    
-    # Buscar todas as atas da ala, ordenadas da mais recente para a mais antiga
-    atas = conn.execute("""
-        SELECT a.*, s.tema 
-        FROM atas a 
-        LEFT JOIN sacramental s ON a.id = s.ata_id 
-        WHERE a.ala_id = ? 
-        ORDER BY a.data DESC
-    """, (session['user_id'],)).fetchall()
-    
-    # Buscar discursantes dos últimos 3 meses
-    tres_meses_atras = (datetime.now().replace(day=1) - timedelta(days=90)).strftime("%Y-%m-%d")
-    
-    discursantes_recentes = conn.execute("""
-        SELECT s.discursantes, a.data, s.tema
-        FROM sacramental s 
-        JOIN atas a ON s.ata_id = a.id 
-        WHERE a.data >= ? AND a.tipo = 'sacramental' AND a.ala_id = ?
-        ORDER BY a.data DESC
-    """, (tres_meses_atras, session['user_id'])).fetchall()
-    
-    # Processar discursantes
-    todos_discursantes = []
-    nomes_ja_adicionados = set()
-    
-    for row in discursantes_recentes:
-        if row['discursantes']:
-            try:
-                discursantes_lista = json.loads(row['discursantes'])
-                for discursante in discursantes_lista:
-                    if discursante and discursante.strip():
-                        nome_limpo = discursante.strip()
-                        if nome_limpo not in nomes_ja_adicionados:
-                            data_obj = datetime.strptime(row['data'], "%Y-%m-%d")
-                            data_formatada = data_obj.strftime("%d/%m/%Y")
-                            
-                            todos_discursantes.append({
-                                'nome': nome_limpo,
-                                'data': data_formatada,
-                                'tema': row['tema'] or 'Sem tema definido'
-                            })
-                            nomes_ja_adicionados.add(nome_limpo)
-            except json.JSONDecodeError:
-                continue
-    
-    # Buscar temas dos últimos 90 dias, ignorando temas nulos/vazios
-    temas_recentes = conn.execute("""
-        SELECT s.tema, a.data 
-        FROM sacramental s 
-        JOIN atas a ON s.ata_id = a.id 
-        WHERE date(a.data) >= date(?) 
-          AND a.tipo = 'sacramental' 
-          AND a.ala_id = ? 
-          AND s.tema IS NOT NULL 
-          AND TRIM(s.tema) <> ''
-        ORDER BY a.data DESC
-    """, (tres_meses_atras, session['user_id'])).fetchall()
-
-    # DEBUG: mostrar o que foi retornado
-    print("DEBUG temas_recentes (count):", len(temas_recentes))
-    for t in temas_recentes[:20]:
-        print("DEBUG tema row:", dict(t))
-
-    temas_formatados = []
-    for tema in temas_recentes:
-        if tema['tema']:
-            data_obj = datetime.strptime(tema['data'], "%Y-%m-%d")
-            data_formatada = data_obj.strftime("%d/%m/%Y")
-            temas_formatados.append({
-                'tema': tema['tema'],
-                'data': data_formatada
-            })
-    
-    conn.close()
-    
-    return render_template(
-        "todas_atas.html",
-        atas=atas,
-        discursantes_recentes=todos_discursantes[:20],
-        temas_recentes=temas_recentes,
-        hinos_recentes=get_hinos_recentes()
-    )
-
-# Rota para editar uma ata existente
-@app.route("/ata/editar/<int:ata_id>")
-@login_required
-def editar_ata(ata_id):
-    """Rota para editar uma ata existente"""
-    conn = get_db()
-    ata = conn.execute(
-        "SELECT * FROM atas WHERE id=? AND ala_id=?", 
-        (ata_id, session['user_id'])
-    ).fetchone()
-    
-    if not ata:
-        flash("Ata não encontrada ou você não tem permissão para editá-la.", "error")
-        return redirect(url_for('index'))
-    
-    # Redireciona para o formulário apropriado com os dados existentes
-    if ata["tipo"] == "sacramental":
-        return redirect(url_for("form_ata", tipo="sacramental", data=ata["data"], editar=ata_id))
-    else:
-        return redirect(url_for("form_ata", tipo="batismo", data=ata["data"], editar=ata_id))
-
-# Rota para excluir uma ata
-@app.route("/ata/excluir/<int:ata_id>")
-@login_required
-def excluir_ata(ata_id: int):
-    """Rota para excluir uma ata"""
-    conn = get_db()
-    
-    # Primeiro, exclui os detalhes específicos
-    ata = conn.execute("SELECT * FROM atas WHERE id=?", (ata_id,)).fetchone()
-    if ata:
-        if ata["tipo"] == "sacramental":
-            conn.execute("DELETE FROM sacramental WHERE ata_id=?", (ata_id,))
-        else:
-            conn.execute("DELETE FROM batismo WHERE ata_id=?", (ata_id,))
-        
-        # Depois exclui a ata principal
-        conn.execute("DELETE FROM atas WHERE id=?", (ata_id,))
-        conn.commit()
-        flash("Ata excluída com sucesso!", "success")
-    else:
-        flash("Ata não encontrada", "error")
-    
-    # Always return a redirect response
-    return redirect(url_for("index"))
-
-# Rota para listar atas por mês
-@app.route("/atas/mes/<string:mes>")
-@login_required
-def listar_atas_mes(mes):
-    conn = get_db()
-    
-    try:
-        # Validar formato do mês (YYYY-MM)
-        datetime.strptime(mes, "%Y-%m")
-        
-        atas = conn.execute(
-            "SELECT * FROM atas WHERE strftime('%Y-%m', data) = ? AND ala_id = ? ORDER BY data DESC", 
-            (mes, session['user_id'])
-        ).fetchall()
-        
-        # Formatar nome do mês para exibição EM PORTUGUÊS
-        meses_ptbr = [
-            '', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
-        ]
-        data_mes = datetime.strptime(mes, "%Y-%m")
-        mes_nome = meses_ptbr[data_mes.month] + " " + str(data_mes.year)
-        
-        return render_template("_atas_list.html", 
-                             atas=atas, 
-                             mes_selecionado_nome=mes_nome)
-    
-    except ValueError:
-        return "<div class='info-card'>Mês inválido.</div>"
-
-# Filtro de template para carregar listas JSON
-@app.template_filter('loads')
-def json_loads_filter(s: str) -> list:
-    """Template filter to parse JSON strings - always returns a list"""
-    if not s:
-        return []
-    try:
-        result = json.loads(s)
-        # Ensure we always return a list, even if JSON contains other types
-        if isinstance(result, list):
-            return result
-        else:
-            return [result] if result is not None else []
-    except (json.JSONDecodeError, TypeError, ValueError):
-        return []
-
-# Rota para criar nova ata
-@app.route("/ata/nova", methods=["GET", "POST"])
-@login_required
-def nova_ata():
-    if request.method == "POST":
-        tipo = request.form.get("tipo")
-        data = request.form.get("data")
-        
-        # Validação básica
-        if not tipo or not data:
-            flash("Erro: Tipo e data são obrigatórios", "error")
-            return render_template("nova_ata.html")
-            
-        # Validação de data - APENAS VERIFICA SE É UMA DATA VÁLIDA
-        try:
-            datetime.strptime(data, "%Y-%m-%d")
-        except ValueError:
-            flash("Erro: Data inválida", "error")
-            return render_template("nova_ata.html")
-            
-        return redirect(url_for("form_ata", tipo=tipo, data=data))
-    
-    # Data padrão: próximo domingo ou hoje se for domingo
-    hoje = datetime.now().date()
-    dias_para_domingo = (6 - hoje.weekday()) % 7
-    if dias_para_domingo == 0:  # Se hoje é domingo
-        data_padrao = hoje.strftime("%Y-%m-%d")
-    else:
-        data_padrao = (hoje + timedelta(days=dias_para_domingo)).strftime("%Y-%m-%d")
-    
-    return render_template("nova_ata.html", data_padrao=data_padrao)
-
-# Rota para formulário de ata (criação/edição)
-@app.route("/ata/form", methods=["GET", "POST"])
-@login_required
-def form_ata():
-    if request.method == "POST":
-        tipo = request.form.get("tipo")
-        data = request.form.get("data")
-        ata_id_editar = request.form.get("editar")
-        
-        # Validação básica
-        if not tipo or not data:
-            flash("Erro: Tipo e data são obrigatórios", "error")
-            return redirect(url_for('nova_ata'))
-        
-        # Validação de data
-        try:
-            datetime.strptime(data, "%Y-%m-%d")
-        except ValueError:
-            flash("Erro: Data inválida", "error")
-            return redirect(url_for('nova_ata'))
-        
-        conn = get_db()
-        
-        if ata_id_editar:
-            # Modo edição - verificar se a ata pertence à ala do usuário
-            ata_existente = conn.execute(
-                "SELECT * FROM atas WHERE id = ? AND ala_id = ?", 
-                (ata_id_editar, session['user_id'])
-            ).fetchone()
-            
-            if not ata_existente:
-                flash("Você não tem permissão para editar esta ata.", "error")
-                return redirect(url_for('index'))
-            
-            # Atualiza a ata existente
-            conn.execute("UPDATE atas SET tipo=?, data=? WHERE id=?", (tipo, data, ata_id_editar))
-            ata_id = ata_id_editar
-        else:
-            # Modo criação - insere nova ata com ala_id
-            conn.execute(
-                "INSERT INTO atas (tipo, data, ala_id) VALUES (?, ?, ?)", 
-                (tipo, data, session['user_id'])
-            )
-            ata_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-
-        if tipo == "sacramental":
-            discursantes = request.form.getlist("discursantes[]")
-            # Filtrar discursantes vazios
-            discursantes = [d for d in discursantes if d and d.strip()]
-            
-            anuncios = request.form.getlist("anuncios[]")
-            # Filtrar anúncios vazios
-            anuncios = [a for a in anuncios if a and a.strip()]
-            
-            detalhes = {
-                "presidido": request.form.get("presidido", ""),
-                "dirigido": request.form.get("dirigido", ""),
-                "recepcionistas": request.form.get("recepcionista", ""),
-                "tema": request.form.get("tema", ""), 
-                "pianista": request.form.get("pianista", ""),
-                "regente_musica": request.form.get("regente_musica", ""),
-                "reconhecemos_presenca": request.form.get("reconhecemos_presenca", ""),  # NOVO
-                "anuncios": anuncios,
-                "hino_abertura": request.form.get("hino_abertura", ""),
-                "oracao_abertura": request.form.get("oracao_abertura", ""),
-                "desobrigacoes": request.form.get("desobrigacoes", ""),  # NOVO
-                "apoios": request.form.get("apoios", ""),  # NOVO
-                "confirmacoes_batismo": request.form.get("confirmacoes_batismo", ""),  # NOVO
-                "apoio_membros": request.form.get("apoio_membros", ""),  # NOVO
-                "bencao_criancas": request.form.get("bencao_criancas", ""),  # NOVO
-                "hino_sacramental": request.form.get("hino_sacramental", ""),
-                "hino_intermediario": request.form.get("hino_intermediario", ""),
-                "ultimo_discursante": request.form.get("ultimo_discursante", ""),  # NOVO
-                "hino_encerramento": request.form.get("hino_encerramento", ""),
-                "oracao_encerramento": request.form.get("oracao_encerramento", ""),
-                "discursantes": discursantes
-            }
-            
-            if ata_id_editar:
-                # Atualiza registro existente COM TEMA
-                conn.execute("""
-                    UPDATE sacramental 
-                    SET presidido=?, dirigido=?, recepcionistas=?, pianista=?, regente_musica=?, 
-                        reconhecemos_presenca=?, anuncios=?, hinos=?, oracoes=?, discursantes=?, 
-                        hino_sacramental=?, hino_intermediario=?, desobrigacoes=?, apoios=?, 
-                        confirmacoes_batismo=?, apoio_membros=?, bencao_criancas=?, ultimo_discursante=?, tema=?
-                    WHERE ata_id=?
-                """, (
-                    detalhes["presidido"], 
-                    detalhes["dirigido"],
-                    detalhes["recepcionistas"],
-                    detalhes["pianista"],
-                    detalhes["regente_musica"],
-                    detalhes["reconhecemos_presenca"],
-                    json.dumps(detalhes["anuncios"]),
-                    json.dumps([detalhes["hino_abertura"], detalhes["hino_encerramento"]]), 
-                    json.dumps([detalhes["oracao_abertura"], detalhes["oracao_encerramento"]]), 
-                    json.dumps(detalhes["discursantes"]),
-                    detalhes["hino_sacramental"],
-                    detalhes["hino_intermediario"],
-                    detalhes["desobrigacoes"],
-                    detalhes["apoios"],
-                    detalhes["confirmacoes_batismo"],
-                    detalhes["apoio_membros"],
-                    detalhes["bencao_criancas"],
-                    detalhes["ultimo_discursante"],
-                    detalhes["tema"],  # ← ADICIONAR AQUI
-                    ata_id
-                ))
-            else:
-                # Insere novo registro COM TEMA
-                conn.execute("""
-                    INSERT INTO sacramental (ata_id, presidido, dirigido, recepcionistas, pianista, regente_musica, 
-                        reconhecemos_presenca, anuncios, hinos, oracoes, discursantes, hino_sacramental, hino_intermediario,
-                        desobrigacoes, apoios, confirmacoes_batismo, apoio_membros, bencao_criancas, ultimo_discursante, tema) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    ata_id, 
-                    detalhes["presidido"], 
-                    detalhes["dirigido"],
-                    detalhes["recepcionistas"],
-                    detalhes["pianista"],
-                    detalhes["regente_musica"],
-                    detalhes["reconhecemos_presenca"],
-                    json.dumps(detalhes["anuncios"]),
-                    json.dumps([detalhes["hino_abertura"], detalhes["hino_encerramento"]]), 
-                    json.dumps([detalhes["oracao_abertura"], detalhes["oracao_encerramento"]]), 
-                    json.dumps(detalhes["discursantes"]),
-                    detalhes["hino_sacramental"],
-                    detalhes["hino_intermediario"],
-                    detalhes["desobrigacoes"],
-                    detalhes["apoios"],
-                    detalhes["confirmacoes_batismo"],
-                    detalhes["apoio_membros"],
-                    detalhes["bencao_criancas"],
-                    detalhes["ultimo_discursante"],
-                    detalhes["tema"]  # ← ADICIONAR AQUI
-                ))
-        
-        elif tipo == "batismo":
-            batizados = request.form.getlist("batizados[]")
-            # Filtrar batizados vazios
-            batizados = [b for b in batizados if b and b.strip()]
-            
-            detalhes = {
-                "presidido": request.form.get("presidido", ""),
-                "dirigido": request.form.get("dirigido", ""),
-                "dedicado": request.form.get("dedicado", ""),
-                "testemunha1": request.form.get("testemunha1", ""),
-                "testemunha2": request.form.get("testemunha2", ""),
-                "batizados": batizados
-            }
-            
-            if ata_id_editar:
-                # Atualiza registro existente
-                conn.execute("""
-                    UPDATE batismo 
-                    SET dedicado=?, presidido=?, dirigido=?, batizados=?, testemunha1=?, testemunha2=? 
-                    WHERE ata_id=?
-                """, (
-                    detalhes["dedicado"], 
-                    detalhes["presidido"], 
-                    detalhes["dirigido"], 
-                    json.dumps(detalhes["batizados"]), 
-                    detalhes["testemunha1"], 
-                    detalhes["testemunha2"], 
-                    ata_id
-                ))
-            else:
-                # Insere novo registro
-                conn.execute("""
-                    INSERT INTO batismo (ata_id, dedicado, presidido, dirigido, batizados, testemunha1, testemunha2) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    ata_id, 
-                    detalhes["dedicado"], 
-                    detalhes["presidido"], 
-                    detalhes["dirigido"], 
-                    json.dumps(detalhes["batizados"]), 
-                    detalhes["testemunha1"], 
-                    detalhes["testemunha2"]
-                ))
-        
-        conn.commit()
-        flash("Ata salva com sucesso!", "success")
-        return redirect(url_for("visualizar_ata", ata_id=ata_id))
-
-    # GET request
-    tipo = request.args.get("tipo")
-    data = request.args.get("data")
-    editar = request.args.get("editar")
-    
-    # Lógica para carregar dados existentes se estiver editando
-    dados_existentes = {}
-    if editar:
-        conn = get_db()
-        if tipo == "sacramental":
-            dados = conn.execute("SELECT * FROM sacramental WHERE ata_id=?", (editar,)).fetchone()
-            if dados:
-                dados_existentes = dict(dados)
-                # Converter JSON strings de volta para objetos
-                if dados_existentes.get('hinos'):
-                    hinos = json.loads(dados_existentes['hinos'])
-                    dados_existentes['hino_abertura'] = hinos[0] if len(hinos) > 0 else ''
-                    dados_existentes['hino_encerramento'] = hinos[1] if len(hinos) > 1 else ''
-                if dados_existentes.get('oracoes'):
-                    oracoes = json.loads(dados_existentes['oracoes'])
-                    dados_existentes['oracao_abertura'] = oracoes[0] if len(oracoes) > 0 else ''
-                    dados_existentes['oracao_encerramento'] = oracoes[1] if len(oracoes) > 1 else ''
-                if dados_existentes.get('discursantes'):
-                    dados_existentes['discursantes'] = json.loads(dados_existentes['discursantes'])
-                if dados_existentes.get('anuncios'):
-                    dados_existentes['anuncios'] = json.loads(dados_existentes['anuncios'])
-        else:
-            dados = conn.execute("SELECT * FROM batismo WHERE ata_id=?", (editar,)).fetchone()
-            if dados:
-                dados_existentes = dict(dados)
-                if dados_existentes.get('batizados'):
-                    dados_existentes['batizados'] = json.loads(dados_existentes['batizados'])
-    
-    if not tipo or not data:
-        flash("Erro: Tipo e data são obrigatórios", "error")
-        return redirect(url_for("nova_ata"))
-    
-    if tipo == "sacramental":
-        dt = datetime.strptime(data, "%Y-%m-%d")
-        primeiro_domingo = min([d for d in range(1, 8) if calendar.weekday(dt.year, dt.month, d) == 6])
-        is_primeiro_domingo = dt.day == primeiro_domingo
-        
-
-        discursantes_recentes = get_discursantes_recentes() if not editar else []
-        temas_recentes = get_temas_recentes() if not editar else []
-        hinos_recentes = get_hinos_recentes() if not editar else []
-        
-        conn = get_db()
-        unidade_row = conn.execute("SELECT * FROM unidades WHERE ala_id = ?", (session['user_id'],)).fetchone()
-        estaca_row = None
-
-        if unidade_row and unidade_row['estaca_id']:
-            estaca_row = conn.execute("SELECT * FROM estacas WHERE id = ?", (unidade_row['estaca_id'],)).fetchone()
-
-        unidade = dict(unidade_row) if unidade_row else {}
-        estaca = dict(estaca_row) if estaca_row else {}
-
-        return render_template("sacramental.html", 
-                             primeiro=is_primeiro_domingo, 
-                             data=data, 
-                             editar=editar, 
-                             dados=dados_existentes,
-                             discursantes_recentes=discursantes_recentes,
-                             temas_recentes=temas_recentes,
-                             hinos_recentes=hinos_recentes,
-                             unidade=unidade,
-                             estaca=estaca)
-    elif tipo == "batismo":
-        return render_template("batismo.html", 
-                             data=data, 
-                             editar=editar, 
-                             dados=dados_existentes)
-    else:
-        flash("Tipo de ata não reconhecido", "error")
-        return redirect(url_for("nova_ata"))
-
-# Rota para visualizar uma ata selecionada
-@app.route("/ata/<int:ata_id>")
-@login_required
-def visualizar_ata(ata_id):
-    conn = get_db()
-    ata = conn.execute(
-        "SELECT * FROM atas WHERE id=? AND ala_id=?", 
-        (ata_id, session['user_id'])
-    ).fetchone()
-    
-    if not ata:
-        flash("Ata não encontrada ou você não tem permissão para visualizá-la.", "error")
-        return redirect(url_for("index"))
-        
-    # Buscar template padrão para sacramental
-    template = None
-    if ata["tipo"] == "sacramental":
-        # Tente diferentes formas de buscar o template
-        template = conn.execute(
-            "SELECT * FROM templates WHERE nome = 'Sacramental Padrão'"
-        ).fetchone()
-        
-        if not template:
-            template = conn.execute(
-                "SELECT * FROM templates WHERE tipo_template = 1"
-            ).fetchone()
-        
-        if template:
-            template = dict(template)
-            print(f"DEBUG: Template carregado - {template.get('nome', 'Sem nome')}")
-    
-    if ata["tipo"] == "sacramental":
-        detalhes = conn.execute("SELECT * FROM sacramental WHERE ata_id=?", (ata_id,)).fetchone()
-        if detalhes:
-            # Converter para dicionário para facilitar o acesso
-            detalhes_dict = dict(detalhes)
-            if detalhes_dict.get('hinos'):
-                try:
-                    hinos = json.loads(detalhes_dict['hinos'])
-                    detalhes_dict['hino_abertura'] = hinos[0] if len(hinos) > 0 else ''
-                    detalhes_dict['hino_encerramento'] = hinos[1] if len(hinos) > 1 else ''
-                except:
-                    detalhes_dict['hino_abertura'] = ''
-                    detalhes_dict['hino_encerramento'] = ''
-                    
-            if detalhes_dict.get('oracoes'):
-                try:
-                    oracoes = json.loads(detalhes_dict['oracoes'])
-                    detalhes_dict['oracao_abertura'] = oracoes[0] if len(oracoes) > 0 else ''
-                    detalhes_dict['oracao_encerramento'] = oracoes[1] if len(oracoes) > 1 else ''
-                except:
-                    detalhes_dict['oracao_abertura'] = ''
-                    detalhes_dict['oracao_encerramento'] = ''
-                    
-            if detalhes_dict.get('discursantes'):
-                try:
-                    detalhes_dict['discursantes'] = json.loads(detalhes_dict['discursantes'])
-                except:
-                    detalhes_dict['discursantes'] = []
-                    
-            if detalhes_dict.get('anuncios'):
-                try:
-                    detalhes_dict['anuncios'] = json.loads(detalhes_dict['anuncios'])
-                except:
-                    detalhes_dict['anuncios'] = []
-                    
-            detalhes = detalhes_dict
-        else:
-            detalhes = {}
-    else:
-        detalhes = conn.execute("SELECT * FROM batismo WHERE ata_id=?", (ata_id,)).fetchone()
-        if detalhes:
-            detalhes_dict = dict(detalhes)
-            if detalhes_dict.get('batizados'):
-                try:
-                    detalhes_dict['batizados'] = json.loads(detalhes_dict['batizados'])
-                except:
-                    detalhes_dict['batizados'] = []
-            detalhes = detalhes_dict
-        else:
-            detalhes = {}
-    
-    # Ler os textos padrão dos convites (1º, 2º e 3º discursante)
-    def _read_discursante_text(n):
-        try:
-            path_txt = os.path.join(app.root_path, "templates", "texts", f"discursante_{n}.txt")
-            with open(path_txt, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception as e:
-            print(f"Aviso: não foi possível ler discursante_{n}.txt ->", e)
-            return ""
-
-    discursante_1_text = _read_discursante_text(1)
-    discursante_2_text = _read_discursante_text(2)
-    discursante_3_text = _read_discursante_text(3)
-
-    conn.close()
-
-    return render_template(
-        "visualizar_ata.html",
-        ata=ata,
-        detalhes=detalhes,
-        template=template,
-        discursante_1_text=discursante_1_text,
-        discursante_2_text=discursante_2_text,
-        discursante_3_text=discursante_3_text
-    )
-
-# Rota para exportar ata como PDF simples
-@app.route("/ata/exportar/<int:ata_id>")
-@login_required
-def exportar_pdf(ata_id):
-    from functions.pdf_exporters import exportar_pdf_bytes
-    
-    conn = get_db() 
-    try:
-        # Usamos um cursor explícito para maior robustez
-        cursor = conn.cursor() 
-        
-        # 1. Buscar a Ata
-        cursor.execute(
-            "SELECT * FROM atas WHERE id=? AND ala_id=?", 
-            (ata_id, session['user_id'])
-        )
-        ata = cursor.fetchone()
-        
-        if not ata:
-            raise ValueError("Ata não encontrada")
-        
-        ata = dict(ata)
-        
-        # =========================================================================
-        # CORREÇÃO: Buscar o Template Padrão (ID 1), pois a tabela templates 
-        # não possui a coluna ala_id.
-        # =========================================================================
-        cursor.execute(
-            # Anteriormente: "SELECT * FROM templates WHERE ala_id=? LIMIT 1"
-            "SELECT * FROM templates WHERE id=1 LIMIT 1" # Agora busca o template padrão (ID 1)
-        )
-        template = cursor.fetchone()
-        
-        if template:
-            template = dict(template)
-        else:
-            template = {}
-        
-        
-        # 4. Buscar detalhes conforme tipo (Lógica de deserialização mantida)
-        if ata["tipo"] == "sacramental":
-            cursor.execute("SELECT * FROM sacramental WHERE ata_id=?", (ata_id,))
-            detalhes = cursor.fetchone()
-            
-            if detalhes:
-                detalhes_dict = dict(detalhes)
-                
-                # Deserialização de JSON
-                keys_to_load = ['hinos', 'oracoes', 'discursantes', 'anuncios', 
-                                'desobrigacoes', 'apoios', 'confirmacoes_batismo', 
-                                'apoio_membro_novo', 'bencao_crianca']
-
-                for key in keys_to_load:
-                    if detalhes_dict.get(key) and isinstance(detalhes_dict[key], str):
-                        try:
-                            detalhes_dict[key] = json.loads(detalhes_dict[key])
-                        except:
-                            if key in ['discursantes', 'anuncios', 'desobrigacoes', 'apoios', 'confirmacoes_batismo', 'apoio_membro_novo', 'bencao_crianca']:
-                                detalhes_dict[key] = []
-                            pass
-
-                # Tratamento específico de hinos e orações
-                if isinstance(detalhes_dict.get('hinos'), list):
-                    hinos = detalhes_dict['hinos']
-                    detalhes_dict['hino_abertura'] = hinos[0] if len(hinos) > 0 else ''
-                    detalhes_dict['hino_encerramento'] = hinos[1] if len(hinos) > 1 else ''
-                    
-                if isinstance(detalhes_dict.get('oracoes'), list):
-                    oracoes = detalhes_dict['oracoes']
-                    detalhes_dict['oracao_abertura'] = oracoes[0] if len(oracoes) > 0 else ''
-                    detalhes_dict['oracao_encerramento'] = oracoes[1] if len(oracoes) > 1 else ''
-                    
-                detalhes = detalhes_dict
-            else:
-                detalhes = {}
-        else: # Tipo batismo
-            cursor.execute("SELECT * FROM batismo WHERE ata_id=?", (ata_id,))
-            detalhes = cursor.fetchone()
-            if detalhes:
-                detalhes_dict = dict(detalhes)
-                if detalhes_dict.get('batizados'):
-                    try:
-                        detalhes_dict['batizados'] = json.loads(detalhes_dict['batizados'])
-                    except:
-                        detalhes_dict['batizados'] = []
-                detalhes = detalhes_dict
-            else:
-                detalhes = {}
-        
-        # 5. Converter para PDF
-        buffer, filename, mimetype = exportar_pdf_bytes(ata, detalhes, template, filename=f"ata_{ata_id}.pdf")
-        return send_file(buffer, as_attachment=True, download_name=filename, mimetype=mimetype)
-        
-    except Exception as e:
-        print(f"======== ERRO CRÍTICO NA EXPORTAÇÃO DE PDF: {e} ========")
-        flash(f"Erro ao exportar PDF: {str(e)}", "error")
-        return redirect(url_for("visualizar_ata", ata_id=ata_id))
-    finally:
-        conn.close()
-
-# Rota para exportar ata como PDF SIMPLES (SOMENTE CAMPOS/SEM TEXTOS)
-@app.route("/ata/exportar_simples/<int:ata_id>")
-@login_required
-def exportar_pdf_simples(ata_id):
-    from functions.pdf_exporters import exportar_pdf_bytes
-    
-    conn = get_db() 
-    try:
-        cursor = conn.cursor() 
-        
-        # 1. Buscar a Ata
-        cursor.execute(
-            "SELECT * FROM atas WHERE id=? AND ala_id=?", 
-            (ata_id, session['user_id'])
-        )
-        ata = cursor.fetchone()
-        
-        if not ata:
-            raise ValueError("Ata não encontrada")
-        
-        ata = dict(ata)
-        
-        # 2. NÃO BUSCAR O TEMPLATE: template = {} ou template = None
-        template = {} 
-        
-        # 3. Buscar detalhes conforme tipo (Lógica de deserialização mantida)
-        if ata["tipo"] == "sacramental":
-            cursor.execute("SELECT * FROM sacramental WHERE ata_id=?", (ata_id,))
-            detalhes = cursor.fetchone()
-            
-            if detalhes:
-                detalhes_dict = dict(detalhes)
-                
-                # Deserialização de JSON (simplificada)
-                keys_to_load = ['hinos', 'oracoes', 'discursantes', 'anuncios', 
-                                'desobrigacoes', 'apoios', 'confirmacoes_batismo', 
-                                'apoio_membro_novo', 'bencao_crianca']
-
-                for key in keys_to_load:
-                    if detalhes_dict.get(key) and isinstance(detalhes_dict[key], str):
-                        try:
-                            detalhes_dict[key] = json.loads(detalhes_dict[key])
-                        except:
-                            if key in ['discursantes', 'anuncios', 'desobrigacoes', 'apoios', 'confirmacoes_batismo', 'apoio_membro_novo', 'bencao_crianca']:
-                                detalhes_dict[key] = []
-                            pass
-
-                # Tratamento específico de hinos e orações
-                if isinstance(detalhes_dict.get('hinos'), list):
-                    hinos = detalhes_dict['hinos']
-                    detalhes_dict['hino_abertura'] = hinos[0] if len(hinos) > 0 else ''
-                    detalhes_dict['hino_encerramento'] = hinos[1] if len(hinos) > 1 else ''
-                    
-                if isinstance(detalhes_dict.get('oracoes'), list):
-                    oracoes = detalhes_dict['oracoes']
-                    detalhes_dict['oracao_abertura'] = oracoes[0] if len(oracoes) > 0 else ''
-                    detalhes_dict['oracao_encerramento'] = oracoes[1] if len(oracoes) > 1 else ''
-                    
-                detalhes = detalhes_dict
-            else:
-                detalhes = {}
-        else: # Tipo batismo
-            cursor.execute("SELECT * FROM batismo WHERE ata_id=?", (ata_id,))
-            detalhes = cursor.fetchone()
-            if detalhes:
-                detalhes_dict = dict(detalhes)
-                if detalhes_dict.get('batizados'):
-                    try:
-                        detalhes_dict['batizados'] = json.loads(detalhes_dict['batizados'])
-                    except:
-                        detalhes_dict['batizados'] = []
-                detalhes = detalhes_dict
-            else:
-                detalhes = {}
-        
-        # 4. Converter para PDF (template é vazio/None, resultando em "Sem Textos")
-        buffer, filename, mimetype = exportar_pdf_bytes(ata, detalhes, template, filename=f"ata_simples_{ata_id}.pdf")
-        return send_file(buffer, as_attachment=True, download_name=filename, mimetype=mimetype)
-        
-    except Exception as e:
-        print(f"======== ERRO CRÍTICO NA EXPORTAÇÃO DE PDF SIMPLES: {e} ========")
-        flash(f"Erro ao exportar PDF Simples: {str(e)}", "error")
-        return redirect(url_for("visualizar_ata", ata_id=ata_id))
-    finally:
-        conn.close()
-
-# Rota para exportar ata sacramental como PDF formatado
-@app.route("/ata/exportar_sacramental/<int:ata_id>")
-@login_required
-def exportar_sacramental_pdf(ata_id):
-    from functions.pdf_exporters import exportar_sacramental_bytes
-    conn = get_db()
-    try:
-        # Renderizar HTML
-        ata = conn.execute(
-            "SELECT * FROM atas WHERE id=? AND ala_id=?", 
-            (ata_id, session['user_id'])
-        ).fetchone()
-        
-        if not ata:
-            raise ValueError("Ata não encontrada")
-        
-        ata = dict(ata)
-        
-        if ata["tipo"] != "sacramental":
-            raise ValueError("Esta ata não é sacramental")
-        
-        detalhes = conn.execute("SELECT * FROM sacramental WHERE ata_id=?", (ata_id,)).fetchone()
-        if detalhes:
-            detalhes = dict(detalhes)
-            if detalhes.get('hinos'):
-                try:
-                    hinos = json.loads(detalhes['hinos'])
-                    detalhes['hino_abertura'] = hinos[0] if len(hinos) > 0 else ''
-                    detalhes['hino_encerramento'] = hinos[1] if len(hinos) > 1 else ''
-                except:
-                    pass
-            if detalhes.get('oracoes'):
-                try:
-                    oracoes = json.loads(detalhes['oracoes'])
-                    detalhes['oracao_abertura'] = oracoes[0] if len(oracoes) > 0 else ''
-                    detalhes['oracao_encerramento'] = oracoes[1] if len(oracoes) > 1 else ''
-                except:
-                    pass
-            if detalhes.get('discursantes'):
-                try:
-                    detalhes['discursantes'] = json.loads(detalhes['discursantes'])
-                except:
-                    detalhes['discursantes'] = []
-            if detalhes.get('anuncios'):
-                try:
-                    detalhes['anuncios'] = json.loads(detalhes['anuncios'])
-                except:
-                    detalhes['anuncios'] = []
-        else:
-            detalhes = {}
-        
-        # Buscar template
-        template = conn.execute("SELECT * FROM templates WHERE nome = 'Sacramental Padrão'").fetchone()
-        
-        if not template:
-            template = conn.execute(
-                "SELECT * FROM templates WHERE tipo_template = 1"
-            ).fetchone()
-        
-        # =================================================================
-        # 🚨 CORREÇÃO APLICADA AQUI
-        # =================================================================
-        if template:
-            template = dict(template)
-        else:
-            # Se nenhuma busca funcionou, defina como um dicionário vazio
-            template = {} 
-        # =================================================================
-
-        # Converter para PDF
-        # Gerar PDF diretamente com dados (ReportLab)
-        buffer, filename, mimetype = exportar_sacramental_bytes(ata, detalhes, template=template, filename=f"ata_sacramental_{ata_id}.pdf")
-        return send_file(buffer, as_attachment=True, download_name=filename, mimetype=mimetype)
-    
-    except Exception as e:
-        print("======== ERRO CRÍTICO NA EXPORTAÇÃO DE PDF ========")
-        traceback.print_exc() # Isso irá imprimir o erro detalhado no console
-
-        flash(f"Erro ao exportar PDF: {str(e)}", "error")
-        return redirect(url_for("visualizar_ata", ata_id=ata_id))
-    finally:
-        conn.close()
-
-@app.template_filter('reverse_date_format')
-def reverse_date_format(value):
-    """Converte 'AAAA/MM/DD' para 'DD/MM/AAAA' (o template usa replace('-', '/') antes)"""
-    # Se o formato original for AAAA-MM-DD, o input é AAAA/MM/DD após o replace no HTML.
-    parts = value.split('/')
-    if len(parts) == 3:
-        # Reverte ordem: [2]DD, [1]MM, [0]AAAA
-        return f"{parts[2]}/{parts[1]}/{parts[0]}"
-    return value
-
-@app.route('/deletar_ata', methods=['POST'])
-def deletar_ata():
-    """Rota para deletar uma ata e seus detalhes relacionados."""
-    # Garante que o usuário está logado
-    if 'user_id' not in session:
-        flash('Você precisa estar logado para realizar esta ação.', 'error')
-        return redirect(url_for('login'))
-
-    ata_id = request.form.get('ata_id', type=int)
-    ala_id = session['user_id']
-
-    if not ata_id:
-        flash('ID da ata não fornecido.', 'error')
-        # CORREÇÃO: O endpoint correto é 'listar_todas_atas'
-        return redirect(url_for('listar_todas_atas'))
-
-    conn = get_db()
-    
-    # 1. Obter o tipo da ata para saber qual tabela de detalhes deletar
-    ata_info = conn.execute("SELECT tipo FROM atas WHERE id = ? AND ala_id = ?", (ata_id, ala_id)).fetchone()
-
-    if not ata_info:
-        flash('Ata não encontrada ou você não tem permissão para deletá-la.', 'error')
-        conn.close()
-        # CORREÇÃO: O endpoint correto é 'listar_todas_atas'
-        return redirect(url_for('listar_todas_atas'))
-
-    ata_tipo = ata_info['tipo']
-
-    try:
-        # Inicia transação
-        conn.execute("BEGIN TRANSACTION")
-
-        # 2. Deleta os detalhes relacionados (sacramental ou batismo)
-        if ata_tipo == 'sacramental':
-            conn.execute("DELETE FROM sacramental WHERE ata_id = ?", (ata_id,))
-        elif ata_tipo == 'batismo':
-            conn.execute("DELETE FROM batismo WHERE ata_id = ?", (ata_id,))
-        
-        # 3. Deleta a ata principal (precisa ter ala_id para segurança)
-        conn.execute("DELETE FROM atas WHERE id = ? AND ala_id = ?", (ata_id, ala_id))
-
-        # Confirma a transação
-        conn.commit()
-        flash(f'Ata de {ata_tipo.capitalize()} (ID: {ata_id}) deletada com sucesso!', 'success')
-
-    except Exception as e:
-        conn.rollback()
-        flash(f'Erro ao deletar ata: {e}', 'error')
-        
-    finally:
-        conn.close()
-
-    # CORREÇÃO: O endpoint correto é 'listar_todas_atas'
-    return redirect(url_for('listar_todas_atas'))
-
-# Sistema de mensagens flash
-@app.context_processor
-def inject_flash_messages():
-    messages = []
-    return dict(flash_messages=messages)
-
-# WebSocket para edição colaborativa em tempo real
-users_editing = {}
-@socketio.on('join')
-def handle_join(data):
-    ata_id = data['ata_id']
-    users_editing[ata_id] = users_editing.get(ata_id, 0) + 1
-
-    join_room(ata_id)
-    emit('update_users', {'count': users_editing[ata_id]}, to=ata_id)
-
-@socketio.on('leave')
-def handle_leave(data):
-    ata_id = data['ata_id']
-    if ata_id in users_editing:
-        users_editing[ata_id] = max(users_editing[ata_id] - 1, 0)
-        if users_editing[ata_id] == 0:
-            del users_editing[ata_id]
-        leave_room(ata_id)
-        emit('update_users', {'count': users_editing.get(ata_id, 0)}, to=ata_id)
-
-@socketio.on('field_update')
-def handle_field_update(data):
-    ata_id = data['ata_id']
-    emit('field_update', {'name': data['name'], 'value': data['value']}, to=ata_id, include_self=False)
-
-# Rota para renderizar HTML puro da ata (para conversão a PDF)
-@app.route("/ata/render_html/<int:ata_id>")
-@login_required
-def render_ata_html(ata_id):
-    """Renderiza o HTML puro (sem base.html) para conversão a PDF"""
-    conn = get_db()
-    ata = conn.execute(
-        "SELECT * FROM atas WHERE id=? AND ala_id=?", 
-        (ata_id, session['user_id'])
-    ).fetchone()
-    
-    if not ata:
-        flash("Ata não encontrada ou você não tem permissão para acessá-la.", "error")
-        return redirect(url_for("index"))
-        
-    # Buscar template padrão
-    template = None
-    if ata["tipo"] == "sacramental":
-        template = conn.execute(
-            "SELECT * FROM templates WHERE nome = 'Sacramental Padrão'"
-        ).fetchone()
-        
-        if not template:
-            template = conn.execute(
-                "SELECT * FROM templates WHERE tipo_template = 1"
-            ).fetchone()
-        
-        if template:
-            template = dict(template)
-    
-    # Buscar detalhes
-    if ata["tipo"] == "sacramental":
-        detalhes = conn.execute("SELECT * FROM sacramental WHERE ata_id=?", (ata_id,)).fetchone()
-        if detalhes:
-            detalhes_dict = dict(detalhes)
-            if detalhes_dict.get('hinos'):
-                try:
-                    hinos = json.loads(detalhes_dict['hinos'])
-                    detalhes_dict['hino_abertura'] = hinos[0] if len(hinos) > 0 else ''
-                    detalhes_dict['hino_encerramento'] = hinos[1] if len(hinos) > 1 else ''
-                except:
-                    detalhes_dict['hino_abertura'] = ''
-                    detalhes_dict['hino_encerramento'] = ''
-                    
-            if detalhes_dict.get('oracoes'):
-                try:
-                    oracoes = json.loads(detalhes_dict['oracoes'])
-                    detalhes_dict['oracao_abertura'] = oracoes[0] if len(oracoes) > 0 else ''
-                    detalhes_dict['oracao_encerramento'] = oracoes[1] if len(oracoes) > 1 else ''
-                except:
-                    detalhes_dict['oracao_abertura'] = ''
-                    detalhes_dict['oracao_encerramento'] = ''
-                    
-            if detalhes_dict.get('discursantes'):
-                try:
-                    detalhes_dict['discursantes'] = json.loads(detalhes_dict['discursantes'])
-                except:
-                    detalhes_dict['discursantes'] = []
-                    
-            if detalhes_dict.get('anuncios'):
-                try:
-                    detalhes_dict['anuncios'] = json.loads(detalhes_dict['anuncios'])
-                except:
-                    detalhes_dict['anuncios'] = []
-                    
-            detalhes = detalhes_dict
-        else:
-            detalhes = {}
-    else:
-        detalhes = conn.execute("SELECT * FROM batismo WHERE ata_id=?", (ata_id,)).fetchone()
-        if detalhes:
-            detalhes_dict = dict(detalhes)
-            if detalhes_dict.get('batizados'):
-                try:
-                    detalhes_dict['batizados'] = json.loads(detalhes_dict['batizados'])
-                except:
-                    detalhes_dict['batizados'] = []
-            detalhes = detalhes_dict
-        else:
-            detalhes = {}
-    
-    conn.close()
-    
-    # Renderizar template SEM base.html (use um template dedicado ou renderize inline)
-    return render_template("visualizar_ata_pdf.html", ata=ata, detalhes=detalhes, template=template)
-
-# Rodar o app
-if __name__ == "__main__":
-    # Configurações para produção
-    port = int(os.environ.get('PORT', 5000))
-    debug = os.environ.get('DEBUG', 'False').lower() == 'true'
-    
-    # Inicializar banco
-    init_db()
-    
-    # Rodar servidor - permitir produção
-    socketio.run(app, 
-                 host='0.0.0.0', 
-                 port=port, 
-                 debug=debug,
+# Com eventlet o monkey patch precisa vir antes dos outros imports; as chamadas
+# que bloqueiam de verdade (sqlite3, ReportLab) vão para o tpool (functions/despacho.py)
+try:
+    import eventlet
+    eventlet.monkey_patch()
+except ImportError:
+    eventlet = None
+
+import os
+import io
+import sqlite3
+from flask import Flask, render_template, request, redirect, url_for, send_file, flash, session, jsonify, Response
+from flask_socketio import SocketIO, join_room, leave_room, emit
+from functools import wraps
+import json
+from datetime import datetime, timedelta
+import calendar
+import click
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Paragraph, Table, TableStyle
+from reportlab.lib import colors
+import models as dbHandler
+from functions.pdf_exporters import exportar_pdf_bytes, exportar_sacramental_bytes
+from functions.ata_repository import AtaRepository
+from functions.ata_models import Ata
+from functions import db, ala_stats, arquivo_morto, ata_listas, ata_summary, atas_em_lote, backup, busca_atas, changelog, consultas_atas, despacho, escritor, exportacao, hinos, historico_discursantes, importacao, manutencao, migrations, replica, revisoes, tenants
+from werkzeug.security import generate_password_hash, check_password_hash
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+import traceback
+
+app = Flask(__name__)
+
+# Configuração do SocketIO para produção 
+if eventlet is not None:
+    socketio = SocketIO(app, 
+                       cors_allowed_origins="*",
+                       async_mode='eventlet')
+else:
+    socketio = SocketIO(app, 
+                       cors_allowed_origins="*",
+                       async_mode='threading')
+
+#Secret key para RENDER
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-123')
+
+# Threads para as views (banco e PDFs rodam fora do loop do Socket.IO)
+app.config['DESPACHO_THREADS'] = int(os.environ.get('DESPACHO_THREADS', despacho.THREADS_PADRAO))
+
+# Quantidade de atas por página em /atas (o restante vem pelo botão "Carregar mais")
+app.config['ATAS_POR_PAGINA'] = int(os.environ.get('ATAS_POR_PAGINA', 30))
+
+# Tempo máximo (segundos) que /sync segura a requisição esperando mudanças
+app.config['SYNC_ESPERA_MAX'] = float(os.environ.get('SYNC_ESPERA_MAX', changelog.ESPERA_MAX_PADRAO))
+
+# Histórico das atas: snapshot completo a cada N revisões e janela (segundos)
+# em que salvamentos seguidos do mesmo usuário viram uma revisão só
+app.config['REVISOES_SNAPSHOT'] = int(os.environ.get('REVISOES_SNAPSHOT', revisoes.SNAPSHOT_A_CADA))
+app.config['REVISOES_JANELA_S'] = float(os.environ.get('REVISOES_JANELA_S', revisoes.JANELA_PADRAO))
+
+# #Database do RENDER para produção
+# if 'RENDER' in os.environ:
+#     DB_PATH = "/opt/render/project/src/database/atas.db"
+# else:
+#     DB_PATH = "database/atas.db"
+
+
+
+# Conexão com o banco: uma por requisição, reaproveitada de um pool por worker
+# (ver functions/db.py para pragmas e tamanho do pool)
+db.init_app(app)
+# Com SHARDS_DIR, cada estaca tem o seu banco (ver functions/tenants.py)
+tenants.init_app(app)
+
+def get_db():
+    return tenants.get_db()
+
+# users/estacas/unidades ficam sempre no catálogo (DATABASE)
+def get_catalogo():
+    return tenants.get_catalogo()
+
+# Escritas: job(conn) roda na thread de escrita do banco, em group commit
+# (ver functions/escritor.py). Retorna o que o job retornar, depois do commit.
+escritor.init_app(app)
+
+def escrever(job, catalogo=False):
+    caminho = app.config['DATABASE'] if catalogo else tenants.caminho_da_sessao()
+    return escritor.get_escritor(caminho).executar(job)
+
+# Arquivo morto (functions/arquivo_morto.py): cada banco ganha um segundo
+# arquivo com as atas antigas, anexado a todas as conexões. Com
+# ARQUIVO_MESES > 0 uma thread move as atas com mais de N meses para lá.
+arquivo_morto.init_app(app, tenants.bancos, lambda caminho: escritor.get_escritor(caminho, app).executar)
+
+# Backup e réplica cobrem os bancos e os seus arquivos mortos
+def bancos_com_arquivos(app):
+    return arquivo_morto.com_arquivos(tenants.bancos(app))
+
+# Backups online (functions/backup.py). Com BACKUP_INTERVALO_H > 0 uma thread
+# faz o backup de todos os bancos nesse intervalo.
+backup.init_app(app, bancos_com_arquivos)
+
+# Réplica contínua por cópia do WAL (functions/replica.py). Com REPLICA_DIR a
+# aplicação copia o WAL de todos os bancos para essa pasta.
+replica.init_app(app, bancos_com_arquivos)
+
+# Manutenção dos bancos (functions/manutencao.py). Com MANUTENCAO_INTERVALO_H > 0
+# uma thread de baixa prioridade roda optimize, incremental_vacuum e checkpoint
+# nesse intervalo, e ANALYZE e integrity_check a cada MANUTENCAO_COMPLETA_H.
+manutencao.init_app(app, bancos_com_arquivos)
+
+# Inicialização do banco de dados: aplica só as migrações pendentes
+# (database/migrations) no catálogo e nos bancos das estacas. Com o banco em
+# dia custa uma leitura de PRAGMA.
+def init_db():
+    try:
+        for caminho in tenants.bancos(app):
+            aplicadas = migrations.migrar(caminho)
+            arquivo_morto.preparar(caminho)
+            if aplicadas:
+                print(f"Banco de dados {caminho} atualizado para a versão {aplicadas[-1]}.")
+    except Exception as e:
+        print(f"Erro ao inicializar banco: {e}")
+        raise
+
+# Comando para aplicar as migrações sem subir o servidor: flask --app app migrar
+@app.cli.command("migrar")
+def migrar_command():
+    for caminho in tenants.bancos(app):
+        aplicadas = migrations.migrar(caminho)
+        arquivo_morto.preparar(caminho)
+        print(f"{caminho}: {len(aplicadas)} migração(ões) aplicada(s).")
+
+# Divide o banco único em um banco por estaca: flask --app app dividir-por-estaca database/estacas
+@app.cli.command("dividir-por-estaca")
+@click.argument("pasta", required=False)
+@click.option("--remover-do-catalogo", is_flag=True,
+              help="Apaga do banco original as atas copiadas para as estacas")
+def dividir_por_estaca_command(pasta, remover_do_catalogo):
+    pasta = pasta or app.config['SHARDS_DIR']
+    if not pasta:
+        raise click.UsageError("Informe a pasta dos bancos das estacas ou configure SHARDS_DIR.")
+    try:
+        tenants.dividir(app.config['DATABASE'], pasta, remover_do_catalogo)
+    except (FileExistsError, ValueError) as e:
+        raise click.ClickException(str(e))
+    print(f"Pronto. Para usar: SHARDS_DIR={pasta}")
+
+# Refaz o histórico de discursantes de todas as alas: flask --app app reconstruir-historico
+@app.cli.command("reconstruir-historico")
+def reconstruir_historico_command():
+    total = 0
+    for caminho in tenants.bancos(app):
+        conn = db.connect(caminho)
+        try:
+            with conn:
+                total += historico_discursantes.reconstruir(conn)
+        finally:
+            conn.close()
+    print(f"Histórico de discursantes reconstruído ({total} nomes).")
+
+# Recalcula os contadores de ala_stats a partir das atas: flask --app app reconciliar-estatisticas
+@app.cli.command("reconciliar-estatisticas")
+def reconciliar_estatisticas_command():
+    divergentes = 0
+    for caminho in tenants.bancos(app):
+        conn = db.connect(caminho)
+        try:
+            with conn:
+                divergentes += ala_stats.reconciliar(conn)
+        finally:
+            conn.close()
+    print(f"Estatísticas reconciliadas ({divergentes} linha(s) corrigida(s)).")
+
+# Refaz o resumo das atas usado pelas listas: flask --app app reconstruir-resumo
+@app.cli.command("reconstruir-resumo")
+def reconstruir_resumo_command():
+    total = 0
+    for caminho in tenants.bancos(app):
+        conn = db.connect(caminho)
+        try:
+            with conn:
+                total += ata_summary.reconstruir(conn)
+        finally:
+            conn.close()
+    print(f"Resumo das atas reconstruído ({total} ata(s)).")
+
+# Apaga do changelog as mudanças antigas: flask --app app podar-changelog --dias 90
+@app.cli.command("podar-changelog")
+@click.option("--dias", type=int, default=90, show_default=True)
+def podar_changelog_command(dias):
+    total = 0
+    for caminho in tenants.bancos(app):
+        conn = db.connect(caminho)
+        try:
+            with conn:
+                total += changelog.podar(conn, dias)
+        finally:
+            conn.close()
+    print(f"{total} mudança(s) com mais de {dias} dia(s) removida(s) do changelog.")
+
+# Backup de todos os bancos: flask --app app backup [--pasta database/backups] [--manter 7]
+@app.cli.command("backup")
+@click.option("--pasta", help="Pasta dos backups (padrão: BACKUP_DIR)")
+@click.option("--manter", type=int, help="Backups mantidos por banco (padrão: BACKUP_MANTER)")
+def backup_command(pasta, manter):
+    pasta = pasta or app.config['BACKUP_DIR']
+    manter = manter or app.config['BACKUP_MANTER']
+    for caminho in bancos_com_arquivos(app):
+        try:
+            feito = backup.criar(caminho, pasta, manter)
+        except (backup.ErroDeBackup, sqlite3.Error) as e:
+            raise click.ClickException(str(e))
+        print(f"{feito['arquivo']}: {feito['bytes']} bytes, {feito['passos']} passo(s), "
+              f"{feito['segundos']:.2f}s, integrity_check ok, {len(feito['apagados'])} antigo(s) removido(s)")
+
+# Lista os backups: flask --app app listar-backups [--verificar]
+@app.cli.command("listar-backups")
+@click.option("--pasta", help="Pasta dos backups (padrão: BACKUP_DIR)")
+@click.option("--verificar", is_flag=True, help="Roda o integrity_check em cada backup")
+def listar_backups_command(pasta, verificar):
+    for item in backup.listar(pasta or app.config['BACKUP_DIR']):
+        situacao = ""
+        if verificar:
+            problemas = backup.verificar(item['arquivo'])
+            situacao = "  ok" if problemas == ['ok'] else f"  CORROMPIDO: {problemas[:3]}"
+        print(f"{item['arquivo']}  {item['quando']:%Y-%m-%d %H:%M:%S} UTC  {item['bytes']} bytes{situacao}")
+
+# Restaura um backup (com a aplicação parada):
+# flask --app app restaurar-backup database/backups/atas-20240101-030000.db
+@app.cli.command("restaurar-backup")
+@click.argument("arquivo", type=click.Path(exists=True, dir_okay=False))
+@click.option("--destino", help="Banco a substituir (padrão: o banco de mesmo nome)")
+@click.confirmation_option(prompt="O banco atual será substituído (uma cópia dele fica na pasta de backups). Continuar?")
+def restaurar_backup_command(arquivo, destino):
+    if not destino:
+        nome = os.path.basename(arquivo).rsplit("-", 2)[0]
+        candidatos = [c for c in bancos_com_arquivos(app) if os.path.splitext(os.path.basename(c))[0] == nome]
+        if not candidatos:
+            raise click.UsageError(f"Nenhum banco configurado se chama {nome}; informe --destino.")
+        destino = candidatos[0]
+    try:
+        seguranca = backup.restaurar(arquivo, destino, app.config['BACKUP_DIR'])
+    except (backup.ErroDeBackup, sqlite3.Error) as e:
+        raise click.ClickException(str(e))
+    if seguranca:
+        print(f"Estado anterior de {destino} guardado em {seguranca}.")
+    print(f"{destino} restaurado de {arquivo}. Migrações pendentes serão aplicadas ao iniciar a aplicação.")
+
+# Replica os bancos em primeiro plano (em vez da thread da aplicação): flask --app app replicar
+@app.cli.command("replicar")
+@click.option("--pasta", help="Pasta da réplica (padrão: REPLICA_DIR)")
+def replicar_command(pasta):
+    pasta = pasta or app.config['REPLICA_DIR']
+    if not pasta:
+        raise click.UsageError("Informe --pasta ou configure REPLICA_DIR.")
+    replicacao = replica.Replicacao(lambda: bancos_com_arquivos(app), pasta, app.config['REPLICA_INTERVALO_S'],
+                                    **replica.opcoes_configuradas(app))
+    print(f"Replicando {', '.join(bancos_com_arquivos(app))} em {pasta} (Ctrl+C para parar)")
+    replicacao.iniciar()
+    try:
+        while replicacao.esperar(1):
+            pass
+    except KeyboardInterrupt:
+        replicacao.parar()
+
+# Reconstrói um banco a partir da réplica, opcionalmente até um instante:
+# flask --app app restaurar-replica database/atas-restaurado.db --ate 2024-06-02T10:30:00
+@app.cli.command("restaurar-replica")
+@click.argument("destino", type=click.Path(dir_okay=False))
+@click.option("--pasta", help="Pasta da réplica (padrão: REPLICA_DIR)")
+@click.option("--banco", default=None, help="Nome do banco na réplica (padrão: o do DATABASE_PATH)")
+@click.option("--ate", type=click.DateTime(), help="Instante (horário local) até onde restaurar")
+def restaurar_replica_command(destino, pasta, banco, ate):
+    pasta = pasta or app.config['REPLICA_DIR']
+    if not pasta:
+        raise click.UsageError("Informe --pasta ou configure REPLICA_DIR.")
+    banco = banco or os.path.splitext(os.path.basename(app.config['DATABASE']))[0]
+    try:
+        feito = replica.restaurar(pasta, banco, destino, int(ate.timestamp() * 1000) if ate else None)
+    except (replica.ErroDeReplica, sqlite3.Error) as e:
+        raise click.ClickException(str(e))
+    print(f"{destino} restaurado da geração {feito['geracao']} com {feito['segmentos']} trecho(s) do WAL "
+          f"até {datetime.fromtimestamp(feito['ate'] / 1000):%Y-%m-%d %H:%M:%S} ({feito['segundos']:.2f}s).")
+
+# Manutenção dos bancos: flask --app app manutencao [--tarefa analyze --tarefa vacuum] [--compactar]
+@app.cli.command("manutencao")
+@click.option("--tarefa", "tarefas", multiple=True, type=click.Choice(manutencao.TAREFAS),
+              help="Tarefa a rodar (pode repetir; padrão: todas)")
+@click.option("--compactar", is_flag=True,
+              help="VACUUM completo antes (liga o auto_vacuum incremental; trava as escritas)")
+def manutencao_command(tarefas, compactar):
+    modo = manutencao.modo_de_checkpoint(app)
+    problemas = False
+    for caminho in bancos_com_arquivos(app):
+        try:
+            if compactar:
+                feito = manutencao.compactar(caminho, modo)
+                print(f"{caminho} compactado em {feito['segundos']:.2f}s: "
+                      f"{feito['antes']['bytes'] / 1e6:.1f} -> {feito['depois']['bytes'] / 1e6:.1f} MB")
+            for feita in manutencao.executar(caminho, tarefas or manutencao.TAREFAS, modo,
+                                             app.config['MANUTENCAO_PAGINAS']):
+                print(manutencao.descrever(caminho, feita))
+        except (manutencao.ErroDeManutencao, sqlite3.Error) as e:
+            print(f"{caminho}: {e}")
+            problemas = True
+    if problemas:
+        raise click.ClickException("manutenção terminou com erros")
+
+# Move para o arquivo morto as atas com mais de N meses: flask --app app arquivar-atas --meses 24
+@app.cli.command("arquivar-atas")
+@click.option("--meses", type=int, help="Idade mínima em meses (padrão: ARQUIVO_MESES)")
+@click.option("--ala", "ala_id", type=int, help="Só as atas desta ala")
+@click.option("--lote", type=int, default=arquivo_morto.LOTE_PADRAO, show_default=True,
+              help="Atas por transação")
+def arquivar_atas_command(meses, ala_id, lote):
+    meses = meses or app.config['ARQUIVO_MESES']
+    if not meses or meses <= 0:
+        raise click.UsageError("Informe --meses ou configure ARQUIVO_MESES.")
+    antes_de = arquivo_morto.data_limite(meses)
+    for caminho in tenants.bancos(app):
+        arquivo_morto.preparar(caminho)
+        conn = db.connect(caminho, {'busy_timeout': 5000})
+        try:
+            feito = arquivo_morto.arquivar(arquivo_morto.transacoes(conn), antes_de, lote, ala_id=ala_id)
+        finally:
+            conn.close()
+        contagem = arquivo_morto.contar(caminho)
+        print(f"{caminho}: {feito['arquivadas']} ata(s) anteriores a {antes_de} arquivada(s) em "
+              f"{feito['lotes']} lote(s), {feito['segundos']:.1f}s; {contagem['principal']} no banco, "
+              f"{contagem['arquivo']} no arquivo morto.")
+        if feito['mantidas']:
+            print(f"  {feito['mantidas']} alterada(s) durante a cópia ficaram no banco; rode de novo para arquivá-las.")
+
+# Traz atas de volta do arquivo morto: flask --app app desarquivar-atas [--desde 2020-01-01]
+@app.cli.command("desarquivar-atas")
+@click.option("--desde", help="Só as atas a partir desta data (AAAA-MM-DD); padrão: todas")
+@click.option("--ala", "ala_id", type=int, help="Só as atas desta ala")
+@click.option("--lote", type=int, default=arquivo_morto.LOTE_PADRAO, show_default=True,
+              help="Atas por transação")
+def desarquivar_atas_command(desde, ala_id, lote):
+    for caminho in tenants.bancos(app):
+        conn = db.connect(caminho, {'busy_timeout': 5000})
+        try:
+            if not arquivo_morto.anexado(conn):
+                continue
+            feito = arquivo_morto.desarquivar(arquivo_morto.transacoes(conn), desde, lote, ala_id=ala_id)
+        finally:
+            conn.close()
+        print(f"{caminho}: {feito['desarquivadas']} ata(s) de volta ao banco em {feito['lotes']} lote(s), "
+              f"{feito['segundos']:.1f}s.")
+
+# Exporta as atas de uma ala: flask --app app exportar-atas 1 --formato csv --desde 2024-01-01 -o atas.csv
+@app.cli.command("exportar-atas")
+@click.argument("ala_id", type=int)
+@click.option("--formato", type=click.Choice(sorted(exportacao.FORMATOS)), default="jsonl")
+@click.option("--desde", help="Data inicial (AAAA-MM-DD), inclusiva")
+@click.option("--ate", help="Data final (AAAA-MM-DD), inclusiva")
+@click.option("-o", "--saida", type=click.File("w", encoding="utf-8"), default="-")
+def exportar_atas_command(ala_id, formato, desde, ate, saida):
+    conn = db.connect(tenants.caminho_da_ala(ala_id, app))
+    try:
+        for linha in exportacao.exportar(conn, ala_id, formato, desde, ate):
+            saida.write(linha)
+    finally:
+        conn.close()
+
+# Importa atas de um arquivo CSV/JSONL: flask --app app importar-atas 1 atas.csv
+@app.cli.command("importar-atas")
+@click.argument("ala_id", type=int)
+@click.argument("arquivo", type=click.Path(exists=True, dir_okay=False))
+@click.option("--formato", type=click.Choice(sorted(exportacao.FORMATOS)),
+              help="Padrão: pela extensão do arquivo")
+def importar_atas_command(ala_id, arquivo, formato):
+    formato = formato or formato_do_arquivo(arquivo)
+    conn = db.connect(tenants.caminho_da_ala(ala_id, app))
+    try:
+        with open(arquivo, "r", encoding="utf-8-sig", newline="") as f:
+            relatorio = importacao.importar(
+                arquivo_morto.transacoes(conn), importacao.ler_registros(f, formato), ala_id,
+                lote=importacao.LOTE_CLI)
+    finally:
+        conn.close()
+    print(f"{relatorio['importadas']} de {relatorio['lidas']} ata(s) importada(s).")
+    for erro in relatorio['erros']:
+        print(f"  linha {erro['linha']}: {erro['erro']}")
+    if relatorio['total_erros'] > len(relatorio['erros']):
+        print(f"  ... e mais {relatorio['total_erros'] - len(relatorio['erros'])} erro(s).")
+
+def formato_do_arquivo(nome):
+    return "csv" if nome.lower().endswith(".csv") else "jsonl"
+
+# Carrega o catálogo de hinos (linhas "numero;titulo"): flask --app app importar-hinos hinos.csv
+@app.cli.command("importar-hinos")
+@click.argument("arquivo", type=click.File("r", encoding="utf-8"))
+def importar_hinos_command(arquivo):
+    conteudo = arquivo.read()
+    for caminho in tenants.bancos(app):
+        conn = db.connect(caminho)
+        try:
+            with conn:
+                total = hinos.importar_catalogo(conn, io.StringIO(conteudo))
+        finally:
+            conn.close()
+    print(f"{total} hino(s) importado(s) para o catálogo.")
+
+# Mensagem Autenticação no Login
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not session.get('logged_in'):
+            flash('Por favor, faça login para acessar esta página.', 'error')
+            return redirect(url_for('login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+# app.py
+
+# Autenticação Login
+def authenticate_user(username, password):
+    conn = get_catalogo()
+    # 1. Busca o usuário APENAS pelo username (NUNCA pela senha)
+    user = conn.execute(
+        "SELECT * FROM users WHERE username = ?", 
+        (username,)
+    ).fetchone()
+    
+    # 2. Se o usuário existir, verifica a senha contra o hash armazenado
+    if user and check_password_hash(user['password'], password):
+        return user
+    return None # Retorna None se o usuário não for encontrado ou a senha não bater
+
+# ==================================================================
+# Rotas principais do sistema de atas
+# ==================================================================
+
+# Aba de discursantes recentes na criação de atas sacramentais
+def get_discursantes_recentes():
+    """Busca discursantes dos últimos 3 meses"""
+    conn = get_db()
+    
+    # usar os últimos 90 dias (mais confiável que manipular day=1)
+    tres_meses_atras = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
+    
+    # Um discursante por nome, já com a data mais recente (limitado a 20)
+    discursantes_recentes = historico_discursantes.recentes(conn, session['user_id'], tres_meses_atras)
+    
+    return [{
+        'nome': row['nome'],
+        'data': datetime.strptime(row['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
+    } for row in discursantes_recentes]
+
+
+# Próxima reunião sacramental automática na página inicial
+def get_proxima_reuniao_sacramental():
+    """Encontra a data da próxima reunião sacramental"""
+    hoje = datetime.now().date()
+    
+    # Encontrar próximo domingo
+    dias_para_domingo = (6 - hoje.weekday()) % 7
+    if dias_para_domingo == 0:  # Se hoje é domingo
+        proximo_domingo = hoje
+    else:
+        proximo_domingo = hoje + timedelta(days=dias_para_domingo)
+    
+    # Verificar se já existe ata para esta data
+    conn = get_db()
+    ata_existente = conn.execute(
+        "SELECT id FROM atas WHERE ala_id = ? AND tipo = 'sacramental' AND data = ?", 
+        (session['user_id'], proximo_domingo.strftime("%Y-%m-%d"))
+    ).fetchone()
+    
+    # Formatar data em português
+    data_formatada = proximo_domingo.strftime("%d/%m/%Y")
+    
+    if ata_existente:
+        return {
+            'data': proximo_domingo.strftime("%Y-%m-%d"),
+            'data_formatada': data_formatada,
+            'ata_existente': True,
+            'id': ata_existente['id']
+        }
+    else:
+        return None
+
+# NOVA FUNÇÃO
+def get_temas_recentes():
+    """Busca temas dos últimos 3 meses"""
+    conn = get_db()
+    
+    # Data de 90 dias atrás
+    tres_meses_atras = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
+    
+    temas_recentes = conn.execute("""
+        SELECT DISTINCT tema, data 
+        FROM ata_summary 
+        WHERE ala_id = ? 
+          AND data >= ? 
+          AND tipo = 'sacramental' 
+          AND tema IS NOT NULL 
+          AND TRIM(tema) <> ''
+        ORDER BY data DESC
+        LIMIT 10
+    """, (session['user_id'], tres_meses_atras)).fetchall()
+    
+    temas_formatados = []
+    for tema in temas_recentes:
+        if tema['tema']:
+            data_obj = datetime.strptime(tema['data'], "%Y-%m-%d")
+            data_formatada = data_obj.strftime("%d/%m/%Y")
+            temas_formatados.append({
+                'tema': tema['tema'],
+                'data': data_formatada
+            })
+    
+    return temas_formatados[:10]
+
+def get_hinos_recentes():
+    """Busca hinos tocados nos últimos 2 meses, agrupados por data."""
+    conn = get_db()
+    
+    # Data de 60 dias atrás (aproximadamente 2 meses)
+    dois_meses_atras = (datetime.now() - timedelta(days=60)).strftime("%Y-%m-%d")
+    
+    # Hinos (abertura, sacramental, intermediário, encerramento) das últimas 10 reuniões
+    hinos_recentes_raw = ata_listas.hinos_recentes(conn, session['user_id'], dois_meses_atras)
+
+    hinos_por_data = {}
+
+    for row in hinos_recentes_raw:
+        data_formatada = datetime.strptime(row['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
+        grupo = hinos_por_data.setdefault(data_formatada, {'data': data_formatada, 'hinos': []})
+        grupo['hinos'].append({'tipo': ata_listas.NOMES_PAPEIS_HINOS[row['papel']], 'nome': row['hino']})
+            
+    return list(hinos_por_data.values())[:10]
+
+# Configuração do Rate Limiting
+limiter = Limiter(
+    app=app,
+    key_func=get_remote_address,
+    storage_uri="memory://",  # Use memória para desenvolvimento. Em produção, use Redis ou Memcached.
+    default_limits=["200 per day", "50 per hour"]
+)
+
+# Rota de Login de Usuário
+@app.route('/', methods=['GET', 'POST'])
+@limiter.limit("5 per minute", methods=["POST"]) # error="Muitas tentativas de login. Tente novamente em um minuto.")
+def login():
+    # If user is already logged in, redirect to index
+    if session.get('logged_in'):
+        return redirect(url_for('index'))
+    
+    if request.method == 'POST':
+        username = request.form.get('username', '').strip()
+        password = request.form.get('password', '').strip()
+        
+        if not username or not password:
+            flash('Por favor, preencha todos os campos.', 'error')
+            return render_template('login.html')
+        
+        user = authenticate_user(username, password)
+        
+        if user:
+            session['logged_in'] = True
+            session['username'] = user['username']
+            session['user_id'] = user['id']
+            session['estaca_id'] = tenants.estaca_da_ala(get_catalogo(), user['id'])
+            flash(f'Login realizado com sucesso! Bem-vindo, {user["username"]}.', 'success')
+            return redirect(url_for('index'))
+        else:
+            flash('Credenciais inválidas. Por favor, tente novamente.', 'error')
+    
+    return render_template('login.html')
+
+# Rota de Logout de Usuário
+@app.route('/logout')
+def logout():
+    session.clear()
+    flash('Você saiu do sistema.', 'success')
+    return redirect(url_for('login'))
+
+# ==================================================================
+# Rotas de Configurações
+# ==================================================================
+
+# Rota para configurações com clonagem automática de templates padrão
+@app.route("/configuracoes")
+@login_required
+def configuracoes():
+    conn = get_db()
+    ala_id = session['user_id']
+
+    # 1. Buscar templates da ala logada
+    templates_row = conn.execute("SELECT * FROM templates WHERE ala_id = ?", (ala_id,)).fetchall()
+    
+    # 2. LÓGICA DE CLONAGEM: Se não houver templates para esta ala, copia os padrões (ala_id = 0)
+    if not templates_row:
+        def clonar_modelos(conn):
+            # Outra requisição pode ter clonado enquanto esta esperava a vez
+            if conn.execute("SELECT 1 FROM templates WHERE ala_id = ?", (ala_id,)).fetchone():
+                return
+            modelos_mestres = conn.execute("SELECT * FROM templates WHERE ala_id = 0").fetchall()
+            for modelo in modelos_mestres:
+                conn.execute("""
+                    INSERT INTO templates (
+                        ala_id, tipo_template, nome, boas_vindas, desobrigacoes, apoios, 
+                        confirmacoes_batismo, apoio_membro_novo, bencao_crianca, 
+                        sacramento, mensagens, live, encerramento
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    ala_id, modelo['tipo_template'], modelo['nome'], modelo['boas_vindas'], 
+                    modelo['desobrigacoes'], modelo['apoios'], modelo['confirmacoes_batismo'], 
+                    modelo['apoio_membro_novo'], modelo['bencao_crianca'], modelo['sacramento'], 
+                    modelo['mensagens'], modelo['live'], modelo['encerramento']
+                ))
+        escrever(clonar_modelos)
+        # Refaz a busca agora com os templates clonados
+        templates_row = conn.execute("SELECT * FROM templates WHERE ala_id = ?", (ala_id,)).fetchall()
+
+    templates = [dict(t) for t in templates_row]
+
+    # 3. Buscar informações da unidade (Sua lógica original preservada)
+    unidade_row = get_catalogo().execute(
+        "SELECT * FROM unidades WHERE ala_id = ?",
+        (ala_id,)
+    ).fetchone()
+
+    if unidade_row:
+        unidade = dict(unidade_row)
+        primeiro = unidade.get('primeiro_conselheiro') or ''
+        segundo = unidade.get('segundo_conselheiro') or ''
+
+        if not primeiro and not segundo:
+            cons_raw = unidade.get('conselheiros') or ''
+            if cons_raw:
+                try:
+                    parsed = json.loads(cons_raw)
+                    if isinstance(parsed, list):
+                        primeiro = parsed[0] if len(parsed) > 0 else ''
+                        segundo = parsed[1] if len(parsed) > 1 else ''
+                except Exception:
+                    if '|' in cons_raw:
+                        parts = [p.strip() for p in cons_raw.split('|', 1)]
+                        primeiro = parts[0]
+                        segundo = parts[1] if len(parts) > 1 else ''
+                    elif '\n' in cons_raw:
+                        parts = [p.strip() for p in cons_raw.split('\n', 1)]
+                        primeiro = parts[0]
+                        segundo = parts[1] if len(parts) > 1 else ''
+                    else:
+                        primeiro = cons_raw.strip()
+
+        unidade['primeiro_conselheiro'] = primeiro
+        unidade['segundo_conselheiro'] = segundo
+    else:
+        unidade = {}
+
+    # 4. Estatísticas (contadores mantidos por triggers em ala_stats)
+    stats = ala_stats.ler(conn, ala_id, datetime.now().strftime("%Y-%m"))
+
+    return render_template(
+        "configuracoes.html",
+        templates=templates,
+        unidade=unidade,
+        total_atas=stats['total'],
+        atas_sacramentais=stats['sacramental'],
+        atas_batismo=stats['batismo'],
+        atas_mes=stats['mes']
+    )
+
+# Rota para salvar configurações da ala
+@app.route("/configuracoes/ala/salvar", methods=["POST"])
+@login_required
+def salvar_configuracoes_ala():
+    ala_id = session['user_id']
+    nome_ala = request.form.get("nome_ala")
+    bispo = request.form.get("bispo")
+    primeiro_conselheiro = request.form.get("primeiro_conselheiro")
+    segundo_conselheiro = request.form.get("segundo_conselheiro")
+    recepcionista = request.form.get("recepcionista")
+    pianista = request.form.get("pianista")
+    regente_musica = request.form.get("regente_musica")
+    horario = request.form.get("horario")
+    
+    def gravar(conn):
+        # Verificar se já existe registro para esta ala
+        unidade_existente = conn.execute(
+            "SELECT * FROM unidades WHERE ala_id = ?",
+            (ala_id,)
+        ).fetchone()
+
+        if unidade_existente:
+            # Atualizar - não tocar em estaca_id para evitar inconsistências
+            conn.execute("""
+                UPDATE unidades
+                SET nome = ?, bispo = ?, primeiro_conselheiro = ?, segundo_conselheiro = ?, horario = ?, recepcionista = ?, pianista = ?, regente_musica = ?
+                WHERE ala_id = ?
+            """, (nome_ala, bispo, primeiro_conselheiro, segundo_conselheiro, horario, recepcionista, pianista, regente_musica, ala_id))
+        else:
+            # Inserir - estaca_id usará valor default definido no schema (DEFAULT 1)
+            conn.execute("""
+                INSERT INTO unidades (ala_id, nome, bispo, primeiro_conselheiro, segundo_conselheiro, horario, recepcionista, pianista, regente_musica)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (ala_id, nome_ala, bispo, primeiro_conselheiro, segundo_conselheiro, horario, recepcionista, pianista, regente_musica))
+
+    # unidades fica no catálogo
+    escrever(gravar, catalogo=True)
+
+    flash("Configurações da ala salvas com sucesso!", "success")
+    return redirect(url_for("configuracoes"))
+
+# Rota para editar template
+@app.route("/configuracoes/template/<int:template_id>")
+@login_required
+def editar_template(template_id):
+    conn = get_db()
+    template = conn.execute(
+        "SELECT * FROM templates WHERE id = ?", 
+        (template_id,)
+    ).fetchone()
+    
+    if template:
+        template = dict(template)
+        return render_template("_editar_template.html", template=template)
+    else:
+        return "Template não encontrado", 404
+
+# Rota para salvar template
+@app.route("/configuracoes/template/<int:template_id>/salvar", methods=["POST"])
+@login_required
+def salvar_template(template_id):
+    try:
+        # Mapeamento exato com o seu novo SCHEMA do SQL
+        valores = (
+            request.form.get('nome'), request.form.get('boas_vindas'),
+            request.form.get('desobrigacoes'), request.form.get('apoios'),
+            request.form.get('confirmacoes_batismo'), request.form.get('apoio_membro_novo'),
+            request.form.get('bencao_crianca'), request.form.get('sacramento'),
+            request.form.get('mensagens'), request.form.get('live'),
+            request.form.get('encerramento'), template_id, session['user_id']
+        )
+        escrever(lambda conn: conn.execute("""
+            UPDATE templates SET
+                nome = ?, boas_vindas = ?, desobrigacoes = ?, apoios = ?, 
+                confirmacoes_batismo = ?, apoio_membro_novo = ?, bencao_crianca = ?,
+                sacramento = ?, mensagens = ?, live = ?, encerramento = ?
+            WHERE id = ? AND ala_id = ?
+        """, valores))
+        
+        flash("Template atualizado com sucesso!", "success")
+    except Exception as e:
+        flash(f"Erro ao salvar: {e}", "error")
+    return redirect(url_for("configuracoes"))
+
+# Rota para criar novo template
+@app.route("/configuracoes/template/criar", methods=["POST"])
+@login_required
+def criar_template():
+    ala_id = session.get('user_id')
+    
+    try:
+        nome = request.form.get('nome')
+        tipo_template = request.form.get('tipo_template') # 1=Sacramental, 2=Batismo
+
+        def criar(conn):
+            # 1. VERIFICAÇÃO DE DUPLICIDADE: 
+            # Busca se já existe um template desse TIPO para essa ALA
+            existente = conn.execute(
+                "SELECT id FROM templates WHERE tipo_template = ? AND ala_id = ?", 
+                (tipo_template, ala_id)
+            ).fetchone()
+
+            if existente:
+                return False
+
+            # 2. INSERÇÃO (Caso seja realmente novo)
+            conn.execute("""
+                INSERT INTO templates (
+                    tipo_template, ala_id, nome, boas_vindas, desobrigacoes, apoios, 
+                    confirmacoes_batismo, apoio_membro_novo, bencao_crianca, 
+                    sacramento, mensagens, live, encerramento
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                tipo_template, ala_id, nome,
+                "Bom dia irmãos...", "É proposto...", "O(a) irmão(o)...",
+                "O(a) irmão(o)...", "O(a) irmão(o)...", "Gostaríamos...",
+                "Passaremos...", "Agradecemos...", "Gostaria...", "Agradecemos..."
+            ))
+            return True
+
+        if not escrever(criar):
+            # Se já existe, apenas redirecionamos ou avisamos. 
+            # O ideal é que o usuário use a rota de SALVAR para editar.
+            flash("Já existe um template para este tipo. Por favor, edite o existente.", "warning")
+            return redirect(url_for("configuracoes"))
+        
+        flash("Novo template criado com sucesso!", "success")
+    except Exception as e:
+        print(f"Erro: {e}")
+        flash("Erro ao criar template", "error")
+    return redirect(url_for("configuracoes"))
+   
+# Rota para apagar template
+@app.route("/configuracoes/template/<int:template_id>/apagar", methods=["POST"])
+@login_required
+def apagar_template(template_id):
+    def apagar(conn):
+        # Verificar se o template existe
+        template = conn.execute(
+            "SELECT * FROM templates WHERE id = ?", 
+            (template_id,)
+        ).fetchone()
+        
+        if not template:
+            return 'nao_encontrado'
+        
+        # Não permitir apagar todos os templates - manter pelo menos um de cada tipo
+        templates_restantes = conn.execute(
+            "SELECT COUNT(*) FROM templates WHERE tipo_template = ?", 
+            (template['tipo_template'],)
+        ).fetchone()[0]
+        
+        if templates_restantes <= 1:
+            return 'ultimo'
+        
+        # Apagar o template
+        conn.execute("DELETE FROM templates WHERE id = ?", (template_id,))
+        return 'apagado'
+
+    try:
+        resultado = escrever(apagar)
+        
+        if resultado == 'nao_encontrado':
+            return jsonify({
+                'success': False,
+                'message': 'Template não encontrado'
+            }), 404
+        
+        if resultado == 'ultimo':
+            return jsonify({
+                'success': False,
+                'message': 'Não é possível apagar o último template deste tipo'
+            }, 400)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Template apagado com sucesso!'
+        })
+        
+    except Exception as e:
+        print(f"Erro ao apagar template: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Erro interno ao apagar template'
+        }), 500
+
+# ==================================================================
+# Rotas de Atas
+# ==================================================================
+
+# Página Inicial com lista de atas
+@app.route('/index')
+@login_required
+def index():
+    conn = get_db()
+    
+    # Gerar lista de meses para o seletor EM PORTUGUÊS
+    meses = []
+    current_year = datetime.now().year
+    current_month = datetime.now().month
+    
+    # Nomes dos meses em português
+    meses_ptbr = [
+        '', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+        'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
+    ]
+    
+    for month in range(1, 13):
+        month_name = meses_ptbr[month]
+        month_value = f"{current_year}-{month:02d}"
+        meses.append({
+            'value': month_value,
+            'nome': f"{month_name} {current_year}"
+        })
+    
+    # Formato do mês atual para seleção automática
+    mes_atual = datetime.now().strftime("%Y-%m")
+    mes_nome = meses_ptbr[datetime.now().month] + " " + str(datetime.now().year)  # CORREÇÃO: Definir mes_nome
+    
+    # Carregar atas do mês atual da ala do usuário
+    atas = consultas_atas.atas_do_mes(conn, session['user_id'], mes_atual)
+    
+    # Buscar próxima reunião sacramental
+    proxima_reuniao = get_proxima_reuniao_sacramental()
+    
+    return render_template(
+        "index.html",
+        meses=meses,
+        mes_atual=mes_atual,
+        mes_nome=mes_nome,  # AGORA ESTÁ DEFINIDA
+        atas=atas,
+        proxima_reuniao=proxima_reuniao
+    )
+
+# Rota para visualizar todas as atas
+@app.route("/atas")
+@login_required
+def listar_todas_atas():
+    conn = get_db()
+    
+    # Primeira página de atas da ala, da mais recente para a mais antiga
+    atas, proximo_cursor = consultas_atas.pagina_de_atas(conn, session['user_id'], limite=tamanho_pagina_atas())
+    total_atas = ala_stats.ler(conn, session['user_id'], datetime.now().strftime("%Y-%m"))['total']
+    
+    # Buscar discursantes dos últimos 3 meses
+    tres_meses_atras = (datetime.now().replace(day=1) - timedelta(days=90)).strftime("%Y-%m-%d")
+    
+    discursantes_recentes = historico_discursantes.recentes(conn, session['user_id'], tres_meses_atras)
+    
+    todos_discursantes = [{
+        'nome': row['nome'],
+        'data': datetime.strptime(row['data'], "%Y-%m-%d").strftime("%d/%m/%Y"),
+        'tema': row['tema'] or 'Sem tema definido'
+    } for row in discursantes_recentes]
+    
+    # Buscar temas dos últimos 90 dias, ignorando temas nulos/vazios
+    temas_recentes = conn.execute("""
+        SELECT tema, data 
+        FROM ata_summary 
+        WHERE ala_id = ? 
+          AND data >= ? 
+          AND tipo = 'sacramental' 
+          AND tema IS NOT NULL 
+          AND TRIM(tema) <> ''
+        ORDER BY data DESC
+    """, (session['user_id'], tres_meses_atras)).fetchall()
+
+    # DEBUG: mostrar o que foi retornado
+    print("DEBUG temas_recentes (count):", len(temas_recentes))
+    for t in temas_recentes[:20]:
+        print("DEBUG tema row:", dict(t))
+
+    temas_formatados = []
+    for tema in temas_recentes:
+        if tema['tema']:
+            data_obj = datetime.strptime(tema['data'], "%Y-%m-%d")
+            data_formatada = data_obj.strftime("%d/%m/%Y")
+            temas_formatados.append({
+                'tema': tema['tema'],
+                'data': data_formatada
+            })
+    
+    
+    return render_template(
+        "todas_atas.html",
+        atas=atas,
+        proximo_cursor=proximo_cursor,
+        total_atas=total_atas,
+        discursantes_recentes=todos_discursantes[:20],
+        temas_recentes=temas_recentes,
+        hinos_recentes=get_hinos_recentes()
+    )
+
+# Próximas páginas de /atas (fragmento HTML usado pelo botão "Carregar mais")
+@app.route("/atas/mais")
+@login_required
+def listar_mais_atas():
+    atas, proximo_cursor = consultas_atas.pagina_de_atas(
+        get_db(), session['user_id'], request.args.get("cursor"), tamanho_pagina_atas())
+    return render_template("_atas_pagina.html", atas=atas, proximo_cursor=proximo_cursor)
+
+def tamanho_pagina_atas():
+    limite = request.args.get("limite", app.config['ATAS_POR_PAGINA'], type=int)
+    return max(1, min(limite, 100))
+
+# Rota para editar uma ata existente
+@app.route("/ata/editar/<int:ata_id>")
+@login_required
+def editar_ata(ata_id):
+    """Rota para editar uma ata existente"""
+    # Pelo repositório, que também acha as atas do arquivo morto
+    ata = AtaRepository(get_db()).load(ata_id, session['user_id'])
+    
+    if not ata:
+        flash("Ata não encontrada ou você não tem permissão para editá-la.", "error")
+        return redirect(url_for('index'))
+    
+    # Redireciona para o formulário apropriado com os dados existentes
+    if ata.tipo == "sacramental":
+        return redirect(url_for("form_ata", tipo="sacramental", data=ata.data, editar=ata_id))
+    else:
+        return redirect(url_for("form_ata", tipo="batismo", data=ata.data, editar=ata_id))
+
+# Rota para excluir uma ata
+@app.route("/ata/excluir/<int:ata_id>")
+@login_required
+def excluir_ata(ata_id: int):
+    """Rota para excluir uma ata"""
+    ala_id = session['user_id']
+    usuario = session.get('username')
+    snapshot_a_cada = app.config['REVISOES_SNAPSHOT']
+
+    # Só atas da ala do usuário; detalhes e listas saem em cascata (ver functions/atas_em_lote.py)
+    def excluir(conn):
+        return atas_em_lote.excluir(conn, ala_id, [ata_id], usuario, snapshot_a_cada)
+
+    if escrever(excluir):
+        flash("Ata excluída com sucesso!", "success")
+    else:
+        flash("Ata não encontrada", "error")
+    
+    # Always return a redirect response
+    return redirect(url_for("index"))
+
+# Rota para buscar atas por texto (tema, discursantes, anúncios, chamados, batizados)
+@app.route("/atas/buscar")
+@login_required
+def buscar_atas():
+    texto = request.args.get("q", "").strip()
+    limite = request.args.get("limite", busca_atas.LIMITE_PADRAO, type=int)
+    resultados = busca_atas.buscar(get_db(), session['user_id'], texto, limite) if texto else []
+
+    if request.args.get("formato") == "json":
+        return jsonify({
+            "q": texto,
+            "resultados": [dict(r, trecho=str(r['trecho'])) for r in resultados],
+        })
+    return render_template("buscar_atas.html", q=texto, resultados=resultados)
+
+# Autocomplete dos campos de hino (número ou começo do título)
+@app.route("/hinos/sugerir")
+@login_required
+@limiter.exempt
+def sugerir_hinos():
+    return jsonify(hinos.sugerir(get_db(), request.args.get("q", "")))
+
+# Mudanças da ala desde o último seq do cliente (functions/changelog.py).
+# ?since=<seq>&espera=<segundos> segura a resposta até haver mudança (long-poll);
+# com sharding, as mudanças do catálogo (unidades) vêm em "catalogo", com
+# cursor próprio (?since_catalogo=<seq>).
+@app.route("/sync")
+@despacho.no_loop
+@login_required
+@limiter.exempt
+def sync():
+    ala_id = session['user_id']
+    since = request.args.get("since", type=int)
+    since_catalogo = request.args.get("since_catalogo", type=int)
+    espera = min(max(request.args.get("espera", 0, type=float), 0), app.config['SYNC_ESPERA_MAX'])
+    limite = max(1, min(request.args.get("limite", changelog.LIMITE_PADRAO, type=int), changelog.LIMITE_PADRAO))
+
+    def ler():
+        resultado = changelog.mudancas(get_db(), ala_id, since, limite)
+        if tenants.sharding_ativo():
+            resultado['catalogo'] = changelog.mudancas(get_catalogo(), ala_id, since_catalogo, limite)
+        return resultado
+
+    # A espera fica no loop; só as consultas vão para o pool
+    return jsonify(changelog.esperar_mudancas(lambda: despacho.executar(ler), espera))
+
+# Hinos não cantados nas últimas N semanas e mais usados no ano
+@app.route("/hinos/estatisticas")
+@login_required
+def estatisticas_hinos():
+    conn = get_db()
+    semanas = request.args.get("semanas", 12, type=int)
+    ano = request.args.get("ano", datetime.now().year, type=int)
+    return jsonify({
+        "semanas": semanas,
+        "ano": ano,
+        "nao_cantados": [dict(r) for r in hinos.nao_cantados(conn, session['user_id'], semanas)],
+        "mais_usados": [dict(r) for r in hinos.mais_usados(conn, session['user_id'], ano)],
+    })
+
+# Exportação de todas as atas da ala (CSV ou JSONL), enviada em streaming
+@app.route("/atas/exportar")
+@login_required
+def exportar_atas():
+    formato = request.args.get("formato", "csv")
+    desde = request.args.get("desde") or None
+    ate = request.args.get("ate") or None
+    if formato not in exportacao.FORMATOS:
+        return jsonify({"erro": "Formato inválido. Use csv ou jsonl."}), 400
+    try:
+        for valor in (desde, ate):
+            if valor:
+                datetime.strptime(valor, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"erro": "Datas devem estar no formato AAAA-MM-DD."}), 400
+
+    ala_id = session['user_id']
+    nome = f"atas_ala{ala_id}_{desde or 'inicio'}_{ate or datetime.now().strftime('%Y-%m-%d')}.{formato}"
+
+    # O corpo é gerado depois que a view retorna, fora do contexto da requisição:
+    # o gerador usa uma conexão própria do pool e cada bloco é lido no despacho
+    pool = db.get_pool(tenants.caminho_da_sessao())
+
+    def gerar():
+        conn = pool.acquire()
+        try:
+            yield from exportacao.exportar(conn, ala_id, formato, desde, ate)
+        finally:
+            pool.release(conn)
+
+    return Response(
+        despacho.iterar(gerar()),
+        mimetype=exportacao.FORMATOS[formato],
+        headers={"Content-Disposition": f"attachment; filename={nome}"},
+    )
+
+# Importação de atas históricas por upload (CSV ou JSONL)
+@app.route("/atas/importar", methods=["GET", "POST"])
+@login_required
+def importar_atas():
+    if request.method == "GET":
+        return render_template("importar_atas.html", relatorio=None)
+
+    arquivo = request.files.get("arquivo")
+    if not arquivo or not arquivo.filename:
+        flash("Selecione um arquivo CSV ou JSONL.", "error")
+        return redirect(url_for("importar_atas"))
+
+    formato = request.form.get("formato") or formato_do_arquivo(arquivo.filename)
+    if formato not in exportacao.FORMATOS:
+        flash("Formato inválido. Use csv ou jsonl.", "error")
+        return redirect(url_for("importar_atas"))
+
+    # Um job de escrita por lote: entre os lotes as outras gravações seguem
+    texto = io.TextIOWrapper(arquivo.stream, encoding="utf-8-sig", newline="")
+    try:
+        relatorio = importacao.importar(escrever, importacao.ler_registros(texto, formato), session['user_id'])
+    except UnicodeDecodeError:
+        flash("O arquivo deve estar em UTF-8.", "error")
+        return redirect(url_for("importar_atas"))
+
+    if request.args.get("formato") == "json":
+        return jsonify(relatorio)
+    return render_template("importar_atas.html", relatorio=relatorio)
+
+# Rota para listar atas por mês
+@app.route("/atas/mes/<string:mes>")
+@login_required
+def listar_atas_mes(mes):
+    conn = get_db()
+    
+    try:
+        # Validar formato do mês (YYYY-MM)
+        datetime.strptime(mes, "%Y-%m")
+        
+        atas = consultas_atas.atas_do_mes(conn, session['user_id'], mes)
+        
+        # Formatar nome do mês para exibição EM PORTUGUÊS
+        meses_ptbr = [
+            '', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
+        ]
+        data_mes = datetime.strptime(mes, "%Y-%m")
+        mes_nome = meses_ptbr[data_mes.month] + " " + str(data_mes.year)
+        
+        return render_template("_atas_list.html", 
+                             atas=atas, 
+                             mes_selecionado_nome=mes_nome)
+    
+    except ValueError:
+        return "<div class='info-card'>Mês inválido.</div>"
+
+# Filtro de template para carregar listas JSON
+@app.template_filter('loads')
+def json_loads_filter(s: str) -> list:
+    """Template filter to parse JSON strings - always returns a list"""
+    if not s:
+        return []
+    try:
+        result = json.loads(s)
+        # Ensure we always return a list, even if JSON contains other types
+        if isinstance(result, list):
+            return result
+        else:
+            return [result] if result is not None else []
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return []
+
+# Rota para criar nova ata
+@app.route("/ata/nova", methods=["GET", "POST"])
+@login_required
+def nova_ata():
+    if request.method == "POST":
+        tipo = request.form.get("tipo")
+        data = request.form.get("data")
+        
+        # Validação básica
+        if not tipo or not data:
+            flash("Erro: Tipo e data são obrigatórios", "error")
+            return render_template("nova_ata.html")
+            
+        # Validação de data - APENAS VERIFICA SE É UMA DATA VÁLIDA
+        try:
+            datetime.strptime(data, "%Y-%m-%d")
+        except ValueError:
+            flash("Erro: Data inválida", "error")
+            return render_template("nova_ata.html")
+            
+        return redirect(url_for("form_ata", tipo=tipo, data=data))
+    
+    # Data padrão: próximo domingo ou hoje se for domingo
+    hoje = datetime.now().date()
+    dias_para_domingo = (6 - hoje.weekday()) % 7
+    if dias_para_domingo == 0:  # Se hoje é domingo
+        data_padrao = hoje.strftime("%Y-%m-%d")
+    else:
+        data_padrao = (hoje + timedelta(days=dias_para_domingo)).strftime("%Y-%m-%d")
+    
+    return render_template("nova_ata.html", data_padrao=data_padrao)
+
+# Grava a ata e tudo que depende dela (detalhes, listas, hinos, busca, resumo).
+# Roda dentro de um job da thread de escrita; devolve o id da ata ou None se
+# `ata_id_editar` não é uma ata da ala.
+def gravar_ata(conn, ala_id, tipo, data, detalhes, ata_id_editar=None):
+    if ata_id_editar:
+        # Modo edição - só atualiza se a ata pertence à ala do usuário
+        row = conn.execute(
+            "UPDATE atas SET tipo=?, data=? WHERE id=? AND ala_id=? RETURNING id",
+            (tipo, data, ata_id_editar, ala_id)
+        ).fetchone()
+        if not row:
+            return None
+        ata_id = row['id']
+        # Se o tipo mudou, o registro de detalhes do tipo antigo deixa de valer
+        outro = "batismo" if tipo == "sacramental" else "sacramental"
+        conn.execute(f"DELETE FROM {outro} WHERE ata_id = ?", (ata_id,))
+    else:
+        # Modo criação - upsert em (ala_id, tipo, data): envio duplicado do
+        # formulário (duplo clique, reenvio após timeout) cai na mesma ata
+        ata_id = conn.execute("""
+            INSERT INTO atas (tipo, data, ala_id) VALUES (?, ?, ?)
+            ON CONFLICT (ala_id, tipo, data) DO UPDATE SET status = atas.status
+            RETURNING id
+        """, (tipo, data, ala_id)).fetchone()['id']
+
+    if tipo == "sacramental":
+        conn.execute("""
+            INSERT INTO sacramental (ata_id, presidido, dirigido, recepcionistas, pianista, regente_musica, 
+                reconhecemos_presenca, anuncios, hinos, oracoes, discursantes, hino_sacramental, hino_intermediario,
+                desobrigacoes, apoios, confirmacoes_batismo, apoio_membros, bencao_criancas, ultimo_discursante, tema) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (ata_id) DO UPDATE SET
+                presidido=excluded.presidido, dirigido=excluded.dirigido,
+                recepcionistas=excluded.recepcionistas, pianista=excluded.pianista,
+                regente_musica=excluded.regente_musica, reconhecemos_presenca=excluded.reconhecemos_presenca,
+                anuncios=excluded.anuncios, hinos=excluded.hinos, oracoes=excluded.oracoes,
+                discursantes=excluded.discursantes, hino_sacramental=excluded.hino_sacramental,
+                hino_intermediario=excluded.hino_intermediario, desobrigacoes=excluded.desobrigacoes,
+                apoios=excluded.apoios, confirmacoes_batismo=excluded.confirmacoes_batismo,
+                apoio_membros=excluded.apoio_membros, bencao_criancas=excluded.bencao_criancas,
+                ultimo_discursante=excluded.ultimo_discursante, tema=excluded.tema
+        """, (
+            ata_id, 
+            detalhes["presidido"], 
+            detalhes["dirigido"],
+            detalhes["recepcionistas"],
+            detalhes["pianista"],
+            detalhes["regente_musica"],
+            detalhes["reconhecemos_presenca"],
+            json.dumps(detalhes["anuncios"]),
+            json.dumps([detalhes["hino_abertura"], detalhes["hino_encerramento"]]), 
+            json.dumps([detalhes["oracao_abertura"], detalhes["oracao_encerramento"]]), 
+            json.dumps(detalhes["discursantes"]),
+            detalhes["hino_sacramental"],
+            detalhes["hino_intermediario"],
+            detalhes["desobrigacoes"],
+            detalhes["apoios"],
+            detalhes["confirmacoes_batismo"],
+            detalhes["apoio_membros"],
+            detalhes["bencao_criancas"],
+            detalhes["ultimo_discursante"],
+            detalhes["tema"]
+        ))
+
+    elif tipo == "batismo":
+        conn.execute("""
+            INSERT INTO batismo (ata_id, dedicado, presidido, dirigido, batizados, testemunha1, testemunha2) 
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (ata_id) DO UPDATE SET
+                dedicado=excluded.dedicado, presidido=excluded.presidido, dirigido=excluded.dirigido,
+                batizados=excluded.batizados, testemunha1=excluded.testemunha1, testemunha2=excluded.testemunha2
+        """, (
+            ata_id, 
+            detalhes["dedicado"], 
+            detalhes["presidido"], 
+            detalhes["dirigido"], 
+            json.dumps(detalhes["batizados"]), 
+            detalhes["testemunha1"], 
+            detalhes["testemunha2"]
+        ))
+
+    # Listas normalizadas (histórico de discursantes, hinos, orações, batizados)
+    if tipo in ("sacramental", "batismo"):
+        discursantes_antes = historico_discursantes.nomes_da_ata(conn, ata_id)
+        ata_listas.gravar_listas(conn, ata_id, tipo, detalhes)
+        historico_discursantes.atualizar(
+            conn, ala_id, discursantes_antes + historico_discursantes.nomes_da_ata(conn, ata_id))
+        hinos.registrar_uso(conn, ata_id, ala_id, data, tipo, detalhes)
+        busca_atas.indexar_ata(conn, ata_id, tipo, detalhes)
+        ata_summary.atualizar(conn, [ata_id])
+    return ata_id
+
+# Rota para formulário de ata (criação/edição)
+@app.route("/ata/form", methods=["GET", "POST"])
+@login_required
+def form_ata():
+    if request.method == "POST":
+        tipo = request.form.get("tipo")
+        data = request.form.get("data")
+        ata_id_editar = request.form.get("editar")
+        
+        # Validação básica
+        if not tipo or not data:
+            flash("Erro: Tipo e data são obrigatórios", "error")
+            return redirect(url_for('nova_ata'))
+        
+        # Validação de data
+        try:
+            datetime.strptime(data, "%Y-%m-%d")
+        except ValueError:
+            flash("Erro: Data inválida", "error")
+            return redirect(url_for('nova_ata'))
+        
+        ala_id = session['user_id']
+
+        if tipo == "sacramental":
+            discursantes = request.form.getlist("discursantes[]")
+            # Filtrar discursantes vazios
+            discursantes = [d for d in discursantes if d and d.strip()]
+            
+            anuncios = request.form.getlist("anuncios[]")
+            # Filtrar anúncios vazios
+            anuncios = [a for a in anuncios if a and a.strip()]
+            
+            detalhes = {
+                "presidido": request.form.get("presidido", ""),
+                "dirigido": request.form.get("dirigido", ""),
+                "recepcionistas": request.form.get("recepcionista", ""),
+                "tema": request.form.get("tema", ""), 
+                "pianista": request.form.get("pianista", ""),
+                "regente_musica": request.form.get("regente_musica", ""),
+                "reconhecemos_presenca": request.form.get("reconhecemos_presenca", ""),  # NOVO
+                "anuncios": anuncios,
+                "hino_abertura": request.form.get("hino_abertura", ""),
+                "oracao_abertura": request.form.get("oracao_abertura", ""),
+                "desobrigacoes": request.form.get("desobrigacoes", ""),  # NOVO
+                "apoios": request.form.get("apoios", ""),  # NOVO
+                "confirmacoes_batismo": request.form.get("confirmacoes_batismo", ""),  # NOVO
+                "apoio_membros": request.form.get("apoio_membros", ""),  # NOVO
+                "bencao_criancas": request.form.get("bencao_criancas", ""),  # NOVO
+                "hino_sacramental": request.form.get("hino_sacramental", ""),
+                "hino_intermediario": request.form.get("hino_intermediario", ""),
+                "ultimo_discursante": request.form.get("ultimo_discursante", ""),  # NOVO
+                "hino_encerramento": request.form.get("hino_encerramento", ""),
+                "oracao_encerramento": request.form.get("oracao_encerramento", ""),
+                "discursantes": discursantes
+            }
+
+        elif tipo == "batismo":
+            batizados = request.form.getlist("batizados[]")
+            # Filtrar batizados vazios
+            batizados = [b for b in batizados if b and b.strip()]
+            
+            detalhes = {
+                "presidido": request.form.get("presidido", ""),
+                "dirigido": request.form.get("dirigido", ""),
+                "dedicado": request.form.get("dedicado", ""),
+                "testemunha1": request.form.get("testemunha1", ""),
+                "testemunha2": request.form.get("testemunha2", ""),
+                "batizados": batizados
+            }
+
+        # A gravação roda na thread de escrita do banco (functions/escritor.py),
+        # em group commit com as outras requisições
+        usuario = session.get('username')
+        snapshot_a_cada, janela = app.config['REVISOES_SNAPSHOT'], app.config['REVISOES_JANELA_S']
+
+        def salvar(conn):
+            # Editar uma ata do arquivo morto (ou salvar por cima dela) a traz de volta ao banco
+            arquivo_morto.trazer_da_ala(conn, ala_id, ata_id_editar, tipo, data)
+            # Ata que já existia antes do histórico: guarda o estado atual como revisão 1
+            existente = ata_id_editar or conn.execute(
+                "SELECT id FROM atas WHERE ala_id = ? AND tipo = ? AND data = ?", (ala_id, tipo, data)).fetchone()
+            if existente:
+                revisoes.garantir_original(conn, ata_id_editar or existente['id'], ala_id, usuario)
+            ata_id = gravar_ata(conn, ala_id, tipo, data, detalhes, ata_id_editar)
+            if ata_id is not None:
+                revisoes.registrar(conn, ata_id, ala_id, revisoes.documento_da_ata(conn, ata_id), usuario=usuario,
+                                   snapshot_a_cada=snapshot_a_cada, janela=janela)
+            return ata_id
+
+        try:
+            ata_id = escrever(salvar)
+        except sqlite3.IntegrityError:
+            # Edição que mudaria tipo/data para os de outra ata da ala
+            flash(f"Já existe uma ata de {tipo} em {datetime.strptime(data, '%Y-%m-%d').strftime('%d/%m/%Y')}.", "error")
+            return redirect(url_for("form_ata", tipo=tipo, data=data, editar=ata_id_editar))
+        if ata_id is None:
+            flash("Você não tem permissão para editar esta ata.", "error")
+            return redirect(url_for('index'))
+
+        flash("Ata salva com sucesso!", "success")
+        return redirect(url_for("visualizar_ata", ata_id=ata_id))
+
+    # GET request
+    tipo = request.args.get("tipo")
+    data = request.args.get("data")
+    editar = request.args.get("editar")
+    
+    # Lógica para carregar dados existentes se estiver editando
+    dados_existentes = {}
+    if editar:
+        carregada = AtaRepository(get_db()).load(editar, session['user_id'])
+        if carregada:
+            dados_existentes = carregada.detalhes_dict()
+    
+    if not tipo or not data:
+        flash("Erro: Tipo e data são obrigatórios", "error")
+        return redirect(url_for("nova_ata"))
+    
+    if tipo == "sacramental":
+        dt = datetime.strptime(data, "%Y-%m-%d")
+        primeiro_domingo = min([d for d in range(1, 8) if calendar.weekday(dt.year, dt.month, d) == 6])
+        is_primeiro_domingo = dt.day == primeiro_domingo
+        
+
+        discursantes_recentes = get_discursantes_recentes() if not editar else []
+        temas_recentes = get_temas_recentes() if not editar else []
+        hinos_recentes = get_hinos_recentes() if not editar else []
+        
+        conn = get_catalogo()
+        unidade_row = conn.execute("SELECT * FROM unidades WHERE ala_id = ?", (session['user_id'],)).fetchone()
+        estaca_row = None
+
+        if unidade_row and unidade_row['estaca_id']:
+            estaca_row = conn.execute("SELECT * FROM estacas WHERE id = ?", (unidade_row['estaca_id'],)).fetchone()
+
+        unidade = dict(unidade_row) if unidade_row else {}
+        estaca = dict(estaca_row) if estaca_row else {}
+
+        return render_template("sacramental.html", 
+                             primeiro=is_primeiro_domingo, 
+                             data=data, 
+                             editar=editar, 
+                             dados=dados_existentes,
+                             discursantes_recentes=discursantes_recentes,
+                             temas_recentes=temas_recentes,
+                             hinos_recentes=hinos_recentes,
+                             unidade=unidade,
+                             estaca=estaca)
+    elif tipo == "batismo":
+        return render_template("batismo.html", 
+                             data=data, 
+                             editar=editar, 
+                             dados=dados_existentes)
+    else:
+        flash("Tipo de ata não reconhecido", "error")
+        return redirect(url_for("nova_ata"))
+
+# Rota para visualizar uma ata selecionada
+@app.route("/ata/<int:ata_id>")
+@login_required
+def visualizar_ata(ata_id):
+    conn = get_db()
+    carregada = AtaRepository(conn).load(ata_id, session['user_id'])
+    
+    if not carregada:
+        flash("Ata não encontrada ou você não tem permissão para visualizá-la.", "error")
+        return redirect(url_for("index"))
+    ata, detalhes = carregada.to_template_dict(), carregada.detalhes_dict()
+        
+    # Buscar template padrão para sacramental
+    template = None
+    if ata["tipo"] == "sacramental":
+        # Tente diferentes formas de buscar o template
+        template = conn.execute(
+            "SELECT * FROM templates WHERE nome = 'Sacramental Padrão'"
+        ).fetchone()
+        
+        if not template:
+            template = conn.execute(
+                "SELECT * FROM templates WHERE tipo_template = 1"
+            ).fetchone()
+        
+        if template:
+            template = dict(template)
+            print(f"DEBUG: Template carregado - {template.get('nome', 'Sem nome')}")
+    
+    # Ler os textos padrão dos convites (1º, 2º e 3º discursante)
+    def _read_discursante_text(n):
+        try:
+            path_txt = os.path.join(app.root_path, "templates", "texts", f"discursante_{n}.txt")
+            with open(path_txt, "r", encoding="utf-8") as f:
+                return f.read()
+        except Exception as e:
+            print(f"Aviso: não foi possível ler discursante_{n}.txt ->", e)
+            return ""
+
+    discursante_1_text = _read_discursante_text(1)
+    discursante_2_text = _read_discursante_text(2)
+    discursante_3_text = _read_discursante_text(3)
+
+    return render_template(
+        "visualizar_ata.html",
+        ata=ata,
+        detalhes=detalhes,
+        template=template,
+        discursante_1_text=discursante_1_text,
+        discursante_2_text=discursante_2_text,
+        discursante_3_text=discursante_3_text
+    )
+
+# Histórico de revisões da ata (functions/revisoes.py). Continua acessível
+# depois que a ata é excluída, para poder restaurá-la.
+@app.route("/ata/<int:ata_id>/revisoes")
+@login_required
+def listar_revisoes(ata_id):
+    conn = get_db()
+    lista = revisoes.listar(conn, ata_id, session['user_id'])
+    if request.args.get("formato") == "json":
+        return jsonify({"ata_id": ata_id, "revisoes": lista})
+    ata = AtaRepository(conn).load(ata_id, session['user_id'])
+    return render_template("revisoes_ata.html", ata_id=ata_id, ata=ata.to_template_dict() if ata else None,
+                           revisoes=lista)
+
+@app.route("/ata/<int:ata_id>/revisoes/<int:revisao>")
+@login_required
+def ver_revisao(ata_id, revisao):
+    conn = get_db()
+    documento = revisoes.reconstruir(conn, ata_id, revisao, session['user_id'])
+    if documento is None:
+        if request.args.get("formato") == "json":
+            return jsonify({"erro": "revisão não encontrada"}), 404
+        flash("Revisão não encontrada.", "error")
+        return redirect(url_for("listar_revisoes", ata_id=ata_id))
+    info = next(r for r in revisoes.listar(conn, ata_id, session['user_id']) if r['revisao'] == revisao)
+    if request.args.get("formato") == "json":
+        return jsonify(dict(info, documento=documento))
+    # Campos que mudaram em relação à revisão anterior
+    anterior = revisoes.reconstruir(conn, ata_id, revisao - 1) if revisao > 1 else None
+    alterados = set(revisoes.diferenca(anterior, documento).get('s', {})) if anterior else set()
+    ata = AtaRepository(conn).load(ata_id, session['user_id'])
+    return render_template("revisoes_ata.html", ata_id=ata_id, ata=ata.to_template_dict() if ata else None,
+                           revisao=info, documento=documento, alterados=alterados)
+
+@app.route("/ata/<int:ata_id>/revisoes/<int:revisao>/restaurar", methods=["POST"])
+@login_required
+def restaurar_revisao(ata_id, revisao):
+    ala_id = session['user_id']
+    usuario = session.get('username')
+    snapshot_a_cada = app.config['REVISOES_SNAPSHOT']
+
+    def restaurar(conn):
+        documento = revisoes.reconstruir(conn, ata_id, revisao, ala_id)
+        if documento is None:
+            return None
+        tipo, data, status, detalhes = importacao.validar(documento)
+        arquivo_morto.trazer_da_ala(conn, ala_id, ata_id, tipo, data)
+        if conn.execute("SELECT 1 FROM atas WHERE id = ? AND ala_id = ?", (ata_id, ala_id)).fetchone():
+            revisoes.garantir_original(conn, ata_id, ala_id, usuario)
+        else:
+            # Ata excluída: volta com o mesmo id (o AUTOINCREMENT nunca reutiliza ids)
+            conn.execute("INSERT INTO atas (id, tipo, data, status, ala_id) VALUES (?, ?, ?, ?, ?)",
+                         (ata_id, tipo, data, status, ala_id))
+        gravar_ata(conn, ala_id, tipo, data, detalhes, ata_id)
+        conn.execute("UPDATE atas SET status = ? WHERE id = ?", (status, ata_id))
+        return revisoes.registrar(conn, ata_id, ala_id, revisoes.documento_da_ata(conn, ata_id), 'restaurada',
+                                  usuario, origem=revisao, snapshot_a_cada=snapshot_a_cada)
+
+    try:
+        restaurada = escrever(restaurar)
+    except sqlite3.IntegrityError:
+        flash("Já existe outra ata do mesmo tipo nessa data; exclua ou altere aquela antes de restaurar.", "error")
+        return redirect(url_for("ver_revisao", ata_id=ata_id, revisao=revisao))
+    except importacao.ErroDeLinha as e:
+        flash(f"Não foi possível restaurar a revisão: {e}", "error")
+        return redirect(url_for("ver_revisao", ata_id=ata_id, revisao=revisao))
+    if restaurada is None:
+        flash("Revisão não encontrada.", "error")
+        return redirect(url_for("listar_revisoes", ata_id=ata_id))
+
+    flash(f"Ata restaurada para a revisão {revisao}.", "success")
+    return redirect(url_for("visualizar_ata", ata_id=ata_id))
+
+# Rota para exportar ata como PDF simples
+@app.route("/ata/exportar/<int:ata_id>")
+@login_required
+def exportar_pdf(ata_id):
+    from functions.pdf_exporters import exportar_pdf_bytes
+    
+    conn = get_db() 
+    try:
+        # 1. Buscar a Ata com os detalhes (sacramental ou batismo) já decodificados
+        carregada = AtaRepository(conn).load(ata_id, session['user_id'])
+        
+        if not carregada:
+            raise ValueError("Ata não encontrada")
+        
+        ata, detalhes = carregada.to_template_dict(), carregada.detalhes_dict()
+        
+        # =========================================================================
+        # CORREÇÃO: Buscar o Template Padrão (ID 1), pois a tabela templates 
+        # não possui a coluna ala_id.
+        # =========================================================================
+        template = conn.execute(
+            # Anteriormente: "SELECT * FROM templates WHERE ala_id=? LIMIT 1"
+            "SELECT * FROM templates WHERE id=1 LIMIT 1" # Agora busca o template padrão (ID 1)
+        ).fetchone()
+        
+        if template:
+            template = dict(template)
+        else:
+            template = {}
+        
+        # 2. Converter para PDF
+        buffer, filename, mimetype = exportar_pdf_bytes(ata, detalhes, template, filename=f"ata_{ata_id}.pdf")
+        return send_file(buffer, as_attachment=True, download_name=filename, mimetype=mimetype)
+        
+    except Exception as e:
+        print(f"======== ERRO CRÍTICO NA EXPORTAÇÃO DE PDF: {e} ========")
+        flash(f"Erro ao exportar PDF: {str(e)}", "error")
+        return redirect(url_for("visualizar_ata", ata_id=ata_id))
+
+# Rota para exportar ata como PDF SIMPLES (SOMENTE CAMPOS/SEM TEXTOS)
+@app.route("/ata/exportar_simples/<int:ata_id>")
+@login_required
+def exportar_pdf_simples(ata_id):
+    from functions.pdf_exporters import exportar_pdf_bytes
+    
+    conn = get_db() 
+    try:
+        # 1. Buscar a Ata com os detalhes já decodificados
+        carregada = AtaRepository(conn).load(ata_id, session['user_id'])
+        
+        if not carregada:
+            raise ValueError("Ata não encontrada")
+        
+        ata, detalhes = carregada.to_template_dict(), carregada.detalhes_dict()
+        
+        # 2. NÃO BUSCAR O TEMPLATE: template = {} ou template = None
+        template = {} 
+        
+        # 3. Converter para PDF (template é vazio/None, resultando em "Sem Textos")
+        buffer, filename, mimetype = exportar_pdf_bytes(ata, detalhes, template, filename=f"ata_simples_{ata_id}.pdf")
+        return send_file(buffer, as_attachment=True, download_name=filename, mimetype=mimetype)
+        
+    except Exception as e:
+        print(f"======== ERRO CRÍTICO NA EXPORTAÇÃO DE PDF SIMPLES: {e} ========")
+        flash(f"Erro ao exportar PDF Simples: {str(e)}", "error")
+        return redirect(url_for("visualizar_ata", ata_id=ata_id))
+
+# Rota para exportar ata sacramental como PDF formatado
+@app.route("/ata/exportar_sacramental/<int:ata_id>")
+@login_required
+def exportar_sacramental_pdf(ata_id):
+    from functions.pdf_exporters import exportar_sacramental_bytes
+    conn = get_db()
+    try:
+        carregada = AtaRepository(conn).load(ata_id, session['user_id'])
+        
+        if not carregada:
+            raise ValueError("Ata não encontrada")
+        
+        ata, detalhes = carregada.to_template_dict(), carregada.detalhes_dict()
+        
+        if ata["tipo"] != "sacramental":
+            raise ValueError("Esta ata não é sacramental")
+        
+        # Buscar template
+        template = conn.execute("SELECT * FROM templates WHERE nome = 'Sacramental Padrão'").fetchone()
+        
+        if not template:
+            template = conn.execute(
+                "SELECT * FROM templates WHERE tipo_template = 1"
+            ).fetchone()
+        
+        # =================================================================
+        # 🚨 CORREÇÃO APLICADA AQUI
+        # =================================================================
+        if template:
+            template = dict(template)
+        else:
+            # Se nenhuma busca funcionou, defina como um dicionário vazio
+            template = {} 
+        # =================================================================
+
+        # Converter para PDF
+        # Gerar PDF diretamente com dados (ReportLab)
+        buffer, filename, mimetype = exportar_sacramental_bytes(ata, detalhes, template=template, filename=f"ata_sacramental_{ata_id}.pdf")
+        return send_file(buffer, as_attachment=True, download_name=filename, mimetype=mimetype)
+    
+    except Exception as e:
+        print("======== ERRO CRÍTICO NA EXPORTAÇÃO DE PDF ========")
+        traceback.print_exc() # Isso irá imprimir o erro detalhado no console
+
+        flash(f"Erro ao exportar PDF: {str(e)}", "error")
+        return redirect(url_for("visualizar_ata", ata_id=ata_id))
+
+@app.template_filter('reverse_date_format')
+def reverse_date_format(value):
+    """Converte 'AAAA/MM/DD' para 'DD/MM/AAAA' (o template usa replace('-', '/') antes)"""
+    # Se o formato original for AAAA-MM-DD, o input é AAAA/MM/DD após o replace no HTML.
+    parts = value.split('/')
+    if len(parts) == 3:
+        # Reverte ordem: [2]DD, [1]MM, [0]AAAA
+        return f"{parts[2]}/{parts[1]}/{parts[0]}"
+    return value
+
+@app.route('/deletar_ata', methods=['POST'])
+def deletar_ata():
+    """Rota para deletar uma ata e seus detalhes relacionados."""
+    # Garante que o usuário está logado
+    if 'user_id' not in session:
+        flash('Você precisa estar logado para realizar esta ação.', 'error')
+        return redirect(url_for('login'))
+
+    ata_id = request.form.get('ata_id', type=int)
+    ala_id = session['user_id']
+
+    if not ata_id:
+        flash('ID da ata não fornecido.', 'error')
+        # CORREÇÃO: O endpoint correto é 'listar_todas_atas'
+        return redirect(url_for('listar_todas_atas'))
+
+    usuario = session.get('username')
+    snapshot_a_cada = app.config['REVISOES_SNAPSHOT']
+
+    # Tudo em um job da thread de escrita (uma transação, desfeita inteira se falhar)
+    def deletar(conn):
+        excluidas = atas_em_lote.excluir(conn, ala_id, [ata_id], usuario, snapshot_a_cada)
+        return excluidas[0].tipo if excluidas else None
+
+    try:
+        ata_tipo = escrever(deletar)
+    except Exception as e:
+        flash(f'Erro ao deletar ata: {e}', 'error')
+        return redirect(url_for('listar_todas_atas'))
+
+    if not ata_tipo:
+        flash('Ata não encontrada ou você não tem permissão para deletá-la.', 'error')
+    else:
+        flash(f'Ata de {ata_tipo.capitalize()} (ID: {ata_id}) deletada com sucesso!', 'success')
+        
+
+    # CORREÇÃO: O endpoint correto é 'listar_todas_atas'
+    return redirect(url_for('listar_todas_atas'))
+
+# Operações em lote (functions/atas_em_lote.py): as atas marcadas em /atas
+# (campo ids[]) mudam todas em uma transação. Com ?formato=json a resposta é JSON.
+def _ids_do_lote():
+    ids = {int(i) for i in request.form.getlist("ids[]") + request.form.getlist("ids") if i.strip().isdigit()}
+    if not ids:
+        raise ValueError("Selecione ao menos uma ata.")
+    if len(ids) > atas_em_lote.LIMITE:
+        raise ValueError(f"Selecione no máximo {atas_em_lote.LIMITE} atas por vez.")
+    return sorted(ids)
+
+def _resposta_do_lote(mensagem, dados, status=200):
+    if request.args.get("formato") == "json":
+        return jsonify(dados), status
+    flash(mensagem, "success" if status == 200 else "error")
+    return redirect(url_for("listar_todas_atas"))
+
+def _executar_lote(operacao, *args):
+    """Roda operacao(conn, ala_id, ids, *args) no escritor, em uma transação."""
+    ala_id, usuario = session['user_id'], session.get('username')
+    snapshot_a_cada = app.config['REVISOES_SNAPSHOT']
+    ids = _ids_do_lote()
+    return escrever(lambda conn: operacao(conn, ala_id, ids, *args, usuario=usuario,
+                                          snapshot_a_cada=snapshot_a_cada))
+
+@app.route("/atas/lote/excluir", methods=["POST"])
+@login_required
+def excluir_atas_em_lote():
+    try:
+        excluidas = _executar_lote(atas_em_lote.excluir)
+    except ValueError as e:
+        return _resposta_do_lote(str(e), {"erro": str(e)}, 400)
+    return _resposta_do_lote(f"{len(excluidas)} ata(s) excluída(s).",
+                             {"excluidas": [ata.id for ata in excluidas]})
+
+@app.route("/atas/lote/duplicar", methods=["POST"])
+@login_required
+def duplicar_atas_em_lote():
+    dias = request.form.get("dias", atas_em_lote.DIAS_PADRAO, type=int)
+    try:
+        feito = _executar_lote(atas_em_lote.duplicar, dias)
+    except ValueError as e:
+        return _resposta_do_lote(str(e), {"erro": str(e)}, 400)
+    mensagem = f"{len(feito['criadas'])} ata(s) criada(s) a partir das selecionadas."
+    if feito['ignoradas']:
+        mensagem += f" {len(feito['ignoradas'])} já tinha(m) ata na data de destino."
+    return _resposta_do_lote(mensagem, {
+        "criadas": [{"origem": origem, "id": nova.id, "data": nova.data} for origem, nova in feito['criadas']],
+        "ignoradas": feito['ignoradas'],
+    })
+
+@app.route("/atas/lote/status", methods=["POST"])
+@login_required
+def alterar_status_em_lote():
+    status = request.form.get("status", "")
+    try:
+        alteradas = _executar_lote(atas_em_lote.alterar_status, status)
+    except ValueError as e:
+        return _resposta_do_lote(str(e), {"erro": str(e)}, 400)
+    return _resposta_do_lote(f"{len(alteradas)} ata(s) marcada(s) como {status}.",
+                             {"alteradas": [ata.id for ata in alteradas], "status": status})
+
+# Sistema de mensagens flash
+@app.context_processor
+def inject_flash_messages():
+    messages = []
+    return dict(flash_messages=messages)
+
+# WebSocket para edição colaborativa em tempo real
+users_editing = {}
+@socketio.on('join')
+def handle_join(data):
+    ata_id = data['ata_id']
+    users_editing[ata_id] = users_editing.get(ata_id, 0) + 1
+
+    join_room(ata_id)
+    emit('update_users', {'count': users_editing[ata_id]}, to=ata_id)
+
+@socketio.on('leave')
+def handle_leave(data):
+    ata_id = data['ata_id']
+    if ata_id in users_editing:
+        users_editing[ata_id] = max(users_editing[ata_id] - 1, 0)
+        if users_editing[ata_id] == 0:
+            del users_editing[ata_id]
+        leave_room(ata_id)
+        emit('update_users', {'count': users_editing.get(ata_id, 0)}, to=ata_id)
+
+@socketio.on('field_update')
+def handle_field_update(data):
+    ata_id = data['ata_id']
+    emit('field_update', {'name': data['name'], 'value': data['value']}, to=ata_id, include_self=False)
+
+# Rota para renderizar HTML puro da ata (para conversão a PDF)
+@app.route("/ata/render_html/<int:ata_id>")
+@login_required
+def render_ata_html(ata_id):
+    """Renderiza o HTML puro (sem base.html) para conversão a PDF"""
+    conn = get_db()
+    carregada = AtaRepository(conn).load(ata_id, session['user_id'])
+    
+    if not carregada:
+        flash("Ata não encontrada ou você não tem permissão para acessá-la.", "error")
+        return redirect(url_for("index"))
+    ata, detalhes = carregada.to_template_dict(), carregada.detalhes_dict()
+        
+    # Buscar template padrão
+    template = None
+    if ata["tipo"] == "sacramental":
+        template = conn.execute(
+            "SELECT * FROM templates WHERE nome = 'Sacramental Padrão'"
+        ).fetchone()
+        
+        if not template:
+            template = conn.execute(
+                "SELECT * FROM templates WHERE tipo_template = 1"
+            ).fetchone()
+        
+        if template:
+            template = dict(template)
+    
+    # Renderizar template SEM base.html (use um template dedicado ou renderize inline)
+    return render_template("visualizar_ata_pdf.html", ata=ata, detalhes=detalhes, template=template)
+
+# Todas as views (acima) rodam no pool do despacho, fora do loop que atende o Socket.IO
+despacho.init_app(app, socketio.async_mode)
+
+# Rodar o app
+if __name__ == "__main__":
+    # Configurações para produção
+    port = int(os.environ.get('PORT', 5000))
+    debug = os.environ.get('DEBUG', 'False').lower() == 'true'
+    
+    # Inicializar banco
+    init_db()
+    
+    # Rodar servidor - permitir produção
+    socketio.run(app, 
+                 host='0.0.0.0', 
+                 port=port, 
+                 debug=debug,
                  allow_unsafe_werkzeug=True)
\ No newline at end of file
@@ -0,0 +1,11 @@
+# 0002: colunas de equipe da unidade (antes eram ALTER TABLE soltos no fim do
+# schema_inicial.sql, que falhavam a cada inicialização depois da primeira).
+
+COLUNAS = ('recepcionista', 'pianista', 'regente_musica')
+
+
+def upgrade(conn, log):
+    existentes = {row[1] for row in conn.execute("PRAGMA table_info(unidades)")}
+    for coluna in COLUNAS:
+        if coluna not in existentes:
+            conn.execute(f"ALTER TABLE unidades ADD COLUMN {coluna} TEXT")
@@ -0,0 +1,52 @@
+-- 0003: listas das atas em tabelas filhas indexadas (ver functions/ata_listas.py)
+
+CREATE TABLE IF NOT EXISTS ata_discursantes (
+    ata_id INTEGER NOT NULL,
+    posicao INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    PRIMARY KEY (ata_id, posicao),
+    FOREIGN KEY(ata_id) REFERENCES atas(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ata_anuncios (
+    ata_id INTEGER NOT NULL,
+    posicao INTEGER NOT NULL,
+    texto TEXT NOT NULL,
+    PRIMARY KEY (ata_id, posicao),
+    FOREIGN KEY(ata_id) REFERENCES atas(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- papel: abertura, sacramental, intermediario, encerramento
+CREATE TABLE IF NOT EXISTS ata_hinos (
+    ata_id INTEGER NOT NULL,
+    posicao INTEGER NOT NULL,
+    papel TEXT NOT NULL,
+    hino TEXT NOT NULL,
+    PRIMARY KEY (ata_id, posicao),
+    FOREIGN KEY(ata_id) REFERENCES atas(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- papel: abertura, encerramento
+CREATE TABLE IF NOT EXISTS ata_oracoes (
+    ata_id INTEGER NOT NULL,
+    posicao INTEGER NOT NULL,
+    papel TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    PRIMARY KEY (ata_id, posicao),
+    FOREIGN KEY(ata_id) REFERENCES atas(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ata_batizados (
+    ata_id INTEGER NOT NULL,
+    posicao INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    PRIMARY KEY (ata_id, posicao),
+    FOREIGN KEY(ata_id) REFERENCES atas(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_ata_discursantes_nome ON ata_discursantes(nome);
+CREATE INDEX IF NOT EXISTS idx_ata_hinos_hino ON ata_hinos(hino);
+CREATE INDEX IF NOT EXISTS idx_ata_hinos_papel ON ata_hinos(papel, hino);
+CREATE INDEX IF NOT EXISTS idx_ata_oracoes_nome ON ata_oracoes(nome);
+CREATE INDEX IF NOT EXISTS idx_ata_oracoes_papel ON ata_oracoes(papel, nome);
+CREATE INDEX IF NOT EXISTS idx_ata_batizados_nome ON ata_batizados(nome);
@@ -0,0 +1,67 @@
+# 0004: conversão única das colunas JSON de sacramental/batismo para as
+# tabelas de listas criadas na 0003.
+#
+# A leitura das colunas fica congelada aqui (como estava em functions/ata_listas.py
+# e functions/ata_models.py nesta versão): 'hinos' guarda [abertura, encerramento]
+# e 'oracoes' [abertura, encerramento]; JSON inválido vira lista vazia.
+import json
+
+TABELAS = ('ata_discursantes', 'ata_anuncios', 'ata_hinos', 'ata_oracoes', 'ata_batizados')
+PAPEIS_HINOS = ('abertura', 'sacramental', 'intermediario', 'encerramento')
+PAPEIS_ORACOES = ('abertura', 'encerramento')
+
+
+def _lista(valor):
+    if not valor:
+        return []
+    try:
+        resultado = json.loads(valor)
+    except (TypeError, ValueError):
+        return []
+    return resultado if isinstance(resultado, list) else []
+
+
+def _limpar(valores):
+    return [v.strip() for v in valores if isinstance(v, str) and v.strip()]
+
+
+def _item(lista, i):
+    return lista[i] if len(lista) > i else ''
+
+
+def _papeis(papeis, valores):
+    return [(i, papel, valor.strip()) for i, (papel, valor) in enumerate(zip(papeis, valores))
+            if isinstance(valor, str) and valor.strip()]
+
+
+def _gravar(conn, ata_id, discursantes=(), anuncios=(), hinos=(), oracoes=(), batizados=()):
+    for tabela in TABELAS:
+        conn.execute(f"DELETE FROM {tabela} WHERE ata_id = ?", (ata_id,))
+    conn.executemany("INSERT INTO ata_discursantes (ata_id, posicao, nome) VALUES (?, ?, ?)",
+                     [(ata_id, i, nome) for i, nome in enumerate(discursantes)])
+    conn.executemany("INSERT INTO ata_anuncios (ata_id, posicao, texto) VALUES (?, ?, ?)",
+                     [(ata_id, i, texto) for i, texto in enumerate(anuncios)])
+    conn.executemany("INSERT INTO ata_hinos (ata_id, posicao, papel, hino) VALUES (?, ?, ?, ?)",
+                     [(ata_id,) + hino for hino in hinos])
+    conn.executemany("INSERT INTO ata_oracoes (ata_id, posicao, papel, nome) VALUES (?, ?, ?, ?)",
+                     [(ata_id,) + oracao for oracao in oracoes])
+    conn.executemany("INSERT INTO ata_batizados (ata_id, posicao, nome) VALUES (?, ?, ?)",
+                     [(ata_id, i, nome) for i, nome in enumerate(batizados)])
+
+
+def upgrade(conn, log):
+    # Um ata_id repetido (antes da 0010) fica com as listas da última linha
+    for ata_id, discursantes, anuncios, hinos, hino_sacramental, hino_intermediario, oracoes in conn.execute(
+            "SELECT ata_id, discursantes, anuncios, hinos, hino_sacramental, hino_intermediario, oracoes "
+            "FROM sacramental WHERE ata_id IS NOT NULL").fetchall():
+        hinos, oracoes = _lista(hinos), _lista(oracoes)
+        _gravar(
+            conn, ata_id,
+            discursantes=_limpar(_lista(discursantes)),
+            anuncios=_limpar(_lista(anuncios)),
+            hinos=_papeis(PAPEIS_HINOS, (_item(hinos, 0), hino_sacramental, hino_intermediario, _item(hinos, 1))),
+            oracoes=_papeis(PAPEIS_ORACOES, (_item(oracoes, 0), _item(oracoes, 1))),
+        )
+    for ata_id, batizados in conn.execute(
+            "SELECT ata_id, batizados FROM batismo WHERE ata_id IS NOT NULL").fetchall():
+        _gravar(conn, ata_id, batizados=_limpar(_lista(batizados)))
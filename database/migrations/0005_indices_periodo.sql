@@ -0,0 +1,8 @@
+-- 0005: índices compostos para filtros por período e histórico por tipo.
+-- (ala_id, data) atende os filtros por período e o ORDER BY data DESC da ala;
+-- (ala_id, tipo, data) atende o histórico sacramental e as contagens por tipo.
+-- Ambos tornam idx_atas_ala_id redundante.
+
+DROP INDEX IF EXISTS idx_atas_ala_id;
+CREATE INDEX IF NOT EXISTS idx_atas_ala_data ON atas(ala_id, data);
+CREATE INDEX IF NOT EXISTS idx_atas_ala_tipo_data ON atas(ala_id, tipo, data);
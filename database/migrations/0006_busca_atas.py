@@ -0,0 +1,53 @@
+# 0006: índice FTS5 para a busca de atas (ver functions/busca_atas.py).
+# rowid = atas.id; prefix='2 3' acelera as buscas por prefixo ("conf"*).
+#
+# A carga inicial monta o texto de cada ata como functions/busca_atas.py
+# fazia nesta versão (congelado aqui): tema, discursantes, anúncios,
+# chamados (desobrigações e apoios) e batizados, um item por linha.
+import json
+
+
+def _lista(valor):
+    if not valor:
+        return []
+    try:
+        resultado = json.loads(valor)
+    except (TypeError, ValueError):
+        return []
+    return resultado if isinstance(resultado, list) else []
+
+
+def _juntar(valores):
+    return '\n'.join(v.strip() for v in valores if isinstance(v, str) and v.strip())
+
+
+def _indexar(conn, ata_id, tema='', discursantes='', anuncios='', chamados='', batizados=''):
+    conn.execute("DELETE FROM atas_fts WHERE rowid = ?", (ata_id,))
+    conn.execute(
+        "INSERT INTO atas_fts (rowid, tema, discursantes, anuncios, chamados, batizados) "
+        "VALUES (?, ?, ?, ?, ?, ?)", (ata_id, tema, discursantes, anuncios, chamados, batizados))
+
+
+def upgrade(conn, log):
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS atas_fts USING fts5(
+            tema, discursantes, anuncios, chamados, batizados,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    conn.execute("DELETE FROM atas_fts")
+    # Um ata_id repetido (antes da 0010) fica com o texto da última linha
+    for ata_id, tema, discursantes, anuncios, desobrigacoes, apoios in conn.execute("""
+        SELECT d.ata_id, d.tema, d.discursantes, d.anuncios, d.desobrigacoes, d.apoios
+        FROM atas a JOIN sacramental d ON d.ata_id = a.id
+        WHERE a.tipo = 'sacramental'
+    """).fetchall():
+        _indexar(conn, ata_id, tema=tema or '', discursantes=_juntar(_lista(discursantes)),
+                 anuncios=_juntar(_lista(anuncios)), chamados=_juntar([desobrigacoes, apoios]))
+    for ata_id, batizados in conn.execute("""
+        SELECT d.ata_id, d.batizados
+        FROM atas a JOIN batismo d ON d.ata_id = a.id
+        WHERE a.tipo = 'batismo'
+    """).fetchall():
+        _indexar(conn, ata_id, batizados=_juntar(_lista(batizados)))
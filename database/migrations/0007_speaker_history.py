@@ -0,0 +1,59 @@
+# 0007: histórico de discursantes por ala (ver functions/historico_discursantes.py),
+# preenchido a partir de ata_discursantes.
+#
+# A carga inicial e a normalização dos nomes (sem acentos, minúsculo, espaços
+# simples; functions/texto.py) ficam congeladas aqui como estavam nesta versão.
+import json
+import re
+import unicodedata
+
+_ESPACOS = re.compile(r'\s+')
+
+
+def _normalizar(texto):
+    sem_acentos = ''.join(c for c in unicodedata.normalize('NFKD', texto or '')
+                          if not unicodedata.combining(c))
+    return _ESPACOS.sub(' ', sem_acentos).strip().casefold()
+
+
+def upgrade(conn, log):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS speaker_history (
+            ala_id INTEGER NOT NULL,
+            nome_normalizado TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            grafias TEXT NOT NULL DEFAULT '[]',
+            last_date TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            last_tema TEXT,
+            PRIMARY KEY (ala_id, nome_normalizado)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_speaker_history_recentes
+        ON speaker_history(ala_id, last_date)
+    """)
+
+    conn.execute("DELETE FROM speaker_history")
+    por_chave = {}
+    for ala_id, nome, ata_id, data, tema in conn.execute("""
+        SELECT a.ala_id, d.nome, a.id, a.data, s.tema
+        FROM ata_discursantes d
+        JOIN atas a ON a.id = d.ata_id
+        LEFT JOIN sacramental s ON s.ata_id = a.id
+        WHERE a.tipo = 'sacramental'
+    """):
+        chave = _normalizar(nome)
+        if chave:
+            por_chave.setdefault((ala_id, chave), []).append((data, ata_id, nome, tema))
+    for (ala_id, chave), falas in por_chave.items():
+        data, _, nome, tema = max(falas, key=lambda f: (f[0], f[1]))
+        conn.execute("""
+            INSERT OR REPLACE INTO speaker_history
+                (ala_id, nome_normalizado, nome, grafias, last_date, count, last_tema)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            ala_id, chave, nome.strip(),
+            json.dumps(sorted({f[2] for f in falas}), ensure_ascii=False),
+            data, len({f[1] for f in falas}), tema,
+        ))
@@ -0,0 +1,80 @@
+# 0008: catálogo de hinos e uso por ata (ver functions/hinos.py). O uso é
+# preenchido a partir de ata_hinos; o catálogo começa com os "número - título"
+# já digitados nas atas e pode ser completado com `flask --app app importar-hinos`.
+#
+# A leitura de "número - título" e a normalização dos títulos ficam congeladas
+# aqui como estavam em functions/hinos.py e functions/texto.py nesta versão.
+import re
+import unicodedata
+
+_ESPACOS = re.compile(r'\s+')
+_PONTUACAO = re.compile(r'[^\w\s]')
+# "85", "85 - Tal Qual Estou", "Hino nº 85: Tal Qual Estou", "85) ..."
+_NUMERO_TITULO = re.compile(
+    r'^\s*(?:hino\s*)?(?:n[º°o.]*\s*)?(\d{1,4})(?!\d)\s*[-–—.:)]*\s*(.*)$', re.IGNORECASE)
+
+
+def _normalizar_titulo(titulo):
+    sem_acentos = ''.join(c for c in unicodedata.normalize('NFKD', titulo or '')
+                          if not unicodedata.combining(c))
+    return _ESPACOS.sub(' ', _PONTUACAO.sub(' ', sem_acentos)).strip().casefold()
+
+
+def _resolver(conn, texto):
+    """(numero, titulo_normalizado) de um hino digitado na ata."""
+    m = _NUMERO_TITULO.match(texto)
+    if m:
+        numero, titulo = int(m.group(1)), m.group(2).strip()
+        if titulo:
+            conn.execute(
+                "INSERT OR IGNORE INTO hinos_catalogo (numero, titulo, titulo_normalizado) VALUES (?, ?, ?)",
+                (numero, titulo, _normalizar_titulo(titulo)))
+        return numero, _normalizar_titulo(titulo)
+    chave = _normalizar_titulo(texto)
+    row = conn.execute("SELECT numero FROM hinos_catalogo WHERE titulo_normalizado = ?", (chave,)).fetchone()
+    return (row[0] if row else None), chave
+
+
+def upgrade(conn, log):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS hinos_catalogo (
+            numero INTEGER PRIMARY KEY,
+            titulo TEXT NOT NULL,
+            titulo_normalizado TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_hinos_catalogo_titulo
+        ON hinos_catalogo(titulo_normalizado)
+    """)
+    # papel: abertura, sacramental, intermediario, encerramento
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS hinos_uso (
+            ata_id INTEGER NOT NULL,
+            papel TEXT NOT NULL,
+            ala_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            numero INTEGER,
+            titulo_normalizado TEXT NOT NULL,
+            hino TEXT NOT NULL,
+            PRIMARY KEY (ata_id, papel),
+            FOREIGN KEY(ata_id) REFERENCES atas(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_hinos_uso_ala_numero ON hinos_uso(ala_id, numero, data)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_hinos_uso_ala_data ON hinos_uso(ala_id, data)")
+
+    conn.execute("DELETE FROM hinos_uso")
+    for ata_id, ala_id, data, papel, hino in conn.execute("""
+        SELECT a.id, a.ala_id, a.data, h.papel, h.hino
+        FROM ata_hinos h JOIN atas a ON a.id = h.ata_id
+        WHERE a.tipo = 'sacramental'
+        ORDER BY a.id, h.posicao
+    """).fetchall():
+        if not hino or not hino.strip():
+            continue
+        texto = hino.strip()
+        conn.execute("""
+            INSERT INTO hinos_uso (ata_id, papel, ala_id, data, numero, titulo_normalizado, hino)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (ata_id, papel, ala_id, data) + _resolver(conn, texto) + (texto,))
@@ -0,0 +1,61 @@
+-- 0009: contadores de atas por ala (ver functions/ala_stats.py), mantidos por
+-- triggers em atas. periodo = '' guarda o total geral; 'AAAA-MM' o total do mês.
+
+CREATE TABLE IF NOT EXISTS ala_stats (
+    ala_id INTEGER NOT NULL,
+    periodo TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    sacramental INTEGER NOT NULL DEFAULT 0,
+    batismo INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (ala_id, periodo)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_ala_stats_insert AFTER INSERT ON atas
+BEGIN
+    INSERT INTO ala_stats (ala_id, periodo, total, sacramental, batismo)
+    VALUES (NEW.ala_id, '', 1, NEW.tipo = 'sacramental', NEW.tipo = 'batismo'),
+           (NEW.ala_id, substr(NEW.data, 1, 7), 1, NEW.tipo = 'sacramental', NEW.tipo = 'batismo')
+    ON CONFLICT (ala_id, periodo) DO UPDATE SET
+        total = total + excluded.total,
+        sacramental = sacramental + excluded.sacramental,
+        batismo = batismo + excluded.batismo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ala_stats_delete AFTER DELETE ON atas
+BEGIN
+    UPDATE ala_stats SET
+        total = total - 1,
+        sacramental = sacramental - (OLD.tipo = 'sacramental'),
+        batismo = batismo - (OLD.tipo = 'batismo')
+    WHERE ala_id = OLD.ala_id AND periodo IN ('', substr(OLD.data, 1, 7));
+    DELETE FROM ala_stats
+    WHERE ala_id = OLD.ala_id AND periodo = substr(OLD.data, 1, 7) AND total <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ala_stats_update AFTER UPDATE OF tipo, data, ala_id ON atas
+WHEN OLD.tipo IS NOT NEW.tipo OR OLD.data IS NOT NEW.data OR OLD.ala_id IS NOT NEW.ala_id
+BEGIN
+    UPDATE ala_stats SET
+        total = total - 1,
+        sacramental = sacramental - (OLD.tipo = 'sacramental'),
+        batismo = batismo - (OLD.tipo = 'batismo')
+    WHERE ala_id = OLD.ala_id AND periodo IN ('', substr(OLD.data, 1, 7));
+    DELETE FROM ala_stats
+    WHERE ala_id = OLD.ala_id AND periodo = substr(OLD.data, 1, 7) AND total <= 0;
+    INSERT INTO ala_stats (ala_id, periodo, total, sacramental, batismo)
+    VALUES (NEW.ala_id, '', 1, NEW.tipo = 'sacramental', NEW.tipo = 'batismo'),
+           (NEW.ala_id, substr(NEW.data, 1, 7), 1, NEW.tipo = 'sacramental', NEW.tipo = 'batismo')
+    ON CONFLICT (ala_id, periodo) DO UPDATE SET
+        total = total + excluded.total,
+        sacramental = sacramental + excluded.sacramental,
+        batismo = batismo + excluded.batismo;
+END;
+
+-- Carga inicial a partir das atas existentes
+INSERT INTO ala_stats (ala_id, periodo, total, sacramental, batismo)
+SELECT ala_id, '', COUNT(*), SUM(tipo = 'sacramental'), SUM(tipo = 'batismo')
+FROM atas GROUP BY ala_id;
+
+INSERT INTO ala_stats (ala_id, periodo, total, sacramental, batismo)
+SELECT ala_id, substr(data, 1, 7), COUNT(*), SUM(tipo = 'sacramental'), SUM(tipo = 'batismo')
+FROM atas GROUP BY ala_id, substr(data, 1, 7);
@@ -0,0 +1,95 @@
+# 0010: uma ata por (ala_id, tipo, data) e um registro de detalhes por ata,
+# para o save ser um upsert (INSERT ... ON CONFLICT DO UPDATE ... RETURNING).
+#
+# Duplicatas existentes (duplo envio do formulário) são resolvidas mantendo a
+# mais recente (maior id); as outras saem junto com listas, hinos e índice de
+# busca. Registros de detalhes repetidos para a mesma ata ficam só com o último.
+# Contadores (0009) e histórico de discursantes (0007) das alas afetadas são
+# recalculados aqui, com o SQL congelado desta versão.
+import json
+import re
+import unicodedata
+
+TABELAS_POR_ATA = ('sacramental', 'batismo', 'ata_anuncios', 'ata_batizados', 'ata_discursantes',
+                   'ata_hinos', 'ata_oracoes', 'hinos_uso')
+
+_ESPACOS = re.compile(r'\s+')
+
+
+def _normalizar(texto):
+    sem_acentos = ''.join(c for c in unicodedata.normalize('NFKD', texto or '')
+                          if not unicodedata.combining(c))
+    return _ESPACOS.sub(' ', sem_acentos).strip().casefold()
+
+
+def _recontar(conn):
+    """ala_stats (0009) refeita a partir de atas."""
+    conn.execute("DELETE FROM ala_stats")
+    conn.execute("""
+        INSERT INTO ala_stats (ala_id, periodo, total, sacramental, batismo)
+        SELECT ala_id, '', COUNT(*), SUM(tipo = 'sacramental'), SUM(tipo = 'batismo')
+        FROM atas GROUP BY ala_id
+    """)
+    conn.execute("""
+        INSERT INTO ala_stats (ala_id, periodo, total, sacramental, batismo)
+        SELECT ala_id, substr(data, 1, 7), COUNT(*), SUM(tipo = 'sacramental'), SUM(tipo = 'batismo')
+        FROM atas GROUP BY ala_id, substr(data, 1, 7)
+    """)
+
+
+def _refazer_historico(conn, alas):
+    """speaker_history (0007) das `alas` refeito a partir de ata_discursantes."""
+    lista = json.dumps(alas)
+    conn.execute("DELETE FROM speaker_history WHERE ala_id IN (SELECT value FROM json_each(?))", (lista,))
+    por_chave = {}
+    for ala_id, nome, ata_id, data, tema in conn.execute("""
+        SELECT a.ala_id, d.nome, a.id, a.data, s.tema
+        FROM ata_discursantes d
+        JOIN atas a ON a.id = d.ata_id
+        LEFT JOIN sacramental s ON s.ata_id = a.id
+        WHERE a.tipo = 'sacramental' AND a.ala_id IN (SELECT value FROM json_each(?))
+    """, (lista,)):
+        chave = _normalizar(nome)
+        if chave:
+            por_chave.setdefault((ala_id, chave), []).append((data, ata_id, nome, tema))
+    for (ala_id, chave), falas in por_chave.items():
+        data, _, nome, tema = max(falas, key=lambda f: (f[0], f[1]))
+        conn.execute("""
+            INSERT OR REPLACE INTO speaker_history
+                (ala_id, nome_normalizado, nome, grafias, last_date, count, last_tema)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            ala_id, chave, nome.strip(),
+            json.dumps(sorted({f[2] for f in falas}), ensure_ascii=False),
+            data, len({f[1] for f in falas}), tema,
+        ))
+
+
+def upgrade(conn, log):
+    duplicadas = conn.execute("""
+        SELECT id, ala_id FROM atas a
+        WHERE id < (SELECT MAX(id) FROM atas b
+                    WHERE b.ala_id = a.ala_id AND b.tipo = a.tipo AND b.data = a.data)
+    """).fetchall()
+    if duplicadas:
+        ids = json.dumps([row['id'] for row in duplicadas])
+        for tabela in TABELAS_POR_ATA:
+            conn.execute(f"DELETE FROM {tabela} WHERE ata_id IN (SELECT value FROM json_each(?))", (ids,))
+        conn.execute("DELETE FROM atas_fts WHERE rowid IN (SELECT value FROM json_each(?))", (ids,))
+        conn.execute("DELETE FROM atas WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+        alas = sorted({row['ala_id'] for row in duplicadas})
+        _refazer_historico(conn, alas)
+        _recontar(conn)
+        log(f"0010: {len(duplicadas)} ata(s) duplicada(s) removida(s) (alas {alas}).")
+
+    for tabela in ('sacramental', 'batismo'):
+        conn.execute(f"""
+            DELETE FROM {tabela}
+            WHERE id < (SELECT MAX(id) FROM {tabela} t WHERE t.ata_id = {tabela}.ata_id)
+        """)
+        conn.execute(f"DROP INDEX IF EXISTS idx_{tabela}_ata_id")
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{tabela}_ata_id ON {tabela}(ata_id)")
+
+    # Mesmo nome e colunas do índice da 0005, agora único
+    conn.execute("DROP INDEX IF EXISTS idx_atas_ala_tipo_data")
+    conn.execute("CREATE UNIQUE INDEX idx_atas_ala_tipo_data ON atas(ala_id, tipo, data)")
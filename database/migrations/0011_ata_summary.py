@@ -0,0 +1,53 @@
+# 0011: resumo das atas para as páginas de lista (ver functions/ata_summary.py).
+#
+# Os triggers seguem exclusões e mudanças das colunas da própria ata; tema,
+# discursantes e hino são gravados por ata_summary.atualizar() junto com o
+# save. A carga inicial projeta todas as atas existentes (mesma projeção de
+# ata_summary.SQL_PROJECAO nesta versão, congelada aqui).
+
+COMANDOS = (
+    """
+    CREATE TABLE IF NOT EXISTS ata_summary (
+        ala_id INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        ata_id INTEGER NOT NULL,
+        tipo TEXT NOT NULL,
+        status TEXT,
+        tema TEXT,
+        total_discursantes INTEGER NOT NULL DEFAULT 0,
+        primeiro_hino TEXT,
+        PRIMARY KEY (ala_id, data, ata_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_ata_summary_ata_id ON ata_summary(ata_id)",
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_ata_summary_delete AFTER DELETE ON atas
+    BEGIN
+        DELETE FROM ata_summary WHERE ata_id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_ata_summary_update AFTER UPDATE OF tipo, data, status, ala_id ON atas
+    BEGIN
+        UPDATE ata_summary
+        SET ala_id = NEW.ala_id, data = NEW.data, tipo = NEW.tipo, status = NEW.status
+        WHERE ata_id = OLD.id;
+    END
+    """,
+)
+
+
+CARGA_INICIAL = """
+    INSERT INTO ata_summary (ala_id, data, ata_id, tipo, status, tema, total_discursantes, primeiro_hino)
+    SELECT a.ala_id, a.data, a.id, a.tipo, a.status, s.tema,
+           (SELECT COUNT(*) FROM ata_discursantes d WHERE d.ata_id = a.id),
+           (SELECT h.hino FROM ata_hinos h WHERE h.ata_id = a.id ORDER BY h.posicao LIMIT 1)
+    FROM atas a LEFT JOIN sacramental s ON s.ata_id = a.id
+"""
+
+
+def upgrade(conn, log):
+    for comando in COMANDOS:
+        conn.execute(comando)
+    conn.execute("DELETE FROM ata_summary")
+    conn.execute(CARGA_INICIAL)
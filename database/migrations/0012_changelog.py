@@ -0,0 +1,49 @@
+# 0012: registro de mudanças para sincronização incremental (ver
+# functions/changelog.py e a rota /sync). Começa vazio: clientes sem cursor
+# recebem 'reiniciar' e fazem a primeira carga completa.
+#
+# Triggers de insert/update/delete em cada entidade gravam uma linha no log.
+# Em sacramental/batismo o entity_id é o ata_id e o ala_id vem da ata; sem a
+# ata (apagada antes) o DELETE de atas já foi registrado.
+
+ENTIDADES = ('atas', 'sacramental', 'batismo', 'templates', 'unidades')
+OPERACOES = {'INSERT': 'insert', 'UPDATE': 'update', 'DELETE': 'delete'}
+
+
+def _triggers(entidade):
+    if entidade in ('sacramental', 'batismo'):
+        ala = "(SELECT ala_id FROM atas WHERE id = {linha}.ata_id)"
+        entity_id = "{linha}.ata_id"
+        quando = "WHEN EXISTS (SELECT 1 FROM atas WHERE id = {linha}.ata_id)"
+    else:
+        ala = "{linha}.ala_id"
+        entity_id = "{linha}.id"
+        quando = ""
+    for evento, op in OPERACOES.items():
+        linha = 'OLD' if evento == 'DELETE' else 'NEW'
+        yield f"""
+            CREATE TRIGGER IF NOT EXISTS trg_changelog_{entidade}_{op} AFTER {evento} ON {entidade}
+            {quando.format(linha=linha)}
+            BEGIN
+                INSERT INTO changelog (ala_id, entity, entity_id, op)
+                VALUES ({ala.format(linha=linha)}, '{entidade}', {entity_id.format(linha=linha)}, '{op}');
+            END
+        """
+
+
+def upgrade(conn, log):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS changelog (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            ala_id INTEGER NOT NULL,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            ts TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+        )
+    """)
+    # /sync lê pela faixa de seq (chave primária); ts só serve para a poda
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_changelog_ts ON changelog(ts)")
+    for entidade in ENTIDADES:
+        for comando in _triggers(entidade):
+            conn.execute(comando)
@@ -0,0 +1,19 @@
+-- 0013: histórico de revisões das atas (ver functions/revisoes.py).
+-- snapshot = 1: dados é o documento completo; 0: diferença para a revisão
+-- anterior. dados é JSON comprimido com zlib (formato = versão da codificação).
+-- evento: original, salva, excluida ou restaurada (origem = revisão restaurada).
+-- Não há FOREIGN KEY para atas: o histórico continua depois da exclusão.
+
+CREATE TABLE IF NOT EXISTS ata_revisoes (
+    ata_id INTEGER NOT NULL,
+    revisao INTEGER NOT NULL,
+    ala_id INTEGER NOT NULL,
+    snapshot INTEGER NOT NULL,
+    formato INTEGER NOT NULL,
+    dados BLOB NOT NULL,
+    evento TEXT NOT NULL,
+    origem INTEGER,
+    usuario TEXT,
+    ts TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    PRIMARY KEY (ata_id, revisao)
+) WITHOUT ROWID;
@@ -0,0 +1,84 @@
+# 0014: chaves estrangeiras valendo (functions/db.py liga PRAGMA foreign_keys
+# em toda conexão). Os detalhes e as listas saem junto com a ata por ON DELETE
+# CASCADE; excluir uma ata (ou muitas, ver functions/atas_em_lote.py) vira um
+# único DELETE em atas.
+#
+# O SQLite não altera constraints com ALTER TABLE: as tabelas abaixo são
+# recriadas (CREATE da nova, cópia, DROP da antiga e RENAME), com os mesmos
+# índices, triggers e sqlite_sequence (as revisões restauram atas com o id antigo).
+#
+# - sacramental.ata_id ganha ON DELETE CASCADE (batismo e as listas já tinham);
+#   a chave de id_tipo sai: a coluna não é usada e o arquivo morto não tem templates.
+# - atas.ala_id e templates.ala_id deixam de apontar para users: com sharding os
+#   usuários valem no catálogo, e os modelos padrão usam ala_id = 0.
+# - hinos_uso perde a chave para atas: como ata_summary, é um modelo de leitura
+#   que fica no principal também para as atas do arquivo morto (quem exclui
+#   a ata apaga o uso junto).
+#
+# Detalhes órfãos (de atas já apagadas com as chaves desligadas) são removidos antes.
+import re
+
+FILHAS_DE_ATAS = ('sacramental', 'batismo', 'ata_discursantes', 'ata_anuncios', 'ata_hinos',
+                  'ata_oracoes', 'ata_batizados')
+
+# tabela -> [(padrão da cláusula FOREIGN KEY no CREATE TABLE atual, substituto)]
+MUDANCAS = {
+    'atas': [(r',\s*FOREIGN KEY\s*\(\s*ala_id\s*\)\s*REFERENCES\s+users\s*\(\s*id\s*\)', '')],
+    'sacramental': [
+        (r',\s*FOREIGN KEY\s*\(\s*id_tipo\s*\)\s*REFERENCES\s+templates\s*\(\s*id\s*\)', ''),
+        (r'FOREIGN KEY\s*\(\s*ata_id\s*\)\s*REFERENCES\s+atas\s*\(\s*id\s*\)(?!\s*ON)',
+         'FOREIGN KEY(ata_id) REFERENCES atas(id) ON DELETE CASCADE'),
+    ],
+    'templates': [(r',\s*FOREIGN KEY\s*\(\s*ala_id\s*\)\s*REFERENCES\s+users\s*\(\s*id\s*\)', '')],
+    'hinos_uso': [(r',\s*FOREIGN KEY\s*\(\s*ata_id\s*\)\s*REFERENCES\s+atas\s*\(\s*id\s*\)\s*ON DELETE CASCADE', '')],
+}
+
+
+def _recriar(conn, tabela, mudancas):
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                       (tabela,)).fetchone()[0]
+    novo = sql
+    for padrao, substituto in mudancas:
+        novo = re.sub(padrao, substituto, novo, flags=re.IGNORECASE)
+    if novo == sql:
+        return
+    novo = re.sub(r'^CREATE TABLE\s+(IF NOT EXISTS\s+)?"?\w+"?', f'CREATE TABLE "{tabela}_novo"', novo)
+    dependentes = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? "
+        "AND sql IS NOT NULL ORDER BY type, name", (tabela,)).fetchall()
+    sequencia = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (tabela,)).fetchone()
+    colunas = ', '.join(f'"{c[1]}"' for c in conn.execute(f'PRAGMA table_info("{tabela}")'))
+
+    conn.execute(novo)
+    conn.execute(f'INSERT INTO "{tabela}_novo" ({colunas}) SELECT {colunas} FROM "{tabela}"')
+    conn.execute(f'DROP TABLE "{tabela}"')
+    # Triggers de outras tabelas citam a antiga pelo nome; sem o modo legado o
+    # RENAME reclama deles enquanto ela não existe
+    conn.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        conn.execute(f'ALTER TABLE "{tabela}_novo" RENAME TO "{tabela}"')
+    finally:
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+    for (comando,) in dependentes:
+        conn.execute(comando)
+    if sequencia is not None:
+        conn.execute("DELETE FROM sqlite_sequence WHERE name IN (?, ?)", (tabela, f"{tabela}_novo"))
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (tabela, sequencia[0]))
+
+
+def upgrade(conn, log):
+    # Com as chaves ligadas o DROP TABLE apagaria os detalhes em cascata
+    if conn.execute("PRAGMA foreign_keys").fetchone()[0]:
+        raise RuntimeError("0014 precisa rodar com PRAGMA foreign_keys = OFF")
+
+    for tabela in FILHAS_DE_ATAS:
+        apagadas = conn.execute(
+            f"DELETE FROM {tabela} WHERE ata_id IS NOT NULL AND ata_id NOT IN (SELECT id FROM atas)").rowcount
+        if apagadas:
+            log(f"0014: {apagadas} linha(s) órfã(s) removida(s) de {tabela}.")
+    for tabela, mudancas in MUDANCAS.items():
+        _recriar(conn, tabela, mudancas)
+
+    problemas = conn.execute("PRAGMA foreign_key_check").fetchall()
+    if problemas:
+        raise RuntimeError(f"0014: chaves estrangeiras inválidas: {[tuple(p) for p in problemas[:5]]}")
@@ -0,0 +1,42 @@
+# 0015: os triggers de atas, sacramental e batismo (contadores, resumo e
+# changelog) ficam em pausa enquanto o arquivo morto move linhas entre o
+# principal e o arquivo (ver functions/arquivo_morto.py): mover não é criar nem
+# apagar. Antes o arquivo morto apagava e recriava os triggers a cada lote.
+#
+# arquivo_movendo fica vazia; o arquivo morto grava uma linha, move e apaga a
+# linha dentro da mesma transação, então ninguém mais a vê. Cada trigger ganha
+# a condição abaixo no WHEN (junto com a que já tinha).
+import re
+
+TABELAS = ('atas', 'sacramental', 'batismo')
+CONDICAO = "NOT EXISTS (SELECT 1 FROM arquivo_movendo)"
+
+
+def _com_condicao(sql):
+    """CREATE TRIGGER `sql` com CONDICAO no WHEN."""
+    inicio = re.search(r'\bBEGIN\b', sql, flags=re.IGNORECASE).start()
+    cabecalho, corpo = sql[:inicio], sql[inicio:]
+    quando = re.search(r'\bWHEN\b', cabecalho, flags=re.IGNORECASE)
+    if quando:
+        cabecalho = (f"{cabecalho[:quando.start()]}WHEN {CONDICAO} "
+                     f"AND ({cabecalho[quando.end():].strip()})\n")
+    else:
+        cabecalho = f"{cabecalho.rstrip()}\nWHEN {CONDICAO}\n"
+    return cabecalho + corpo
+
+
+def upgrade(conn, log):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS arquivo_movendo (
+            ts TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+        )
+    """)
+    marcadores = ', '.join('?' for _ in TABELAS)
+    triggers = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ({marcadores})",
+        TABELAS).fetchall()
+    for nome, sql in triggers:
+        if CONDICAO in sql:
+            continue
+        conn.execute(f'DROP TRIGGER "{nome}"')
+        conn.execute(_com_condicao(sql))
@@ -0,0 +1,54 @@
+# functions/ala_stats.py
+# Contadores de atas por ala (tabela ala_stats, migração 0009).
+#
+# Triggers em atas mantêm uma linha de total geral (periodo = '') e uma por
+# mês ('AAAA-MM') com total, sacramental e batismo. Leituras usam só a chave
+# primária; reconciliar() refaz tudo a partir de atas caso os contadores
+# tenham divergido (ex.: banco editado com os triggers desligados).
+
+from functions import arquivo_morto
+
+# {atas}: atas do principal e, com o arquivo morto anexado, também as de lá
+SQL_RECONTAGEM = """
+    SELECT ala_id, '' AS periodo, COUNT(*) AS total,
+           SUM(tipo = 'sacramental') AS sacramental, SUM(tipo = 'batismo') AS batismo
+    FROM {atas} {filtro} GROUP BY ala_id
+    UNION ALL
+    SELECT ala_id, substr(data, 1, 7), COUNT(*), SUM(tipo = 'sacramental'), SUM(tipo = 'batismo')
+    FROM {atas} {filtro} GROUP BY ala_id, substr(data, 1, 7)
+"""
+
+
+def ler(conn, ala_id, mes):
+    """{'total', 'sacramental', 'batismo', 'mes'} da ala; `mes` no formato 'AAAA-MM'."""
+    stats = {'total': 0, 'sacramental': 0, 'batismo': 0, 'mes': 0}
+    for row in conn.execute(
+            "SELECT periodo, total, sacramental, batismo FROM ala_stats "
+            "WHERE ala_id = ? AND periodo IN ('', ?)", (ala_id, mes)):
+        if row['periodo'] == '':
+            stats.update(total=row['total'], sacramental=row['sacramental'], batismo=row['batismo'])
+        else:
+            stats['mes'] = row['total']
+    return stats
+
+
+def reconciliar(conn, ala_id=None):
+    """Recalcula ala_stats (de uma ala ou de todas) a partir de atas.
+
+    Retorna quantas linhas estavam divergentes.
+    """
+    filtro, params = ("WHERE ala_id = ?", (ala_id,)) if ala_id is not None else ("", ())
+    atuais = {(r['ala_id'], r['periodo']): tuple(r)[2:] for r in conn.execute(
+        f"SELECT ala_id, periodo, total, sacramental, batismo FROM ala_stats {filtro} "
+        f"{'AND' if filtro else 'WHERE'} total > 0", params)}
+    atas, _ = arquivo_morto.uniao(conn, "SELECT a.ala_id, a.tipo, a.data FROM {s}atas a WHERE {unica}")
+    corretas = {(r['ala_id'], r['periodo']): tuple(r)[2:] for r in conn.execute(
+        SQL_RECONTAGEM.format(atas=f"({atas})", filtro=filtro), params * 2)}
+    divergentes = sum(1 for chave in atuais.keys() | corretas.keys()
+                      if atuais.get(chave) != corretas.get(chave))
+    if divergentes:
+        conn.execute(f"DELETE FROM ala_stats {filtro}", params)
+        conn.executemany(
+            "INSERT INTO ala_stats (ala_id, periodo, total, sacramental, batismo) VALUES (?, ?, ?, ?, ?)",
+            [chave + valores for chave, valores in corretas.items()])
+    return divergentes
@@ -0,0 +1,464 @@
+# functions/arquivo_morto.py
+# Arquivo morto: as atas antigas saem do banco principal para um segundo
+# arquivo SQLite (arquivo/<banco>_arquivo.db, ao lado do banco), anexado a
+# cada conexão com ATTACH ... AS arquivo.
+#
+# Vão para o arquivo as linhas de atas, sacramental, batismo e das listas
+# (ata_discursantes, ...). Os modelos de leitura (ata_summary, ala_stats,
+# speaker_history, hinos_uso, atas_fts), o changelog e as revisões ficam no
+# principal: listas, painéis e busca continuam lendo só ele, e o principal
+# com os seus índices fica pequeno o bastante para caber no cache.
+#
+# Quem precisa da ata completa (visualizar, exportar, PDF, revisões) ou
+# recalcula um modelo de leitura monta a consulta com uniao(): a mesma
+# consulta em main e em arquivo, com UNION ALL. Uma ata que está nos dois
+# (ver abaixo) vale pela cópia do principal.
+#
+# arquivar() move em lotes, cada um em duas transações curtas: copia para o
+# arquivo e só depois apaga do principal (com os triggers de contadores,
+# resumo e changelog em pausa, ver 0015_arquivo_movendo). Entre as duas, uma
+# queda deixa a ata nos dois arquivos, nunca em nenhum; atas alteradas entre
+# a cópia e a remoção (vistas no changelog) ficam no principal.
+# trazer_de_volta() faz o caminho inverso dentro de um job de escrita: o
+# SQLite grava o commit de main antes dos bancos anexados, então uma queda no
+# meio também só deixa a ata duplicada. Editar, excluir ou restaurar uma ata
+# arquivada a traz de volta antes.
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import date
+
+from functions import changelog, db
+from functions.ata_listas import TABELAS as TABELAS_LISTAS
+
+try:
+    # Com eventlet.monkey_patch() o agendador precisa de uma thread do sistema
+    from eventlet.patcher import original
+    threading = original('threading')
+except ImportError:
+    import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+ESQUEMA = 'arquivo'
+PASTA = 'arquivo'
+TABELAS = ('atas', 'sacramental', 'batismo') + TABELAS_LISTAS  # atas primeiro
+LOTE_PADRAO = 500
+PAUSA_PADRAO = 0.05     # segundos entre lotes, para os saves não esperarem
+INTERVALO_H_PADRAO = 24
+CACHE_KIB = 2000        # cache do arquivo por conexão; o principal fica com o resto
+
+# No arquivo, descarta as atas que também estão no principal
+_UNICA = "NOT EXISTS (SELECT 1 FROM main.atas m WHERE m.id = a.id)"
+
+
+def caminho_do_arquivo(caminho):
+    pasta, nome = os.path.split(caminho)
+    raiz, extensao = os.path.splitext(nome)
+    return os.path.join(pasta, PASTA, f"{raiz}_arquivo{extensao or '.db'}")
+
+
+def com_arquivos(caminhos):
+    """Os bancos `caminhos` mais os arquivos mortos que existem (para backup e réplica)."""
+    caminhos = list(caminhos)
+    return caminhos + [a for a in map(caminho_do_arquivo, caminhos) if os.path.exists(a)]
+
+
+def anexado(conn):
+    return conn.execute(
+        "SELECT 1 FROM pragma_database_list WHERE name = ?", (ESQUEMA,)).fetchone() is not None
+
+
+def _chave(tabela):
+    return 'id' if tabela == 'atas' else 'ata_id'
+
+
+def _colunas(conn, esquema, tabela):
+    return [c[1] for c in conn.execute(f'PRAGMA {esquema}.table_info("{tabela}")')]
+
+
+# ------------------------------------------------------------------
+# Esquema e conexão
+# ------------------------------------------------------------------
+
+def _chaves(conn, esquema, tabela):
+    return conn.execute(f'PRAGMA {esquema}.foreign_key_list("{tabela}")').fetchall()
+
+
+def _recriar(conn, tabela, sql):
+    """Recria a tabela do arquivo com o CREATE do principal (chaves estrangeiras mudaram).
+
+    Os índices somem com o DROP e voltam logo depois, em preparar().
+    """
+    colunas = ', '.join(f'"{c}"' for c in _colunas(conn, ESQUEMA, tabela)
+                        if c in set(_colunas(conn, 'main', tabela)))
+    conn.execute(re.sub(r'^CREATE TABLE\s+"?\w+"?', f'CREATE TABLE {ESQUEMA}."{tabela}_novo"', sql))
+    conn.execute(f'INSERT INTO {ESQUEMA}."{tabela}_novo" ({colunas}) SELECT {colunas} FROM {ESQUEMA}."{tabela}"')
+    conn.execute(f'DROP TABLE {ESQUEMA}."{tabela}"')
+    conn.execute(f'ALTER TABLE {ESQUEMA}."{tabela}_novo" RENAME TO "{tabela}"')
+
+
+def preparar(caminho):
+    """Cria (ou completa) o arquivo morto de `caminho` com o esquema das tabelas movidas.
+
+    Tabelas e índices são copiados do principal (sem triggers); colunas
+    acrescentadas depois por migrações entram com ALTER TABLE, e uma tabela
+    cujas chaves estrangeiras mudaram no principal é recriada. Retorna o
+    caminho do arquivo, ou None se o principal ainda não tem as tabelas.
+    """
+    conn = sqlite3.connect(caminho)
+    try:
+        objetos = conn.execute(
+            f"SELECT type, name, tbl_name, sql FROM main.sqlite_master "
+            f"WHERE type IN ('table', 'index') AND sql IS NOT NULL "
+            f"AND tbl_name IN ({', '.join('?' for _ in TABELAS)})", TABELAS).fetchall()
+        if sum(1 for tipo, *_ in objetos if tipo == 'table') < len(TABELAS):
+            return None
+        arquivo = caminho_do_arquivo(caminho)
+        os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+        conn.execute(f"ATTACH DATABASE ? AS {ESQUEMA}", (arquivo,))
+        # Arquivo novo: auto_vacuum incremental antes do WAL e da primeira tabela
+        conn.execute(f"PRAGMA {ESQUEMA}.auto_vacuum = INCREMENTAL")
+        conn.execute(f"PRAGMA {ESQUEMA}.journal_mode = WAL")
+        for tipo, nome, tabela, sql in sorted(objetos, key=lambda o: o[0] != 'table'):
+            if tipo == 'table':
+                conn.execute(re.sub(r'^CREATE TABLE\s+', f'CREATE TABLE IF NOT EXISTS {ESQUEMA}.', sql))
+                if _chaves(conn, 'main', tabela) != _chaves(conn, ESQUEMA, tabela):
+                    _recriar(conn, tabela, sql)
+                existentes = set(_colunas(conn, ESQUEMA, tabela))
+                for coluna in conn.execute(f'PRAGMA main.table_info("{tabela}")').fetchall():
+                    if coluna[1] not in existentes:
+                        conn.execute(f'ALTER TABLE {ESQUEMA}."{tabela}" ADD COLUMN "{coluna[1]}" {coluna[2]}')
+            else:
+                conn.execute(re.sub(r'^CREATE (UNIQUE )?INDEX\s+(IF NOT EXISTS\s+)?',
+                                    rf'CREATE \1INDEX IF NOT EXISTS {ESQUEMA}.', sql))
+        conn.commit()
+        return arquivo
+    finally:
+        conn.close()
+
+
+def anexar(conn, caminho):
+    """ATTACH do arquivo morto de `caminho` em `conn`, se ele existe. Retorna True se anexou."""
+    arquivo = caminho_do_arquivo(caminho)
+    if not os.path.exists(arquivo):
+        return False
+    conn.execute(f"ATTACH DATABASE ? AS {ESQUEMA}", (arquivo,))
+    conn.execute(f"PRAGMA {ESQUEMA}.synchronous = NORMAL")
+    conn.execute(f"PRAGMA {ESQUEMA}.cache_size = -{CACHE_KIB}")
+    return True
+
+
+def uniao(conn, sql, params=()):
+    """Monta `sql` para o principal e, com o arquivo anexado, também para o arquivo.
+
+    Em `sql`, {s} vai antes de cada tabela movida (fica "arquivo." na segunda
+    parte) e {unica} é uma condição sobre o alias `a` de atas que, no
+    arquivo, descarta as atas que também estão no principal. ORDER BY e
+    LIMIT ficam por conta de quem chama, depois da união. Retorna (sql, params).
+    """
+    principal = sql.replace('{s}', '').replace('{unica}', '1')
+    if not anexado(conn):
+        return principal, tuple(params)
+    arquivada = sql.replace('{s}', f'{ESQUEMA}.').replace('{unica}', _UNICA)
+    return f"{principal}\nUNION ALL\n{arquivada}", tuple(params) * 2
+
+
+# ------------------------------------------------------------------
+# Movimentação (dentro de um job de escrita; sem commit)
+# ------------------------------------------------------------------
+
+def _copiar(conn, origem, destino, ids):
+    """Copia as atas `ids` (com detalhes e listas) de `origem` para `destino`.
+
+    O id próprio de sacramental/batismo não é copiado: o do outro arquivo
+    pode já estar em uso.
+    """
+    lista = json.dumps(ids)
+    for tabela in TABELAS:
+        chave = _chave(tabela)
+        da_origem = set(_colunas(conn, origem, tabela))
+        colunas = [c for c in _colunas(conn, destino, tabela)
+                   if c in da_origem and (tabela == 'atas' or c != 'id')]
+        nomes = ', '.join(f'"{c}"' for c in colunas)
+        conn.execute(f'DELETE FROM {destino}."{tabela}" WHERE {chave} IN (SELECT value FROM json_each(?))',
+                     (lista,))
+        conn.execute(f'INSERT INTO {destino}."{tabela}" ({nomes}) SELECT {nomes} FROM {origem}."{tabela}" '
+                     f'WHERE {chave} IN (SELECT value FROM json_each(?))', (lista,))
+
+
+def _apagar(conn, esquema, ids):
+    lista = json.dumps(sorted(ids))
+    for tabela in reversed(TABELAS):
+        conn.execute(f'DELETE FROM {esquema}."{tabela}" WHERE {_chave(tabela)} IN (SELECT value FROM json_each(?))',
+                     (lista,))
+
+
+def _sem_triggers(conn, funcao):
+    """Roda funcao() com os triggers das tabelas movidas em pausa no principal.
+
+    Mover não é criar nem apagar: contadores, resumo e changelog não mudam.
+    A linha em arquivo_movendo (migração 0015) só existe durante funcao(),
+    dentro da transação de quem chama.
+    """
+    conn.execute("INSERT INTO main.arquivo_movendo DEFAULT VALUES")
+    try:
+        funcao()
+    finally:
+        conn.execute("DELETE FROM main.arquivo_movendo")
+
+
+def trazer_de_volta(conn, ids):
+    """Traz do arquivo para o principal as atas `ids` que estão lá. Retorna quantas.
+
+    Chamar dentro do job de escrita, antes de alterar ou apagar a ata.
+    """
+    if not ids or not anexado(conn):
+        return 0
+    lista = json.dumps([int(i) for i in ids])
+    arquivadas = [row[0] for row in conn.execute(
+        f"SELECT id FROM {ESQUEMA}.atas WHERE id IN (SELECT value FROM json_each(?))", (lista,))]
+    if not arquivadas:
+        return 0
+    # Se a ata ficou nos dois (queda no meio de um lote), vale a do principal
+    novas = [row[0] for row in conn.execute(
+        "SELECT value FROM json_each(?) WHERE value NOT IN (SELECT id FROM main.atas)",
+        (json.dumps(arquivadas),))]
+    if novas:
+        _sem_triggers(conn, lambda: _copiar(conn, ESQUEMA, 'main', novas))
+    _apagar(conn, ESQUEMA, arquivadas)
+    return len(arquivadas)
+
+
+def trazer_da_ala(conn, ala_id, ata_id=None, tipo=None, data=None):
+    """trazer_de_volta() da ata `ata_id` e/ou da ata de (`tipo`, `data`) da ala."""
+    if not anexado(conn):
+        return 0
+    ids = [row[0] for row in conn.execute(
+        f"SELECT id FROM {ESQUEMA}.atas WHERE ala_id = ? AND (id = ? OR (tipo = ? AND data = ?))",
+        (ala_id, int(ata_id) if ata_id else None, tipo, data))]
+    return trazer_de_volta(conn, ids)
+
+
+def _copiar_lote(conn, antes_de, depois_do_id, lote, ala_id):
+    filtro, params = ("AND ala_id = ?", (ala_id,)) if ala_id is not None else ("", ())
+    ids = [row[0] for row in conn.execute(
+        f"SELECT id FROM main.atas WHERE data < ? AND id > ? {filtro} ORDER BY id LIMIT ?",
+        (antes_de, depois_do_id) + params + (lote,))]
+    if ids:
+        _copiar(conn, 'main', ESQUEMA, ids)
+    return ids, changelog.ultimo_seq(conn)
+
+
+def _apagar_lote(conn, ids, seq):
+    """Apaga do principal as atas copiadas que não mudaram depois da cópia (seq do changelog)."""
+    mudaram = {row[0] for row in conn.execute("""
+        SELECT DISTINCT entity_id FROM changelog
+        WHERE seq > ? AND entity IN ('atas', 'sacramental', 'batismo')
+          AND entity_id IN (SELECT value FROM json_each(?))
+    """, (seq, json.dumps(ids)))}
+    if mudaram:
+        # A cópia ficou velha (ou a ata foi excluída): o principal continua valendo
+        _apagar(conn, ESQUEMA, mudaram)
+    movidas = [i for i in ids if i not in mudaram]
+    if movidas:
+        _sem_triggers(conn, lambda: _apagar(conn, 'main', movidas))
+    return len(movidas)
+
+
+# ------------------------------------------------------------------
+# Lotes
+# ------------------------------------------------------------------
+
+def data_limite(meses, hoje=None):
+    """Primeiro dia do mês de `meses` meses atrás ('AAAA-MM-DD')."""
+    hoje = hoje or date.today()
+    indice = hoje.year * 12 + hoje.month - 1 - int(meses)
+    return date(indice // 12, indice % 12 + 1, 1).isoformat()
+
+
+def transacoes(conn):
+    """executar(job) para uma conexão própria (CLI): cada job na sua transação."""
+    conn.isolation_level = None
+
+    def executar(job):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            resultado = job(conn)
+            conn.execute("COMMIT")
+            return resultado
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+    return executar
+
+
+def arquivar(executar, antes_de, lote=LOTE_PADRAO, pausa=PAUSA_PADRAO, ala_id=None):
+    """Move para o arquivo, em lotes de `lote`, as atas com data anterior a `antes_de`.
+
+    `executar(job)` roda job(conn) em uma transação e faz o commit (o
+    escritor da aplicação ou transacoes() no CLI); a conexão precisa estar
+    com o arquivo anexado. Retorna {'arquivadas', 'mantidas', 'lotes', 'segundos'}.
+    """
+    resultado = {'arquivadas': 0, 'mantidas': 0, 'lotes': 0}
+    inicio = time.perf_counter()
+    ultimo_id = 0
+    while True:
+        ids, seq = executar(lambda conn: _copiar_lote(conn, antes_de, ultimo_id, lote, ala_id))
+        if not ids:
+            break
+        movidas = executar(lambda conn: _apagar_lote(conn, ids, seq))
+        resultado['arquivadas'] += movidas
+        resultado['mantidas'] += len(ids) - movidas
+        resultado['lotes'] += 1
+        ultimo_id = ids[-1]
+        if pausa:
+            time.sleep(pausa)
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+
+def desarquivar(executar, desde=None, lote=LOTE_PADRAO, pausa=PAUSA_PADRAO, ala_id=None):
+    """Traz de volta ao principal, em lotes, as atas arquivadas com data >= `desde` (todas sem `desde`).
+
+    Retorna {'desarquivadas', 'lotes', 'segundos'}.
+    """
+    filtro, params = "WHERE data >= ?", (desde or '',)
+    if ala_id is not None:
+        filtro, params = filtro + " AND ala_id = ?", params + (ala_id,)
+
+    def lote_seguinte(conn):
+        ids = [row[0] for row in conn.execute(
+            f"SELECT id FROM {ESQUEMA}.atas {filtro} ORDER BY id LIMIT ?", params + (lote,))]
+        return trazer_de_volta(conn, ids)
+
+    resultado = {'desarquivadas': 0, 'lotes': 0}
+    inicio = time.perf_counter()
+    while True:
+        trazidas = executar(lote_seguinte)
+        if not trazidas:
+            break
+        resultado['desarquivadas'] += trazidas
+        resultado['lotes'] += 1
+        if pausa:
+            time.sleep(pausa)
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+
+def contar(caminho):
+    """{'principal', 'arquivo'}: quantas atas há em cada arquivo do banco `caminho`."""
+    conn = db.connect(caminho)
+    try:
+        contagem = {'principal': conn.execute("SELECT COUNT(*) FROM main.atas").fetchone()[0], 'arquivo': 0}
+        if anexado(conn):
+            contagem['arquivo'] = conn.execute(f"SELECT COUNT(*) FROM {ESQUEMA}.atas").fetchone()[0]
+        return contagem
+    finally:
+        conn.close()
+
+
+# ------------------------------------------------------------------
+# Agendamento
+# ------------------------------------------------------------------
+
+class Agendador:
+    """Thread que arquiva as atas com mais de `meses` meses a cada `intervalo` segundos.
+
+    Com vários workers, só quem pega a trava do arquivo de cada banco arquiva.
+    """
+
+    def __init__(self, bancos, executar_em, meses, intervalo, lote=LOTE_PADRAO, pausa=PAUSA_PADRAO, log=print):
+        self.bancos = bancos  # função que retorna os caminhos (shards podem surgir depois)
+        self.executar_em = executar_em  # caminho -> executar(job)
+        self.meses = meses
+        self.intervalo = intervalo
+        self.lote = lote
+        self.pausa = pausa
+        self.log = log
+        self.pid = os.getpid()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="arquivo-morto", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+    def rodar_uma_vez(self):
+        feitos = {}
+        for caminho in self.bancos():
+            arquivo = preparar(caminho)
+            if arquivo is None:
+                continue
+            with open(arquivo + ".trava", "w") as trava:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue
+                feitos[caminho] = arquivar(self.executar_em(caminho), data_limite(self.meses),
+                                           self.lote, self.pausa)
+        return feitos
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                for caminho, feito in self.rodar_uma_vez().items():
+                    if feito['arquivadas']:
+                        self.log(f"Arquivo morto de {caminho}: {feito['arquivadas']} ata(s) em "
+                                 f"{feito['lotes']} lote(s), {feito['segundos']:.1f}s")
+            except Exception as e:
+                self.log(f"Erro ao arquivar atas: {e}")
+            self._parar.wait(self.intervalo)
+
+
+_agendador = None
+_agendador_lock = threading.Lock()
+
+
+def init_app(app, bancos, executar_em):
+    """Anexa o arquivo morto às conexões dos bancos da aplicação e configura o agendamento.
+
+    O arquivo é criado na primeira conexão com um banco já migrado. Com
+    ARQUIVO_MESES > 0 a thread de arquivamento sobe na primeira requisição.
+    """
+    app.config.setdefault('ARQUIVO_MESES', int(os.environ.get('ARQUIVO_MESES', 0)))
+    app.config.setdefault('ARQUIVO_LOTE', int(os.environ.get('ARQUIVO_LOTE', LOTE_PADRAO)))
+    app.config.setdefault('ARQUIVO_INTERVALO_H', float(os.environ.get('ARQUIVO_INTERVALO_H', INTERVALO_H_PADRAO)))
+
+    def _do_app(caminho):
+        # Só o catálogo e os shards; backups, réplicas e o próprio arquivo ficam de fora
+        if not isinstance(caminho, str) or caminho.startswith((':', 'file:')):
+            return False
+        caminho = os.path.abspath(caminho)
+        if caminho == os.path.abspath(app.config['DATABASE']):
+            return True
+        shards = app.config.get('SHARDS_DIR')
+        return bool(shards) and os.path.dirname(caminho) == os.path.abspath(shards) \
+            and re.fullmatch(r"estaca_\d+\.db", os.path.basename(caminho)) is not None
+
+    @db.ao_conectar
+    def _anexar(conn, caminho):
+        if _do_app(caminho) and (os.path.exists(caminho_do_arquivo(caminho)) or preparar(caminho)):
+            anexar(conn, caminho)
+
+    @app.before_request
+    def _iniciar_agendador():
+        global _agendador
+        meses = app.config['ARQUIVO_MESES']
+        if meses <= 0 or (_agendador is not None and _agendador.pid == os.getpid()):
+            return
+        with _agendador_lock:
+            if _agendador is None or _agendador.pid != os.getpid():
+                _agendador = Agendador(lambda: bancos(app), executar_em, meses,
+                                       app.config['ARQUIVO_INTERVALO_H'] * 3600,
+                                       app.config['ARQUIVO_LOTE']).iniciar()
@@ -0,0 +1,116 @@
+# functions/ata_listas.py
+# Listas das atas (discursantes, anúncios, hinos, orações e batizados) em
+# tabelas filhas indexadas, uma linha por item com chave (ata_id, posicao).
+# As colunas JSON de sacramental/batismo continuam sendo gravadas; estas
+# tabelas existem para que o histórico ("quem discursou/orou, qual hino,
+# quando") seja consultado por índice, sem json.loads por linha.
+
+# Ordem fixa dos hinos e orações dentro de uma ata
+PAPEIS_HINOS = ('abertura', 'sacramental', 'intermediario', 'encerramento')
+PAPEIS_ORACOES = ('abertura', 'encerramento')
+
+NOMES_PAPEIS_HINOS = {
+    'abertura': 'Abertura',
+    'sacramental': 'Sacramental',
+    'intermediario': 'Intermediário',
+    'encerramento': 'Encerramento',
+}
+
+TABELAS = ('ata_discursantes', 'ata_anuncios', 'ata_hinos', 'ata_oracoes', 'ata_batizados')
+
+
+def _limpar(valores):
+    return [v.strip() for v in valores if isinstance(v, str) and v.strip()]
+
+
+def listas_de_detalhes(tipo, detalhes):
+    """Extrai as listas de um dict de detalhes no formato de form_ata."""
+    if tipo == 'sacramental':
+        hinos = dict(zip(PAPEIS_HINOS, (
+            detalhes.get('hino_abertura'), detalhes.get('hino_sacramental'),
+            detalhes.get('hino_intermediario'), detalhes.get('hino_encerramento'),
+        )))
+        oracoes = dict(zip(PAPEIS_ORACOES, (
+            detalhes.get('oracao_abertura'), detalhes.get('oracao_encerramento'),
+        )))
+        return {
+            'discursantes': _limpar(detalhes.get('discursantes') or []),
+            'anuncios': _limpar(detalhes.get('anuncios') or []),
+            'hinos': hinos,
+            'oracoes': oracoes,
+        }
+    return {'batizados': _limpar(detalhes.get('batizados') or [])}
+
+
+def apagar_listas(conn, ata_id):
+    for tabela in TABELAS:
+        conn.execute(f"DELETE FROM {tabela} WHERE ata_id = ?", (ata_id,))
+
+
+def gravar_listas(conn, ata_id, tipo, detalhes):
+    """Substitui as listas da ata. Deve rodar na mesma transação do save."""
+    _gravar(conn, ata_id, listas_de_detalhes(tipo, detalhes))
+
+
+INSERTS = {
+    'ata_discursantes': "INSERT INTO ata_discursantes (ata_id, posicao, nome) VALUES (?, ?, ?)",
+    'ata_anuncios': "INSERT INTO ata_anuncios (ata_id, posicao, texto) VALUES (?, ?, ?)",
+    'ata_hinos': "INSERT INTO ata_hinos (ata_id, posicao, papel, hino) VALUES (?, ?, ?, ?)",
+    'ata_oracoes': "INSERT INTO ata_oracoes (ata_id, posicao, papel, nome) VALUES (?, ?, ?, ?)",
+    'ata_batizados': "INSERT INTO ata_batizados (ata_id, posicao, nome) VALUES (?, ?, ?)",
+}
+
+
+def linhas_das_listas(ata_id, listas, destino=None):
+    """Linhas de cada tabela filha para uma ata: {tabela: [tuplas]}.
+
+    Com `destino`, acrescenta às listas já existentes (importação em lote).
+    """
+    linhas = destino if destino is not None else {tabela: [] for tabela in TABELAS}
+    linhas['ata_discursantes'].extend(
+        (ata_id, i, nome) for i, nome in enumerate(listas.get('discursantes') or []))
+    linhas['ata_anuncios'].extend(
+        (ata_id, i, texto) for i, texto in enumerate(listas.get('anuncios') or []))
+    hinos = listas.get('hinos') or {}
+    linhas['ata_hinos'].extend(
+        (ata_id, i, papel, hinos[papel].strip()) for i, papel in enumerate(PAPEIS_HINOS)
+        if hinos.get(papel) and hinos[papel].strip())
+    oracoes = listas.get('oracoes') or {}
+    linhas['ata_oracoes'].extend(
+        (ata_id, i, papel, oracoes[papel].strip()) for i, papel in enumerate(PAPEIS_ORACOES)
+        if oracoes.get(papel) and oracoes[papel].strip())
+    linhas['ata_batizados'].extend(
+        (ata_id, i, nome) for i, nome in enumerate(listas.get('batizados') or []))
+    return linhas
+
+
+def inserir_linhas(conn, linhas):
+    for tabela, valores in linhas.items():
+        if valores:
+            conn.executemany(INSERTS[tabela], valores)
+
+
+def _gravar(conn, ata_id, listas):
+    apagar_listas(conn, ata_id)
+    inserir_linhas(conn, linhas_das_listas(ata_id, listas))
+
+
+# ------------------------------------------------------------------
+# Consultas de histórico
+# ------------------------------------------------------------------
+
+def hinos_recentes(conn, ala_id, desde, limite_atas=10):
+    """Hinos das últimas `limite_atas` reuniões desde `desde`, na ordem da reunião."""
+    return conn.execute("""
+        SELECT a.data, h.papel, h.hino
+        FROM atas a
+        JOIN ata_hinos h ON h.ata_id = a.id
+        WHERE a.id IN (
+            SELECT a2.id FROM atas a2
+            WHERE a2.ala_id = ? AND a2.tipo = 'sacramental' AND a2.data >= ?
+              AND EXISTS (SELECT 1 FROM ata_hinos h2 WHERE h2.ata_id = a2.id)
+            ORDER BY a2.data DESC
+            LIMIT ?
+        )
+        ORDER BY a.data DESC, h.posicao
+    """, (ala_id, desde, limite_atas)).fetchall()
@@ -0,0 +1,163 @@
+# functions/ata_models.py
+# Modelos compactos (__slots__) para atas e seus detalhes.
+#
+# As colunas JSON (discursantes, anuncios, hinos, oracoes, batizados) ficam
+# guardadas como texto e só são decodificadas no primeiro acesso ao atributo;
+# o resultado fica memorizado na instância. Páginas de lista, que só usam
+# id/data/tipo/tema, nunca pagam o json.loads.
+import json
+
+_NAO_DECODIFICADO = object()
+
+
+def json_lista(valor):
+    """Decodifica uma coluna JSON de lista; qualquer valor inválido vira []."""
+    if isinstance(valor, list):
+        return valor
+    if not valor:
+        return []
+    try:
+        resultado = json.loads(valor)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return []
+    return resultado if isinstance(resultado, list) else []
+
+
+class campo_json:
+    """Atributo decodificado sob demanda a partir da coluna JSON de mesmo nome."""
+
+    def __set_name__(self, owner, nome):
+        self.slot_texto = f"_{nome}_json"
+        self.slot_valor = f"_{nome}"
+
+    def __get__(self, obj, tipo=None):
+        if obj is None:
+            return self
+        valor = getattr(obj, self.slot_valor)
+        if valor is _NAO_DECODIFICADO:
+            valor = json_lista(getattr(obj, self.slot_texto))
+            setattr(obj, self.slot_valor, valor)
+        return valor
+
+    def __set__(self, obj, valor):
+        setattr(obj, self.slot_texto, valor)
+        setattr(obj, self.slot_valor, _NAO_DECODIFICADO)
+
+
+def _slots(colunas, campos_json):
+    """Slots das colunas simples + par (texto, valor decodificado) de cada campo JSON."""
+    simples = tuple(c for c in colunas if c not in campos_json)
+    return simples + tuple(s for nome in campos_json for s in (f"_{nome}_json", f"_{nome}"))
+
+
+def _item(lista, i):
+    return lista[i] if len(lista) > i else ''
+
+
+class _Modelo:
+    __slots__ = ()
+    COLUNAS = ()
+
+    @classmethod
+    def from_row(cls, row, prefixo=''):
+        """Cria a instância a partir de um sqlite3.Row/dict (colunas ausentes viram None)."""
+        obj = cls.__new__(cls)
+        chaves = set(row.keys())
+        for coluna in cls.COLUNAS:
+            chave = prefixo + coluna
+            setattr(obj, coluna, row[chave] if chave in chaves else None)
+        return obj
+
+    def __repr__(self):
+        return f"<{type(self).__name__} id={getattr(self, 'id', None)}>"
+
+
+class Sacramental(_Modelo):
+    COLUNAS = (
+        'id', 'ata_id', 'presidido', 'dirigido', 'pianista', 'regente_musica', 'anuncios',
+        'hinos', 'hino_sacramental', 'hino_intermediario', 'oracoes', 'discursantes',
+        'recepcionistas', 'reconhecemos_presenca', 'desobrigacoes', 'apoios',
+        'confirmacoes_batismo', 'apoio_membros', 'bencao_criancas', 'ultimo_discursante',
+        'id_tipo', 'tema',
+    )
+    CAMPOS_JSON = ('anuncios', 'hinos', 'oracoes', 'discursantes')
+    __slots__ = _slots(COLUNAS, CAMPOS_JSON)
+
+    anuncios = campo_json()
+    hinos = campo_json()
+    oracoes = campo_json()
+    discursantes = campo_json()
+
+    # 'hinos' guarda [abertura, encerramento]; 'oracoes' guarda [abertura, encerramento]
+    @property
+    def hino_abertura(self):
+        return _item(self.hinos, 0)
+
+    @property
+    def hino_encerramento(self):
+        return _item(self.hinos, 1)
+
+    @property
+    def oracao_abertura(self):
+        return _item(self.oracoes, 0)
+
+    @property
+    def oracao_encerramento(self):
+        return _item(self.oracoes, 1)
+
+    def to_template_dict(self):
+        """Dict completo (com listas decodificadas) no formato usado por templates e PDFs."""
+        dados = {c: getattr(self, c) for c in self.COLUNAS if c not in self.CAMPOS_JSON}
+        dados.update({
+            'hinos': self._hinos_json,
+            'oracoes': self._oracoes_json,
+            'discursantes': self.discursantes,
+            'anuncios': self.anuncios,
+            'hino_abertura': self.hino_abertura,
+            'hino_encerramento': self.hino_encerramento,
+            'oracao_abertura': self.oracao_abertura,
+            'oracao_encerramento': self.oracao_encerramento,
+        })
+        return dados
+
+
+class Batismo(_Modelo):
+    COLUNAS = ('id', 'ata_id', 'dedicado', 'presidido', 'dirigido', 'batizados',
+               'testemunha1', 'testemunha2')
+    CAMPOS_JSON = ('batizados',)
+    __slots__ = _slots(COLUNAS, CAMPOS_JSON)
+
+    batizados = campo_json()
+
+    def to_template_dict(self):
+        dados = {c: getattr(self, c) for c in self.COLUNAS if c not in self.CAMPOS_JSON}
+        dados['batizados'] = self.batizados
+        return dados
+
+
+class Ata(_Modelo):
+    # 'tema' vem do JOIN com sacramental nas listas; 'detalhes' é Sacramental/Batismo/None
+    COLUNAS = ('id', 'tipo', 'data', 'status', 'ala_id', 'tema')
+    __slots__ = COLUNAS + ('detalhes',)
+
+    @classmethod
+    def from_row(cls, row, prefixo=''):
+        obj = super().from_row(row, prefixo)
+        obj.detalhes = None
+        return obj
+
+    def to_template_dict(self):
+        """Só os campos da ata (barato; não toca nos detalhes)."""
+        return {c: getattr(self, c) for c in self.COLUNAS}
+
+    def detalhes_dict(self):
+        return self.detalhes.to_template_dict() if self.detalhes is not None else {}
+
+
+class ResumoAta(_Modelo):
+    """Linha de ata_summary, usada nas páginas de lista (id = ata_id)."""
+    COLUNAS = ('id', 'ala_id', 'tipo', 'data', 'status', 'tema', 'total_discursantes', 'primeiro_hino')
+    __slots__ = COLUNAS
+
+
+MODELOS_DETALHES = {'sacramental': Sacramental, 'batismo': Batismo}
@@ -0,0 +1,98 @@
+# functions/ata_repository.py
+# Carregamento de atas com seus detalhes (sacramental ou batismo).
+#
+# Uma ata é lida em uma única consulta (atas LEFT JOIN sacramental/batismo) e
+# devolvida como functions.ata_models.Ata, cujos campos JSON são decodificados
+# uma única vez, no primeiro acesso. load_many() hidrata qualquer quantidade
+# de atas com a mesma única consulta, para listas, exportações e lotes de PDF
+# não precisarem de um laço de queries por ata. Com o arquivo morto anexado
+# (functions/arquivo_morto.py) a consulta roda também nele, com UNION ALL.
+import json
+
+from functions import arquivo_morto
+from functions.ata_models import Ata, Batismo, MODELOS_DETALHES, Sacramental
+
+# {s}/{unica}: ver arquivo_morto.uniao
+_SELECT = "SELECT {colunas} FROM {{s}}atas a " \
+    "LEFT JOIN {{s}}sacramental s ON s.ata_id = a.id AND a.tipo = 'sacramental' " \
+    "LEFT JOIN {{s}}batismo b ON b.ata_id = a.id AND a.tipo = 'batismo' ".format(colunas=", ".join(
+        [f"a.{c} AS a__{c}" for c in Ata.COLUNAS if c != 'tema']
+        + [f"s.{c} AS s__{c}" for c in Sacramental.COLUNAS]
+        + [f"b.{c} AS b__{c}" for c in Batismo.COLUNAS]))
+
+_PREFIXOS = {'sacramental': 's__', 'batismo': 'b__'}
+
+
+def decodificar_detalhes(tipo, detalhes):
+    """Converte uma linha de sacramental/batismo no dict usado por templates e PDFs."""
+    return MODELOS_DETALHES[tipo].from_row(detalhes).to_template_dict()
+
+
+def _hidratar(row):
+    ata = Ata.from_row(row, 'a__')
+    prefixo = _PREFIXOS.get(ata.tipo)
+    if prefixo and row[f'{prefixo}id'] is not None:
+        ata.detalhes = MODELOS_DETALHES[ata.tipo].from_row(row, prefixo)
+        if ata.tipo == 'sacramental':
+            ata.tema = ata.detalhes.tema
+    return ata
+
+
+class AtaRepository:
+    """Leitura de atas + detalhes sobre uma conexão já aberta."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def load(self, ata_id, ala_id=None):
+        """Retorna a Ata (com .detalhes) ou None se não existe ou é de outra ala."""
+        sql = _SELECT + "WHERE a.id = ? AND {unica}"
+        params = [ata_id]
+        if ala_id is not None:
+            sql += " AND a.ala_id = ?"
+            params.append(ala_id)
+        row = self.conn.execute(*arquivo_morto.uniao(self.conn, sql, params)).fetchone()
+        return _hidratar(row) if row else None
+
+    def load_many(self, ids, ala_id=None):
+        """Hidrata várias atas em uma consulta. Mantém a ordem de `ids`."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return []
+        # json_each evita o limite de parâmetros do SQLite para listas grandes
+        sql = _SELECT + "WHERE a.id IN (SELECT value FROM json_each(?)) AND {unica}"
+        params = [json.dumps(ids)]
+        if ala_id is not None:
+            sql += " AND a.ala_id = ?"
+            params.append(ala_id)
+        por_id = {}
+        for row in self.conn.execute(*arquivo_morto.uniao(self.conn, sql, params)):
+            ata = _hidratar(row)
+            por_id[ata.id] = ata
+        return [por_id[i] for i in ids if i in por_id]
+
+    def iter_ala(self, ala_id, desde=None, ate=None, lote=500):
+        """Gera todas as atas da ala (data, id crescentes) lendo `lote` linhas por vez.
+
+        `desde`/`ate` ('AAAA-MM-DD') são inclusivos. Usa o índice (ala_id, data)
+        e fetchmany, então a memória não cresce com o tamanho do histórico.
+        """
+        sql = _SELECT + "WHERE a.ala_id = ? AND {unica}"
+        params = [ala_id]
+        if desde:
+            sql += " AND a.data >= ?"
+            params.append(desde)
+        if ate:
+            sql += " AND a.data <= ?"
+            params.append(ate)
+        sql, params = arquivo_morto.uniao(self.conn, sql, params)
+        cursor = self.conn.execute(sql + " ORDER BY a__data, a__id", params)
+        try:
+            while True:
+                rows = cursor.fetchmany(lote)
+                if not rows:
+                    break
+                for row in rows:
+                    yield _hidratar(row)
+        finally:
+            cursor.close()
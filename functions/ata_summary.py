@@ -0,0 +1,47 @@
+# functions/ata_summary.py
+# Resumo das atas para as páginas de lista (tabela ata_summary, migração 0011).
+#
+# Uma linha por ata com só o que as listas mostram: data, tipo, status, tema,
+# quantidade de discursantes e primeiro hino. A chave primária é
+# (ala_id, data, ata_id) em uma tabela WITHOUT ROWID, então listar um mês ou
+# uma página de /atas lê um trecho contíguo da própria tabela, sem JOIN com
+# sacramental nem JSON.
+#
+# Quem grava uma ata chama atualizar() na mesma transação. Exclusões e
+# mudanças de tipo/data/status/ala direto em atas são seguidas por triggers.
+import json
+
+from functions import arquivo_morto
+
+# {s}/{unica}: ver arquivo_morto.uniao (o resumo cobre também as atas arquivadas)
+SQL_PROJECAO = """
+    SELECT a.ala_id, a.data, a.id, a.tipo, a.status, s.tema,
+           (SELECT COUNT(*) FROM {s}ata_discursantes d WHERE d.ata_id = a.id),
+           (SELECT h.hino FROM {s}ata_hinos h WHERE h.ata_id = a.id ORDER BY h.posicao LIMIT 1)
+    FROM {s}atas a LEFT JOIN {s}sacramental s ON s.ata_id = a.id
+    WHERE {unica} {filtro}
+"""
+
+FILTRO_ATAS = "AND a.id IN (SELECT value FROM json_each(?))"
+
+
+def _projetar(conn, filtro, params=()):
+    sql, params = arquivo_morto.uniao(conn, SQL_PROJECAO.replace('{filtro}', filtro), params)
+    return conn.execute("INSERT INTO ata_summary (ala_id, data, ata_id, tipo, status, tema, "
+                        "total_discursantes, primeiro_hino) " + sql, params).rowcount
+
+
+def atualizar(conn, ata_ids):
+    """Refaz o resumo das atas `ata_ids` a partir de atas/sacramental/listas."""
+    ids = json.dumps([int(i) for i in ata_ids])
+    conn.execute("DELETE FROM ata_summary WHERE ata_id IN (SELECT value FROM json_each(?))", (ids,))
+    _projetar(conn, FILTRO_ATAS, (ids,))
+
+
+def reconstruir(conn, ala_id=None):
+    """Refaz o resumo de uma ala (ou de todas). Retorna quantas linhas foram gravadas."""
+    if ala_id is None:
+        conn.execute("DELETE FROM ata_summary")
+        return _projetar(conn, "")
+    conn.execute("DELETE FROM ata_summary WHERE ala_id = ?", (ala_id,))
+    return _projetar(conn, "AND a.ala_id = ?", (ala_id,))
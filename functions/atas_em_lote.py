@@ -0,0 +1,150 @@
+# functions/atas_em_lote.py
+# Operações em várias atas de uma vez (rotas /atas/lote/*): excluir, duplicar
+# para outra data ("copiar a estrutura do domingo passado") e mudar o status.
+#
+# Cada operação roda dentro de um job de escrita, então o lote inteiro é uma
+# transação: ou todas as atas mudam ou nenhuma. Os ids vão como JSON e entram
+# nas consultas com json_each, como em AtaRepository.load_many(); cada passo é
+# um comando sobre o conjunto, não um laço por ata. Na exclusão, detalhes e
+# listas saem com a ata pelo ON DELETE CASCADE (migração 0014), contadores,
+# resumo e changelog seguem pelos triggers de atas, e busca e uso de hinos
+# (que cobrem também o arquivo morto) são apagados por um DELETE cada.
+#
+# Só as revisões são gravadas ata por ata (cada uma tem o seu documento e a sua
+# diferença), a partir de um único load_many().
+import json
+
+from functions import arquivo_morto, ata_summary, busca_atas, hinos, historico_discursantes, revisoes
+from functions.ata_repository import AtaRepository
+
+STATUS = ('pendente', 'completa', 'rascunho')
+LIMITE = 500        # atas por requisição
+DIAS_PADRAO = 7     # duplicar para o domingo seguinte
+DIAS_MAXIMO = 366
+
+# O que se repete de uma reunião para a outra; tema, discursantes, hinos,
+# orações e chamados são da reunião e ficam em branco na cópia
+ESTRUTURA = {
+    'sacramental': ('presidido', 'dirigido', 'pianista', 'regente_musica', 'recepcionistas',
+                    'reconhecemos_presenca', 'anuncios'),
+    'batismo': ('presidido', 'dirigido'),
+}
+
+# Pares [origem, nova] da duplicação como tabela
+_MAPA = ("WITH mapa(origem, nova) AS ("
+         "SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)) ")
+
+
+def _ids(ids):
+    return json.dumps([int(i) for i in ids])
+
+
+def _da_ala(conn, ala_id, ids):
+    """As atas `ids` que são da ala, com detalhes; as arquivadas voltam antes ao principal."""
+    if arquivo_morto.anexado(conn):
+        arquivo_morto.trazer_de_volta(conn, [row[0] for row in conn.execute(
+            f"SELECT id FROM {arquivo_morto.ESQUEMA}.atas "
+            f"WHERE ala_id = ? AND id IN (SELECT value FROM json_each(?))", (ala_id, _ids(ids)))])
+    return AtaRepository(conn).load_many(ids, ala_id)
+
+
+def _documentos(atas):
+    return {ata.id: revisoes.documento(ata.tipo, ata.data, ata.status, ata.detalhes_dict()) for ata in atas}
+
+
+def excluir(conn, ala_id, ids, usuario=None, snapshot_a_cada=revisoes.SNAPSHOT_A_CADA):
+    """Exclui as atas `ids` da ala. Retorna as atas excluídas (ids de outras alas são ignorados)."""
+    atas = _da_ala(conn, ala_id, ids)
+    if not atas:
+        return []
+    excluidas = _ids(ata.id for ata in atas)
+    # O histórico fica: a última revisão de cada ata é o estado excluído
+    docs = _documentos(atas)
+    revisoes.garantir_originais(conn, docs, ala_id, usuario)
+    for ata_id, doc in docs.items():
+        revisoes.registrar(conn, ata_id, ala_id, doc, 'excluida', usuario, snapshot_a_cada=snapshot_a_cada)
+
+    discursantes = historico_discursantes.nomes_das_atas(conn, [ata.id for ata in atas])
+    busca_atas.remover_atas(conn, [ata.id for ata in atas])
+    hinos.remover_usos(conn, [ata.id for ata in atas])
+    conn.execute("DELETE FROM atas WHERE ala_id = ? AND id IN (SELECT value FROM json_each(?))",
+                 (ala_id, excluidas))
+    historico_discursantes.atualizar(conn, ala_id, discursantes)
+    return atas
+
+
+def alterar_status(conn, ala_id, ids, status, usuario=None, snapshot_a_cada=revisoes.SNAPSHOT_A_CADA):
+    """Muda o status das atas `ids` da ala. Retorna as atas que mudaram (com o status antigo)."""
+    if status not in STATUS:
+        raise ValueError(f"Status inválido: {status!r}. Use {', '.join(STATUS)}.")
+    atas = [ata for ata in _da_ala(conn, ala_id, ids) if ata.status != status]
+    if not atas:
+        return []
+    antes = _documentos(atas)
+    revisoes.garantir_originais(conn, antes, ala_id, usuario)
+    conn.execute("UPDATE atas SET status = ? WHERE ala_id = ? AND id IN (SELECT value FROM json_each(?))",
+                 (status, ala_id, _ids(antes)))
+    for ata_id, doc in antes.items():
+        revisoes.registrar(conn, ata_id, ala_id, dict(doc, status=status), 'salva', usuario,
+                           snapshot_a_cada=snapshot_a_cada)
+    return atas
+
+
+def duplicar(conn, ala_id, ids, dias=DIAS_PADRAO, usuario=None, snapshot_a_cada=revisoes.SNAPSHOT_A_CADA):
+    """Copia a estrutura (ESTRUTURA e anúncios) das atas `ids` para `dias` dias depois, como pendentes.
+
+    Uma ata cujo destino já existe (mesmo tipo e data) não é copiada.
+    Retorna {'criadas': [(origem, Ata nova)], 'ignoradas': [origem]}.
+    """
+    dias = int(dias)
+    if not dias or abs(dias) > DIAS_MAXIMO:
+        raise ValueError(f"Informe de 1 a {DIAS_MAXIMO} dias (negativo para trás).")
+    atas = _da_ala(conn, ala_id, ids)
+    if not atas:
+        return {'criadas': [], 'ignoradas': []}
+    deslocamento = f"{dias:+d} days"
+    origens = _ids(ata.id for ata in atas)
+
+    # Destino arquivado volta ao principal, onde o índice único o enxerga
+    if arquivo_morto.anexado(conn):
+        arquivo_morto.trazer_de_volta(conn, [row[0] for row in conn.execute(f"""
+            SELECT d.id FROM {arquivo_morto.ESQUEMA}.atas d
+            JOIN main.atas o ON d.ala_id = o.ala_id AND d.tipo = o.tipo AND d.data = date(o.data, ?)
+            WHERE o.id IN (SELECT value FROM json_each(?))
+        """, (deslocamento, origens))])
+
+    novas = [row[0] for row in conn.execute("""
+        INSERT INTO atas (tipo, data, status, ala_id)
+        SELECT tipo, date(data, ?), 'pendente', ala_id FROM atas
+        WHERE ala_id = ? AND id IN (SELECT value FROM json_each(?))
+        ON CONFLICT (ala_id, tipo, data) DO NOTHING
+        RETURNING id
+    """, (deslocamento, ala_id, origens))]
+    pares = [tuple(row) for row in conn.execute("""
+        SELECT o.id, n.id FROM atas o
+        JOIN atas n ON n.ala_id = o.ala_id AND n.tipo = o.tipo AND n.data = date(o.data, ?)
+        WHERE o.id IN (SELECT value FROM json_each(?)) AND n.id IN (SELECT value FROM json_each(?))
+    """, (deslocamento, origens, _ids(novas)))]
+    if not pares:
+        return {'criadas': [], 'ignoradas': [ata.id for ata in atas]}
+
+    mapa = json.dumps(pares)
+    for tipo, campos in ESTRUTURA.items():
+        conn.execute(f"{_MAPA}INSERT INTO {tipo} (ata_id, {', '.join(campos)}) "
+                     f"SELECT m.nova, {', '.join('d.' + c for c in campos)} "
+                     f"FROM mapa m JOIN {tipo} d ON d.ata_id = m.origem", (mapa,))
+    conn.execute(f"{_MAPA}INSERT INTO ata_anuncios (ata_id, posicao, texto) "
+                 f"SELECT m.nova, a.posicao, a.texto FROM mapa m JOIN ata_anuncios a ON a.ata_id = m.origem",
+                 (mapa,))
+
+    # Modelos de leitura que não seguem por trigger: resumo, busca e revisões
+    ata_summary.atualizar(conn, novas)
+    criadas = AtaRepository(conn).load_many(novas)
+    busca_atas.indexar_atas(conn, criadas)
+    for ata_id, doc in _documentos(criadas).items():
+        revisoes.registrar(conn, ata_id, ala_id, doc, 'salva', usuario, snapshot_a_cada=snapshot_a_cada)
+
+    nova_de = dict(pares)
+    por_id = {ata.id: ata for ata in criadas}
+    return {'criadas': [(ata.id, por_id[nova_de[ata.id]]) for ata in atas if ata.id in nova_de],
+            'ignoradas': [ata.id for ata in atas if ata.id not in nova_de]}
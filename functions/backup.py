@@ -0,0 +1,276 @@
+# functions/backup.py
+# Backups online dos bancos SQLite com a API de backup (Connection.backup).
+#
+# A cópia é feita em passos de `paginas` páginas, com uma pausa entre eles,
+# para não disputar disco e CPU com as requisições. Em WAL a origem fica em
+# uma transação de leitura durante toda a cópia: o snapshot é consistente, os
+# escritores continuam livres e a cópia não recomeça a cada commit (sem essa
+# transação o SQLite reinicia o backup quando outra conexão grava). Fora de
+# WAL cada passo segura o lock de leitura só durante o passo; se a cópia
+# reiniciar MAX_REINICIOS vezes, o restante é feito em um passo só.
+#
+# Cada backup vai para <pasta>/<nome do banco>-AAAAMMDD-HHMMSS.db, é
+# verificado com PRAGMA integrity_check antes de ganhar o nome final e só os
+# `manter` mais recentes de cada banco ficam na pasta.
+import glob
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from functions import db
+
+try:
+    # Com eventlet.monkey_patch() o agendador precisa de uma thread do sistema
+    from eventlet.patcher import original
+    threading = original('threading')
+except ImportError:
+    import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+PASTA_PADRAO = "database/backups"
+MANTER_PADRAO = 7
+PAGINAS_POR_PASSO = 256
+PAUSA_PADRAO = 0.02  # segundos entre passos
+MAX_REINICIOS = 3
+SUFIXO_ANTES_DE_RESTAURAR = "antes-de-restaurar"
+
+
+class ErroDeBackup(Exception):
+    pass
+
+
+class _Reiniciou(Exception):
+    pass
+
+
+def _nome_base(caminho):
+    return os.path.splitext(os.path.basename(caminho))[0]
+
+
+def listar(pasta, caminho=None):
+    """Backups da pasta (do banco `caminho`, se informado), mais recente primeiro.
+
+    Retorna [{'arquivo', 'banco', 'quando', 'bytes'}].
+    """
+    backups = []
+    for arquivo in glob.glob(os.path.join(pasta, "*.db")):
+        nome = os.path.basename(arquivo)
+        achado = re.match(r"^(.+)-(\d{8}-\d{6})\.db$", nome)
+        if not achado or (caminho and achado.group(1) != _nome_base(caminho)):
+            continue
+        backups.append({
+            'arquivo': arquivo,
+            'banco': achado.group(1),
+            'quando': datetime.strptime(achado.group(2), "%Y%m%d-%H%M%S").replace(tzinfo=timezone.utc),
+            'bytes': os.path.getsize(arquivo),
+        })
+    backups.sort(key=lambda b: (b['quando'], b['arquivo']), reverse=True)
+    return backups
+
+
+def verificar(caminho):
+    """Mensagens do PRAGMA integrity_check (['ok'] quando o arquivo está íntegro)."""
+    conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+    try:
+        return [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+
+
+def copiar(origem, destino, paginas=PAGINAS_POR_PASSO, pausa=PAUSA_PADRAO):
+    """Copia o banco `origem` (caminho) para `destino` (caminho) com a API de backup."""
+    fonte = db.connect(origem, {'busy_timeout': 5000})
+    fonte.isolation_level = None
+    alvo = sqlite3.connect(destino)
+    estado = {'passos': 0, 'reinicios': 0, 'restantes': None, 'paginas': 0}
+
+    def progresso(status, restantes, total):
+        if estado['restantes'] is not None and restantes > estado['restantes']:
+            estado['reinicios'] += 1
+            if estado['reinicios'] >= MAX_REINICIOS:
+                raise _Reiniciou()
+        estado.update(passos=estado['passos'] + 1, restantes=restantes, paginas=total)
+        if restantes and pausa:
+            time.sleep(pausa)
+
+    inicio = time.perf_counter()
+    try:
+        wal = fonte.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        if wal:
+            # Snapshot de leitura: os commits feitos durante a cópia não a reiniciam
+            fonte.execute("BEGIN")
+            fonte.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        try:
+            fonte.backup(alvo, pages=paginas, progress=progresso)
+        except _Reiniciou:
+            fonte.backup(alvo, pages=-1)
+            estado['passos'] += 1
+        if wal:
+            fonte.execute("COMMIT")
+        # O backup é um arquivo só, sem -wal ao lado
+        alvo.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        alvo.close()
+        fonte.close()
+    return {
+        'paginas': estado['paginas'],
+        'passos': estado['passos'],
+        'reinicios': estado['reinicios'],
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def rotacionar(pasta, caminho, manter=MANTER_PADRAO):
+    """Apaga os backups de `caminho` além dos `manter` mais recentes. Retorna os apagados."""
+    apagados = []
+    for backup in listar(pasta, caminho)[max(manter, 1):]:
+        os.remove(backup['arquivo'])
+        apagados.append(backup['arquivo'])
+    return apagados
+
+
+def criar(caminho, pasta=PASTA_PADRAO, manter=MANTER_PADRAO, paginas=PAGINAS_POR_PASSO,
+          pausa=PAUSA_PADRAO, sufixo=None):
+    """Faz o backup de `caminho` em `pasta`, verifica e rotaciona.
+
+    Retorna as estatísticas de copiar() + {'arquivo', 'bytes', 'apagados', 'verificacao_s'}.
+    Com `sufixo` (ex.: antes de restaurar) o arquivo fica fora da rotação.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    carimbo = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    nome = f"{_nome_base(caminho)}-{carimbo}" + (f"-{sufixo}" if sufixo else "")
+    arquivo = os.path.join(pasta, nome + ".db")
+    parcial = arquivo + ".parcial"
+    try:
+        estatisticas = copiar(caminho, parcial, paginas, pausa)
+        inicio = time.perf_counter()
+        problemas = verificar(parcial)
+        estatisticas['verificacao_s'] = time.perf_counter() - inicio
+        if problemas != ['ok']:
+            raise ErroDeBackup(f"backup de {caminho} não passou no integrity_check: {problemas[:5]}")
+        os.replace(parcial, arquivo)
+    finally:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+    estatisticas.update(arquivo=arquivo, bytes=os.path.getsize(arquivo),
+                        apagados=[] if sufixo else rotacionar(pasta, caminho, manter))
+    return estatisticas
+
+
+def restaurar(arquivo, destino, pasta=PASTA_PADRAO):
+    """Substitui o banco `destino` pelo conteúdo do backup `arquivo`.
+
+    O backup é verificado antes; o estado atual de `destino` é guardado em
+    `pasta` (fora da rotação). Rodar com a aplicação parada: conexões abertas
+    em outros processos continuariam com caches do banco antigo.
+    Retorna o caminho da cópia de segurança (None se `destino` não existia).
+    """
+    problemas = verificar(arquivo)
+    if problemas != ['ok']:
+        raise ErroDeBackup(f"{arquivo} não passou no integrity_check: {problemas[:5]}")
+    seguranca = None
+    if os.path.exists(destino):
+        seguranca = criar(destino, pasta, sufixo=SUFIXO_ANTES_DE_RESTAURAR, pausa=0)['arquivo']
+    fonte = sqlite3.connect(f"file:{arquivo}?mode=ro", uri=True)
+    alvo = db.connect(destino, {'busy_timeout': 5000})
+    try:
+        fonte.backup(alvo)
+        alvo.execute(f"PRAGMA journal_mode = {db.PRAGMAS_PADRAO['journal_mode']}")
+    finally:
+        alvo.close()
+        fonte.close()
+    problemas = verificar(destino)
+    if problemas != ['ok']:
+        raise ErroDeBackup(f"{destino} ficou inconsistente após restaurar: {problemas[:5]}")
+    return seguranca
+
+
+def precisa_de_backup(pasta, caminho, intervalo):
+    """True se o último backup de `caminho` tem mais de `intervalo` segundos."""
+    backups = listar(pasta, caminho)
+    if not backups:
+        return True
+    idade = (datetime.now(timezone.utc) - backups[0]['quando']).total_seconds()
+    return idade >= intervalo
+
+
+class Agendador:
+    """Thread que faz o backup dos bancos a cada `intervalo` segundos.
+
+    Com vários workers, só quem pega a trava da pasta faz o backup; os outros
+    veem o backup recente e pulam a vez.
+    """
+
+    def __init__(self, bancos, pasta, intervalo, manter=MANTER_PADRAO, log=print):
+        self.bancos = bancos  # função que retorna os caminhos (shards podem surgir depois)
+        self.pasta = pasta
+        self.intervalo = intervalo
+        self.manter = manter
+        self.log = log
+        self.pid = os.getpid()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="backup", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+    def rodar_uma_vez(self):
+        os.makedirs(self.pasta, exist_ok=True)
+        with open(os.path.join(self.pasta, ".trava"), "w") as trava:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return []
+            feitos = []
+            for caminho in self.bancos():
+                if precisa_de_backup(self.pasta, caminho, self.intervalo):
+                    feitos.append(criar(caminho, self.pasta, self.manter))
+            return feitos
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                for feito in self.rodar_uma_vez():
+                    self.log(f"Backup {feito['arquivo']} ({feito['bytes']} bytes, "
+                             f"{feito['passos']} passos, {feito['segundos']:.1f}s)")
+            except Exception as e:
+                self.log(f"Erro no backup agendado: {e}")
+            # Acorda um pouco depois de vencer o intervalo do backup mais recente
+            self._parar.wait(min(self.intervalo, 600))
+
+
+_agendador = None
+_agendador_lock = threading.Lock()
+
+
+def init_app(app, bancos):
+    """Configura o backup; com BACKUP_INTERVALO_H > 0 o agendador sobe na primeira requisição.
+
+    Comandos de CLI importam a aplicação mas não recebem requisições, então
+    não iniciam o agendador.
+    """
+    app.config.setdefault('BACKUP_DIR', os.environ.get('BACKUP_DIR', PASTA_PADRAO))
+    app.config.setdefault('BACKUP_MANTER', int(os.environ.get('BACKUP_MANTER', MANTER_PADRAO)))
+    app.config.setdefault('BACKUP_INTERVALO_H', float(os.environ.get('BACKUP_INTERVALO_H', 0)))
+
+    @app.before_request
+    def _iniciar_agendador():
+        global _agendador
+        intervalo = app.config['BACKUP_INTERVALO_H'] * 3600
+        if intervalo <= 0 or (_agendador is not None and _agendador.pid == os.getpid()):
+            return
+        with _agendador_lock:
+            if _agendador is None or _agendador.pid != os.getpid():
+                _agendador = Agendador(lambda: bancos(app), app.config['BACKUP_DIR'], intervalo,
+                                       app.config['BACKUP_MANTER']).iniciar()
@@ -0,0 +1,139 @@
+# functions/busca_atas.py
+# Busca textual das atas com SQLite FTS5 (tabela atas_fts, migração 0006).
+#
+# Cada ata tem uma linha no índice com rowid = atas.id. O texto é gravado no
+# save de form_ata (mesma transação) e removido junto com a ata. O tokenizer
+# unicode61 com remove_diacritics faz "conferencia" achar "Conferência".
+#
+# O índice e o resumo usado no filtro por ala (ata_summary) ficam no banco
+# principal, então a busca também acha as atas do arquivo morto.
+import json
+import re
+
+from markupsafe import Markup, escape
+
+from functions import arquivo_morto
+from functions.ata_models import MODELOS_DETALHES
+
+COLUNAS_FTS = ('tema', 'discursantes', 'anuncios', 'chamados', 'batizados')
+
+# Peso de cada coluna no bm25 (mesma ordem de COLUNAS_FTS)
+PESOS = (5.0, 3.0, 1.0, 1.0, 3.0)
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+# Marcadores do snippet; trocados por <mark> depois de escapar o HTML
+_INICIO, _FIM = '\x02', '\x03'
+
+_PALAVRA = re.compile(r'\w+', re.UNICODE)
+
+
+def _juntar(valores):
+    return '\n'.join(v.strip() for v in valores or [] if isinstance(v, str) and v.strip())
+
+
+def documento(tipo, detalhes):
+    """Texto indexado de uma ata, a partir do dict de detalhes de form_ata."""
+    if tipo == 'sacramental':
+        return {
+            'tema': detalhes.get('tema') or '',
+            'discursantes': _juntar(detalhes.get('discursantes')),
+            'anuncios': _juntar(detalhes.get('anuncios')),
+            'chamados': _juntar([detalhes.get('desobrigacoes'), detalhes.get('apoios')]),
+            'batizados': '',
+        }
+    if tipo == 'batismo':
+        return {
+            'tema': '', 'discursantes': '', 'anuncios': '', 'chamados': '',
+            'batizados': _juntar(detalhes.get('batizados')),
+        }
+    return None
+
+
+SQL_INSERIR = (f"INSERT INTO atas_fts (rowid, {', '.join(COLUNAS_FTS)}) "
+               f"VALUES (?, {', '.join('?' for _ in COLUNAS_FTS)})")
+
+
+def linha_do_indice(ata_id, tipo, detalhes):
+    """Tupla para SQL_INSERIR, ou None se o tipo não é indexado."""
+    doc = documento(tipo, detalhes)
+    if doc is None:
+        return None
+    return (int(ata_id),) + tuple(doc[c] for c in COLUNAS_FTS)
+
+
+def indexar_ata(conn, ata_id, tipo, detalhes):
+    """Substitui a linha da ata no índice. Deve rodar na mesma transação do save."""
+    remover_ata(conn, ata_id)
+    linha = linha_do_indice(ata_id, tipo, detalhes)
+    if linha:
+        conn.execute(SQL_INSERIR, linha)
+
+
+def remover_ata(conn, ata_id):
+    conn.execute("DELETE FROM atas_fts WHERE rowid = ?", (int(ata_id),))
+
+
+def indexar_atas(conn, atas):
+    """Indexa atas novas (functions.ata_models.Ata com detalhes) em um executemany."""
+    linhas = (linha_do_indice(ata.id, ata.tipo, ata.detalhes_dict()) for ata in atas)
+    conn.executemany(SQL_INSERIR, [linha for linha in linhas if linha])
+
+
+def remover_atas(conn, ata_ids):
+    conn.execute("DELETE FROM atas_fts WHERE rowid IN (SELECT value FROM json_each(?))",
+                 (json.dumps([int(i) for i in ata_ids]),))
+
+
+def reindexar(conn):
+    """Reconstrói o índice inteiro a partir de sacramental/batismo."""
+    conn.execute("DELETE FROM atas_fts")
+    for tipo, modelo in MODELOS_DETALHES.items():
+        rows = conn.execute(*arquivo_morto.uniao(
+            conn, f"SELECT d.* FROM {{s}}atas a JOIN {{s}}{tipo} d ON d.ata_id = a.id "
+                  f"WHERE a.tipo = ? AND {{unica}}", (tipo,)))
+        for row in rows:
+            indexar_ata(conn, row['ata_id'], tipo, modelo.from_row(row).to_template_dict())
+
+
+def expressao_fts(texto):
+    """Converte o texto digitado em uma expressão FTS5 segura.
+
+    Cada palavra vira um termo entre aspas com prefixo ("conf"*), todas
+    obrigatórias. Operadores e aspas do usuário são descartados.
+    """
+    termos = _PALAVRA.findall(texto or '')
+    return ' '.join(f'"{t}"*' for t in termos)
+
+
+def _marcar(trecho):
+    html = str(escape(trecho or ''))
+    return Markup(html.replace(_INICIO, '<mark>').replace(_FIM, '</mark>'))
+
+
+def buscar(conn, ala_id, texto, limite=LIMITE_PADRAO):
+    """Atas da ala que batem com `texto`, da mais relevante para a menos."""
+    expressao = expressao_fts(texto)
+    if not expressao:
+        return []
+    limite = max(1, min(int(limite), LIMITE_MAXIMO))
+    rows = conn.execute(f"""
+        SELECT a.ata_id AS id, a.tipo, a.data, a.status,
+               atas_fts.tema AS tema,
+               snippet(atas_fts, -1, ?, ?, '…', 12) AS trecho,
+               bm25(atas_fts, {', '.join(str(p) for p in PESOS)}) AS relevancia
+        FROM atas_fts
+        JOIN ata_summary a ON a.ata_id = atas_fts.rowid
+        WHERE atas_fts MATCH ? AND a.ala_id = ?
+        ORDER BY relevancia
+        LIMIT ?
+    """, (_INICIO, _FIM, expressao, ala_id, limite)).fetchall()
+    return [{
+        'id': row['id'],
+        'tipo': row['tipo'],
+        'data': row['data'],
+        'status': row['status'],
+        'tema': row['tema'],
+        'trecho': _marcar(row['trecho']),
+    } for row in rows]
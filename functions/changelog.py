@@ -0,0 +1,76 @@
+# functions/changelog.py
+# Registro de mudanças (tabela changelog, migração 0012) e leitura incremental.
+#
+# Triggers em atas, sacramental, batismo, templates e unidades gravam uma
+# linha por INSERT/UPDATE/DELETE: (seq, ala_id, entity, entity_id, op, ts).
+# Em sacramental/batismo o entity_id é o ata_id, para o cliente recarregar a
+# ata inteira. Modelos padrão (ala_id = 0) valem para todas as alas.
+#
+# Clientes guardam o último seq recebido e pedem só o que veio depois
+# (/sync?since=<seq>). O seq é por arquivo de banco: com sharding, as atas vêm
+# do banco da estaca e as unidades do catálogo, cada um com a sua sequência.
+import time
+
+LIMITE_PADRAO = 500
+ESPERA_MAX_PADRAO = 25  # segundos; abaixo do timeout usual de proxies
+INTERVALO_PADRAO = 0.5  # segundos entre consultas durante a espera
+
+SQL_MUDANCAS = """
+    SELECT seq, entity, entity_id, op, ts FROM changelog
+    WHERE ala_id IN (?, 0) AND seq > ? AND seq <= ?
+    ORDER BY seq
+    LIMIT ?
+"""
+
+
+def ultimo_seq(conn):
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changelog").fetchone()[0]
+
+
+def primeiro_seq(conn):
+    """Menor seq ainda no log (com o log vazio, o próximo a ser gerado)."""
+    return conn.execute("""
+        SELECT COALESCE(MIN(seq), (SELECT seq FROM sqlite_sequence WHERE name = 'changelog') + 1, 1)
+        FROM changelog
+    """).fetchone()[0]
+
+
+def mudancas(conn, ala_id, desde, limite=LIMITE_PADRAO):
+    """Mudanças da ala com seq > desde, em ordem.
+
+    Retorna {'seq', 'mudancas', 'mais', 'reiniciar'}: 'seq' é o cursor para a
+    próxima chamada; 'reiniciar' indica que o cliente está atrás do que ainda
+    existe no log (podado) e precisa recarregar tudo.
+    """
+    # O fim é lido antes das mudanças: o que for gravado depois fica para a próxima chamada
+    fim = ultimo_seq(conn)
+    if desde is None or desde < primeiro_seq(conn) - 1:
+        return {'seq': fim, 'mudancas': [], 'mais': False, 'reiniciar': True}
+    linhas = conn.execute(SQL_MUDANCAS, (ala_id, desde, fim, limite + 1)).fetchall()
+    mais = len(linhas) > limite
+    linhas = linhas[:limite]
+    # Sem mais páginas o cursor vai até o fim, pulando as mudanças de outras alas
+    seq = linhas[-1]['seq'] if mais else max(desde, fim)
+    return {'seq': seq, 'mudancas': [dict(row) for row in linhas], 'mais': mais, 'reiniciar': False}
+
+
+def _novidade(resultado):
+    partes = (resultado, resultado.get('catalogo') or {})
+    return any(p.get('mudancas') or p.get('reiniciar') for p in partes)
+
+
+def esperar_mudancas(ler, espera, intervalo=INTERVALO_PADRAO):
+    """Long-poll: chama ler() até haver mudanças ou passar `espera` segundos."""
+    limite = time.monotonic() + espera
+    while True:
+        resultado = ler()
+        if _novidade(resultado) or time.monotonic() >= limite:
+            return resultado
+        time.sleep(min(intervalo, max(limite - time.monotonic(), 0)))
+
+
+def podar(conn, dias):
+    """Apaga do log as mudanças com mais de `dias` dias. Retorna quantas."""
+    return conn.execute(
+        "DELETE FROM changelog WHERE ts < strftime('%Y-%m-%dT%H:%M:%fZ', 'now', ?)",
+        (f"-{int(dias)} days",)).rowcount
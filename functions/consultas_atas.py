@@ -0,0 +1,88 @@
+# functions/consultas_atas.py
+# Consultas de listagem de atas por período. Os filtros usam intervalos
+# semiabertos [inicio, fim) sobre a coluna `data` ('AAAA-MM-DD') para que o
+# SQLite use a chave (ala_id, data) em vez de avaliar strftime() linha a linha.
+#
+# As listas leem de ata_summary (functions/ata_summary.py), que já traz tema,
+# discursantes e primeiro hino: nenhuma página de lista toca em sacramental.
+from datetime import date, datetime
+
+from functions.ata_models import ResumoAta
+
+COLUNAS_RESUMO = "ata_id AS id, ala_id, tipo, data, status, tema, total_discursantes, primeiro_hino"
+
+SQL_ATAS_DO_PERIODO = f"""
+    SELECT {COLUNAS_RESUMO} FROM ata_summary
+    WHERE ala_id = ? AND data >= ? AND data < ?
+    ORDER BY data DESC, ata_id DESC
+"""
+
+SQL_CONTAR_ATAS_DO_PERIODO = """
+    SELECT COUNT(*) FROM ata_summary
+    WHERE ala_id = ? AND data >= ? AND data < ?
+"""
+
+
+def intervalo_mes(mes):
+    """'AAAA-MM' -> ('AAAA-MM-01', primeiro dia do mês seguinte). ValueError se inválido."""
+    inicio = datetime.strptime(mes, "%Y-%m").date()
+    if inicio.month == 12:
+        fim = date(inicio.year + 1, 1, 1)
+    else:
+        fim = date(inicio.year, inicio.month + 1, 1)
+    return inicio.strftime("%Y-%m-%d"), fim.strftime("%Y-%m-%d")
+
+
+def atas_do_mes(conn, ala_id, mes):
+    inicio, fim = intervalo_mes(mes)
+    return [ResumoAta.from_row(row) for row in conn.execute(SQL_ATAS_DO_PERIODO, (ala_id, inicio, fim))]
+
+
+def contar_atas_do_mes(conn, ala_id, mes):
+    inicio, fim = intervalo_mes(mes)
+    return conn.execute(SQL_CONTAR_ATAS_DO_PERIODO, (ala_id, inicio, fim)).fetchone()[0]
+
+
+# Paginação por cursor (keyset) de /atas: ordem (data DESC, id DESC), servida
+# pela chave primária (ala_id, data, ata_id) de ata_summary. O custo de cada
+# página não depende de quantas atas a ala tem.
+SQL_PAGINA_DE_ATAS = f"""
+    SELECT {COLUNAS_RESUMO} FROM ata_summary
+    WHERE ala_id = ? {{filtro}}
+    ORDER BY data DESC, ata_id DESC
+    LIMIT ?
+"""
+
+FILTRO_CURSOR = "AND (data, ata_id) < (?, ?)"
+
+
+def cursor_de(ata):
+    return f"{ata.data}_{ata.id}"
+
+
+def ler_cursor(cursor):
+    """'AAAA-MM-DD_id' -> (data, id); None se ausente ou inválido."""
+    if not cursor:
+        return None
+    data, _, ata_id = cursor.rpartition('_')
+    try:
+        datetime.strptime(data, "%Y-%m-%d")
+        return data, int(ata_id)
+    except ValueError:
+        return None
+
+
+def pagina_de_atas(conn, ala_id, cursor=None, limite=30):
+    """(atas, próximo cursor ou None) a partir de `cursor` (exclusivo)."""
+    posicao = ler_cursor(cursor)
+    if posicao:
+        sql = SQL_PAGINA_DE_ATAS.format(filtro=FILTRO_CURSOR)
+        params = (ala_id, posicao[0], posicao[1], limite + 1)
+    else:
+        sql = SQL_PAGINA_DE_ATAS.format(filtro="")
+        params = (ala_id, limite + 1)
+    atas = [ResumoAta.from_row(row) for row in conn.execute(sql, params)]
+    if len(atas) > limite:
+        atas = atas[:limite]
+        return atas, cursor_de(atas[-1])
+    return atas, None
@@ -0,0 +1,153 @@
+# functions/db.py
+import os
+import queue
+import sqlite3
+import threading
+
+from flask import current_app, g
+
+# Pragmas aplicados a cada conexão nova. Podem ser sobrescritos por
+# app.config['SQLITE_PRAGMAS'] (dict) ou pela variável de ambiente
+# SQLITE_PRAGMAS no formato "chave=valor,chave=valor".
+PRAGMAS_PADRAO = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,       # ms esperando lock antes de "database is locked"
+    'cache_size': -16000,       # negativo = KiB (~16 MB por conexão)
+    'mmap_size': 134217728,     # 128 MB
+    'temp_store': 'MEMORY',
+}
+
+DB_PATH_PADRAO = "database/atas.db"
+
+# Funções chamadas com (conn, path) em cada conexão aberta por connect(), ex.:
+# o ATTACH do arquivo morto (functions/arquivo_morto.py)
+_ao_conectar = []
+POOL_SIZE_PADRAO = 5
+
+
+def parse_pragmas(texto):
+    """Converte "chave=valor,chave=valor" em dict."""
+    pragmas = {}
+    for item in (texto or '').split(','):
+        if '=' not in item:
+            continue
+        chave, valor = item.split('=', 1)
+        pragmas[chave.strip()] = valor.strip()
+    return pragmas
+
+
+def connect(path, pragmas=None):
+    """Abre uma conexão SQLite já com row_factory e pragmas aplicados."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # Fora de PRAGMAS_PADRAO para não ser desligado por configuração: excluir
+    # atas conta com o ON DELETE CASCADE dos detalhes (migração 0014)
+    conn.execute("PRAGMA foreign_keys = ON")
+    for chave, valor in (pragmas or {}).items():
+        conn.execute(f"PRAGMA {chave} = {valor}")
+    for funcao in _ao_conectar:
+        funcao(conn, path)
+    return conn
+
+
+def ao_conectar(funcao):
+    """Registra funcao(conn, path) para rodar em cada conexão nova."""
+    _ao_conectar.append(funcao)
+    return funcao
+
+
+class ConnectionPool:
+    """Pool limitado de conexões SQLite para um arquivo de banco.
+
+    Cada worker (processo) tem os seus próprios pools; conexões excedentes
+    são fechadas ao serem devolvidas.
+    """
+
+    def __init__(self, path, size=POOL_SIZE_PADRAO, pragmas=None):
+        self.path = path
+        self.size = size
+        self.pragmas = dict(pragmas or {})
+        self.pid = os.getpid()
+        self._livres = queue.LifoQueue(maxsize=max(size, 0) or 1)
+        self.criadas = 0
+
+    def acquire(self):
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            self.criadas += 1
+            return connect(self.path, self.pragmas)
+
+    def release(self, conn):
+        # Nunca devolver ao pool uma conexão com transação pendente
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        if self.size <= 0:
+            conn.close()
+            return
+        try:
+            self._livres.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pragmas_configurados(app=None):
+    app = app or current_app
+    pragmas = dict(PRAGMAS_PADRAO)
+    pragmas.update(app.config.get('SQLITE_PRAGMAS') or {})
+    return pragmas
+
+
+def get_pool(path=None, app=None):
+    """Retorna (criando se preciso) o pool do processo atual para `path`."""
+    app = app or current_app
+    path = path or app.config['DATABASE']
+    pid = os.getpid()
+    pool = _pools.get(path)
+    if pool is None or pool.pid != pid:
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None or pool.pid != pid:
+                pool = ConnectionPool(path, app.config['DB_POOL_SIZE'], pragmas_configurados(app))
+                _pools[path] = pool
+    return pool
+
+
+def get_db(path=None):
+    """Conexão única por requisição (app context) para `path`, devolvida ao pool no teardown.
+
+    Sem `path`, usa app.config['DATABASE'].
+    """
+    path = path or current_app.config['DATABASE']
+    conexoes = g.setdefault('conexoes', {})
+    if path not in conexoes:
+        conexoes[path] = get_pool(path).acquire()
+    return conexoes[path]
+
+
+def close_db(exc=None):
+    for path, conn in g.pop('conexoes', {}).items():
+        get_pool(path).release(conn)
+
+
+def init_app(app):
+    app.config.setdefault('DATABASE', os.environ.get('DATABASE_PATH', DB_PATH_PADRAO))
+    app.config.setdefault('DB_POOL_SIZE', int(os.environ.get('DB_POOL_SIZE', POOL_SIZE_PADRAO)))
+    app.config.setdefault('SQLITE_PRAGMAS', parse_pragmas(os.environ.get('SQLITE_PRAGMAS')))
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,110 @@
+# functions/despacho.py
+# Executa chamadas bloqueantes (sqlite3, ReportLab) fora do loop do servidor.
+#
+# Com eventlet, um único hub atende HTTP e todas as salas do Socket.IO; uma
+# consulta ou renderização de PDF nele trava a edição colaborativa de todo
+# mundo. Aqui essas chamadas vão para eventlet.tpool (threads do sistema) e o
+# hub só espera o resultado. No modo threading, vão para um pool de threads
+# limitado, para o trabalho pesado não disputar o processador com os
+# handlers do Socket.IO sem limite.
+#
+# init_app() embrulha as views da aplicação; o contexto da requisição
+# (request, session, g) é copiado para a thread que executa a view.
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from eventlet import tpool
+except ImportError:
+    tpool = None
+
+THREADS_PADRAO = 8
+
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+_modo = 'threading'
+
+
+def configurar(async_mode, threads=THREADS_PADRAO):
+    """Define o modo do servidor ('eventlet' ou 'threading') e o tamanho do pool."""
+    global _modo, _executor
+    _modo = 'eventlet' if async_mode == 'eventlet' and tpool is not None else 'threading'
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+        if _modo == 'eventlet':
+            tpool.set_num_threads(threads)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="despacho")
+
+
+def _rodar(ctx, func, args, kwargs):
+    _local.ativo = True
+    try:
+        return ctx.run(func, *args, **kwargs)
+    finally:
+        _local.ativo = False
+
+
+def executar(func, *args, **kwargs):
+    """Roda func(*args, **kwargs) fora do loop e devolve o resultado (ou a exceção).
+
+    Chamadas já feitas de dentro do pool rodam direto, sem fila nova.
+    """
+    if getattr(_local, 'ativo', False):
+        return func(*args, **kwargs)
+    ctx = contextvars.copy_context()
+    if _modo == 'eventlet':
+        return tpool.execute(_rodar, ctx, func, args, kwargs)
+    if _executor is None:
+        return func(*args, **kwargs)  # despacho não configurado (ex.: scripts)
+    return _executor.submit(_rodar, ctx, func, args, kwargs).result()
+
+
+def fora_do_loop(func):
+    """Decorator: a função sempre roda via executar()."""
+    @functools.wraps(func)
+    def embrulhada(*args, **kwargs):
+        return executar(func, *args, **kwargs)
+    return embrulhada
+
+
+def no_loop(func):
+    """Decorator de view: init_app() não a embrulha.
+
+    Para views que passam a maior parte do tempo esperando (long-poll): a
+    espera fica no loop, sem ocupar uma thread do pool, e a própria view usa
+    executar() para o trabalho bloqueante.
+    """
+    func._despachada = True
+    return func
+
+
+def iterar(iteravel):
+    """Consome um gerador (ex.: resposta em streaming) pedindo cada item via executar()."""
+    iterador = iter(iteravel)
+    fim = object()
+    try:
+        while True:
+            item = executar(next, iterador, fim)
+            if item is fim:
+                return
+            yield item
+    finally:
+        # Cliente desconectou no meio: fecha o gerador (e o que ele segura) no pool também
+        if hasattr(iterador, 'close'):
+            executar(iterador.close)
+
+
+def init_app(app, async_mode):
+    """Configura o despacho e embrulha todas as views já registradas (menos static)."""
+    configurar(async_mode, int(app.config.get('DESPACHO_THREADS', THREADS_PADRAO)))
+    for endpoint, view in list(app.view_functions.items()):
+        if endpoint != 'static' and not getattr(view, '_despachada', False):
+            nova = fora_do_loop(view)
+            nova._despachada = True
+            app.view_functions[endpoint] = nova
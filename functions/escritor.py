@@ -0,0 +1,167 @@
+# functions/escritor.py
+# Thread única de escrita por banco, com group commit.
+#
+# O SQLite aceita um escritor por vez; com várias requisições salvando ao
+# mesmo tempo cada uma disputava o lock (e às vezes recebia "database is
+# locked") e pagava o seu próprio commit. Aqui uma thread é dona da conexão
+# de escrita: as views enviam um job (função que recebe a conexão) e esperam
+# o resultado; os jobs que chegam juntos (na fila ou dentro de
+# ESCRITA_JANELA_MS) vão em uma única transação e um único commit.
+#
+# Cada job roda dentro de um SAVEPOINT: se ele falhar, só ele é desfeito e a
+# exceção volta para quem o enviou. Jobs não devem chamar commit/rollback nem
+# guardar a conexão, e só recebem dados já lidos da requisição (a thread de
+# escrita não tem request/session).
+import os
+import sqlite3
+import time
+
+from flask import current_app
+
+from functions import db
+
+try:
+    # Com eventlet.monkey_patch() a thread de escrita e os eventos de espera
+    # precisam ser do sistema (as views rodam no tpool, também em threads reais)
+    from eventlet.patcher import original
+    threading = original('threading')
+    queue = original('queue')
+except ImportError:
+    import queue
+    import threading
+
+JANELA_PADRAO_MS = 2
+MAX_LOTE_PADRAO = 64
+
+
+class _Pedido:
+    __slots__ = ('job', 'resultado', 'erro', 'pronto')
+
+    def __init__(self, job):
+        self.job = job
+        self.resultado = None
+        self.erro = None
+        self.pronto = threading.Event()
+
+
+class Escritor:
+    """Dono da conexão de escrita de um arquivo SQLite."""
+
+    def __init__(self, path, pragmas=None, janela_ms=JANELA_PADRAO_MS, max_lote=MAX_LOTE_PADRAO):
+        self.path = path
+        self.pragmas = dict(pragmas or {})
+        self.janela = janela_ms / 1000
+        self.max_lote = max_lote
+        self.pid = os.getpid()
+        self.commits = 0
+        self.jobs = 0
+        self._concorrencia = False
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=f"escritor:{path}", daemon=True)
+        self._thread.start()
+
+    def executar(self, job):
+        """Roda job(conn) na thread de escrita e devolve o retorno depois do commit."""
+        if threading.current_thread() is self._thread:
+            return job(self._conn)  # job enviando outro job: já está na transação
+        pedido = _Pedido(job)
+        self._fila.put(pedido)
+        pedido.pronto.wait()
+        if pedido.erro is not None:
+            raise pedido.erro
+        return pedido.resultado
+
+    def fechar(self):
+        self._fila.put(None)
+        self._thread.join()
+
+    def _loop(self):
+        self._conn = db.connect(self.path, self.pragmas)
+        self._conn.isolation_level = None  # transações controladas aqui
+        try:
+            while True:
+                primeiro = self._fila.get()
+                if primeiro is None:
+                    return
+                lote, parar = self._juntar(primeiro)
+                self._gravar(lote)
+                if parar:
+                    return
+        finally:
+            self._conn.close()
+
+    def _juntar(self, primeiro):
+        """Junta ao primeiro job o que já está na fila e o que chegar dentro da janela.
+
+        A janela só é esperada quando o lote anterior teve mais de um job (há
+        escritores concorrentes); um editor sozinho não paga a espera.
+        """
+        lote = [primeiro]
+        limite = time.monotonic() + (self.janela if self._concorrencia else 0)
+        while len(lote) < self.max_lote:
+            try:
+                pedido = self._fila.get_nowait()
+            except queue.Empty:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    pedido = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+            if pedido is None:
+                return lote, True
+            lote.append(pedido)
+        self._concorrencia = len(lote) > 1
+        return lote, False
+
+    def _gravar(self, lote):
+        conn = self._conn
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for pedido in lote:
+                conn.execute("SAVEPOINT job")
+                try:
+                    pedido.resultado = pedido.job(conn)
+                    conn.execute("RELEASE job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    pedido.erro = e
+            conn.execute("COMMIT")
+            self.commits += 1
+            self.jobs += len(lote)
+        except sqlite3.Error as e:
+            # Falha no BEGIN/COMMIT (ex.: lock de outro processo): ninguém foi gravado
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for pedido in lote:
+                if pedido.erro is None:
+                    pedido.erro = e
+        finally:
+            for pedido in lote:
+                pedido.pronto.set()
+
+
+_escritores = {}
+_escritores_lock = threading.Lock()
+
+
+def get_escritor(path=None, app=None):
+    """Retorna (criando se preciso) o escritor do processo atual para `path`."""
+    app = app or current_app
+    path = path or app.config['DATABASE']
+    pid = os.getpid()
+    escritor = _escritores.get(path)
+    if escritor is None or escritor.pid != pid:
+        with _escritores_lock:
+            escritor = _escritores.get(path)
+            if escritor is None or escritor.pid != pid:
+                escritor = Escritor(path, db.pragmas_configurados(app),
+                                    float(app.config.get('ESCRITA_JANELA_MS', JANELA_PADRAO_MS)))
+                _escritores[path] = escritor
+    return escritor
+
+
+def init_app(app):
+    app.config.setdefault('ESCRITA_JANELA_MS', float(os.environ.get('ESCRITA_JANELA_MS', JANELA_PADRAO_MS)))
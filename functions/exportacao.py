@@ -0,0 +1,97 @@
+# functions/exportacao.py
+# Exportação do histórico de atas de uma ala em CSV ou JSONL.
+#
+# Os geradores produzem uma linha de texto por ata a partir de
+# AtaRepository.iter_ala (fetchmany), sem montar o histórico inteiro em
+# memória. O comando `flask --app app exportar-atas` escreve direto no
+# arquivo. A rota /atas/exportar lê tudo da requisição antes de retornar e
+# entrega exportar() a despacho.iterar: cada bloco é lido em uma thread do
+# despacho, com uma conexão do pool que o próprio gerador pega e devolve. O
+# corpo não usa request, session nem g, então não precisa de stream_with_context.
+import csv
+import io
+import json
+
+from functions.ata_repository import AtaRepository
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# Tamanho aproximado (caracteres) de cada bloco enviado ao cliente
+TAMANHO_BLOCO = 64 * 1024
+
+# Colunas do CSV: campos da ata, detalhes de sacramental e os próprios de batismo.
+# Em sacramental, 'hinos'/'oracoes' (JSON) saem separados em abertura/encerramento.
+COLUNAS_CSV = [
+    'id', 'tipo', 'data', 'status', 'tema',
+    'presidido', 'dirigido', 'pianista', 'regente_musica', 'recepcionistas',
+    'reconhecemos_presenca', 'anuncios', 'hino_abertura', 'oracao_abertura',
+    'desobrigacoes', 'apoios', 'confirmacoes_batismo', 'apoio_membros', 'bencao_criancas',
+    'hino_sacramental', 'discursantes', 'hino_intermediario', 'ultimo_discursante',
+    'hino_encerramento', 'oracao_encerramento',
+    'dedicado', 'batizados', 'testemunha1', 'testemunha2',
+]
+
+
+def registro(ata):
+    """Dict exportado de uma ata: campos da ata + 'detalhes' decodificados."""
+    dados = ata.to_template_dict()
+    detalhes = ata.detalhes_dict()
+    for chave in ('id', 'ata_id', 'id_tipo'):
+        detalhes.pop(chave, None)
+    # Em sacramental, 'hinos'/'oracoes' são o JSON bruto; os campos derivados bastam
+    if ata.tipo == 'sacramental':
+        detalhes.pop('hinos', None)
+        detalhes.pop('oracoes', None)
+    dados['detalhes'] = detalhes
+    return dados
+
+
+def gerar_jsonl(atas):
+    for ata in atas:
+        yield json.dumps(registro(ata), ensure_ascii=False) + '\n'
+
+
+def _valor_csv(valor):
+    if isinstance(valor, list):
+        return ' | '.join(str(v) for v in valor)
+    return '' if valor is None else valor
+
+
+def gerar_csv(atas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def _linha(valores):
+        writer.writerow(valores)
+        texto = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return texto
+
+    yield '\ufeff' + _linha(COLUNAS_CSV)  # BOM para o Excel reconhecer UTF-8
+    for ata in atas:
+        dados = registro(ata)
+        detalhes = dados.pop('detalhes')
+        yield _linha([_valor_csv(dados.get(c, detalhes.get(c))) for c in COLUNAS_CSV])
+
+
+def _em_blocos(linhas, tamanho=TAMANHO_BLOCO):
+    """Junta linhas em blocos de ~`tamanho` caracteres (menos chamadas de escrita/rede)."""
+    bloco, total = [], 0
+    for linha in linhas:
+        bloco.append(linha)
+        total += len(linha)
+        if total >= tamanho:
+            yield ''.join(bloco)
+            bloco, total = [], 0
+    if bloco:
+        yield ''.join(bloco)
+
+
+def exportar(conn, ala_id, formato='jsonl', desde=None, ate=None):
+    """Gerador de blocos de texto (CSV ou JSONL) com todas as atas da ala no período."""
+    atas = AtaRepository(conn).iter_ala(ala_id, desde, ate)
+    return _em_blocos(gerar_csv(atas) if formato == 'csv' else gerar_jsonl(atas))
@@ -0,0 +1,234 @@
+# functions/hinos.py
+# Catálogo local de hinos e registro de uso por ata (migração 0008).
+#
+# - hinos_catalogo: um hino por número, com o título normalizado indexado
+#   para o autocomplete por prefixo (faixa >= prefixo AND < prefixo + U+FFFF).
+#   É carregado por `flask --app app importar-hinos arquivo.csv` e também
+#   aprende "número - título" digitados nas atas.
+# - hinos_uso: um registro por (ata, papel) gravado no save da ata, com ala e
+#   data copiadas da ata, para "não cantados nas últimas N semanas" e "mais
+#   usados no ano" serem consultas por índice.
+import csv
+import io
+import json
+import re
+from datetime import date, timedelta
+
+from functions import arquivo_morto
+from functions.ata_listas import PAPEIS_HINOS
+from functions.texto import normalizar
+
+MAIOR_NUMERO = 9999
+LIMITE_SUGESTOES = 10
+
+# "85", "85 - Tal Qual Estou", "Hino nº 85: Tal Qual Estou", "85) ..."
+_NUMERO_TITULO = re.compile(
+    r'^\s*(?:hino\s*)?(?:n[º°o.]*\s*)?(\d{1,4})(?!\d)\s*[-–—.:)]*\s*(.*)$', re.IGNORECASE)
+
+
+def normalizar_titulo(titulo):
+    return normalizar(titulo, pontuacao=False)
+
+
+def separar(texto):
+    """'85 - Tal Qual Estou' -> (85, 'Tal Qual Estou'); sem número -> (None, texto)."""
+    texto = (texto or '').strip()
+    m = _NUMERO_TITULO.match(texto)
+    if m:
+        return int(m.group(1)), m.group(2).strip()
+    return None, texto
+
+
+def _faixas_numericas(prefixo):
+    """Faixas de números que começam com `prefixo` ('8' -> 8, 80-89, 800-899...)."""
+    if not prefixo or prefixo.startswith('0'):
+        return []
+    base = int(prefixo)
+    faixas = []
+    largura = 1
+    while base * largura <= MAIOR_NUMERO:
+        faixas.append((base * largura, min((base + 1) * largura - 1, MAIOR_NUMERO)))
+        largura *= 10
+    return faixas
+
+
+# ------------------------------------------------------------------
+# Catálogo
+# ------------------------------------------------------------------
+
+def gravar_no_catalogo(conn, numero, titulo, substituir=False):
+    verbo = "INSERT OR REPLACE" if substituir else "INSERT OR IGNORE"
+    conn.execute(
+        f"{verbo} INTO hinos_catalogo (numero, titulo, titulo_normalizado) VALUES (?, ?, ?)",
+        (numero, titulo, normalizar_titulo(titulo)))
+
+
+def importar_catalogo(conn, arquivo):
+    """Carrega linhas 'numero;titulo' (ou com vírgula/tab) de um arquivo texto.
+
+    Títulos já existentes são substituídos. Retorna o número de hinos lidos.
+    """
+    conteudo = arquivo.read()
+    primeira = next((l for l in conteudo.splitlines() if l.strip()), '')
+    delimitador = next((d for d in ';\t,' if d in primeira), ';')
+    total = 0
+    for linha in csv.reader(io.StringIO(conteudo), delimiter=delimitador):
+        if len(linha) < 2 or not linha[0].strip().isdigit() or not linha[1].strip():
+            continue  # cabeçalho ou linha vazia
+        gravar_no_catalogo(conn, int(linha[0]), linha[1].strip(), substituir=True)
+        total += 1
+    # Usos gravados só com o título ganham o número do catálogo
+    conn.execute("""
+        UPDATE hinos_uso SET numero = (
+            SELECT c.numero FROM hinos_catalogo c WHERE c.titulo_normalizado = hinos_uso.titulo_normalizado
+        )
+        WHERE numero IS NULL
+    """)
+    return total
+
+
+def _resolver(conn, texto):
+    """(numero, titulo_normalizado) de um hino digitado na ata."""
+    numero, titulo = separar(texto)
+    if numero is not None:
+        if titulo:
+            gravar_no_catalogo(conn, numero, titulo)
+        return numero, normalizar_titulo(titulo)
+    chave = normalizar_titulo(titulo)
+    row = conn.execute(
+        "SELECT numero FROM hinos_catalogo WHERE titulo_normalizado = ?", (chave,)).fetchone()
+    return (row['numero'] if row else None), chave
+
+
+def sugerir(conn, texto, limite=LIMITE_SUGESTOES):
+    """Hinos do catálogo cujo número ou título começa com `texto`."""
+    texto = (texto or '').strip()
+    numero, titulo = separar(texto)
+    if numero is not None:
+        faixas = _faixas_numericas(str(numero))
+        if not faixas:
+            return []
+        filtro = " OR ".join("numero BETWEEN ? AND ?" for _ in faixas)
+        params = [v for faixa in faixas for v in faixa]
+        rows = conn.execute(
+            f"SELECT numero, titulo FROM hinos_catalogo WHERE {filtro} ORDER BY numero LIMIT ?",
+            params + [limite]).fetchall()
+    else:
+        prefixo = normalizar_titulo(titulo)
+        if not prefixo:
+            return []
+        rows = conn.execute("""
+            SELECT numero, titulo FROM hinos_catalogo
+            WHERE titulo_normalizado >= ? AND titulo_normalizado < ?
+            ORDER BY titulo_normalizado
+            LIMIT ?
+        """, (prefixo, prefixo + '\uffff', limite)).fetchall()
+    return [{'numero': r['numero'], 'titulo': r['titulo'],
+             'rotulo': f"{r['numero']} - {r['titulo']}"} for r in rows]
+
+
+# ------------------------------------------------------------------
+# Uso nas atas
+# ------------------------------------------------------------------
+
+def remover_uso(conn, ata_id):
+    conn.execute("DELETE FROM hinos_uso WHERE ata_id = ?", (int(ata_id),))
+
+
+def remover_usos(conn, ata_ids):
+    """Apaga o uso de várias atas (exclusão em lote; hinos_uso não tem cascata, ver migração 0014)."""
+    conn.execute("DELETE FROM hinos_uso WHERE ata_id IN (SELECT value FROM json_each(?))",
+                 (json.dumps([int(i) for i in ata_ids]),))
+
+
+def registrar_uso(conn, ata_id, ala_id, data, tipo, detalhes):
+    """Substitui os hinos da ata em hinos_uso. Deve rodar na mesma transação do save."""
+    remover_uso(conn, ata_id)
+    if tipo != 'sacramental':
+        return
+    linhas = linhas_de_uso(conn, int(ata_id), ala_id, data, detalhes)
+    if linhas:
+        conn.executemany(SQL_INSERIR_USO, linhas)
+
+
+SQL_INSERIR_USO = """
+    INSERT INTO hinos_uso (ata_id, papel, ala_id, data, numero, titulo_normalizado, hino)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def linhas_de_uso(conn, ata_id, ala_id, data, detalhes, cache=None):
+    """Linhas de hinos_uso de uma ata sacramental. `cache` evita resolver o mesmo texto de novo."""
+    return _linhas(conn, ata_id, ala_id, data, [
+        (papel, detalhes.get(f'hino_{papel}')) for papel in PAPEIS_HINOS], cache)
+
+
+def _linhas(conn, ata_id, ala_id, data, hinos, cache=None):
+    linhas = []
+    for papel, texto in hinos:
+        if not texto or not texto.strip():
+            continue
+        texto = texto.strip()
+        if cache is None:
+            resolvido = _resolver(conn, texto)
+        else:
+            resolvido = cache.get(texto)
+            if resolvido is None:
+                resolvido = cache[texto] = _resolver(conn, texto)
+        linhas.append((ata_id, papel, ala_id, data) + resolvido + (texto,))
+    return linhas
+
+
+def _registrar(conn, ata_id, ala_id, data, hinos):
+    linhas = _linhas(conn, ata_id, ala_id, data, hinos)
+    if linhas:
+        conn.executemany(SQL_INSERIR_USO, linhas)
+
+
+def reconstruir_uso(conn):
+    """Refaz hinos_uso a partir de ata_hinos. Retorna o número de registros."""
+    conn.execute("DELETE FROM hinos_uso")
+    por_ata = {}
+    sql, params = arquivo_morto.uniao(conn, """
+        SELECT a.id, a.ala_id, a.data, h.papel, h.hino, h.posicao
+        FROM {s}ata_hinos h JOIN {s}atas a ON a.id = h.ata_id
+        WHERE a.tipo = 'sacramental' AND {unica}
+    """)
+    for row in conn.execute(sql + " ORDER BY id, posicao", params).fetchall():
+        ata = por_ata.setdefault(row['id'], (row['ala_id'], row['data'], []))
+        ata[2].append((row['papel'], row['hino']))
+    for ata_id, (ala_id, data, hinos) in por_ata.items():
+        _registrar(conn, ata_id, ala_id, data, hinos)
+    return conn.execute("SELECT COUNT(*) FROM hinos_uso").fetchone()[0]
+
+
+# ------------------------------------------------------------------
+# Estatísticas
+# ------------------------------------------------------------------
+
+def nao_cantados(conn, ala_id, semanas, hoje=None):
+    """Hinos do catálogo que a ala não cantou nas últimas `semanas` semanas."""
+    desde = ((hoje or date.today()) - timedelta(weeks=semanas)).isoformat()
+    return conn.execute("""
+        SELECT c.numero, c.titulo
+        FROM hinos_catalogo c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM hinos_uso u
+            WHERE u.ala_id = ? AND u.numero = c.numero AND u.data >= ?
+        )
+        ORDER BY c.numero
+    """, (ala_id, desde)).fetchall()
+
+
+def mais_usados(conn, ala_id, ano, limite=10):
+    """Hinos mais cantados pela ala no ano (sem número no catálogo, agrupa pelo título)."""
+    return conn.execute("""
+        SELECT u.numero, COALESCE(c.titulo, MAX(u.hino)) AS titulo, COUNT(*) AS usos,
+               MAX(u.data) AS ultima_data
+        FROM hinos_uso u
+        LEFT JOIN hinos_catalogo c ON c.numero = u.numero
+        WHERE u.ala_id = ? AND u.data >= ? AND u.data < ?
+        GROUP BY COALESCE(u.numero, u.titulo_normalizado)
+        ORDER BY usos DESC, ultima_data DESC
+        LIMIT ?
+    """, (ala_id, f"{int(ano):04d}-01-01", f"{int(ano) + 1:04d}-01-01", limite)).fetchall()
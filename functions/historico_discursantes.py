@@ -0,0 +1,165 @@
+# functions/historico_discursantes.py
+# Histórico de discursantes por ala (tabela speaker_history, migração 0007).
+#
+# Uma linha por (ala_id, nome normalizado) com a última data, o tema dessa
+# reunião e o total de reuniões sacramentais em que a pessoa discursou. É
+# atualizada no save/exclusão da ata, recalculando só os nomes envolvidos, e
+# os painéis de "discursantes recentes" viram uma leitura pelo índice
+# (ala_id, last_date).
+import json
+
+from functions import arquivo_morto
+from functions.texto import normalizar as normalizar_nome
+
+
+def nomes_da_ata(conn, ata_id):
+    """Nomes (como gravados) dos discursantes de uma ata."""
+    return [row['nome'] for row in conn.execute(
+        "SELECT nome FROM ata_discursantes WHERE ata_id = ?", (ata_id,))]
+
+
+def nomes_das_atas(conn, ata_ids):
+    """Nomes distintos dos discursantes de várias atas (exclusão em lote)."""
+    return [row['nome'] for row in conn.execute(
+        "SELECT DISTINCT nome FROM ata_discursantes WHERE ata_id IN (SELECT value FROM json_each(?))",
+        (json.dumps([int(i) for i in ata_ids]),))]
+
+
+def atualizar(conn, ala_id, nomes):
+    """Recalcula as linhas de `nomes` na ala. Chamar depois de gravar/apagar as listas.
+
+    `nomes` deve incluir os discursantes de antes e de depois da alteração.
+    Todas as grafias já vistas de cada nome ficam em `grafias`, para o
+    recálculo usar o índice de ata_discursantes.nome.
+    """
+    grafias_por_chave = {}
+    for nome in nomes:
+        chave = normalizar_nome(nome)
+        if chave:
+            grafias_por_chave.setdefault(chave, set()).add(nome)
+
+    for chave, grafias in grafias_por_chave.items():
+        atual = conn.execute(
+            "SELECT grafias FROM speaker_history WHERE ala_id = ? AND nome_normalizado = ?",
+            (ala_id, chave)).fetchone()
+        if atual:
+            grafias.update(json.loads(atual['grafias']))
+        rows = conn.execute(*arquivo_morto.uniao(conn, """
+            SELECT d.nome, a.id, a.data, s.tema
+            FROM {s}ata_discursantes d
+            JOIN {s}atas a ON a.id = d.ata_id
+            LEFT JOIN {s}sacramental s ON s.ata_id = a.id
+            WHERE d.nome IN (SELECT value FROM json_each(?))
+              AND a.ala_id = ? AND a.tipo = 'sacramental' AND {unica}
+        """, (json.dumps(sorted(grafias)), ala_id))).fetchall()
+        _gravar(conn, ala_id, chave, [r for r in rows if normalizar_nome(r['nome']) == chave])
+
+
+def _gravar(conn, ala_id, chave, rows):
+    if not rows:
+        conn.execute("DELETE FROM speaker_history WHERE ala_id = ? AND nome_normalizado = ?",
+                     (ala_id, chave))
+        return
+    ultima = max(rows, key=lambda r: (r['data'], r['id']))
+    _salvar(conn, ala_id, chave, ultima, {r['nome'] for r in rows}, len({r['id'] for r in rows}))
+
+
+SQL_SALVAR = """
+    INSERT OR REPLACE INTO speaker_history
+        (ala_id, nome_normalizado, nome, grafias, last_date, count, last_tema)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _linha(ala_id, chave, ultima, grafias, total):
+    return (ala_id, chave, ultima['nome'].strip(), json.dumps(sorted(grafias), ensure_ascii=False),
+            ultima['data'], total, ultima['tema'])
+
+
+def _salvar(conn, ala_id, chave, ultima, grafias, total):
+    conn.execute(SQL_SALVAR, _linha(ala_id, chave, ultima, grafias, total))
+
+
+def acrescentar(conn, ala_id, ata_ids):
+    """Soma ao histórico as atas novas `ata_ids` (importação), sem reler as atas antigas de cada nome.
+
+    Só vale para atas recém-gravadas: uma ata que já contava seria contada de novo.
+    Lê as linhas atuais dos nomes em uma consulta e grava tudo em um executemany.
+    """
+    chaves = {}  # nome como digitado -> normalizado (os mesmos nomes se repetem muito)
+    por_chave = {}
+    for row in conn.execute("""
+        SELECT d.nome, a.id, a.data, s.tema
+        FROM ata_discursantes d
+        JOIN atas a ON a.id = d.ata_id
+        LEFT JOIN sacramental s ON s.ata_id = a.id
+        WHERE a.id IN (SELECT value FROM json_each(?)) AND a.ala_id = ? AND a.tipo = 'sacramental'
+    """, (json.dumps([int(i) for i in ata_ids]), ala_id)):
+        chave = chaves.get(row['nome'])
+        if chave is None:
+            chave = chaves[row['nome']] = normalizar_nome(row['nome'])
+        if chave:
+            por_chave.setdefault(chave, []).append(row)
+    if not por_chave:
+        return
+
+    atuais = {row['nome_normalizado']: row for row in conn.execute(
+        "SELECT nome_normalizado, nome, grafias, last_date AS data, count, last_tema AS tema "
+        "FROM speaker_history WHERE ala_id = ? AND nome_normalizado IN (SELECT value FROM json_each(?))",
+        (ala_id, json.dumps(sorted(por_chave), ensure_ascii=False)))}
+    linhas = []
+    for chave, rows in por_chave.items():
+        ultima = max(rows, key=lambda r: (r['data'], r['id']))
+        grafias = {r['nome'] for r in rows}
+        total = len({r['id'] for r in rows})
+        atual = atuais.get(chave)
+        if atual:
+            grafias.update(json.loads(atual['grafias']))
+            total += atual['count']
+            # Na mesma data vale a ata de id maior, que é a nova
+            if atual['data'] > ultima['data']:
+                ultima = atual
+        linhas.append(_linha(ala_id, chave, ultima, grafias, total))
+    conn.executemany(SQL_SALVAR, linhas)
+
+
+def reconstruir(conn, ala_ids=None):
+    """Refaz a tabela (ou só as alas em `ala_ids`) a partir de ata_discursantes.
+
+    Retorna o número de linhas gravadas.
+    """
+    sql = """
+        SELECT a.ala_id, d.nome, a.id, a.data, s.tema
+        FROM {s}ata_discursantes d
+        JOIN {s}atas a ON a.id = d.ata_id
+        LEFT JOIN {s}sacramental s ON s.ata_id = a.id
+        WHERE a.tipo = 'sacramental' AND {unica}
+    """
+    if ala_ids is None:
+        conn.execute("DELETE FROM speaker_history")
+        params = ()
+    else:
+        alas = json.dumps(sorted(set(ala_ids)))
+        conn.execute("DELETE FROM speaker_history WHERE ala_id IN (SELECT value FROM json_each(?))", (alas,))
+        sql += " AND a.ala_id IN (SELECT value FROM json_each(?))"
+        params = (alas,)
+    por_chave = {}
+    rows = conn.execute(*arquivo_morto.uniao(conn, sql, params))
+    for row in rows:
+        chave = normalizar_nome(row['nome'])
+        if chave:
+            por_chave.setdefault((row['ala_id'], chave), []).append(row)
+    for (ala_id, chave), grupo in por_chave.items():
+        _gravar(conn, ala_id, chave, grupo)
+    return len(por_chave)
+
+
+def recentes(conn, ala_id, desde, limite=20):
+    """Discursantes cuja última fala foi em `desde` ou depois, do mais recente."""
+    return conn.execute("""
+        SELECT nome, last_date AS data, last_tema AS tema, count
+        FROM speaker_history
+        WHERE ala_id = ? AND last_date >= ?
+        ORDER BY last_date DESC
+        LIMIT ?
+    """, (ala_id, desde, limite)).fetchall()
@@ -0,0 +1,332 @@
+# functions/importacao.py
+# Importação em lote de atas históricas (CSV ou JSONL, mesmo formato da
+# exportação em functions/exportacao.py).
+#
+# As linhas são validadas uma a uma enquanto o arquivo é lido; as válidas são
+# gravadas com executemany em lotes, cada lote em uma transação própria (um
+# job de escrita: o escritor da aplicação ou arquivo_morto.transacoes() no
+# CLI), para o lock de escrita ser liberado entre um lote e outro. Índices e
+# triggers ficam ligados durante a carga: o índice único de (ala_id, tipo,
+# data) continua valendo para quem escreve ao mesmo tempo, e contadores da ala
+# e changelog seguem pelos triggers de atas. O resumo das listas e o histórico
+# de discursantes são projetados uma vez, em um job no fim da importação (também
+# se ela parar com erro), com as atas de todos os lotes: até lá as atas novas
+# aparecem na busca, mas não nas listas. Erros de uma linha entram no
+# relatório sem interromper o restante, inclusive uma ata que já existe na ala
+# (mesmo tipo e data; ver 0010_atas_unicas) ou que aparece duas vezes no arquivo.
+# Cargas grandes terminam com ANALYZE, para o planejador ver as tabelas novas.
+import csv
+import json
+import sqlite3
+from datetime import date, datetime
+from json.encoder import encode_basestring_ascii
+
+from functions import arquivo_morto, ata_listas, ata_summary, busca_atas, hinos, historico_discursantes, manutencao
+
+LOTE = 1000  # atas por job no escritor da aplicação (~0,2 s com o lock)
+# Conexão própria (CLI): lotes maiores, menos commits; cada commit regrava no
+# WAL as páginas dos índices que o lote tocou (~0,8 s com o lock)
+LOTE_CLI = 5000
+MAX_ERROS_NO_RELATORIO = 1000
+ANALISAR_A_PARTIR_DE = 500  # atas importadas
+
+TIPOS = ('sacramental', 'batismo')
+
+CAMPOS_SACRAMENTAL = (
+    'presidido', 'dirigido', 'recepcionistas', 'tema', 'pianista', 'regente_musica',
+    'reconhecemos_presenca', 'hino_abertura', 'oracao_abertura', 'desobrigacoes', 'apoios',
+    'confirmacoes_batismo', 'apoio_membros', 'bencao_criancas', 'hino_sacramental',
+    'hino_intermediario', 'ultimo_discursante', 'hino_encerramento', 'oracao_encerramento',
+)
+LISTAS_SACRAMENTAL = ('anuncios', 'discursantes')
+CAMPOS_BATISMO = ('presidido', 'dirigido', 'dedicado', 'testemunha1', 'testemunha2')
+LISTAS_BATISMO = ('batizados',)
+
+SQL_ATA = "INSERT INTO atas (id, tipo, data, status, ala_id) VALUES (?, ?, ?, ?, ?)"
+SQL_SACRAMENTAL = """
+    INSERT INTO sacramental (ata_id, presidido, dirigido, recepcionistas, pianista, regente_musica,
+        reconhecemos_presenca, anuncios, hinos, oracoes, discursantes, hino_sacramental, hino_intermediario,
+        desobrigacoes, apoios, confirmacoes_batismo, apoio_membros, bencao_criancas, ultimo_discursante, tema)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_BATISMO = """
+    INSERT INTO batismo (ata_id, dedicado, presidido, dirigido, batizados, testemunha1, testemunha2)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Ordem dos executemany de um lote: atas antes das tabelas que apontam para ela
+INSERTS = {
+    'atas': SQL_ATA,
+    'sacramental': SQL_SACRAMENTAL,
+    'batismo': SQL_BATISMO,
+    **ata_listas.INSERTS,
+    'hinos_uso': hinos.SQL_INSERIR_USO,
+    'atas_fts': busca_atas.SQL_INSERIR,
+}
+
+
+class ErroDeLinha(ValueError):
+    pass
+
+
+class _LoteRecusado(Exception):
+    """Uma ata do lote falhou no executemany; o lote é refeito ata por ata."""
+
+
+# ------------------------------------------------------------------
+# Leitura e validação
+# ------------------------------------------------------------------
+
+def ler_registros(arquivo, formato):
+    """Gera (numero_da_linha, dict) de um arquivo texto CSV ou JSONL.
+
+    Linhas que nem chegam a ser um registro geram (numero, ErroDeLinha).
+    """
+    if formato == 'csv':
+        leitor = csv.DictReader(arquivo)
+        for dados in leitor:
+            yield leitor.line_num, dados
+        return
+    for numero, linha in enumerate(arquivo, 1):
+        if not linha.strip():
+            continue
+        try:
+            dados = json.loads(linha)
+        except ValueError as e:
+            yield numero, ErroDeLinha(f"JSON inválido: {e}")
+            continue
+        if not isinstance(dados, dict):
+            yield numero, ErroDeLinha("cada linha deve ser um objeto JSON")
+            continue
+        # Formato da exportação: campos da ata + "detalhes"
+        registro = dict(dados.get('detalhes') or {})
+        registro.update({k: v for k, v in dados.items() if k != 'detalhes' and v is not None})
+        yield numero, registro
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if type(valor) is str:
+        return valor.strip()
+    if isinstance(valor, (list, dict)):
+        raise ErroDeLinha(f"valor de texto inválido: {valor!r}")
+    return str(valor).strip()
+
+
+def _lista(valor):
+    """Lista de textos a partir de lista JSON, texto 'a | b' ou uma linha por item."""
+    if valor is None or valor == '':
+        return []
+    if isinstance(valor, str):
+        valor = valor.strip()
+        if valor.startswith('['):
+            try:
+                valor = json.loads(valor)
+            except ValueError:
+                raise ErroDeLinha(f"lista JSON inválida: {valor[:40]!r}")
+        else:
+            separador = ' | ' if ' | ' in valor else '\n'
+            valor = valor.split(separador)
+    if not isinstance(valor, list):
+        raise ErroDeLinha(f"lista inválida: {valor!r}")
+    return [_texto(v) for v in valor if _texto(v)]
+
+
+def _data(valor):
+    texto = _texto(valor)
+    try:
+        return date.fromisoformat(texto).isoformat()  # caminho rápido: AAAA-MM-DD
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(texto, "%d/%m/%Y").date().isoformat()
+    except ValueError:
+        pass
+    raise ErroDeLinha(f"data inválida: {texto!r} (use AAAA-MM-DD ou DD/MM/AAAA)")
+
+
+def validar(dados):
+    """Registro lido -> (tipo, data, status, detalhes no formato de form_ata)."""
+    tipo = _texto(dados.get('tipo')).lower()
+    if tipo not in TIPOS:
+        raise ErroDeLinha(f"tipo inválido: {tipo!r} (use sacramental ou batismo)")
+    data = _data(dados.get('data'))
+    status = _texto(dados.get('status')) or 'pendente'
+    campos, listas = ((CAMPOS_SACRAMENTAL, LISTAS_SACRAMENTAL) if tipo == 'sacramental'
+                      else (CAMPOS_BATISMO, LISTAS_BATISMO))
+    detalhes = {c: _texto(dados.get(c)) for c in campos}
+    detalhes.update({c: _lista(dados.get(c)) for c in listas})
+    return tipo, data, status, detalhes
+
+
+# ------------------------------------------------------------------
+# Gravação
+# ------------------------------------------------------------------
+
+def _json_lista(textos):
+    """O mesmo texto de json.dumps(textos), sem montar um encoder a cada chamada."""
+    return '[' + ', '.join(map(encode_basestring_ascii, textos)) + ']'
+
+
+def _linhas_vazias():
+    return {tabela: [] for tabela in INSERTS}
+
+
+def _acrescentar(conn, linhas, ata_id, ala_id, tipo, data, status, detalhes, cache_hinos):
+    """Acrescenta a `linhas` ({tabela: [tuplas]}, de _linhas_vazias) as linhas de uma ata."""
+    linhas['atas'].append((ata_id, tipo, data, status, ala_id))
+    if tipo == 'sacramental':
+        linhas['sacramental'].append((
+            ata_id, detalhes['presidido'], detalhes['dirigido'], detalhes['recepcionistas'],
+            detalhes['pianista'], detalhes['regente_musica'], detalhes['reconhecemos_presenca'],
+            _json_lista(detalhes['anuncios']),
+            _json_lista((detalhes['hino_abertura'], detalhes['hino_encerramento'])),
+            _json_lista((detalhes['oracao_abertura'], detalhes['oracao_encerramento'])),
+            _json_lista(detalhes['discursantes']),
+            detalhes['hino_sacramental'], detalhes['hino_intermediario'], detalhes['desobrigacoes'],
+            detalhes['apoios'], detalhes['confirmacoes_batismo'], detalhes['apoio_membros'],
+            detalhes['bencao_criancas'], detalhes['ultimo_discursante'], detalhes['tema'],
+        ))
+        linhas['hinos_uso'].extend(hinos.linhas_de_uso(conn, ata_id, ala_id, data, detalhes, cache_hinos))
+    else:
+        linhas['batismo'].append((
+            ata_id, detalhes['dedicado'], detalhes['presidido'], detalhes['dirigido'],
+            _json_lista(detalhes['batizados']), detalhes['testemunha1'], detalhes['testemunha2'],
+        ))
+    ata_listas.linhas_das_listas(ata_id, ata_listas.listas_de_detalhes(tipo, detalhes), linhas)
+    linhas['atas_fts'].append(busca_atas.linha_do_indice(ata_id, tipo, detalhes))
+
+
+def _inserir(conn, linhas):
+    for tabela, valores in linhas.items():
+        if valores:
+            conn.executemany(INSERTS[tabela], valores)
+
+
+def _inserir_uma_a_uma(conn, ala_id, novas, cache_hinos, erros):
+    """Segunda tentativa de um lote recusado: cada ata no seu SAVEPOINT, para isolar o erro."""
+    gravadas = []
+    for numero, ata_id, tipo, data, status, detalhes in novas:
+        linhas = _linhas_vazias()
+        _acrescentar(conn, linhas, ata_id, ala_id, tipo, data, status, detalhes, cache_hinos)
+        conn.execute("SAVEPOINT ata")
+        try:
+            _inserir(conn, linhas)
+            conn.execute("RELEASE ata")
+            gravadas.append(ata_id)
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK TO ata")
+            conn.execute("RELEASE ata")
+            erros.append((numero, f"erro ao gravar: {e}"))
+    return gravadas
+
+
+def _gravar_lote(conn, ala_id, validas, cache_hinos, isolar=False):
+    """Job de escrita de um lote de linhas já validadas: [(numero, tipo, data, status, detalhes)].
+
+    Retorna (ids das atas gravadas, [(numero, erro)]); os erros só entram no
+    relatório depois do commit. O lote vai em um executemany por tabela, sem
+    SAVEPOINT próprio (com ele cada página alterada iria também para o
+    subjournal): se uma ata falhar, levanta _LoteRecusado e o job é desfeito;
+    com `isolar`, grava ata por ata.
+    """
+    # (tipo, data) já ocupados na ala, também no arquivo morto; o índice
+    # único rejeitaria o lote inteiro. Com o tipo na condição a busca usa as
+    # três colunas do índice em vez de percorrer todas as atas da ala.
+    datas = json.dumps(sorted({data for _, _, data, _, _ in validas}))
+    existentes = {(row['tipo'], row['data']) for row in conn.execute(*arquivo_morto.uniao(
+        conn, "SELECT a.tipo, a.data FROM {s}atas a WHERE a.ala_id = ? AND a.tipo IN (?, ?) "
+              "AND a.data IN (SELECT value FROM json_each(?)) AND {unica}", (ala_id,) + TIPOS + (datas,)))}
+    proximo_id = conn.execute(
+        "SELECT MAX(COALESCE((SELECT MAX(id) FROM atas), 0), "
+        "COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'atas'), 0)) + 1").fetchone()[0]
+
+    erros = []
+    novas = []
+    for numero, tipo, data, status, detalhes in validas:
+        if (tipo, data) in existentes:
+            erros.append((numero, f"já existe ata de {tipo} em {data}"))
+            continue
+        novas.append((numero, proximo_id, tipo, data, status, detalhes))
+        proximo_id += 1
+    if not novas:
+        return [], erros
+    if isolar:
+        return _inserir_uma_a_uma(conn, ala_id, novas, cache_hinos, erros), erros
+
+    linhas = _linhas_vazias()
+    for _, ata_id, tipo, data, status, detalhes in novas:
+        _acrescentar(conn, linhas, ata_id, ala_id, tipo, data, status, detalhes, cache_hinos)
+    try:
+        _inserir(conn, linhas)
+    except sqlite3.Error as e:
+        raise _LoteRecusado() from e
+    return [ata_id for _, ata_id, _, _, _, _ in novas], erros
+
+
+def _projetar(conn, ala_id, ata_ids):
+    """Job do fim da importação: resumo das listas e histórico de discursantes das atas novas."""
+    ata_summary.atualizar(conn, ata_ids)
+    historico_discursantes.acrescentar(conn, ala_id, ata_ids)
+
+
+def _registrar_erro(relatorio, numero, mensagem):
+    relatorio['total_erros'] += 1
+    if len(relatorio['erros']) < MAX_ERROS_NO_RELATORIO:
+        relatorio['erros'].append({'linha': numero, 'erro': mensagem})
+
+
+def importar(executar, registros, ala_id, lote=LOTE):
+    """Importa `registros` (de ler_registros) para a ala. Retorna o relatório.
+
+    `executar(job)` roda job(conn) em uma transação e faz o commit; cada lote
+    é um job, então os lotes já gravados ficam se a importação parar no meio.
+    {'lidas', 'importadas', 'total_erros', 'erros': [{'linha', 'erro'}]}
+    """
+    relatorio = {'lidas': 0, 'importadas': 0, 'total_erros': 0, 'erros': []}
+    cache_hinos = {}
+    gravadas = []
+
+    def gravar(validas):
+        try:
+            ids, erros = executar(lambda conn: _gravar_lote(conn, ala_id, validas, cache_hinos))
+        except _LoteRecusado:
+            # Os hinos que o job desfeito pôs no catálogo também voltaram
+            cache_hinos.clear()
+            ids, erros = executar(lambda conn: _gravar_lote(conn, ala_id, validas, cache_hinos, isolar=True))
+        for numero, mensagem in erros:
+            _registrar_erro(relatorio, numero, mensagem)
+        relatorio['importadas'] += len(ids)
+        gravadas.extend(ids)
+
+    vistas = set()  # (tipo, data) do arquivo: a segunda ocorrência é erro
+    validas = []
+    try:
+        for numero, dados in registros:
+            relatorio['lidas'] += 1
+            try:
+                if isinstance(dados, ErroDeLinha):
+                    raise dados
+                tipo, data, status, detalhes = validar(dados)
+            except ErroDeLinha as e:
+                _registrar_erro(relatorio, numero, str(e))
+                continue
+            if (tipo, data) in vistas:
+                _registrar_erro(relatorio, numero, f"já existe ata de {tipo} em {data}")
+                continue
+            vistas.add((tipo, data))
+            validas.append((numero, tipo, data, status, detalhes))
+            if len(validas) >= lote:
+                gravar(validas)
+                validas = []
+        if validas:
+            gravar(validas)
+    finally:
+        # Lotes já gravados ficam; o resumo e o histórico precisam cobri-los
+        if gravadas:
+            executar(lambda conn: _projetar(conn, ala_id, gravadas))
+
+    if relatorio['importadas'] >= ANALISAR_A_PARTIR_DE:
+        executar(lambda conn: manutencao.analisar(conn, manutencao.ANALISE_LIMITE))
+    return relatorio
@@ -0,0 +1,281 @@
+# functions/manutencao.py
+# Manutenção dos bancos SQLite: estatísticas do planejador (ANALYZE e PRAGMA
+# optimize), devolução das páginas livres ao sistema (incremental_vacuum),
+# checkpoint do WAL e PRAGMA integrity_check.
+#
+# Cada tarefa roda em uma conexão própria, fora do escritor da aplicação, e
+# registra tamanho do arquivo, páginas livres e tempo antes e depois. O
+# incremental_vacuum é feito em passos de `paginas` páginas com pausa entre
+# eles, para a trava de escrita durar pouco (como os passos do backup).
+#
+# O incremental_vacuum só encolhe bancos com auto_vacuum = INCREMENTAL. Os
+# bancos novos já nascem assim (functions/migrations.py e o arquivo morto);
+# um banco antigo é convertido uma vez por compactar(), que roda um VACUUM
+# completo e trava as escritas enquanto dura.
+#
+# Com a réplica ligada o checkpoint é PASSIVE: o replicador segura uma leitura
+# aberta e faz ele mesmo os checkpoints que recomeçam o WAL.
+import json
+import os
+import sqlite3
+import time
+
+try:
+    # Com eventlet.monkey_patch() o agendador precisa de uma thread do sistema
+    from eventlet.patcher import original
+    threading = original('threading')
+except ImportError:
+    import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+# Ordem de execução: o vácuo antes do checkpoint, que é quando o arquivo encolhe em WAL
+TAREFAS = ('analyze', 'optimize', 'vacuum', 'checkpoint', 'integrity_check')
+LEVES = ('optimize', 'vacuum', 'checkpoint')
+PAGINAS_POR_PASSO = 1000
+PAUSA_PADRAO = 0.02
+INTERVALO_H_PADRAO = 0       # 0 = agendador desligado
+COMPLETA_H_PADRAO = 168      # ANALYZE e integrity_check uma vez por semana
+ANALISE_LIMITE = 1000        # linhas examinadas por índice no ANALYZE depois de importações
+AUTO_VACUUM_INCREMENTAL = 2
+NICE = 10                    # prioridade da thread do agendador (Linux)
+
+
+class ErroDeManutencao(Exception):
+    pass
+
+
+def estado(conn, caminho):
+    """{'bytes', 'wal_bytes', 'paginas', 'livres', 'auto_vacuum'} do banco principal de `conn`."""
+    wal = caminho + "-wal"
+    return {
+        'bytes': os.path.getsize(caminho),
+        'wal_bytes': os.path.getsize(wal) if os.path.exists(wal) else 0,
+        'paginas': conn.execute("PRAGMA main.page_count").fetchone()[0],
+        'livres': conn.execute("PRAGMA main.freelist_count").fetchone()[0],
+        'auto_vacuum': conn.execute("PRAGMA main.auto_vacuum").fetchone()[0],
+    }
+
+
+def analisar(conn, limite=0):
+    """ANALYZE do banco principal; com `limite`, amostra até `limite` linhas por índice."""
+    conn.execute(f"PRAGMA analysis_limit = {int(limite)}")
+    try:
+        conn.execute("ANALYZE main")
+    finally:
+        conn.execute("PRAGMA analysis_limit = 0")
+
+
+def _vacuo(conn, paginas, pausa):
+    if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        return "auto_vacuum desligado: rode a manutenção com --compactar uma vez"
+    liberadas = 0
+    while True:
+        livres = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+        if not livres:
+            break
+        # executescript roda o pragma até o fim (execute() libera uma página por chamada)
+        conn.executescript(f"PRAGMA main.incremental_vacuum({min(livres, paginas)})")
+        liberadas += livres - conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+        if pausa:
+            time.sleep(pausa)
+    return f"{liberadas} página(s) devolvida(s)"
+
+
+def _checkpoint(conn, modo):
+    ocupado, wal, copiadas = conn.execute(f"PRAGMA main.wal_checkpoint({modo})").fetchone()
+    if wal < 0:
+        return "fora de WAL"
+    return f"{modo}: {copiadas} de {wal} frame(s)" + (" (leitores ativos)" if ocupado else "")
+
+
+def _integridade(conn):
+    problemas = [row[0] for row in conn.execute("PRAGMA main.integrity_check")]
+    if problemas != ['ok']:
+        raise ErroDeManutencao(f"integrity_check: {problemas[:5]}")
+    return "ok"
+
+
+def executar(caminho, tarefas=TAREFAS, checkpoint='TRUNCATE', paginas=PAGINAS_POR_PASSO,
+             pausa=PAUSA_PADRAO, timeout=30):
+    """Roda as `tarefas` (na ordem de TAREFAS) no banco `caminho`.
+
+    Retorna [{'tarefa', 'resultado', 'segundos', 'antes', 'depois'}], com
+    'antes' e 'depois' no formato de estado(). ErroDeManutencao se o
+    integrity_check encontrar problemas.
+    """
+    desconhecidas = set(tarefas) - set(TAREFAS)
+    if desconhecidas:
+        raise ValueError(f"tarefas desconhecidas: {', '.join(sorted(desconhecidas))}")
+    conn = sqlite3.connect(caminho, timeout=timeout, isolation_level=None)
+    feitas = []
+    try:
+        for tarefa in (t for t in TAREFAS if t in tarefas):
+            antes = estado(conn, caminho)
+            inicio = time.perf_counter()
+            if tarefa == 'analyze':
+                analisar(conn)
+                resultado = "estatísticas atualizadas"
+            elif tarefa == 'optimize':
+                conn.execute("PRAGMA main.optimize")
+                resultado = "ok"
+            elif tarefa == 'vacuum':
+                resultado = _vacuo(conn, paginas, pausa)
+            elif tarefa == 'checkpoint':
+                resultado = _checkpoint(conn, checkpoint)
+            else:
+                resultado = _integridade(conn)
+            feitas.append({'tarefa': tarefa, 'resultado': resultado,
+                           'segundos': time.perf_counter() - inicio,
+                           'antes': antes, 'depois': estado(conn, caminho)})
+    finally:
+        conn.close()
+    return feitas
+
+
+def compactar(caminho, checkpoint='TRUNCATE', timeout=30):
+    """VACUUM completo de `caminho`, ligando o auto_vacuum incremental.
+
+    Trava as escritas durante toda a cópia: rodar fora do horário de uso.
+    Retorna {'segundos', 'antes', 'depois'}.
+    """
+    conn = sqlite3.connect(caminho, timeout=timeout, isolation_level=None)
+    try:
+        antes = estado(conn, caminho)
+        inicio = time.perf_counter()
+        conn.execute(f"PRAGMA main.auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+        conn.execute("VACUUM main")
+        conn.execute(f"PRAGMA main.wal_checkpoint({checkpoint})")
+        return {'segundos': time.perf_counter() - inicio, 'antes': antes, 'depois': estado(conn, caminho)}
+    finally:
+        conn.close()
+
+
+def descrever(caminho, feita):
+    """Uma linha de log para um item de executar()."""
+    antes, depois = feita['antes'], feita['depois']
+    return (f"{caminho} {feita['tarefa']}: {feita['resultado']}; {feita['segundos']:.2f}s, "
+            f"{antes['bytes'] / 1e6:.1f} -> {depois['bytes'] / 1e6:.1f} MB, "
+            f"WAL {antes['wal_bytes'] / 1e6:.1f} -> {depois['wal_bytes'] / 1e6:.1f} MB, "
+            f"livres {antes['livres']} -> {depois['livres']} página(s)")
+
+
+# ------------------------------------------------------------------
+# Agendamento
+# ------------------------------------------------------------------
+
+def _ler_ultimas(arquivo):
+    arquivo.seek(0)
+    try:
+        return json.loads(arquivo.read() or "{}")
+    except ValueError:
+        return {}
+
+
+class Agendador:
+    """Thread que roda as tarefas leves a cada `intervalo` segundos e todas a cada `completa`.
+
+    A hora da última rodada de cada banco fica em <banco>.manutencao; com
+    vários workers, só quem pega a trava desse arquivo roda a manutenção.
+    """
+
+    def __init__(self, bancos, intervalo, completa, checkpoint=lambda: 'TRUNCATE',
+                 paginas=PAGINAS_POR_PASSO, pausa=PAUSA_PADRAO, log=print):
+        self.bancos = bancos  # função que retorna os caminhos (shards podem surgir depois)
+        self.intervalo = intervalo
+        self.completa = completa
+        self.checkpoint = checkpoint  # função: o modo depende da réplica estar ligada
+        self.paginas = paginas
+        self.pausa = pausa
+        self.log = log
+        self.pid = os.getpid()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="manutencao", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+    def rodar_uma_vez(self, agora=None):
+        agora = agora or time.time()
+        feitas = {}
+        for caminho in self.bancos():
+            if not os.path.exists(caminho):
+                continue
+            with open(caminho + ".manutencao", "a+") as arquivo:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue
+                ultimas = _ler_ultimas(arquivo)
+                if agora - ultimas.get('completa', 0) >= self.completa:
+                    tipo, tarefas = 'completa', TAREFAS
+                elif agora - ultimas.get('leve', 0) >= self.intervalo:
+                    tipo, tarefas = 'leve', LEVES
+                else:
+                    continue
+                try:
+                    feitas[caminho] = executar(caminho, tarefas, self.checkpoint(), self.paginas, self.pausa)
+                finally:
+                    # Mesmo com erro: sem isso um banco com problema seria verificado em laço
+                    ultimas['leve'] = agora
+                    if tipo == 'completa':
+                        ultimas['completa'] = agora
+                    arquivo.seek(0)
+                    arquivo.truncate()
+                    arquivo.write(json.dumps(ultimas))
+        return feitas
+
+    def _loop(self):
+        try:
+            # Prioridade baixa para a CPU; no Linux o nice vale por thread
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), NICE)
+        except (AttributeError, OSError):
+            pass
+        while not self._parar.is_set():
+            try:
+                for caminho, feitas in self.rodar_uma_vez().items():
+                    for feita in feitas:
+                        self.log("Manutenção " + descrever(caminho, feita))
+            except Exception as e:
+                self.log(f"Erro na manutenção: {e}")
+            self._parar.wait(min(self.intervalo, 600))
+
+
+def modo_de_checkpoint(app):
+    return 'PASSIVE' if app.config.get('REPLICA_DIR') else 'TRUNCATE'
+
+
+_agendador = None
+_agendador_lock = threading.Lock()
+
+
+def init_app(app, bancos):
+    """Configura a manutenção; com MANUTENCAO_INTERVALO_H > 0 o agendador sobe na primeira requisição."""
+    app.config.setdefault('MANUTENCAO_INTERVALO_H',
+                          float(os.environ.get('MANUTENCAO_INTERVALO_H', INTERVALO_H_PADRAO)))
+    app.config.setdefault('MANUTENCAO_COMPLETA_H',
+                          float(os.environ.get('MANUTENCAO_COMPLETA_H', COMPLETA_H_PADRAO)))
+    app.config.setdefault('MANUTENCAO_PAGINAS',
+                          int(os.environ.get('MANUTENCAO_PAGINAS', PAGINAS_POR_PASSO)))
+
+    @app.before_request
+    def _iniciar_agendador():
+        global _agendador
+        intervalo = app.config['MANUTENCAO_INTERVALO_H'] * 3600
+        if intervalo <= 0 or (_agendador is not None and _agendador.pid == os.getpid()):
+            return
+        with _agendador_lock:
+            if _agendador is None or _agendador.pid != os.getpid():
+                _agendador = Agendador(lambda: bancos(app), intervalo,
+                                       max(app.config['MANUTENCAO_COMPLETA_H'] * 3600, intervalo),
+                                       lambda: modo_de_checkpoint(app),
+                                       app.config['MANUTENCAO_PAGINAS']).iniciar()
+
@@ -0,0 +1,131 @@
+# functions/migrations.py
+# Migrações numeradas do banco (database/migrations/NNNN_nome.sql|.py).
+#
+# A versão aplicada fica em PRAGMA user_version. Em um banco atualizado a
+# inicialização custa só essa leitura; migrações pendentes rodam em ordem,
+# cada uma na sua própria transação junto com o novo user_version.
+#
+# - .sql: comandos sem BEGIN/COMMIT próprios (o executor abre a transação)
+# - .py:  módulo com upgrade(conn, log); não deve usar executescript nem commit.
+#          Mensagens para o operador vão por log (o mesmo de aplicar_migracoes)
+import importlib.util
+import os
+import re
+import sqlite3
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS_DIR = os.path.join(BASE, "database", "migrations")
+
+_NOME_ARQUIVO = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+
+
+def listar_migracoes(diretorio=MIGRATIONS_DIR):
+    """Lista (versao, nome, caminho) ordenada por versão."""
+    migracoes = []
+    for arquivo in os.listdir(diretorio):
+        m = _NOME_ARQUIVO.match(arquivo)
+        if m:
+            migracoes.append((int(m.group(1)), m.group(2), os.path.join(diretorio, arquivo)))
+    migracoes.sort()
+    versoes = [v for v, _, _ in migracoes]
+    if len(versoes) != len(set(versoes)):
+        raise RuntimeError(f"Migrações com número repetido em {diretorio}")
+    return migracoes
+
+
+def versao_atual(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _contar_indices(conn):
+    return conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index'").fetchone()[0]
+
+
+def _comandos(sql):
+    """Divide um script em comandos completos (respeita strings e triggers)."""
+    atual = ""
+    for parte in sql.split(";"):
+        atual += parte + ";"
+        if sqlite3.complete_statement(atual):
+            yield atual
+            atual = ""
+
+
+def _auto_vacuum_incremental(conn):
+    """Banco vazio: liga o auto_vacuum incremental (ver functions/manutencao.py)."""
+    # Só vale antes da primeira tabela; se o arquivo já foi criado em WAL,
+    # é o VACUUM do banco vazio que aplica a mudança
+    if conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]:
+        return
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("VACUUM")
+
+
+def _executar_migracao(conn, caminho, log):
+    if caminho.endswith(".sql"):
+        with open(caminho, "r", encoding="utf-8") as f:
+            sql = f.read()
+        for comando in _comandos(sql):
+            conn.execute(comando)
+        return
+    spec = importlib.util.spec_from_file_location(os.path.basename(caminho)[:-3], caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    modulo.upgrade(conn, log)
+
+
+def aplicar_migracoes(conn, diretorio=MIGRATIONS_DIR, log=print):
+    """Aplica as migrações pendentes em `conn`. Retorna as versões aplicadas."""
+    migracoes = listar_migracoes(diretorio)
+    if not migracoes or versao_atual(conn) >= migracoes[-1][0]:
+        return []
+
+    isolation_anterior = conn.isolation_level
+    conn.isolation_level = None  # controle manual das transações
+    # Tabelas recriadas (ex.: 0014) não podem apagar as filhas em cascata no DROP
+    chaves_estrangeiras = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF")
+    aplicadas = []
+    indices_antes = _contar_indices(conn)
+    try:
+        if versao_atual(conn) == 0:
+            _auto_vacuum_incremental(conn)
+        for versao, nome, caminho in migracoes:
+            if versao <= versao_atual(conn):
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Outro worker pode ter aplicado enquanto esperávamos o lock
+                if versao <= versao_atual(conn):
+                    conn.execute("ROLLBACK")
+                    continue
+                _executar_migracao(conn, caminho, log)
+                conn.execute(f"PRAGMA user_version = {versao}")
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            aplicadas.append(versao)
+            log(f"Migração {versao:04d}_{nome} aplicada.")
+
+        if aplicadas:
+            # Estatísticas para o planejador depois de criar índices
+            if _contar_indices(conn) != indices_antes:
+                conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {int(chaves_estrangeiras)}")
+        conn.isolation_level = isolation_anterior
+    return aplicadas
+
+
+def migrar(path, diretorio=MIGRATIONS_DIR, log=print):
+    """Abre `path`, aplica as migrações pendentes e fecha a conexão."""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        return aplicar_migracoes(conn, diretorio, log)
+    finally:
+        conn.close()
@@ -0,0 +1,428 @@
+# functions/replica.py
+# Réplica contínua dos bancos por cópia do WAL, no estilo do Litestream.
+#
+# A pasta REPLICA_DIR faz o papel do armazenamento remoto:
+#
+#   <pasta>/<banco>/<geração>/snapshot.db
+#   <pasta>/<banco>/<geração>/wal/<índice>-<posição>-<ms>.wal
+#
+# Uma geração começa com um snapshot (API de backup) e segue com trechos do
+# WAL copiados byte a byte: o <índice> conta os reinícios do WAL dentro da
+# geração, a <posição> é o offset do trecho no arquivo -wal e <ms> é quando
+# foi copiado (usado na restauração até um instante).
+#
+# Para nenhum frame se perder, o WAL só pode recomeçar depois de copiado. O
+# replicador mantém uma transação de leitura aberta o tempo todo, o que
+# impede o reinício do WAL pelos checkpoints automáticos, e faz ele mesmo o
+# checkpoint: trava a escrita (BEGIN IMMEDIATE), copia o que falta, solta a
+# leitura, roda o checkpoint e libera a escrita. Só são copiados frames já
+# confirmados: o limite (mxFrame) vem do cabeçalho do índice do WAL no -shm.
+# Se o WAL recomeçar sem passar por esse caminho (ex.: outro processo com o
+# replicador parado), a cópia não é mais contínua e começa uma geração nova.
+import glob
+import os
+import shutil
+import sqlite3
+import struct
+import time
+
+from functions import backup, db
+
+try:
+    # Com eventlet.monkey_patch() o replicador precisa de uma thread do sistema
+    from eventlet.patcher import original
+    threading = original('threading')
+except ImportError:
+    import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+INTERVALO_PADRAO = 1.0         # segundos entre cópias do WAL
+CHECKPOINT_PAGINAS_PADRAO = 1000
+CHECKPOINT_S_PADRAO = 60
+SNAPSHOT_H_PADRAO = 24         # geração nova (snapshot) a cada N horas
+GERACOES_PADRAO = 2            # gerações mantidas por banco
+
+CABECALHO_WAL = 32
+CABECALHO_FRAME = 24
+VERSAO_WAL_INDEX = 3007000
+
+
+class ErroDeReplica(Exception):
+    pass
+
+
+def _agora_ms():
+    return int(time.time() * 1000)
+
+
+def _nome_base(caminho):
+    return os.path.splitext(os.path.basename(caminho))[0]
+
+
+def _ler(caminho, inicio, fim):
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        return arquivo.read(fim - inicio)
+
+
+def _gravar_atomico(caminho, dados):
+    parcial = caminho + ".parcial"
+    with open(parcial, 'wb') as arquivo:
+        arquivo.write(dados)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(parcial, caminho)
+
+
+def estado_do_wal(caminho):
+    """Cabeçalho do WAL + frames confirmados, ou None se não há o que copiar.
+
+    Retorna {'pagina', 'checkpoints', 'sal', 'fim'}: 'fim' é o offset logo
+    depois do último frame confirmado (mxFrame do -shm). None também quando
+    o -shm está sendo atualizado ou não corresponde ao WAL (tentar de novo).
+    """
+    try:
+        cabecalho = _ler(caminho + "-wal", 0, CABECALHO_WAL)
+        indice = _ler(caminho + "-shm", 0, 96)
+    except FileNotFoundError:
+        return None
+    if len(cabecalho) < CABECALHO_WAL or len(indice) < 96 or indice[:48] != indice[48:96]:
+        return None
+    versao, _, _, iniciado, _, _, mx_frame = struct.unpack('=IIIBBHI', indice[:20])
+    if versao != VERSAO_WAL_INDEX or not iniciado or indice[32:40] != cabecalho[16:24]:
+        return None
+    pagina, checkpoints = struct.unpack('>II', cabecalho[8:16])
+    return {
+        'pagina': pagina,
+        'checkpoints': checkpoints,
+        'sal': cabecalho[16:24],
+        'fim': CABECALHO_WAL + mx_frame * (CABECALHO_FRAME + pagina) if mx_frame else 0,
+    }
+
+
+# ------------------------------------------------------------------
+# Leitura da réplica
+# ------------------------------------------------------------------
+
+def geracoes(pasta, banco):
+    """Gerações do banco (nome base, ex.: 'atas'), mais antiga primeiro: [(ms, caminho)]."""
+    lista = []
+    for caminho in glob.glob(os.path.join(pasta, banco, "*", "snapshot.db")):
+        nome = os.path.basename(os.path.dirname(caminho))
+        if nome.isdigit():
+            lista.append((int(nome), os.path.dirname(caminho)))
+    return sorted(lista)
+
+
+def segmentos(geracao):
+    """Trechos do WAL da geração em ordem: [(índice, posição, ms, caminho)]."""
+    lista = []
+    for caminho in glob.glob(os.path.join(geracao, "wal", "*.wal")):
+        partes = os.path.basename(caminho)[:-4].split("-")
+        if len(partes) == 3 and all(p.isdigit() for p in partes):
+            lista.append((int(partes[0]), int(partes[1]), int(partes[2]), caminho))
+    return sorted(lista)
+
+
+def restaurar(pasta, banco, destino, ate_ms=None):
+    """Reconstrói o banco `banco` da réplica em `destino` (que não pode existir).
+
+    Com `ate_ms`, para no último trecho copiado até esse instante (epoch em
+    ms). Retorna {'geracao', 'segmentos', 'ate', 'segundos'}.
+    """
+    inicio = time.perf_counter()
+    if os.path.exists(destino):
+        raise ErroDeReplica(f"{destino} já existe")
+    candidatas = [g for g in geracoes(pasta, banco) if ate_ms is None or g[0] <= ate_ms]
+    if not candidatas:
+        raise ErroDeReplica(f"nenhuma geração de {banco} em {pasta}" + (" até esse instante" if ate_ms else ""))
+    criada_em, geracao = candidatas[-1]
+
+    parcial = destino + ".restaurando"
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(parcial + sufixo):
+            os.remove(parcial + sufixo)
+    shutil.copyfile(os.path.join(geracao, "snapshot.db"), parcial)
+
+    aplicados, ultimo = 0, criada_em
+    por_indice = {}
+    for indice, posicao, ms, caminho in segmentos(geracao):
+        if ate_ms is None or ms <= ate_ms:
+            por_indice.setdefault(indice, []).append((posicao, ms, caminho))
+    for indice in range(len(por_indice)):
+        if indice not in por_indice:
+            break  # buraco na sequência: o que vem depois não se aplica
+        # Cada índice é um WAL desde o cabeçalho; a recuperação do SQLite
+        # aplica os frames confirmados e o checkpoint os grava no banco
+        partes, esperado = [], 0
+        for posicao, ms, caminho in por_indice[indice]:
+            if posicao != esperado:
+                break
+            with open(caminho, 'rb') as arquivo:
+                partes.append(arquivo.read())
+            esperado += len(partes[-1])
+            aplicados, ultimo = aplicados + 1, ms
+        if partes:
+            with open(parcial + "-wal", 'wb') as arquivo:
+                arquivo.writelines(partes)
+            conn = sqlite3.connect(parcial)
+            try:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            finally:
+                conn.close()
+        if len(partes) < len(por_indice[indice]):
+            break
+
+    problemas = backup.verificar(parcial)
+    if problemas != ['ok']:
+        raise ErroDeReplica(f"banco restaurado não passou no integrity_check: {problemas[:5]}")
+    for sufixo in ("-wal", "-shm"):
+        if os.path.exists(parcial + sufixo):
+            os.remove(parcial + sufixo)
+    os.replace(parcial, destino)
+    return {'geracao': criada_em, 'segmentos': aplicados, 'ate': ultimo,
+            'segundos': time.perf_counter() - inicio}
+
+
+# ------------------------------------------------------------------
+# Replicação
+# ------------------------------------------------------------------
+
+class Replicador:
+    """Copia o WAL de um banco para a réplica (um por banco, sempre na mesma thread)."""
+
+    def __init__(self, caminho, pasta, checkpoint_paginas=CHECKPOINT_PAGINAS_PADRAO,
+                 checkpoint_s=CHECKPOINT_S_PADRAO, snapshot_s=SNAPSHOT_H_PADRAO * 3600,
+                 manter=GERACOES_PADRAO):
+        self.caminho = caminho
+        self.pasta = os.path.join(pasta, _nome_base(caminho))
+        self.checkpoint_paginas = checkpoint_paginas
+        self.checkpoint_s = checkpoint_s
+        self.snapshot_s = snapshot_s
+        self.manter = manter
+        self.leitor = None
+        self.geracao = None
+        self.criada_em = 0
+        self.indice = 0
+        self.posicao = 0
+        self.sal = None
+        self.checkpoints = None
+        self.pagina = None
+        self.reinicio_esperado = False
+        self.ultimo_checkpoint = time.monotonic()
+
+    # Transação de leitura que segura o WAL
+    def _segurar(self):
+        if self.leitor is None:
+            self.leitor = db.connect(self.caminho, {'busy_timeout': 5000, 'journal_mode': 'WAL'})
+            self.leitor.isolation_level = None
+        if not self.leitor.in_transaction:
+            self.leitor.execute("BEGIN")
+            self.leitor.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+    def _soltar(self):
+        if self.leitor is not None and self.leitor.in_transaction:
+            self.leitor.execute("COMMIT")
+
+    def fechar(self):
+        if self.leitor is not None:
+            self._soltar()
+            self.leitor.close()
+            self.leitor = None
+
+    def nova_geracao(self):
+        """Snapshot do banco no ponto da leitura aberta; o WAL passa a ser copiado do início."""
+        self._segurar()
+        self.criada_em = _agora_ms()
+        geracao = os.path.join(self.pasta, f"{self.criada_em:013d}")
+        os.makedirs(os.path.join(geracao, "wal"), exist_ok=True)
+        parcial = os.path.join(geracao, "snapshot.db.parcial")
+        alvo = sqlite3.connect(parcial)
+        try:
+            self.leitor.backup(alvo, pages=backup.PAGINAS_POR_PASSO)
+        finally:
+            alvo.close()
+        os.replace(parcial, os.path.join(geracao, "snapshot.db"))
+        self.geracao, self.indice, self.posicao = geracao, 0, 0
+        self.sal = self.checkpoints = None
+        self.reinicio_esperado = False
+        self._podar()
+
+    def _podar(self):
+        for _, antiga in geracoes(os.path.dirname(self.pasta), _nome_base(self.caminho))[:-max(self.manter, 1)]:
+            shutil.rmtree(antiga, ignore_errors=True)
+
+    def sincronizar(self):
+        """Copia os frames confirmados desde a última cópia. Retorna os bytes copiados."""
+        if self.geracao is None:
+            self.nova_geracao()
+        wal = estado_do_wal(self.caminho)
+        if wal is None or not wal['fim']:
+            return 0
+        if wal['sal'] != self.sal:
+            if self.sal is None and self.posicao == 0 and (
+                    self.checkpoints is None or wal['checkpoints'] == self.checkpoints + 1):
+                pass  # primeiro cabeçalho do índice
+            elif self.reinicio_esperado and wal['checkpoints'] == self.checkpoints + 1:
+                # WAL recomeçou depois do nosso checkpoint: tudo já foi copiado
+                self.indice, self.posicao = self.indice + 1, 0
+            else:
+                self.nova_geracao()
+                return self.sincronizar()
+            self.sal, self.checkpoints, self.pagina = wal['sal'], wal['checkpoints'], wal['pagina']
+            self.reinicio_esperado = False
+        if wal['fim'] <= self.posicao:
+            return 0
+        dados = _ler(self.caminho + "-wal", self.posicao, wal['fim'])
+        nome = f"{self.indice:06d}-{self.posicao:012d}-{_agora_ms():013d}.wal"
+        _gravar_atomico(os.path.join(self.geracao, "wal", nome), dados)
+        self.posicao = wal['fim']
+        self.reinicio_esperado = False
+        return len(dados)
+
+    def checkpoint(self):
+        """Copia o que falta e faz o checkpoint com a escrita travada. True se completo."""
+        trava = db.connect(self.caminho, {'busy_timeout': 5000})
+        trava.isolation_level = None
+        try:
+            trava.execute("BEGIN IMMEDIATE")
+            try:
+                self.sincronizar()
+                self._soltar()
+                # Na conexão de leitura, já sem transação (a `trava` está no meio de uma)
+                ocupado, frames, copiados = self.leitor.execute("PRAGMA main.wal_checkpoint(PASSIVE)").fetchone()
+            finally:
+                trava.execute("COMMIT")
+        finally:
+            trava.close()
+            self._segurar()
+            self.ultimo_checkpoint = time.monotonic()
+        # Checkpoint completo: o próximo escritor recomeça o WAL, e isso é esperado
+        self.reinicio_esperado = not ocupado and frames == copiados and self.sal is not None
+        return self.reinicio_esperado
+
+    def passo(self):
+        """Uma rodada: copia o WAL e, se for a hora, faz checkpoint ou começa outra geração."""
+        self._segurar()
+        copiados = self.sincronizar()
+        if self.snapshot_s and _agora_ms() - self.criada_em >= self.snapshot_s * 1000:
+            self.nova_geracao()
+        elif self.pagina and self.posicao > CABECALHO_WAL:
+            paginas = (self.posicao - CABECALHO_WAL) // (CABECALHO_FRAME + self.pagina)
+            if paginas >= self.checkpoint_paginas or time.monotonic() - self.ultimo_checkpoint >= self.checkpoint_s:
+                self.checkpoint()
+        return copiados
+
+
+class Replicacao:
+    """Thread que replica todos os bancos a cada `intervalo` segundos.
+
+    Com vários workers, só quem segura a trava da pasta replica; os outros
+    tentam de novo de tempos em tempos (assumem se aquele processo morrer).
+    """
+
+    def __init__(self, bancos, pasta, intervalo=INTERVALO_PADRAO, log=print, **opcoes):
+        self.bancos = bancos  # função que retorna os caminhos (shards podem surgir depois)
+        self.pasta = pasta
+        self.intervalo = intervalo
+        self.log = log
+        self.opcoes = opcoes
+        self.pid = os.getpid()
+        self.replicadores = {}
+        self._trava = None
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="replica", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join()
+
+    def esperar(self, segundos=None):
+        """Espera a thread até `segundos`; True se ela continua rodando."""
+        self._thread.join(segundos)
+        return self._thread.is_alive()
+
+    def _travar(self):
+        if self._trava is not None:
+            return True
+        os.makedirs(self.pasta, exist_ok=True)
+        trava = open(os.path.join(self.pasta, ".trava"), "w")
+        if fcntl is not None:
+            try:
+                fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                trava.close()
+                return False
+        self._trava = trava
+        return True
+
+    def rodar_uma_vez(self):
+        if not self._travar():
+            return None
+        copiados = 0
+        for caminho in self.bancos():
+            replicador = self.replicadores.get(caminho)
+            if replicador is None:
+                replicador = self.replicadores[caminho] = Replicador(caminho, self.pasta, **self.opcoes)
+            copiados += replicador.passo()
+        return copiados
+
+    def _loop(self):
+        try:
+            while not self._parar.is_set():
+                try:
+                    self.rodar_uma_vez()
+                except Exception as e:
+                    self.log(f"Erro na replicação: {e}")
+                self._parar.wait(self.intervalo)
+        finally:
+            for replicador in self.replicadores.values():
+                replicador.fechar()
+            if self._trava is not None:
+                self._trava.close()
+
+
+_replicacao = None
+_replicacao_lock = threading.Lock()
+
+
+def opcoes_configuradas(app):
+    return {
+        'checkpoint_paginas': app.config['REPLICA_CHECKPOINT_PAGINAS'],
+        'checkpoint_s': app.config['REPLICA_CHECKPOINT_S'],
+        'snapshot_s': app.config['REPLICA_SNAPSHOT_H'] * 3600,
+        'manter': app.config['REPLICA_GERACOES'],
+    }
+
+
+def init_app(app, bancos):
+    """Configura a réplica; com REPLICA_DIR ela sobe na primeira requisição.
+
+    Comandos de CLI importam a aplicação mas não recebem requisições, então
+    não iniciam a replicação (para isso há `flask --app app replicar`).
+    """
+    app.config.setdefault('REPLICA_DIR', os.environ.get('REPLICA_DIR', ''))
+    app.config.setdefault('REPLICA_INTERVALO_S', float(os.environ.get('REPLICA_INTERVALO_S', INTERVALO_PADRAO)))
+    app.config.setdefault('REPLICA_CHECKPOINT_PAGINAS',
+                          int(os.environ.get('REPLICA_CHECKPOINT_PAGINAS', CHECKPOINT_PAGINAS_PADRAO)))
+    app.config.setdefault('REPLICA_CHECKPOINT_S', float(os.environ.get('REPLICA_CHECKPOINT_S', CHECKPOINT_S_PADRAO)))
+    app.config.setdefault('REPLICA_SNAPSHOT_H', float(os.environ.get('REPLICA_SNAPSHOT_H', SNAPSHOT_H_PADRAO)))
+    app.config.setdefault('REPLICA_GERACOES', int(os.environ.get('REPLICA_GERACOES', GERACOES_PADRAO)))
+
+    @app.before_request
+    def _iniciar_replicacao():
+        global _replicacao
+        if not app.config['REPLICA_DIR'] or (_replicacao is not None and _replicacao.pid == os.getpid()):
+            return
+        with _replicacao_lock:
+            if _replicacao is None or _replicacao.pid != os.getpid():
+                _replicacao = Replicacao(lambda: bancos(app), app.config['REPLICA_DIR'],
+                                         app.config['REPLICA_INTERVALO_S'], **opcoes_configuradas(app)).iniciar()
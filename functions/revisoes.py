@@ -0,0 +1,194 @@
+# functions/revisoes.py
+# Histórico de revisões das atas (tabela ata_revisoes, migração 0013).
+#
+# Cada revisão guarda o documento da ata (tipo, data, status e os campos do
+# formulário) de um de dois jeitos: snapshot completo a cada SNAPSHOT_A_CADA
+# revisões (1, N+1, 2N+1, ...) e, entre eles, só a diferença JSON para a
+# revisão anterior. Ler qualquer revisão custa no máximo um snapshot e N-1
+# diferenças. Tudo é comprimido com zlib usando um dicionário fixo com os
+# nomes dos campos, o que deixa as diferenças pequenas com poucos bytes.
+#
+# Salvamentos seguidos do mesmo usuário dentro de `janela` segundos (ex.:
+# autosave) atualizam a última diferença em vez de criar outra, e salvar sem
+# mudar nada não gera revisão. Excluir a ata não apaga o histórico: a última
+# revisão fica registrada como 'excluida' e pode ser restaurada.
+import json
+import zlib
+
+from functions.ata_repository import AtaRepository
+from functions.importacao import CAMPOS_BATISMO, CAMPOS_SACRAMENTAL, LISTAS_BATISMO, LISTAS_SACRAMENTAL
+
+SNAPSHOT_A_CADA = 20
+JANELA_PADRAO = 60  # segundos
+
+# Formato 1: JSON compacto + zlib com o dicionário abaixo. Nunca alterar o
+# dicionário de um formato existente: revisões gravadas dependem dele.
+FORMATO = 1
+_DICIONARIOS = {
+    1: ('{"s":{"anuncios":[],"apoio_membros":"","apoios":"","bencao_criancas":"",'
+        '"confirmacoes_batismo":"","data":"","dedicado":"","desobrigacoes":"","dirigido":"",'
+        '"discursantes":[],"hino_abertura":"","hino_encerramento":"","hino_intermediario":"",'
+        '"hino_sacramental":"","oracao_abertura":"","oracao_encerramento":"","pianista":"",'
+        '"presidido":"","batizados":[],"reconhecemos_presenca":"","recepcionistas":"",'
+        '"regente_musica":"","status":"pendente","tema":"","testemunha1":"","testemunha2":"",'
+        '"tipo":"sacramental","ultimo_discursante":""},"d":[]}').encode('utf-8'),
+}
+
+
+def documento(tipo, data, status, detalhes):
+    """Documento versionado de uma ata: campos da ata + campos do formulário."""
+    campos, listas = ((CAMPOS_SACRAMENTAL, LISTAS_SACRAMENTAL) if tipo == 'sacramental'
+                      else (CAMPOS_BATISMO, LISTAS_BATISMO))
+    doc = {'tipo': tipo, 'data': data, 'status': status or 'pendente'}
+    doc.update({c: detalhes.get(c) or '' for c in campos})
+    doc.update({c: list(detalhes.get(c) or []) for c in listas})
+    return doc
+
+
+def documento_da_ata(conn, ata_id, ala_id=None):
+    ata = AtaRepository(conn).load(ata_id, ala_id)
+    if ata is None:
+        return None
+    return documento(ata.tipo, ata.data, ata.status, ata.detalhes_dict())
+
+
+# ------------------------------------------------------------------
+# Codificação
+# ------------------------------------------------------------------
+
+def _comprimir(obj):
+    texto = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, _DICIONARIOS[FORMATO])
+    return compressor.compress(texto) + compressor.flush()
+
+
+def _descomprimir(dados, formato):
+    descompressor = zlib.decompressobj(-15, _DICIONARIOS[formato])
+    return json.loads(descompressor.decompress(dados) + descompressor.flush())
+
+
+def diferenca(antes, depois):
+    """{'s': campos novos/alterados, 'd': campos removidos} de `antes` para `depois`."""
+    delta = {}
+    alterados = {k: v for k, v in depois.items() if antes.get(k, object()) != v}
+    removidos = sorted(k for k in antes if k not in depois)
+    if alterados:
+        delta['s'] = alterados
+    if removidos:
+        delta['d'] = removidos
+    return delta
+
+
+def aplicar(doc, delta):
+    doc = dict(doc)
+    for chave in delta.get('d', ()):
+        doc.pop(chave, None)
+    doc.update(delta.get('s', {}))
+    return doc
+
+
+# ------------------------------------------------------------------
+# Leitura
+# ------------------------------------------------------------------
+
+def listar(conn, ata_id, ala_id):
+    """Revisões da ata (mais recente primeiro), sem o conteúdo."""
+    return [dict(row) for row in conn.execute("""
+        SELECT revisao, evento, origem, usuario, ts, snapshot, length(dados) AS bytes
+        FROM ata_revisoes WHERE ata_id = ? AND ala_id = ?
+        ORDER BY revisao DESC
+    """, (ata_id, ala_id))]
+
+
+def reconstruir(conn, ata_id, revisao, ala_id=None):
+    """Documento da ata na `revisao` (None se não existe ou é de outra ala)."""
+    filtro, params = ("AND ala_id = ?", (ala_id,)) if ala_id is not None else ("", ())
+    rows = conn.execute(f"""
+        SELECT revisao, snapshot, formato, dados FROM ata_revisoes
+        WHERE ata_id = ? {filtro} AND revisao <= ? AND revisao >= (
+            SELECT MAX(revisao) FROM ata_revisoes WHERE ata_id = ? AND snapshot = 1 AND revisao <= ?)
+        ORDER BY revisao
+    """, (ata_id,) + params + (revisao, ata_id, revisao)).fetchall()
+    if not rows or rows[-1]['revisao'] != revisao:
+        return None
+    doc = {}
+    for row in rows:
+        conteudo = _descomprimir(row['dados'], row['formato'])
+        doc = conteudo if row['snapshot'] else aplicar(doc, conteudo)
+    return doc
+
+
+def _ultima(conn, ata_id):
+    return conn.execute("""
+        SELECT revisao, snapshot, evento, usuario,
+               (julianday('now') - julianday(ts)) * 86400 AS idade
+        FROM ata_revisoes WHERE ata_id = ? ORDER BY revisao DESC LIMIT 1
+    """, (ata_id,)).fetchone()
+
+
+# ------------------------------------------------------------------
+# Gravação (dentro da transação do save/exclusão)
+# ------------------------------------------------------------------
+
+def _inserir(conn, ata_id, ala_id, revisao, doc, anterior, evento, usuario, origem, snapshot_a_cada):
+    snapshot = anterior is None or (revisao - 1) % snapshot_a_cada == 0
+    conteudo = doc if snapshot else diferenca(anterior, doc)
+    conn.execute("""
+        INSERT INTO ata_revisoes (ata_id, revisao, ala_id, snapshot, formato, dados, evento, origem, usuario)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (ata_id, revisao, ala_id, int(snapshot), FORMATO, _comprimir(conteudo), evento, origem, usuario))
+    return revisao
+
+
+def garantir_original(conn, ata_id, ala_id, usuario=None):
+    """Antes da primeira revisão de uma ata já existente, guarda o estado atual."""
+    if _ultima(conn, ata_id) is None:
+        doc = documento_da_ata(conn, ata_id, ala_id)
+        if doc is not None:
+            _inserir(conn, ata_id, ala_id, 1, doc, None, 'original', usuario, None, SNAPSHOT_A_CADA)
+
+
+def garantir_originais(conn, docs, ala_id, usuario=None):
+    """garantir_original() de várias atas, com os documentos já montados ({ata_id: doc})."""
+    com_historico = {row[0] for row in conn.execute(
+        "SELECT DISTINCT ata_id FROM ata_revisoes WHERE ata_id IN (SELECT value FROM json_each(?))",
+        (json.dumps([int(i) for i in docs]),))}
+    for ata_id, doc in docs.items():
+        if ata_id not in com_historico:
+            _inserir(conn, ata_id, ala_id, 1, doc, None, 'original', usuario, None, SNAPSHOT_A_CADA)
+
+
+def registrar(conn, ata_id, ala_id, doc, evento='salva', usuario=None, origem=None,
+              snapshot_a_cada=SNAPSHOT_A_CADA, janela=JANELA_PADRAO):
+    """Registra `doc` como nova revisão da ata. Retorna o número da revisão.
+
+    Retorna None quando um salvamento não muda nada.
+    """
+    ultima = _ultima(conn, ata_id)
+    if ultima is None:
+        return _inserir(conn, ata_id, ala_id, 1, doc, None, evento, usuario, origem, snapshot_a_cada)
+    anterior = reconstruir(conn, ata_id, ultima['revisao'])
+    if evento == 'salva' and doc == anterior:
+        return None
+
+    # Autosave: o mesmo usuário salvando de novo logo em seguida reescreve a última diferença
+    if (evento == 'salva' and ultima['evento'] == 'salva' and not ultima['snapshot']
+            and ultima['usuario'] == usuario and janela and ultima['idade'] < janela):
+        base = reconstruir(conn, ata_id, ultima['revisao'] - 1)
+        conn.execute("""
+            UPDATE ata_revisoes SET dados = ?, formato = ?, ts = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            WHERE ata_id = ? AND revisao = ?
+        """, (_comprimir(diferenca(base, doc)), FORMATO, ata_id, ultima['revisao']))
+        return ultima['revisao']
+
+    return _inserir(conn, ata_id, ala_id, ultima['revisao'] + 1, doc, anterior, evento, usuario,
+                    origem, snapshot_a_cada)
+
+
+def registrar_exclusao(conn, ata_id, ala_id, usuario=None, snapshot_a_cada=SNAPSHOT_A_CADA):
+    """Chamar antes de apagar a ata: a última revisão fica sendo o estado excluído."""
+    doc = documento_da_ata(conn, ata_id, ala_id)
+    if doc is None:
+        return None
+    garantir_original(conn, ata_id, ala_id, usuario)
+    return registrar(conn, ata_id, ala_id, doc, 'excluida', usuario, snapshot_a_cada=snapshot_a_cada)
@@ -0,0 +1,269 @@
+# functions/tenants.py
+# Roteamento de bancos por estaca (sharding).
+#
+# Com SHARDS_DIR configurado, cada estaca tem o seu arquivo SQLite
+# (SHARDS_DIR/estaca_<id>.db) com as atas das suas alas, e o banco de
+# DATABASE vira o catálogo: users, estacas e unidades (que diz a estaca de
+# cada ala). Assim cada estaca tem o seu próprio lock de escrita.
+#
+# O caminho é user_id -> unidades.estaca_id -> arquivo da estaca; a estaca
+# fica em session['estaca_id'] a partir do login. Sem SHARDS_DIR tudo
+# continua em um único banco e get_db() == get_catalogo().
+#
+# Os shards têm o esquema completo (mesmas migrações). users/estacas/unidades
+# são copiados para o shard só como referência; quem vale é o catálogo.
+import glob
+import json
+import os
+import threading
+
+from flask import current_app, has_request_context, session
+
+from functions import ala_stats, arquivo_morto, db, migrations
+
+ESTACA_PADRAO = 1  # mesmo DEFAULT de unidades.estaca_id
+
+TABELAS_CATALOGO = ('users', 'estacas', 'unidades')
+
+_preparados = set()
+_preparados_lock = threading.Lock()
+
+
+def init_app(app):
+    app.config.setdefault('SHARDS_DIR', os.environ.get('SHARDS_DIR', ''))
+
+
+def sharding_ativo(app=None):
+    return bool((app or current_app).config.get('SHARDS_DIR'))
+
+
+def caminho_da_estaca(estaca_id, app=None):
+    return os.path.join((app or current_app).config['SHARDS_DIR'], f"estaca_{int(estaca_id)}.db")
+
+
+def bancos(app=None):
+    """Catálogo + shards existentes (para comandos que rodam em todos os bancos)."""
+    app = app or current_app
+    caminhos = [app.config['DATABASE']]
+    if sharding_ativo(app):
+        caminhos += sorted(glob.glob(os.path.join(app.config['SHARDS_DIR'], "estaca_*.db")))
+    return caminhos
+
+
+def preparar(caminho, log=print):
+    """Cria/migra o banco de uma estaca na primeira vez que o processo o usa."""
+    if caminho in _preparados:
+        return caminho
+    with _preparados_lock:
+        if caminho not in _preparados:
+            os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+            migrations.migrar(caminho, log=log)
+            arquivo_morto.preparar(caminho)
+            _preparados.add(caminho)
+    return caminho
+
+
+def estaca_da_ala(conn_catalogo, ala_id):
+    row = conn_catalogo.execute(
+        "SELECT estaca_id FROM unidades WHERE ala_id = ?", (ala_id,)).fetchone()
+    return row['estaca_id'] if row and row['estaca_id'] else ESTACA_PADRAO
+
+
+def caminho_da_ala(ala_id, app=None):
+    """Banco onde ficam as atas da ala (fora de requisição, ex.: comandos CLI)."""
+    app = app or current_app
+    if not sharding_ativo(app):
+        return app.config['DATABASE']
+    conn = db.connect(app.config['DATABASE'])
+    try:
+        estaca_id = estaca_da_ala(conn, ala_id)
+    finally:
+        conn.close()
+    return preparar(caminho_da_estaca(estaca_id, app))
+
+
+def get_catalogo():
+    """Conexão da requisição com o catálogo (users, estacas, unidades)."""
+    return db.get_db(current_app.config['DATABASE'])
+
+
+def caminho_da_sessao():
+    """Banco da estaca do usuário logado; sem sharding, ou sem login, o catálogo."""
+    app = current_app
+    if not sharding_ativo(app) or not has_request_context() or 'user_id' not in session:
+        return app.config['DATABASE']
+    estaca_id = session.get('estaca_id')
+    if estaca_id is None:
+        estaca_id = session['estaca_id'] = estaca_da_ala(get_catalogo(), session['user_id'])
+    return preparar(caminho_da_estaca(estaca_id, app))
+
+
+def get_db():
+    """Conexão da requisição com o banco da estaca do usuário logado."""
+    return db.get_db(caminho_da_sessao())
+
+
+# ------------------------------------------------------------------
+# Divisão de um banco único em shards por estaca
+# ------------------------------------------------------------------
+
+def alas_por_estaca(conn):
+    """{estaca_id: [ala_id, ...]} de todos os usuários do catálogo."""
+    estacas = {}
+    for row in conn.execute("""
+        SELECT u.id, COALESCE(un.estaca_id, ?) AS estaca_id
+        FROM users u LEFT JOIN unidades un ON un.ala_id = u.id
+        ORDER BY u.id
+    """, (ESTACA_PADRAO,)):
+        estacas.setdefault(row['estaca_id'], []).append(row['id'])
+    return estacas
+
+
+def _tabelas(conn, esquema='main'):
+    """[(nome, colunas, virtual)] das tabelas de dados, atas primeiro.
+
+    Ficam de fora as internas do SQLite, as tabelas de apoio do FTS5 e
+    ala_stats (recalculada no destino).
+    """
+    rows = conn.execute(
+        f"SELECT name, sql FROM {esquema}.sqlite_master "
+        f"WHERE type = 'table' AND name NOT LIKE 'sqlite_%'").fetchall()
+    virtuais = {r['name'] for r in rows if r['sql'].upper().startswith('CREATE VIRTUAL')}
+    tabelas = []
+    for r in rows:
+        nome = r['name']
+        if nome == 'ala_stats' or any(nome.startswith(v + '_') for v in virtuais):
+            continue
+        colunas = [c['name'] for c in conn.execute(f'PRAGMA {esquema}.table_info("{nome}")')]
+        tabelas.append((nome, colunas, nome in virtuais))
+    ordem = {nome: i for i, nome in enumerate(TABELAS_CATALOGO + ('atas',))}
+    # changelog por último: copiar/apagar as outras dispara os triggers que escrevem nele
+    tabelas.sort(key=lambda t: (t[0] == 'changelog', ordem.get(t[0], len(ordem))))
+    return tabelas
+
+
+def _filtro(nome, colunas, virtual, esquema, incluir_padrao):
+    """WHERE que seleciona as linhas das alas em json_each(:alas)."""
+    alas = "(SELECT value FROM json_each(:alas))"
+    atas = f"(SELECT id FROM {esquema}.atas WHERE ala_id IN {alas})"
+    if nome == 'users':
+        return f"id IN {alas}"
+    if nome == 'estacas':
+        return "id = :estaca_id"
+    if 'ala_id' in colunas:
+        # ala_id = 0 são os modelos padrão (templates), copiados para todo shard
+        return f"(ala_id IN {alas} OR ala_id = 0)" if incluir_padrao else f"ala_id IN {alas}"
+    if 'ata_id' in colunas:
+        return f"ata_id IN {atas}"
+    if virtual:
+        return f"rowid IN {atas}"
+    return None  # tabela compartilhada (ex.: hinos_catalogo): copia tudo
+
+
+def _copiar_sequencias(conn):
+    """Leva ao shard os contadores AUTOINCREMENT da origem (sqlite_sequence).
+
+    Sem isso o contador de atas parava no maior id copiado, e o id de uma
+    ata apagada voltaria a ser usado: as revisões dela (ata_revisoes) se
+    misturariam com as da nova, e restaurar_revisao a recriaria por cima.
+    """
+    for row in conn.execute("""
+        SELECT s.name, s.seq FROM origem.sqlite_sequence s
+        WHERE s.name IN (SELECT name FROM main.sqlite_master WHERE type = 'table')
+    """).fetchall():
+        if not conn.execute("UPDATE main.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                            (row['seq'], row['name'])).rowcount:
+            conn.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)",
+                         (row['name'], row['seq']))
+
+
+def copiar_estaca(origem, destino, estaca_id, alas):
+    """Copia as linhas das `alas` do banco `origem` para o banco novo `destino`."""
+    conn = db.connect(preparar(destino, log=lambda _msg: None))
+    conn.isolation_level = None
+    parametros = {'alas': json.dumps(alas), 'estaca_id': estaca_id}
+    copiadas = {}
+    try:
+        conn.execute("ATTACH DATABASE ? AS origem", (origem,))
+        conn.execute("BEGIN IMMEDIATE")
+        # As tabelas vêm na ordem do sqlite_master, filhas às vezes antes de atas:
+        # as chaves estrangeiras são conferidas só no COMMIT
+        conn.execute("PRAGMA defer_foreign_keys = ON")
+        try:
+            tabelas_origem = {nome for nome, _, _ in _tabelas(conn, 'origem')}
+            for nome, colunas, virtual in _tabelas(conn):
+                # Linhas criadas pelas migrações (usuários, modelos padrão) dão lugar às da origem
+                conn.execute(f'DELETE FROM main."{nome}"')
+                if nome not in tabelas_origem:
+                    continue
+                filtro = _filtro(nome, colunas, virtual, 'origem', incluir_padrao=True)
+                lista = ', '.join(f'"{c}"' for c in (['rowid'] if virtual else []) + colunas)
+                sql = f'INSERT INTO main."{nome}" ({lista}) SELECT {lista} FROM origem."{nome}"'
+                cursor = conn.execute(sql + (f" WHERE {filtro}" if filtro else ""), parametros)
+                copiadas[nome] = cursor.rowcount
+            _copiar_sequencias(conn)
+            ala_stats.reconciliar(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        conn.execute("DETACH DATABASE origem")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return copiadas
+
+
+def remover_alas(caminho, alas):
+    """Apaga do banco `caminho` as linhas das `alas` (menos as do catálogo)."""
+    conn = db.connect(caminho)
+    parametros = {'alas': json.dumps(alas)}
+    try:
+        with conn:
+            tabelas = [t for t in _tabelas(conn) if t[0] not in TABELAS_CATALOGO]
+            tabelas.append(('ala_stats', ['ala_id'], False))
+            # Filhas de atas antes de atas (os filtros por ata_id dependem dela)
+            tabelas.sort(key=lambda t: (t[0] == 'changelog', t[0] == 'atas' or 'ala_id' in t[1]))
+            for nome, colunas, virtual in tabelas:
+                filtro = _filtro(nome, colunas, virtual, 'main', incluir_padrao=False)
+                if filtro:
+                    conn.execute(f'DELETE FROM "{nome}" WHERE {filtro}', parametros)
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def dividir(catalogo, pasta, remover_do_catalogo=False, log=print):
+    """Divide o banco `catalogo` em um arquivo por estaca dentro de `pasta`.
+
+    Os arquivos de destino não podem existir. Com `remover_do_catalogo`, as
+    atas copiadas saem do catálogo, que fica só com users/estacas/unidades.
+    Retorna {estaca_id: caminho}.
+    """
+    conn = db.connect(catalogo)
+    try:
+        estacas = alas_por_estaca(conn)
+        arquivadas = conn.execute(f"SELECT COUNT(*) FROM {arquivo_morto.ESQUEMA}.atas").fetchone()[0] \
+            if arquivo_morto.anexado(conn) else 0
+    finally:
+        conn.close()
+    if arquivadas:
+        # A cópia por estaca lê só o principal
+        raise ValueError(f"{arquivadas} ata(s) no arquivo morto de {catalogo}; "
+                         f"rode desarquivar-atas antes de dividir")
+
+    destinos = {estaca_id: os.path.join(pasta, f"estaca_{estaca_id}.db") for estaca_id in estacas}
+    existentes = [c for c in destinos.values() if os.path.exists(c)]
+    if existentes:
+        raise FileExistsError(f"Shard(s) já existe(m): {', '.join(existentes)}")
+
+    os.makedirs(pasta, exist_ok=True)
+    for estaca_id, alas in sorted(estacas.items()):
+        copiadas = copiar_estaca(catalogo, destinos[estaca_id], estaca_id, alas)
+        log(f"Estaca {estaca_id}: alas {alas}, {copiadas.get('atas', 0)} ata(s) -> {destinos[estaca_id]}")
+
+    if remover_do_catalogo:
+        remover_alas(catalogo, [ala for alas in estacas.values() for ala in alas])
+        log(f"Atas removidas do catálogo {catalogo}.")
+    return destinos
@@ -0,0 +1,17 @@
+# functions/texto.py
+# Normalização de textos digitados (nomes, títulos de hinos) para comparação
+# e chaves de índice: sem acentos, minúsculo e com espaços simples.
+import re
+import unicodedata
+
+_ESPACOS = re.compile(r'\s+')
+_PONTUACAO = re.compile(r'[^\w\s]')
+
+
+def normalizar(texto, pontuacao=True):
+    """'  JOÃO  da Silva' -> 'joao da silva'. Com pontuacao=False remove sinais."""
+    sem_acentos = ''.join(c for c in unicodedata.normalize('NFKD', texto or '')
+                          if not unicodedata.combining(c))
+    if not pontuacao:
+        sem_acentos = _PONTUACAO.sub(' ', sem_acentos)
+    return _ESPACOS.sub(' ', sem_acentos).strip().casefold()
@@ -1,16 +1,16 @@
-import sqlite3 as sql
-
-# def insertUser(username,password):
-#     con = sql.connect("database/atas.db")
-#     cur = con.cursor()
-#     cur.execute("INSERT INTO users (username,password) VALUES (?,?)", (username,password))
-#     con.commit()
-#     con.close()
-
-def retrieveUsers():
-	con = sql.connect("database/atas.db")
-	cur = con.cursor()
-	cur.execute("SELECT username, password FROM users")
-	users = cur.fetchall()
-	con.close()
+import sqlite3 as sql
+
+# def insertUser(username,password):
+#     con = sql.connect("database/atas.db")
+#     cur = con.cursor()
+#     cur.execute("INSERT INTO users (username,password) VALUES (?,?)", (username,password))
+#     con.commit()
+#     con.close()
+
+def retrieveUsers():
+	con = sql.connect("database/atas.db")
+	cur = con.cursor()
+	cur.execute("SELECT username, password FROM users")
+	users = cur.fetchall()
+	con.close()
 	return users 
\ No newline at end of file
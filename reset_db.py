@@ -1,17 +1,18 @@
 #!/usr/bin/env python3
 import shutil
-import sqlite3
 from pathlib import Path
 from datetime import datetime
 
+from functions import migrations
+
 BASE = Path(__file__).resolve().parent
 DB_PATH = BASE / "database" / "atas.db"
-SCHEMA_PATH = BASE / "database" / "schema_inicial.sql"
+MIGRATIONS_DIR = BASE / "database" / "migrations"
 BACKUP_DIR = BASE / "database" / "backups"
 BACKUP_DIR.mkdir(parents=True, exist_ok=True)
 
-if not SCHEMA_PATH.exists():
-    print(f"ERRO: arquivo de schema não encontrado em {SCHEMA_PATH}")
+if not MIGRATIONS_DIR.exists():
+    print(f"ERRO: diretório de migrações não encontrado em {MIGRATIONS_DIR}")
     raise SystemExit(1)
 
 if DB_PATH.exists():
@@ -22,9 +23,6 @@ if DB_PATH.exists():
     DB_PATH.unlink()
     print("Arquivo antigo removido.")
 
-print("Criando novo banco a partir de schema_inicial.sql...")
-sql = SCHEMA_PATH.read_text(encoding="utf-8")
-conn = sqlite3.connect(DB_PATH)
-conn.executescript(sql)
-conn.close()
+print("Criando novo banco a partir das migrações...")
+migrations.migrar(str(DB_PATH), str(MIGRATIONS_DIR))
 print("Banco criado com sucesso em:", DB_PATH)
\ No newline at end of file
@@ -0,0 +1,167 @@
+# arquivo_morto.py
+# Compara o banco principal antes e depois de mover as atas antigas para o
+# arquivo morto (functions/arquivo_morto.py): tamanho do arquivo quente, latência
+# da lista de atas, de uma ata recente, de uma ata arquivada e do salvamento, e
+# a latência das requisições enquanto o arquivamento roda em lotes. Confere que
+# a exportação e a busca enxergam as mesmas atas antes, depois e após desarquivar.
+#
+# Uso: python test/arquivo_morto.py [atas] [segundos]
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+ATAS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+SEGUNDOS = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+RECENTES = 100          # atas dentro da janela quente
+MESES = 24
+LIMITE_AUMENTO_P95_MS = 50
+
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(tmp_dir, "atas.db")
+os.chdir(BASE)
+import app as app_module  # noqa: E402
+from functions import arquivo_morto, busca_atas, escritor, exportacao, importacao  # noqa: E402
+
+app_module.limiter.enabled = False
+flask_app = app_module.app
+app_module.init_db()
+banco = flask_app.config["DATABASE"]
+
+hoje = date.today()
+linhas = io.StringIO()
+for i in range(ATAS):
+    if i < ATAS - RECENTES:
+        data = date(1700, 1, 1) + timedelta(days=i)
+    else:
+        data = hoje - timedelta(days=ATAS - i)
+    linhas.write(json.dumps({
+        "tipo": "sacramental", "data": data.isoformat(),
+        "tema": f"Tema {i}", "discursantes": ["João Silva", "Maria Santos", "José Souza"],
+        "anuncios": ["Reunião de jejum no próximo domingo"] * 5,
+        "hino_abertura": "85", "hino_sacramental": "100", "hino_encerramento": "2",
+    }) + "\n")
+linhas.seek(0)
+conn = app_module.db.connect(banco)
+importacao.importar(arquivo_morto.transacoes(conn), importacao.ler_registros(linhas, "jsonl"), 1)
+antiga_id = conn.execute("SELECT MIN(id) FROM atas").fetchone()[0]
+recente_id, recente_data = conn.execute("SELECT id, data FROM atas ORDER BY id DESC LIMIT 1").fetchone()
+conn.close()
+
+
+def cliente_http():
+    cliente = flask_app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["logged_in"] = True
+        sessao["user_id"] = 1
+        sessao["username"] = "Criciuma1"
+    return cliente
+
+
+def medir(segundos):
+    cliente = cliente_http()
+    tempos = {"lista": [], "recente": [], "antiga": [], "salvar": []}
+    fim = time.perf_counter() + segundos
+    i = 0
+    while time.perf_counter() < fim:
+        nome = ("lista", "recente", "antiga", "salvar")[i % 4]
+        inicio = time.perf_counter()
+        if nome == "salvar":
+            # Edita a ata recente: atas novas mudariam a lista entre os cenários
+            resposta = cliente.post("/ata/form", data={
+                "tipo": "sacramental", "tema": f"T{i}", "data": recente_data, "editar": str(recente_id)})
+        else:
+            rota = {"lista": "/atas", "recente": f"/ata/{recente_id}", "antiga": f"/ata/{antiga_id}"}[nome]
+            resposta = cliente.get(rota)
+        resposta.get_data()
+        tempos[nome].append((time.perf_counter() - inicio) * 1000)
+        assert resposta.status_code in (200, 302), (nome, resposta.status_code)
+        i += 1
+    resultado = {}
+    for nome, lista in tempos.items():
+        lista.sort()
+        resultado[nome] = (statistics.median(lista), lista[int(len(lista) * 0.95)])
+    todos = sorted(t for lista in tempos.values() for t in lista)
+    resultado["p95"] = todos[int(len(todos) * 0.95)]
+    return resultado
+
+
+def visao():
+    conn = app_module.db.connect(banco)
+    try:
+        # Até a véspera da ata recente, que muda a cada salvamento
+        ate = (date.fromisoformat(recente_data) - timedelta(days=1)).isoformat()
+        exportado = "".join(exportacao.exportar(conn, 1, "jsonl", None, ate))
+        achadas = [row["id"] for row in busca_atas.buscar(conn, 1, "tema 12")]
+        return exportado, achadas
+    finally:
+        conn.close()
+
+
+def tamanho():
+    conn = app_module.db.connect(banco)
+    try:
+        conn.execute("PRAGMA main.wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return os.path.getsize(banco) / 1e6
+
+
+def imprimir(titulo, r):
+    partes = "  ".join(f"{nome} {r[nome][0]:.2f}/{r[nome][1]:.2f}" for nome in ("lista", "recente", "antiga", "salvar"))
+    print(f"{titulo:<22} {partes}  (p50/p95 ms)")
+
+
+print(f"{ATAS} atas ({RECENTES} nos últimos meses), arquivando as com mais de {MESES} meses\n")
+antes_visao = visao()
+antes = medir(SEGUNDOS)
+imprimir("antes", antes)
+tamanho_antes = tamanho()
+
+# Arquivamento pelo escritor da aplicação, com requisições ao mesmo tempo
+executar = escritor.get_escritor(banco, flask_app).executar
+feito = {}
+thread = threading.Thread(target=lambda: feito.update(
+    arquivo_morto.arquivar(executar, arquivo_morto.data_limite(MESES))))
+thread.start()
+durante = medir(SEGUNDOS)
+thread.join()
+imprimir("durante o arquivamento", durante)
+print(f"{'':<22} {feito['arquivadas']} arquivadas em {feito['lotes']} lotes, {feito['segundos']:.1f}s")
+
+# Compacta o arquivo quente, como faria a manutenção
+conn = app_module.db.connect(banco)
+conn.isolation_level = None
+conn.execute("VACUUM")
+conn.close()
+depois = medir(SEGUNDOS)
+imprimir("depois", depois)
+depois_visao = visao()
+contagem = arquivo_morto.contar(banco)
+print(f"\nbanco principal: {tamanho_antes:.1f} MB -> {tamanho():.1f} MB ({contagem['principal']} atas); "
+      f"arquivo morto: {os.path.getsize(arquivo_morto.caminho_do_arquivo(banco)) / 1e6:.1f} MB "
+      f"({contagem['arquivo']} atas)")
+
+falhas = []
+if depois_visao != antes_visao:
+    falhas.append("exportação ou busca mudaram depois de arquivar")
+devolvidas = arquivo_morto.desarquivar(executar)
+if visao() != antes_visao:
+    falhas.append("exportação ou busca mudaram depois de desarquivar")
+print(f"desarquivadas: {devolvidas['desarquivadas']} em {devolvidas['segundos']:.1f}s")
+aumento = durante["p95"] - antes["p95"]
+if aumento > LIMITE_AUMENTO_P95_MS:
+    falhas.append(f"o arquivamento aumentou o p95 em {aumento:.1f} ms (limite {LIMITE_AUMENTO_P95_MS} ms)")
+for falha in falhas:
+    print("FALHOU:", falha)
+if falhas:
+    sys.exit(1)
+print(f"OK: o arquivamento em lotes aumentou o p95 em {aumento:.1f} ms")
@@ -0,0 +1,112 @@
+# atas_em_lote.py
+# Compara as operações em lote (functions/atas_em_lote.py) com uma requisição
+# por ata: mudar o status, duplicar para a semana seguinte e excluir LOTE atas
+# de um banco com ATAS atas. Confere que detalhes, listas, resumo, busca e uso
+# de hinos das atas excluídas saem junto (ON DELETE CASCADE, migração 0014).
+#
+# Uso: python test/atas_em_lote.py [atas] [lote]
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+ATAS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+LOTE = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(tmp_dir, "atas.db")
+os.chdir(BASE)
+import app as app_module  # noqa: E402
+from functions import arquivo_morto, ata_listas, importacao  # noqa: E402
+
+app_module.limiter.enabled = False
+flask_app = app_module.app
+app_module.init_db()
+banco = flask_app.config["DATABASE"]
+
+linhas = io.StringIO()
+for i in range(ATAS):
+    linhas.write(json.dumps({
+        "tipo": "sacramental", "data": (date(1900, 1, 7) + timedelta(weeks=2 * i)).isoformat(),
+        "tema": f"Tema {i}", "presidido": "Bispo Silva", "dirigido": "Irmão Souza",
+        "discursantes": ["João Silva", "Maria Santos", "José Souza"],
+        "anuncios": ["Reunião de jejum no próximo domingo"] * 3,
+        "hino_abertura": "85", "hino_sacramental": "100", "hino_encerramento": "2",
+    }) + "\n")
+linhas.seek(0)
+conn = app_module.db.connect(banco)
+importacao.importar(arquivo_morto.transacoes(conn), importacao.ler_registros(linhas, "jsonl"), 1)
+ids = [row[0] for row in conn.execute("SELECT id FROM atas ORDER BY id")]
+conn.close()
+
+cliente = flask_app.test_client()
+with cliente.session_transaction() as sessao:
+    sessao["logged_in"] = True
+    sessao["user_id"] = 1
+    sessao["username"] = "Criciuma1"
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def em_lote(rota, selecionadas, **campos):
+    resposta = cliente.post(f"/atas/lote/{rota}?formato=json", data=dict(campos, **{"ids[]": selecionadas}))
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    return resposta.get_json()
+
+
+def uma_por_vez(rota, selecionadas, **campos):
+    for ata_id in selecionadas:
+        em_lote(rota, [ata_id], **campos)
+
+
+def restantes(selecionadas):
+    conn = app_module.db.connect(banco)
+    try:
+        filtro = "IN (SELECT value FROM json_each(?))"
+        lista = json.dumps(selecionadas)
+        contagem = {"atas": conn.execute(f"SELECT COUNT(*) FROM atas WHERE id {filtro}", (lista,)).fetchone()[0]}
+        for tabela in ("sacramental", "ata_summary", "hinos_uso") + ata_listas.TABELAS:
+            contagem[tabela] = conn.execute(f"SELECT COUNT(*) FROM {tabela} WHERE ata_id {filtro}",
+                                            (lista,)).fetchone()[0]
+        contagem["atas_fts"] = conn.execute(f"SELECT COUNT(*) FROM atas_fts WHERE rowid {filtro}",
+                                            (lista,)).fetchone()[0]
+        return {tabela: n for tabela, n in contagem.items() if n}
+    finally:
+        conn.close()
+
+
+# Conjuntos disjuntos: cada cenário mexe em atas que o outro não tocou
+por_ata, lote = ids[:LOTE], ids[LOTE:2 * LOTE]
+print(f"{ATAS} atas, {LOTE} por operação\n")
+print(f"{'operação':<12} {'uma por vez ms':>15} {'em lote ms':>12}")
+resultados = {}
+for rota, campos in (("status", {"status": "completa"}), ("duplicar", {"dias": "7"}), ("excluir", {})):
+    separado = cronometrar(lambda: uma_por_vez(rota, por_ata, **campos))
+    junto = cronometrar(lambda: resultados.update({rota: em_lote(rota, lote, **campos)}))
+    print(f"{rota:<12} {separado:>15.1f} {junto:>12.1f}")
+
+falhas = []
+if len(resultados["status"]["alteradas"]) != LOTE:
+    falhas.append(f"status: {len(resultados['status']['alteradas'])} de {LOTE} atas alteradas")
+if len(resultados["duplicar"]["criadas"]) != LOTE:
+    falhas.append(f"duplicar: {len(resultados['duplicar']['criadas'])} de {LOTE} atas criadas")
+if len(resultados["excluir"]["excluidas"]) != LOTE:
+    falhas.append(f"excluir: {len(resultados['excluir']['excluidas'])} de {LOTE} atas excluídas")
+sobras = restantes(por_ata + lote)
+if sobras:
+    falhas.append(f"linhas das atas excluídas continuam no banco: {sobras}")
+for falha in falhas:
+    print("FALHOU:", falha)
+if falhas:
+    sys.exit(1)
+print("\nOK: as atas excluídas saíram com detalhes, listas, resumo, busca e uso de hinos")
@@ -0,0 +1,75 @@
+# benchmark_busca.py
+# Mede a busca FTS5 (functions/busca_atas.py) em uma estaca inteira com dez
+# anos de atas: 10 alas x 52 domingos x 10 anos, mais batismos. A busca junta
+# atas_fts com ata_summary, então o resumo é gravado junto com o índice; uma
+# busca que deveria achar atas e volta vazia faz o script falhar.
+#
+# Uso: python test/benchmark_busca.py
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from functions import ata_summary, busca_atas, migrations  # noqa: E402
+
+ALAS = 10
+ANOS = 10
+REPETICOES = 50
+
+NOMES = ["João", "Maria", "José", "Ana", "Pedro", "Paula", "Lucas", "Márcia", "Antônio", "Luíza"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Ávila", "Pereira", "Costa", "Gonçalves"]
+TEMAS = ["Fé em Jesus Cristo", "Arrependimento", "Conferência Geral", "Dízimo", "Templo e história da família",
+         "Oração", "Serviço", "Expiação", "Batismo", "Sábado"]
+
+
+def nome():
+    return f"{random.choice(NOMES)} {random.choice(SOBRENOMES)}"
+
+
+conn = sqlite3.connect(":memory:")
+conn.row_factory = sqlite3.Row
+migrations.aplicar_migracoes(conn, log=lambda _msg: None)
+
+random.seed(42)
+inicio = time.perf_counter()
+primeiro_domingo = date.today() - timedelta(weeks=52 * ANOS)
+for ala_id in range(1, ALAS + 1):
+    for semana in range(52 * ANOS):
+        data = (primeiro_domingo + timedelta(weeks=semana)).isoformat()
+        ata_id = conn.execute("INSERT INTO atas (tipo, data, ala_id) VALUES ('sacramental', ?, ?)",
+                              (data, ala_id)).lastrowid
+        busca_atas.indexar_ata(conn, ata_id, "sacramental", {
+            "tema": random.choice(TEMAS),
+            "discursantes": [nome() for _ in range(3)],
+            "anuncios": ["Reunião de jejum no próximo domingo", "Atividade da Primária"],
+            "desobrigacoes": f"{nome()} como professor(a)",
+            "apoios": f"{nome()} como secretário(a)",
+        })
+        if semana % 8 == 0:
+            ata_id = conn.execute("INSERT INTO atas (tipo, data, ala_id) VALUES ('batismo', ?, ?)",
+                                  (data, ala_id)).lastrowid
+            busca_atas.indexar_ata(conn, ata_id, "batismo", {"batizados": [nome()]})
+ata_summary.reconstruir(conn)
+conn.commit()
+total = conn.execute("SELECT COUNT(*) FROM atas_fts").fetchone()[0]
+print(f"{total} atas indexadas em {time.perf_counter() - inicio:.1f}s")
+
+print(f"\n{'busca':<25} {'resultados':>10} {'ms/busca':>9}")
+falhas = []
+for texto in ["conferencia", "avila", "joao silva", "secretario", "jejum", "gonc", "inexistente"]:
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        resultados = busca_atas.buscar(conn, 3, texto)
+    ms = (time.perf_counter() - inicio) * 1000 / REPETICOES
+    print(f"{texto:<25} {len(resultados):>10} {ms:>9.2f}")
+    if bool(resultados) == (texto == "inexistente"):
+        falhas.append(texto)
+
+if falhas:
+    print(f"\nFALHOU: resultado inesperado para {', '.join(falhas)}")
+    sys.exit(1)
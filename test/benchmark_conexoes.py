@@ -0,0 +1,116 @@
+# benchmark_conexoes.py
+# Compara conexões abertas e queries executadas por requisição:
+#   antes  -> get_db() abrindo um sqlite3.connect novo a cada chamada
+#   depois -> uma conexão por requisição vinda do pool (functions/db.py)
+#
+# O "antes" troca functions.db.get_db, por onde passam tanto o get_db() do
+# app quanto tenants.get_db()/get_catalogo(); as conexões são contadas no
+# sqlite3.connect (abertas) e no ConnectionPool.acquire (tiradas do pool).
+#
+# Uso: python test/benchmark_conexoes.py
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "atas.db")
+shutil.copy(os.path.join(BASE, "database", "atas.db"), db_path)
+os.environ["DATABASE_PATH"] = db_path
+
+from functions import ata_summary, migrations  # noqa: E402
+
+migrations.migrar(db_path, log=lambda _msg: None)
+
+# Algumas atas de exemplo para a ala 1
+seed = sqlite3.connect(db_path)
+hoje = datetime.now()
+for i in range(30):
+    data = (hoje - timedelta(days=7 * i)).strftime("%Y-%m-%d")
+    cur = seed.execute("INSERT INTO atas (tipo, data, ala_id) VALUES ('sacramental', ?, 1)", (data,))
+    seed.execute(
+        "INSERT INTO sacramental (ata_id, tema, discursantes, hinos, oracoes, anuncios) VALUES (?, ?, ?, ?, ?, ?)",
+        (cur.lastrowid, f"Tema {i}", '["João Silva", "Maria Santos"]', '["1", "2"]', '["A", "B"]', '[]'),
+    )
+ata_summary.reconstruir(seed)
+seed.commit()
+seed.close()
+
+os.chdir(BASE)
+import app as app_module  # noqa: E402
+
+app_module.limiter.enabled = False
+flask_app = app_module.app
+
+contadores = {"conexoes": 0, "queries": 0, "pool": 0}
+_connect_original = sqlite3.connect
+_acquire_original = app_module.db.ConnectionPool.acquire
+
+
+def _connect_contando(*args, **kwargs):
+    contadores["conexoes"] += 1
+    conn = _connect_original(*args, **kwargs)
+    conn.set_trace_callback(lambda _sql: contadores.__setitem__("queries", contadores["queries"] + 1))
+    return conn
+
+
+def _acquire_contando(self):
+    contadores["pool"] += 1
+    return _acquire_original(self)
+
+
+sqlite3.connect = _connect_contando
+app_module.db.ConnectionPool.acquire = _acquire_contando
+
+
+def get_db_legado(path=None):
+    conn = sqlite3.connect(path or db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+ata_id = _connect_original(db_path).execute("SELECT MAX(id) FROM atas").fetchone()[0]
+ROTAS = [
+    "/index",
+    "/atas",
+    "/configuracoes",
+    f"/ata/{ata_id}",
+    f"/ata/form?tipo=sacramental&data={hoje.strftime('%Y-%m-%d')}",
+    "/atas/mes/" + hoje.strftime("%Y-%m"),
+]
+REPETICOES = 20
+
+
+def medir(nome):
+    client = flask_app.test_client()
+    with client.session_transaction() as sess:
+        sess["logged_in"] = True
+        sess["user_id"] = 1
+        sess["username"] = "Criciuma1"
+    print(f"\n== {nome} ==")
+    print(f"{'rota':<45} {'abertas/req':>12} {'do pool/req':>12} {'queries/req':>12} {'ms/req':>8}")
+    for rota in ROTAS:
+        contadores["conexoes"] = contadores["queries"] = contadores["pool"] = 0
+        inicio = time.perf_counter()
+        for _ in range(REPETICOES):
+            resp = client.get(rota)
+            assert resp.status_code == 200, (rota, resp.status_code)
+        ms = (time.perf_counter() - inicio) * 1000 / REPETICOES
+        print(f"{rota[:45]:<45} {contadores['conexoes'] / REPETICOES:>12.2f} "
+              f"{contadores['pool'] / REPETICOES:>12.2f} "
+              f"{contadores['queries'] / REPETICOES:>12.2f} {ms:>8.2f}")
+
+
+get_db_pool = app_module.db.get_db
+app_module.db.get_db = get_db_legado
+medir("antes: sqlite3.connect por chamada")
+app_module.db.get_db = get_db_pool
+medir("depois: conexão por requisição + pool")
+
+shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,111 @@
+# benchmark_escrita.py
+# Salvamentos de ata por segundo com N editores simultâneos:
+#   direto   -> cada editor com a sua conexão, commit por salvamento (como antes)
+#   escritor -> jobs enviados para a thread de escrita (functions/escritor.py),
+#               com group commit
+# Cada salvamento grava a ata, a sacramental, as listas, o índice de busca e o
+# histórico de discursantes, como o POST de /ata/form.
+#
+# Uso: python test/benchmark_escrita.py [segundos] [synchronous]
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from functions import ata_listas, busca_atas, db, escritor, historico_discursantes, migrations  # noqa: E402
+
+SEGUNDOS = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+SYNCHRONOUS = sys.argv[2] if len(sys.argv) > 2 else "NORMAL"
+EDITORES = (1, 4, 16, 32)
+
+PRAGMAS = dict(db.PRAGMAS_PADRAO, synchronous=SYNCHRONOUS)
+NOMES = [f"{nome} {sobrenome}" for nome in ("João", "Maria", "José", "Ana", "Pedro", "Paula", "Lucas", "Márcia")
+         for sobrenome in ("Silva", "Santos", "Souza", "Costa", "Ávila", "Gonçalves", "Pereira", "Lima")]
+
+
+def salvar(conn, ala_id, numero, data):
+    """Mesmo trabalho do POST de /ata/form para uma ata sacramental nova."""
+    detalhes = {
+        "tema": f"Tema {numero}", "discursantes": [f"{random.choice(NOMES)} {random.randrange(50)}" for _ in range(3)],
+        "anuncios": ["Reunião de jejum no próximo domingo"],
+        "hino_abertura": "85", "hino_encerramento": "2", "oracao_abertura": "A", "oracao_encerramento": "B",
+        "hino_sacramental": "100", "hino_intermediario": "", "desobrigacoes": "", "apoios": "",
+    }
+    ata_id = conn.execute("""
+        INSERT INTO atas (tipo, data, ala_id) VALUES ('sacramental', ?, ?)
+        ON CONFLICT (ala_id, tipo, data) DO UPDATE SET status = atas.status RETURNING id
+    """, (data, ala_id)).fetchone()[0]
+    conn.execute("INSERT INTO sacramental (ata_id, tema, anuncios, discursantes) VALUES (?, ?, ?, ?)",
+                 (ata_id, detalhes["tema"], json.dumps(detalhes["anuncios"]), json.dumps(detalhes["discursantes"])))
+    ata_listas.gravar_listas(conn, ata_id, "sacramental", detalhes)
+    historico_discursantes.atualizar(conn, ala_id, historico_discursantes.nomes_da_ata(conn, ata_id))
+    busca_atas.indexar_ata(conn, ata_id, "sacramental", detalhes)
+    return ata_id
+
+
+def rodar(modo, editores):
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, "atas.db")
+    migrations.migrar(caminho, log=lambda _msg: None)
+    servico = escritor.Escritor(caminho, PRAGMAS) if modo == "escritor" else None
+    fim = time.perf_counter() + SEGUNDOS
+    tempos, erros = [], []
+    lock = threading.Lock()
+
+    def editor(indice):
+        conn = db.connect(caminho, PRAGMAS) if servico is None else None
+        numero = 0
+        while time.perf_counter() < fim:
+            numero += 1
+            # Data única por (editor, salvamento): (ala_id, tipo, data) é único
+            data = (date(2000, 1, 1) + timedelta(days=numero * editores + indice)).isoformat()
+            inicio = time.perf_counter()
+            try:
+                if servico is None:
+                    with conn:
+                        salvar(conn, indice % 5 + 1, numero, data)
+                else:
+                    servico.executar(lambda c: salvar(c, indice % 5 + 1, numero, data))
+            except sqlite3.OperationalError as e:
+                with lock:
+                    erros.append(str(e))
+                continue
+            with lock:
+                tempos.append(time.perf_counter() - inicio)
+        if conn is not None:
+            conn.close()
+
+    threads = [threading.Thread(target=editor, args=(i,)) for i in range(editores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    commits = servico.commits if servico else len(tempos)
+    if servico:
+        servico.fechar()
+    tempos.sort()
+    return {
+        "por_segundo": len(tempos) / SEGUNDOS,
+        "p50": statistics.median(tempos) * 1000 if tempos else 0,
+        "p95": tempos[int(len(tempos) * 0.95)] * 1000 if tempos else 0,
+        "commits": commits,
+        "erros": len(erros),
+    }
+
+
+print(f"synchronous={SYNCHRONOUS}, {SEGUNDOS:.0f}s por cenário\n")
+print(f"{'editores':>8} {'modo':<9} {'salv/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'commits':>8} {'erros':>6}")
+for editores in EDITORES:
+    for modo in ("direto", "escritor"):
+        r = rodar(modo, editores)
+        print(f"{editores:>8} {modo:<9} {r['por_segundo']:>8.0f} {r['p50']:>8.2f} {r['p95']:>8.2f} "
+              f"{r['commits']:>8} {r['erros']:>6}")
@@ -0,0 +1,97 @@
+# benchmark_importacao.py
+# Mede a importação em lote (functions/importacao.py) como o CLI a faz: gera
+# um JSONL com 100 mil atas (90% sacramentais) e importa em um banco novo.
+# Falha se passar de LIMITE_SEGUNDOS_POR_MIL (escalado pelo número de linhas)
+# ou se os contadores da ala (triggers de atas, ligados durante a carga) e o
+# histórico de discursantes (somado no fim da importação) não baterem com um
+# recálculo do zero.
+#
+# Uso: python test/benchmark_importacao.py [linhas]
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from functions import arquivo_morto, db, historico_discursantes, importacao, migrations  # noqa: E402
+
+LINHAS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+LIMITE_SEGUNDOS_POR_MIL = 0.3  # 100 mil atas em até 30 s
+
+NOMES = ["João", "Maria", "José", "Ana", "Pedro", "Paula", "Lucas", "Márcia", "Antônio", "Luíza"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Ávila", "Pereira", "Costa", "Gonçalves"]
+TEMAS = ["Fé em Jesus Cristo", "Arrependimento", "Conferência Geral", "Dízimo", "Oração", "Serviço"]
+
+
+def nome():
+    return f"{random.choice(NOMES)} {random.choice(SOBRENOMES)}"
+
+
+def gerar_jsonl(linhas):
+    random.seed(42)
+    inicio = date(1700, 1, 3)  # uma data por linha: (ala_id, tipo, data) é único
+    saida = io.StringIO()
+    for i in range(linhas):
+        data = (inicio + timedelta(days=i)).isoformat()
+        if i % 10:
+            registro = {
+                "tipo": "sacramental", "data": data, "status": "finalizada",
+                "tema": random.choice(TEMAS), "presidido": nome(), "dirigido": nome(),
+                "discursantes": [nome() for _ in range(3)],
+                "anuncios": ["Reunião de jejum no próximo domingo"],
+                "hino_abertura": f"{random.randint(1, 300)} - Hino",
+                "hino_sacramental": str(random.randint(1, 300)),
+                "hino_encerramento": str(random.randint(1, 300)),
+            }
+        else:
+            registro = {"tipo": "batismo", "data": data, "batizados": [nome()],
+                        "testemunha1": nome(), "testemunha2": nome()}
+        saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    saida.seek(0)
+    return saida
+
+
+def historico_atual(conn):
+    return conn.execute("SELECT * FROM speaker_history ORDER BY ala_id, nome_normalizado").fetchall()
+
+
+def medir():
+    with tempfile.TemporaryDirectory() as pasta:
+        conn = db.connect(os.path.join(pasta, "bench.db"), db.PRAGMAS_PADRAO)
+        migrations.aplicar_migracoes(conn, log=lambda _msg: None)
+        arquivo = gerar_jsonl(LINHAS)
+        inicio = time.perf_counter()
+        relatorio = importacao.importar(arquivo_morto.transacoes(conn),
+                                        importacao.ler_registros(arquivo, "jsonl"), 1,
+                                        lote=importacao.LOTE_CLI)
+        segundos = time.perf_counter() - inicio
+        total = conn.execute("SELECT total FROM ala_stats WHERE ala_id = 1 AND periodo = ''").fetchone()
+        historico = historico_atual(conn)
+        historico_discursantes.reconstruir(conn, [1])
+        historico_ok = historico == historico_atual(conn)
+        conn.close()
+    print(f"{relatorio['importadas']} atas em {segundos:.1f}s "
+          f"({relatorio['importadas'] / segundos:,.0f} atas/s, {relatorio['total_erros']} erros)")
+    falhas = []
+    limite = LIMITE_SEGUNDOS_POR_MIL * LINHAS / 1000
+    if segundos > limite:
+        falhas.append(f"{segundos:.1f}s (limite {limite:.1f}s)")
+    if relatorio['total_erros']:
+        falhas.append(f"{relatorio['total_erros']} erros")
+    if (total[0] if total else 0) != relatorio['importadas']:
+        falhas.append(f"ala_stats com {total and total[0]} atas")
+    if not historico_ok:
+        falhas.append("speaker_history diferente do recálculo")
+    for falha in falhas:
+        print("FALHOU:", falha)
+    if falhas:
+        sys.exit(1)
+
+
+medir()
@@ -9,18 +9,19 @@ cur = conn.cursor()
 # Inserir uma ata de teste para a ala 1 (Criciuma1)
 data_teste = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
 
-# Inserir ata (sem criado_em)
-cur.execute("""
+# Inserir ata (sem criado_em); rodar de novo no mesmo dia reaproveita a ata
+ata_id = cur.execute("""
     INSERT INTO atas (tipo, ala_id, data)
     VALUES (?, ?, ?)
-""", ("sacramental", 1, data_teste))
-
-ata_id = cur.lastrowid
+    ON CONFLICT (ala_id, tipo, data) DO UPDATE SET status = atas.status
+    RETURNING id
+""", ("sacramental", 1, data_teste)).fetchone()[0]
 
 # Inserir sacramental com tema
 cur.execute("""
     INSERT INTO sacramental (ata_id, tema, discursantes)
     VALUES (?, ?, ?)
+    ON CONFLICT (ata_id) DO UPDATE SET tema = excluded.tema, discursantes = excluded.discursantes
 """, (ata_id, "A importância da Fé", '["João Silva", "Maria Santos"]'))
 
 conn.commit()
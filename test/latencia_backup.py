@@ -0,0 +1,136 @@
+# latencia_backup.py
+# Mede a latência de requisições (lista de atas, ata e salvamento) sem
+# backup e com backups rodando sem parar (functions/backup.py): em passos
+# com pausa (padrão) e em um passo só. Também confere o integrity_check e a
+# restauração do último backup em um banco novo.
+#
+# Uso: python test/latencia_backup.py [segundos] [atas]
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+SEGUNDOS = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+ATAS = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+LIMITE_AUMENTO_P95_MS = 30
+
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(tmp_dir, "atas.db")
+os.chdir(BASE)
+import app as app_module  # noqa: E402
+from functions import arquivo_morto, backup, importacao  # noqa: E402
+
+app_module.limiter.enabled = False
+flask_app = app_module.app
+app_module.init_db()
+banco = flask_app.config["DATABASE"]
+pasta = os.path.join(tmp_dir, "backups")
+
+linhas = io.StringIO()
+for i in range(ATAS):
+    linhas.write(json.dumps({
+        "tipo": "sacramental", "data": (date(1700, 1, 1) + timedelta(days=i)).isoformat(),
+        "tema": f"Tema {i}", "discursantes": ["João Silva", "Maria Santos", "José Souza"],
+        "anuncios": ["Reunião de jejum no próximo domingo"] * 5,
+        "hino_abertura": "85", "hino_sacramental": "100", "hino_encerramento": "2",
+    }) + "\n")
+linhas.seek(0)
+conn = app_module.db.connect(banco)
+importacao.importar(arquivo_morto.transacoes(conn), importacao.ler_registros(linhas, "jsonl"), 1)
+ata_id = conn.execute("SELECT MAX(id) FROM atas").fetchone()[0]
+conn.close()
+
+
+def cliente_http():
+    cliente = flask_app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["logged_in"] = True
+        sessao["user_id"] = 1
+        sessao["username"] = "Criciuma1"
+    return cliente
+
+
+def medir(segundos):
+    cliente = cliente_http()
+    tempos = []
+    inicio_data = date(2100, 1, 1)
+    fim = time.perf_counter() + segundos
+    i = 0
+    while time.perf_counter() < fim:
+        if i % 3 == 0:
+            rota = ("post", "/ata/form", {"tipo": "sacramental", "tema": f"T{i}",
+                                          "data": (inicio_data + timedelta(days=i)).isoformat()})
+        else:
+            rota = ("get", "/atas" if i % 3 == 1 else f"/ata/{ata_id}", None)
+        inicio = time.perf_counter()
+        resposta = getattr(cliente, rota[0])(rota[1], data=rota[2])
+        resposta.get_data()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        assert resposta.status_code in (200, 302), (rota[1], resposta.status_code)
+        i += 1
+    tempos.sort()
+    return {"n": len(tempos), "p50": statistics.median(tempos),
+            "p95": tempos[int(len(tempos) * 0.95)], "max": tempos[-1]}
+
+
+def com_backups(segundos, **opcoes):
+    parar = threading.Event()
+    feitos = []
+
+    def loop():
+        while not parar.is_set():
+            feitos.append(backup.criar(banco, pasta, manter=2, **opcoes))
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    time.sleep(0.2)
+    resultado = medir(segundos)
+    parar.set()
+    thread.join()
+    return resultado, feitos
+
+
+def imprimir(titulo, r, feitos=()):
+    extra = ""
+    if feitos:
+        extra = (f"  {len(feitos)} backup(s), cópia {statistics.mean(f['segundos'] for f in feitos):.2f}s + "
+                 f"integrity_check {statistics.mean(f['verificacao_s'] for f in feitos):.2f}s, "
+                 f"{statistics.mean(f['passos'] for f in feitos):.0f} passos, "
+                 f"{sum(f['reinicios'] for f in feitos)} reinício(s)")
+    print(f"{titulo:<16} {r['n']:>6} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['max']:>8.2f}{extra}")
+
+
+print(f"{ATAS} atas, banco de {os.path.getsize(banco) / 1e6:.1f} MB, {SEGUNDOS:.0f}s por cenário\n")
+print(f"{'cenário':<16} {'reqs':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+sem = medir(SEGUNDOS)
+imprimir("sem backup", sem)
+passos, feitos_passos = com_backups(SEGUNDOS)
+imprimir("backup em passos", passos, feitos_passos)
+unico, feitos_unico = com_backups(SEGUNDOS, paginas=-1, pausa=0)
+imprimir("backup de uma vez", unico, feitos_unico)
+
+# O último backup passa no integrity_check e restaura em um banco novo
+ultimo = backup.listar(pasta, banco)[0]["arquivo"]
+assert backup.verificar(ultimo) == ["ok"]
+restaurado = os.path.join(tmp_dir, "restaurado.db")
+backup.restaurar(ultimo, restaurado, pasta)
+conn = app_module.db.connect(restaurado)
+print(f"\nrestaurado de {os.path.basename(ultimo)}: "
+      f"{conn.execute('SELECT COUNT(*) FROM atas').fetchone()[0]} atas, "
+      f"user_version {conn.execute('PRAGMA user_version').fetchone()[0]}")
+conn.close()
+assert len(backup.listar(pasta, banco)) == 2, "rotação deveria manter 2 backups"
+
+aumento = passos["p95"] - sem["p95"]
+if aumento > LIMITE_AUMENTO_P95_MS:
+    print(f"FALHOU: backup em passos aumentou o p95 em {aumento:.1f} ms (limite {LIMITE_AUMENTO_P95_MS} ms)")
+    sys.exit(1)
+print(f"OK: backup em passos aumentou o p95 em {aumento:.1f} ms")
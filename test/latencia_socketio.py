@@ -0,0 +1,129 @@
+# latencia_socketio.py
+# Mede o round-trip de 'field_update' (edição colaborativa) entre dois
+# clientes Socket.IO na mesma sala, primeiro sem carga e depois enquanto
+# outras threads exportam PDFs e listam/exportam /atas sem parar. As views
+# rodam no pool de functions/despacho.py (eventlet.tpool com eventlet).
+#
+# Uso: python test/latencia_socketio.py [segundos]
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+SEGUNDOS = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+ATAS = 5000
+THREADS_DE_CARGA = 4
+LIMITE_P95_MS = 5
+
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(tmp_dir, "atas.db")
+os.chdir(BASE)
+import app as app_module  # noqa: E402
+from functions import arquivo_morto, importacao  # noqa: E402
+
+app_module.limiter.enabled = False
+flask_app = app_module.app
+socketio = app_module.socketio
+app_module.init_db()
+
+# Histórico da ala 1 para deixar /atas/exportar pesado
+linhas = io.StringIO()
+for i in range(ATAS):
+    linhas.write(json.dumps({
+        "tipo": "sacramental", "data": (date(2000, 1, 2) + timedelta(weeks=i)).isoformat(),
+        "tema": f"Tema {i}", "discursantes": ["João Silva", "Maria Santos", "José Souza"],
+        "anuncios": ["Reunião de jejum no próximo domingo"] * 5,
+        "hino_abertura": "85", "hino_sacramental": "100", "hino_encerramento": "2",
+    }) + "\n")
+linhas.seek(0)
+with flask_app.app_context():
+    conn = app_module.db.connect(flask_app.config["DATABASE"])
+    importacao.importar(arquivo_morto.transacoes(conn), importacao.ler_registros(linhas, "jsonl"), 1)
+    ata_id = conn.execute("SELECT MAX(id) FROM atas").fetchone()[0]
+    conn.close()
+
+
+def cliente_http():
+    cliente = flask_app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["logged_in"] = True
+        sessao["user_id"] = 1
+        sessao["username"] = "Criciuma1"
+    return cliente
+
+
+parar = threading.Event()
+requisicoes = {"pdf": 0, "atas": 0, "exportar": 0}
+
+
+def carga(indice):
+    cliente = cliente_http()
+    rotas = [("pdf", f"/ata/exportar_sacramental/{ata_id}"), ("atas", "/atas"),
+             ("exportar", "/atas/exportar?formato=csv")]
+    nome, rota = rotas[indice % len(rotas)]
+    while not parar.is_set():
+        resposta = cliente.get(rota)
+        resposta.get_data()
+        assert resposta.status_code == 200, (rota, resposta.status_code)
+        requisicoes[nome] += 1
+
+
+def medir(segundos):
+    editor = socketio.test_client(flask_app)
+    outro = socketio.test_client(flask_app)
+    editor.emit("join", {"ata_id": ata_id})
+    outro.emit("join", {"ata_id": ata_id})
+    editor.get_received()
+    outro.get_received()
+    tempos = []
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        editor.emit("field_update", {"ata_id": ata_id, "name": "tema", "value": "Fé"})
+        recebidos = outro.get_received()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        assert recebidos and recebidos[0]["name"] == "field_update"
+        time.sleep(0.002)
+    editor.disconnect()
+    outro.disconnect()
+    tempos.sort()
+    return {
+        "n": len(tempos),
+        "p50": statistics.median(tempos),
+        "p95": tempos[int(len(tempos) * 0.95)],
+        "p99": tempos[int(len(tempos) * 0.99)],
+        "max": tempos[-1],
+    }
+
+
+def imprimir(titulo, r):
+    print(f"{titulo:<12} {r['n']:>6} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f} {r['max']:>8.2f}")
+
+
+print(f"modo: {socketio.async_mode}, {ATAS} atas, {THREADS_DE_CARGA} threads de carga, {SEGUNDOS:.0f}s\n")
+print(f"{'cenário':<12} {'envios':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+imprimir("sem carga", medir(min(SEGUNDOS, 2)))
+
+threads = [threading.Thread(target=carga, args=(i,), daemon=True) for i in range(THREADS_DE_CARGA)]
+for t in threads:
+    t.start()
+time.sleep(0.5)
+com_carga = medir(SEGUNDOS)
+parar.set()
+for t in threads:
+    t.join()
+imprimir("com carga", com_carga)
+print(f"\nrequisições concluídas durante a medição: {requisicoes}")
+
+if com_carga["p95"] > LIMITE_P95_MS:
+    print(f"FALHOU: p95 de field_update acima de {LIMITE_P95_MS} ms com carga")
+    sys.exit(1)
+print(f"OK: p95 de field_update abaixo de {LIMITE_P95_MS} ms com carga")
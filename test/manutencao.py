@@ -0,0 +1,144 @@
+# manutencao.py
+# Apaga a metade mais antiga das atas de um banco grande e mede a manutenção
+# (functions/manutencao.py): quanto o arquivo encolhe com o incremental_vacuum
+# em passos, o tempo de cada tarefa e a latência das requisições enquanto ela
+# roda, comparada à de um VACUUM completo (compactar).
+#
+# Uso: python test/manutencao.py [atas] [segundos]
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+ATAS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+SEGUNDOS = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+LIMITE_AUMENTO_P95_MS = 30
+
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(tmp_dir, "atas.db")
+os.chdir(BASE)
+import app as app_module  # noqa: E402
+from functions import arquivo_morto, ata_listas, importacao, manutencao  # noqa: E402
+
+app_module.limiter.enabled = False
+flask_app = app_module.app
+app_module.init_db()
+banco = flask_app.config["DATABASE"]
+
+
+def carregar():
+    linhas = io.StringIO()
+    for i in range(ATAS):
+        linhas.write(json.dumps({
+            "tipo": "sacramental", "data": (date(1700, 1, 1) + timedelta(days=i)).isoformat(),
+            "tema": f"Tema {i}", "discursantes": ["João Silva", "Maria Santos", "José Souza"],
+            "anuncios": ["Reunião de jejum no próximo domingo"] * 5,
+            "hino_abertura": "85", "hino_sacramental": "100", "hino_encerramento": "2",
+        }) + "\n")
+    linhas.seek(0)
+    conn = app_module.db.connect(banco)
+    importacao.importar(arquivo_morto.transacoes(conn), importacao.ler_registros(linhas, "jsonl"), 1)
+    conn.close()
+
+
+def apagar(filtro):
+    # Como excluir_ata: a ata e os seus detalhes
+    conn = app_module.db.connect(banco)
+    with conn:
+        for tabela in ('sacramental', 'batismo') + ata_listas.TABELAS:
+            conn.execute(f"DELETE FROM {tabela} WHERE {filtro.format(id='ata_id')}")
+        conn.execute(f"DELETE FROM atas WHERE {filtro.format(id='id')}")
+    conn.close()
+
+
+def cliente_http():
+    cliente = flask_app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["logged_in"] = True
+        sessao["user_id"] = 1
+        sessao["username"] = "Criciuma1"
+    return cliente
+
+
+def medir(parar):
+    cliente = cliente_http()
+    ata_id = app_module.db.connect(banco).execute("SELECT MAX(id) FROM atas").fetchone()[0]
+    tempos = []
+    i = 0
+    while not parar():
+        if i % 3 == 0:
+            rota = ("post", "/ata/form", {"tipo": "sacramental", "tema": f"T{i}", "data": "2100-01-01"})
+        else:
+            rota = ("get", "/atas" if i % 3 == 1 else f"/ata/{ata_id}", None)
+        inicio = time.perf_counter()
+        resposta = getattr(cliente, rota[0])(rota[1], data=rota[2])
+        resposta.get_data()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        assert resposta.status_code in (200, 302), (rota[1], resposta.status_code)
+        i += 1
+    tempos.sort()
+    return {"n": len(tempos), "p50": statistics.median(tempos), "p95": tempos[int(len(tempos) * 0.95)],
+            "max": tempos[-1]}
+
+
+def durante(funcao):
+    """Latência das requisições enquanto `funcao` roda (no mínimo SEGUNDOS)."""
+    resultado = {}
+    thread = threading.Thread(target=lambda: resultado.update(feito=funcao()))
+    inicio = time.perf_counter()
+    thread.start()
+    latencia = medir(lambda: not thread.is_alive() and time.perf_counter() - inicio >= SEGUNDOS)
+    thread.join()
+    return latencia, resultado['feito']
+
+
+def imprimir(titulo, r):
+    print(f"{titulo:<24} {r['n']:>6} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['max']:>8.2f}")
+
+
+carregar()
+apagar(f"{{id}} <= {ATAS // 2}")
+print(f"{ATAS} atas, metade mais antiga apagada\n")
+print(f"{'cenário':<24} {'reqs':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+fim = time.perf_counter() + SEGUNDOS
+sem = medir(lambda: time.perf_counter() >= fim)
+imprimir("sem manutenção", sem)
+com, feitas = durante(lambda: manutencao.executar(banco))
+imprimir("manutenção em passos", com)
+
+# De novo, agora com um VACUUM completo
+apagar("1")
+carregar()
+apagar(f"{{id}} <= {ATAS // 2}")
+completo, compactado = durante(lambda: manutencao.compactar(banco))
+imprimir("VACUUM completo", completo)
+
+print()
+for feita in feitas:
+    print(manutencao.descrever(os.path.basename(banco), feita))
+print(f"{os.path.basename(banco)} compactar: {compactado['segundos']:.2f}s, "
+      f"{compactado['antes']['bytes'] / 1e6:.1f} -> {compactado['depois']['bytes'] / 1e6:.1f} MB")
+
+vacuo = next(f for f in feitas if f['tarefa'] == 'vacuum')
+checkpoint = next(f for f in feitas if f['tarefa'] == 'checkpoint')
+falhas = []
+if vacuo['depois']['livres']:
+    falhas.append(f"o incremental_vacuum deixou {vacuo['depois']['livres']} página(s) livres")
+if checkpoint['depois']['bytes'] >= vacuo['antes']['bytes']:
+    falhas.append("o arquivo não encolheu")
+aumento = com["p95"] - sem["p95"]
+if aumento > LIMITE_AUMENTO_P95_MS:
+    falhas.append(f"a manutenção aumentou o p95 em {aumento:.1f} ms (limite {LIMITE_AUMENTO_P95_MS} ms)")
+for falha in falhas:
+    print("FALHOU:", falha)
+if falhas:
+    sys.exit(1)
+print(f"OK: a manutenção em passos aumentou o p95 em {aumento:.1f} ms")
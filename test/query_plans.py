@@ -0,0 +1,129 @@
+# query_plans.py
+# Verifica com EXPLAIN QUERY PLAN que as listagens por período usam o índice
+# composto de atas (ou a chave de ata_summary) e não voltam a fazer varredura
+# completa da tabela.
+#
+# Uso: python test/query_plans.py
+import os
+import sqlite3
+import sys
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from functions import ata_summary, changelog, consultas_atas, hinos, migrations  # noqa: E402
+
+
+def criar_banco():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrations.aplicar_migracoes(conn, log=lambda _msg: None)
+    for ala_id in range(1, 6):
+        for i in range(200):
+            conn.execute(
+                "INSERT INTO atas (tipo, data, ala_id) VALUES (?, date('2015-01-04', ?), ?)",
+                ("sacramental" if i % 5 else "batismo", f"+{7 * i} days", ala_id),
+            )
+    ata_summary.reconstruir(conn)
+    conn.execute("ANALYZE")
+    return conn
+
+
+def plano(conn, sql, params):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def verificar(conn, nome, sql, params, indices, ordenada=False):
+    detalhes = plano(conn, sql, params)
+    texto = " | ".join(detalhes)
+    assert not any(d.startswith(("SCAN atas", "SCAN ata_summary")) for d in detalhes), \
+        f"{nome}: varredura completa -> {texto}"
+    assert any(i in texto for i in indices), f"{nome}: índice esperado {indices} não usado -> {texto}"
+    if ordenada:
+        assert "USE TEMP B-TREE FOR ORDER BY" not in texto, f"{nome}: ORDER BY sem índice -> {texto}"
+    print(f"ok  {nome}: {texto}")
+
+
+def main():
+    conn = criar_banco()
+    inicio, fim = consultas_atas.intervalo_mes("2018-03")
+    assert (inicio, fim) == ("2018-03-01", "2018-04-01")
+    assert consultas_atas.intervalo_mes("2018-12") == ("2018-12-01", "2019-01-01")
+
+    # Listas: só ata_summary, pela chave primária (ala_id, data, ata_id)
+    verificar(conn, "atas do mês (index / listar_atas_mes)",
+              consultas_atas.SQL_ATAS_DO_PERIODO, (1, inicio, fim),
+              ["SEARCH ata_summary USING PRIMARY KEY"], ordenada=True)
+    verificar(conn, "primeira página de /atas",
+              consultas_atas.SQL_PAGINA_DE_ATAS.format(filtro=""), (1, 31),
+              ["SEARCH ata_summary USING PRIMARY KEY"], ordenada=True)
+    verificar(conn, "página seguinte de /atas (cursor)",
+              consultas_atas.SQL_PAGINA_DE_ATAS.format(filtro=consultas_atas.FILTRO_CURSOR),
+              (1, "2018-03-04", 500, 31), ["SEARCH ata_summary USING PRIMARY KEY"], ordenada=True)
+    assert consultas_atas.ler_cursor("2018-03-04_500") == ("2018-03-04", 500)
+    assert consultas_atas.ler_cursor("lixo") is None
+    verificar(conn, "contagem do mês",
+              consultas_atas.SQL_CONTAR_ATAS_DO_PERIODO, (1, inicio, fim),
+              ["SEARCH ata_summary USING PRIMARY KEY"])
+    verificar(conn, "temas recentes (/atas, formulário)",
+              "SELECT tema, data FROM ata_summary WHERE ala_id = ? AND data >= ? AND tipo = 'sacramental' "
+              "AND tema IS NOT NULL AND TRIM(tema) <> '' ORDER BY data DESC", (1, "2018-01-01"),
+              ["SEARCH ata_summary USING PRIMARY KEY"], ordenada=True)
+    verificar(conn, "contagem por tipo (configuracoes)",
+              "SELECT COUNT(*) FROM atas WHERE ala_id = ? AND tipo = 'sacramental'", (1,),
+              ["idx_atas_ala_tipo_data"])
+    verificar(conn, "hinos recentes",
+              "SELECT a2.id FROM atas a2 WHERE a2.ala_id = ? AND a2.tipo = 'sacramental' "
+              "AND a2.data >= ? ORDER BY a2.data DESC", (1, "2018-01-01"),
+              ["idx_atas_ala_tipo_data"], ordenada=True)
+
+    # As consultas de histórico de listas também precisam ser indexadas
+    detalhes = " | ".join(plano(conn, """
+        SELECT d.nome, a.data FROM ata_discursantes d JOIN atas a ON a.id = d.ata_id
+        WHERE d.nome = ?""", ("João",)))
+    assert "idx_ata_discursantes_nome" in detalhes, detalhes
+    print(f"ok  discursante por nome: {detalhes}")
+
+    detalhes = " | ".join(plano(conn, """
+        SELECT nome, last_date FROM speaker_history
+        WHERE ala_id = ? AND last_date >= ? ORDER BY last_date DESC LIMIT 20""", (1, "2018-01-01")))
+    assert "idx_speaker_history_recentes" in detalhes and "TEMP B-TREE" not in detalhes, detalhes
+    print(f"ok  discursantes recentes (speaker_history): {detalhes}")
+
+    # Catálogo e uso de hinos
+    detalhes = " | ".join(plano(conn, """
+        SELECT numero, titulo FROM hinos_catalogo
+        WHERE titulo_normalizado >= ? AND titulo_normalizado < ? ORDER BY titulo_normalizado LIMIT 10""",
+        ("tal", "tal\uffff")))
+    assert "idx_hinos_catalogo_titulo" in detalhes and "TEMP B-TREE" not in detalhes, detalhes
+    print(f"ok  autocomplete de hinos por título: {detalhes}")
+    detalhes = " | ".join(plano(conn, """
+        SELECT c.numero FROM hinos_catalogo c WHERE NOT EXISTS (
+            SELECT 1 FROM hinos_uso u WHERE u.ala_id = ? AND u.numero = c.numero AND u.data >= ?)""",
+        (1, "2018-01-01")))
+    assert "idx_hinos_uso_ala_numero" in detalhes, detalhes
+    print(f"ok  hinos não cantados: {detalhes}")
+    detalhes = " | ".join(plano(conn, """
+        SELECT numero, COUNT(*) FROM hinos_uso WHERE ala_id = ? AND data >= ? AND data < ?
+        GROUP BY COALESCE(numero, titulo_normalizado)""", (1, "2018-01-01", "2019-01-01")))
+    assert "idx_hinos_uso_ala_data" in detalhes or "idx_hinos_uso_ala_numero" in detalhes, detalhes
+    print(f"ok  hinos mais usados no ano: {detalhes}")
+    assert hinos._faixas_numericas("8")[:3] == [(8, 8), (80, 89), (800, 899)]
+
+    detalhes = " | ".join(plano(conn, "SELECT * FROM ala_stats WHERE ala_id = ? AND periodo IN ('', ?)",
+                                (1, "2018-03")))
+    assert "PRIMARY KEY" in detalhes, detalhes
+    print(f"ok  estatísticas da ala (configuracoes): {detalhes}")
+
+    detalhes = " | ".join(plano(conn, changelog.SQL_MUDANCAS, (1, 0, 1000, 501)))
+    assert "USING INTEGER PRIMARY KEY" in detalhes and "TEMP B-TREE" not in detalhes, detalhes
+    print(f"ok  mudanças desde um seq (/sync): {detalhes}")
+
+    # Sanidade: o mesmo filtro com strftime() força varredura
+    detalhes = plano(conn, "SELECT * FROM atas WHERE strftime('%Y-%m', data) = ?", ("2018-03",))
+    assert any(d.startswith("SCAN atas") for d in detalhes)
+    print("\nTodos os planos de consulta estão indexados.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# replica_kill.py
+# Mata (SIGKILL) um processo da aplicação no meio de uma sequência de
+# salvamentos e reconstrói o banco só a partir da réplica (functions/replica.py),
+# como se o disco do servidor tivesse sido perdido. Mede:
+#   - tempo de recuperação (restaurar-replica até o banco pronto);
+#   - janela de perda: quanto tempo de salvamentos confirmados ficou fora da réplica;
+#   - restauração até um instante no meio da execução.
+#
+# O processo filho grava atas pelo /ata/form e imprime "<id> <epoch>" depois
+# de cada resposta, ou seja, depois do commit.
+#
+# Uso: python test/replica_kill.py [segundos]
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+INTERVALO = 0.2            # REPLICA_INTERVALO_S do filho
+CHECKPOINT_PAGINAS = 200   # checkpoints frequentes para o WAL recomeçar várias vezes
+
+
+def filho(pasta):
+    os.environ["DATABASE_PATH"] = os.path.join(pasta, "atas.db")
+    os.environ["REPLICA_DIR"] = os.path.join(pasta, "replica")
+    os.environ["REPLICA_INTERVALO_S"] = str(INTERVALO)
+    os.environ["REPLICA_CHECKPOINT_PAGINAS"] = str(CHECKPOINT_PAGINAS)
+    os.chdir(BASE)
+    import app as app_module
+
+    app_module.limiter.enabled = False
+    app_module.init_db()
+    cliente = app_module.app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["logged_in"] = True
+        sessao["user_id"] = 1
+        sessao["username"] = "Criciuma1"
+    print("pronto", flush=True)
+    i = 0
+    while True:
+        resposta = cliente.post("/ata/form", data={
+            "tipo": "sacramental", "data": (date(2000, 1, 2) + timedelta(days=i)).isoformat(),
+            "tema": f"Tema {i}", "discursantes[]": ["João Silva", "Maria Santos"],
+            "anuncios[]": ["Reunião de jejum no próximo domingo"] * 3,
+        })
+        ata_id = int(resposta.headers["Location"].rsplit("/", 1)[1])
+        print(ata_id, time.time(), flush=True)
+        i += 1
+
+
+def principal(segundos):
+    from functions import replica
+
+    pasta = tempfile.mkdtemp()
+    processo = subprocess.Popen([sys.executable, os.path.abspath(__file__), "filho", pasta],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    confirmadas = []
+
+    def ler():
+        for linha in processo.stdout:
+            partes = linha.split()
+            if len(partes) == 2 and partes[0].isdigit():
+                confirmadas.append((int(partes[0]), float(partes[1])))
+
+    for linha in processo.stdout:  # mensagens das migrações antes do "pronto"
+        if linha.strip() == "pronto":
+            break
+    else:
+        sys.exit("FALHOU: o processo filho não iniciou")
+    leitor = threading.Thread(target=ler, daemon=True)
+    leitor.start()
+    time.sleep(segundos / 2)
+    meio = time.time()
+    time.sleep(segundos / 2)
+    processo.send_signal(signal.SIGKILL)
+    morte = time.time()
+    processo.wait()
+    leitor.join()
+
+    replica_dir = os.path.join(pasta, "replica")
+    ids_por_tempo = dict(confirmadas)
+    falhas = []
+
+    # Recuperação completa
+    destino = os.path.join(pasta, "restaurado.db")
+    feito = replica.restaurar(replica_dir, "atas", destino)
+    conn = sqlite3.connect(destino)
+    presentes = {row[0] for row in conn.execute("SELECT id FROM atas")}
+    conn.close()
+    perdidas = [i for i, _ in confirmadas if i not in presentes]
+    ultima_presente = max((t for i, t in confirmadas if i in presentes), default=None)
+    janela = (confirmadas[-1][1] - ultima_presente) if perdidas and ultima_presente else 0.0
+    if any(i not in ids_por_tempo for i in presentes):
+        falhas.append("a réplica tem atas que o filho não confirmou")
+    if perdidas and min(ids_por_tempo[i] for i in perdidas) < ultima_presente:
+        falhas.append("a réplica pulou atas (perda fora do fim da sequência)")
+
+    # Restauração até o meio da execução
+    destino_meio = os.path.join(pasta, "meio.db")
+    feito_meio = replica.restaurar(replica_dir, "atas", destino_meio, int(meio * 1000))
+    conn = sqlite3.connect(destino_meio)
+    no_meio = {row[0] for row in conn.execute("SELECT id FROM atas")}
+    conn.close()
+    depois = [i for i in no_meio if ids_por_tempo.get(i, 0) > meio + 0.05]
+    faltando = [i for i, t in confirmadas if t < meio - INTERVALO - 0.5 and i not in no_meio]
+    if depois:
+        falhas.append(f"restauração até o meio trouxe {len(depois)} ata(s) confirmadas depois do instante")
+    if faltando:
+        falhas.append(f"restauração até o meio perdeu {len(faltando)} ata(s) confirmadas bem antes do instante")
+
+    segmentos = sum(len(replica.segmentos(g)) for _, g in replica.geracoes(replica_dir, "atas"))
+    indices = {s[0] for _, g in replica.geracoes(replica_dir, "atas") for s in replica.segmentos(g)}
+    print(f"{len(confirmadas)} atas confirmadas em {segundos:.0f}s; processo morto {morte - confirmadas[-1][1]:.3f}s "
+          f"depois da última; réplica com {segmentos} trechos em {len(indices)} índice(s) do WAL")
+    print(f"recuperação: {feito['segundos']:.2f}s, {feito['segmentos']} trechos aplicados, {len(presentes)} atas")
+    print(f"perda: {len(perdidas)} ata(s) confirmadas fora da réplica, janela de {janela:.3f}s "
+          f"(intervalo de cópia {INTERVALO}s)")
+    print(f"até o meio: {len(no_meio)} atas, {feito_meio['segmentos']} trechos, "
+          f"último trecho {meio - feito_meio['ate'] / 1000:.3f}s antes do instante")
+    if janela > INTERVALO + 1:
+        falhas.append(f"janela de perda ({janela:.2f}s) maior que o intervalo de cópia + 1s")
+    for falha in falhas:
+        print("FALHOU:", falha)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "filho":
+        filho(sys.argv[2])
+    else:
+        principal(float(sys.argv[1]) if len(sys.argv) > 1 else 6)